@@ -2,7 +2,14 @@ import argparse
 import sys
 
 # all import must be absolute, because this is the entry script for pyinstaller
-from bitcoin_safe.logging_setup import setup_logging
+from bitcoin_safe.import_profiler import ImportTimeRecorder
+
+# the imports below happen before the arguments are parsed, so --profile is checked directly
+import_time_recorder = ImportTimeRecorder()
+if "--profile" in sys.argv:
+    import_time_recorder.install()
+
+from bitcoin_safe.logging_setup import setup_logging  # noqa: E402
 
 setup_logging()
 
@@ -19,13 +26,17 @@ from bitcoin_safe.gnome_darkmode import is_gnome_dark_mode, set_dark_palette  #
 from bitcoin_safe.gui.qt.main import MainWindow  # noqa: E402
 from bitcoin_safe.gui.qt.util import custom_exception_handler  # noqa: E402
 
+import_time_recorder.uninstall()
+
 
 def parse_args() -> argparse.Namespace:
     """Parse args."""
     parser = argparse.ArgumentParser(description="Bitcoin Safe")
     parser.add_argument("--network", help="Choose the network: bitcoin, regtest, testnet, signet ")
     parser.add_argument(
-        "--profile", action="store_true", help="Enable profiling. VIsualize with snakeviz .prof_stats"
+        "--profile",
+        action="store_true",
+        help="Enable profiling. VIsualize with snakeviz .prof_stats. Import times are written to import_times.txt in the config directory",
     )
     parser.add_argument(
         "open_files_at_startup",
@@ -69,6 +80,13 @@ if __name__ == "__main__":
         import os
         from pstats import Stats
 
+        from bitcoin_safe.logging_setup import get_config_dir
+
+        import_times_file = get_config_dir() / "import_times.txt"
+        with open(import_times_file, "w") as stream:
+            import_time_recorder.write_report(stream)
+        print(f"Import times written to {import_times_file}")
+
         with cProfile.Profile() as pr:
             main()
 
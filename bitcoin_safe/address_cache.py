@@ -0,0 +1,251 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import bdkpython as bdk
+
+from bitcoin_safe.storage import Encrypt, Journal, JournalError
+
+logger = logging.getLogger(__name__)
+
+
+class AddressCache:
+    """Persistent cache of the derived addresses of a multipath descriptor.
+
+    The addresses of each keychain are stored contiguously from index 0 in a journal
+    next to the wallet files, so that a wallet open only has to derive addresses beyond
+    the cached ones. New addresses are collected in memory and appended by flush().
+
+    The file name and the encryption key are derived from the descriptor. Anyone able to
+    decrypt the cache could therefore derive the addresses anyway.
+
+    Wallets are deleted by removing their file, which the cache cannot notice. Each load
+    therefore marks the cache as used, and prune() removes caches that were not used for
+    MAX_UNUSED_DAYS.
+    """
+
+    MAX_UNUSED_DAYS = 90
+
+    def __init__(self, directory: Path | str, descriptor: bdk.Descriptor) -> None:
+        """Initialize instance."""
+        descriptor_str = str(descriptor)
+        self.cache_id = hashlib.sha256(f"address_cache_id:{descriptor_str}".encode()).hexdigest()[:32]
+        # the descriptor has enough entropy, so a single key derivation iteration is enough
+        self.journal = Journal(
+            str(Path(directory) / self.cache_id),
+            password=hashlib.sha256(f"address_cache_key:{descriptor_str}".encode()).hexdigest(),
+            iterations=1,
+        )
+        self._addresses: tuple[list[str], list[str]] = ([], [])
+        self._flushed: list[int] = [0, 0]
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        """Load."""
+        if not self.journal.exists():
+            return
+        try:
+            records = self.journal.read(self.cache_id)
+        except (JournalError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Discarding the address cache {self.journal.filename}: {e}")
+            self.journal.remove()
+            return
+
+        for record in records:
+            addresses = self._addresses[int(record["is_change"])]
+            # records can only extend the list, otherwise the cache is inconsistent
+            if record["start"] != len(addresses):
+                logger.warning(f"Discarding the inconsistent address cache {self.journal.filename}")
+                self._addresses = ([], [])
+                self.journal.remove()
+                return
+            addresses += record["addresses"]
+        self._flushed = [len(addresses) for addresses in self._addresses]
+        logger.debug(f"Loaded {self._flushed} addresses from the address cache")
+        try:
+            os.utime(self.journal.filename)
+        except OSError as e:
+            logger.debug(f"Could not mark the address cache {self.journal.filename} as used: {e}")
+
+    @classmethod
+    def prune(cls, directory: Path | str, max_unused_days: float | None = None) -> list[Path]:
+        """Remove the caches that were not used for max_unused_days.
+
+        Returns the removed files.
+        """
+        directory = Path(directory)
+        if not directory.is_dir():
+            return []
+        max_unused_days = cls.MAX_UNUSED_DAYS if max_unused_days is None else max_unused_days
+        cutoff = time.time() - max_unused_days * 24 * 60 * 60
+        removed: list[Path] = []
+        for path in directory.iterdir():
+            try:
+                if path.is_file() and path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed.append(path)
+            except OSError as e:
+                logger.warning(f"Could not remove the address cache {path}: {e}")
+        if removed:
+            logger.info(f"Removed {len(removed)} unused address caches")
+        return removed
+
+    def __len__(self) -> int:
+        """Number of cached addresses."""
+        return sum(len(addresses) for addresses in self._addresses)
+
+    def get(self, index: int, is_change: bool) -> str | None:
+        """Get the cached address."""
+        addresses = self._addresses[int(is_change)]
+        return addresses[index] if index < len(addresses) else None
+
+    def add(self, index: int, is_change: bool, address: str) -> None:
+        """Add a derived address.
+
+        Only addresses that extend the cached range are kept.
+        """
+        with self._lock:
+            addresses = self._addresses[int(is_change)]
+            if index == len(addresses):
+                addresses.append(address)
+
+    def remove(self) -> None:
+        """Delete the cache file and forget the addresses."""
+        with self._lock:
+            self._addresses = ([], [])
+            self._flushed = [0, 0]
+            self.journal.remove()
+
+    def flush(self) -> None:
+        """Append the new addresses to the file."""
+        with self._lock:
+            records = [
+                {"is_change": is_change, "start": start, "addresses": addresses[start:]}
+                for is_change, (start, addresses) in enumerate(
+                    zip(self._flushed, self._addresses, strict=True)
+                )
+                if len(addresses) > start
+            ]
+            if not records:
+                return
+            try:
+                Path(self.journal.filename).parent.mkdir(parents=True, exist_ok=True)
+                self.journal.append(self.cache_id, records)
+            except (OSError, JournalError) as e:
+                logger.warning(f"Could not write the address cache {self.journal.filename}: {e}")
+                return
+            self._flushed = [len(addresses) for addresses in self._addresses]
+
+
+class AddressIndexStore:
+    """Encrypted files of the AddressIndex segments, stored next to the AddressCache.
+
+    Each segment covers a contiguous range of index rows and is stored in its own file
+    named after that range. Adding addresses therefore only writes the new segment, and
+    a merge replaces the files of the merged segments.
+
+    Like for the AddressCache, the file names and the encryption key are derived from
+    the descriptor, and the files are removed by AddressCache.prune once unused.
+    """
+
+    def __init__(self, directory: Path | str, descriptor: bdk.Descriptor) -> None:
+        """Initialize instance."""
+        descriptor_str = str(descriptor)
+        self.directory = Path(directory)
+        self.store_id = hashlib.sha256(f"address_index_id:{descriptor_str}".encode()).hexdigest()[:32]
+        self._password = hashlib.sha256(f"address_index_key:{descriptor_str}".encode()).hexdigest()
+        self._name_pattern = re.compile(rf"{self.store_id}\.(\d+)-(\d+)")
+
+    def _path(self, start: int, end: int) -> Path:
+        """Path of the segment file of the rows start..end."""
+        return self.directory / f"{self.store_id}.{start}-{end}"
+
+    def ranges(self) -> list[tuple[int, int]]:
+        """The row ranges of the stored segments."""
+        if not self.directory.is_dir():
+            return []
+        ranges: list[tuple[int, int]] = []
+        for path in self.directory.iterdir():
+            match = self._name_pattern.fullmatch(path.name)
+            if match:
+                ranges.append((int(match.group(1)), int(match.group(2))))
+        return sorted(ranges)
+
+    def read(self, start: int, end: int) -> bytes:
+        """Decrypt the segment file and mark it as used."""
+        path = self._path(start, end)
+        with open(path, "rb") as f:
+            data = b"".join(Encrypt().stream_decrypt(f, self._password))
+        try:
+            os.utime(path)
+        except OSError as e:
+            logger.debug(f"Could not mark the address index {path} as used: {e}")
+        return data
+
+    def write(self, start: int, end: int, data: bytes) -> None:
+        """Encrypt the segment into its file."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, prefix=f"{self.store_id}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                view = memoryview(data)
+                chunk_size = Encrypt.STREAM_SEGMENT_SIZE
+                # the descriptor has enough entropy, so a single key derivation iteration is enough
+                Encrypt().stream_encrypt(
+                    (view[i : i + chunk_size] for i in range(0, len(view), chunk_size)),
+                    f,
+                    self._password,
+                    iterations=1,
+                )
+            os.replace(tmp_name, self._path(start, end))
+        finally:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+
+    def delete(self, start: int, end: int) -> None:
+        """Delete the segment file."""
+        self._path(start, end).unlink(missing_ok=True)
+
+    def remove(self) -> None:
+        """Delete all segment files."""
+        for start, end in self.ranges():
+            try:
+                self.delete(start, end)
+            except OSError as e:
+                logger.warning(f"Could not remove the address index {self._path(start, end)}: {e}")
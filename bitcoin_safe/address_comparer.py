@@ -28,11 +28,18 @@
 
 from __future__ import annotations
 
+import io
 import logging
+import threading
+from collections.abc import Iterable
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 import numpy as np
 
+if TYPE_CHECKING:
+    from bitcoin_safe.address_cache import AddressIndexStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -177,6 +184,66 @@ class AddressComparer:
         logger.debug(f"Finished precompute_trigram_dicts of {len(addresses)} addresses")
         return precomputed
 
+    @classmethod
+    def extract_trigram_features(
+        cls,
+        addresses: list[str],
+        n_begin: int = 3,
+        m_end: int = 3,
+        weight_begin: float = 5.0,
+        weight_end: float = 5.0,
+        default_weight: float = 1.0,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vectorized version of build_trigram_dict for many addresses.
+
+        Returns the sparse feature matrix in coordinate form (rows, trigram_ids, weights),
+        grouped by row, with duplicate trigrams of an address summed up.
+        Row i belongs to addresses[i].
+
+        A trigram id packs the 3 unicode code points (21 bits each) into one int64,
+        so the "hash" is collision free.
+        """
+        row_parts: list[np.ndarray] = []
+        id_parts: list[np.ndarray] = []
+        weight_parts: list[np.ndarray] = []
+
+        # Addresses of the same stripped length can be processed as one 2D array of code points
+        # Example: ["ABCD", "ABCE"] -> [[65, 66, 67, 68], [65, 66, 67, 69]]
+        rows_by_length: dict[int, list[int]] = {}
+        stripped = [cls.strip_prefix(address) for address in addresses]
+        for row, s in enumerate(stripped):
+            if len(s) >= 3:
+                rows_by_length.setdefault(len(s), []).append(row)
+
+        for L, rows in rows_by_length.items():
+            codes = (
+                np.array([stripped[row] for row in rows], dtype=f"<U{L}")
+                .view(np.uint32)
+                .reshape(len(rows), L)
+                .astype(np.int64)
+            )
+            ids = (codes[:, :-2] << 42) | (codes[:, 1:-1] << 21) | codes[:, 2:]
+            weights = np.full(L - 2, default_weight, dtype=float)
+            if n_begin > 0:
+                weights[: min(n_begin, L - 2)] = weight_begin
+            if m_end > 0:
+                weights[-min(m_end, L - 2) :] = weight_end
+
+            # sort the trigrams of each address, such that duplicates are adjacent
+            order = np.argsort(ids, axis=1)
+            ids = np.take_along_axis(ids, order, axis=1)
+            # sum the weights of duplicate trigrams within an address
+            is_start = np.ones(ids.shape, dtype=bool)
+            is_start[:, 1:] = ids[:, 1:] != ids[:, :-1]
+            starts = np.flatnonzero(is_start)
+            row_parts.append(np.repeat(np.array(rows, dtype=np.int64), L - 2)[starts])
+            id_parts.append(ids.ravel()[starts])
+            weight_parts.append(np.add.reduceat(weights[order].ravel(), starts))
+
+        if not row_parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=float)
+        return np.concatenate(row_parts), np.concatenate(id_parts), np.concatenate(weight_parts)
+
     @classmethod
     def find_neighbors(
         cls,
@@ -189,61 +256,25 @@ class AddressComparer:
         candidate_threshold: float = 2.0,
     ) -> dict[str, list[tuple[str, float]]]:
         """For each address in the given set, finds neighboring addresses that share
-        similar trigrams, using an inverted index built from the precomputed trigram
-        dictionaries.
+        similar trigrams.
 
-        For each trigram in an address's precomputed dictionary, each candidate address that shares the trigram
+        For each trigram in an address, each candidate address that shares the trigram
         gets its candidate score incremented by min(weight_in_address, weight_in_candidate).
         Only candidates accumulating a total candidate score >= candidate_threshold are returned.
 
         Returns:
             A dictionary mapping each address to a list of tuples (neighbor_address, candidate_score).
         """
-        # Precompute the trigram dictionaries for all addresses.
-        # For each address, build a dictionary mapping trigrams (e.g., "ABC") to a cumulative weight.
-        # Example: For address "ABCDEF", after stripping, the trigrams might be:
-        #           "ABC": weight 5.0, "BCD": weight 1.0, "CDE": weight 1.0, "DEF": weight 5.0.
-        precomputed: dict[str, dict[str, float]] = cls.precompute_trigram_dicts(
-            addresses, n_begin, m_end, weight_begin, weight_end, default_weight
+        index = AddressIndex(
+            n_begin=n_begin,
+            m_end=m_end,
+            weight_begin=weight_begin,
+            weight_end=weight_end,
+            default_weight=default_weight,
+            candidate_threshold=candidate_threshold,
         )
-
-        # Build an inverted index that maps each trigram to the set of addresses containing that trigram.
-        # This allows us to quickly find candidates that share a given trigram.
-        # For example, if "ABC" appears in addresses "addr1" and "addr2", then
-        # inverted_index["ABC"] = { "addr1", "addr2" }.
-        inverted_index: dict[str, set[str]] = {}
-        for addr, tg_dict in precomputed.items():
-            for trigram in tg_dict.keys():
-                inverted_index.setdefault(trigram, set()).add(addr)
-
-        # Initialize a dictionary to hold neighbor candidate scores for each address.
-        # Here, "neighbors" will map an address to a list of (candidate_address, candidate_score) tuples.
-        neighbors: dict[str, list[tuple[str, float]]] = {}
-        for addr in addresses:
-            candidate_scores: dict[str, float] = {}
-            # Get the trigram dictionary for the current address.
-            # Example: For "addr1", tg_dict might be {"ABC": 5.0, "BCD": 1.0, "CDE": 1.0, "DEF": 5.0}.
-            tg_dict = precomputed[addr]
-            # Process each trigram of the current address.
-            for trigram, weight_a in tg_dict.items():
-                # Look up all addresses that also contain this trigram.
-                for candidate in inverted_index.get(trigram, set()):
-                    if candidate == addr:
-                        continue  # Skip comparing the address with itself.
-                    # Get the candidate's weight for the same trigram.
-                    # Example: For candidate "addr2", if the weight for "ABC" is 5.0 too, then:
-                    # min(weight_a, weight_candidate) = min(5.0, 5.0) = 5.0.
-                    weight_candidate = precomputed[candidate].get(trigram, 0.0)
-                    # Increment the candidate's score by the minimum weight (reflecting the shared feature strength).
-                    candidate_scores[candidate] = candidate_scores.get(candidate, 0.0) + min(
-                        weight_a, weight_candidate
-                    )
-            # After processing all trigrams for the current address,
-            # filter candidates that have a cumulative score above candidate_threshold.
-            # Example: Only if candidate_scores for a candidate is >= candidate_threshold, it is kept.
-            neighbors[addr] = [
-                (cand, score) for cand, score in candidate_scores.items() if score >= candidate_threshold
-            ]
+        index.add(addresses)
+        neighbors = index.neighbors(addresses)
         logger.debug(f"Finished find_neighbors of {len(addresses)} addresses")
         return neighbors
 
@@ -440,3 +471,320 @@ class AddressComparer:
         )
 
         return AddressComparer._list_poisonous_pairs(result_dict)
+
+
+@dataclass
+class _IndexSegment:
+    """Trigram postings of the indexed addresses in the rows start..end, sorted by
+    trigram id."""
+
+    ids: np.ndarray
+    rows: np.ndarray
+    weights: np.ndarray
+    start: int
+    end: int
+
+    @classmethod
+    def from_features(
+        cls, rows: np.ndarray, ids: np.ndarray, weights: np.ndarray, start: int, end: int
+    ) -> _IndexSegment:
+        """From features."""
+        order = np.argsort(ids)
+        return cls(ids=ids[order], rows=rows[order], weights=weights[order], start=start, end=end)
+
+    @classmethod
+    def merge(cls, a: _IndexSegment, b: _IndexSegment) -> _IndexSegment:
+        """Merge."""
+        return cls.from_features(
+            rows=np.concatenate([a.rows, b.rows]),
+            ids=np.concatenate([a.ids, b.ids]),
+            weights=np.concatenate([a.weights, b.weights]),
+            start=a.start,
+            end=b.end,
+        )
+
+    def dump(self, addresses: list[str], params: np.ndarray) -> bytes:
+        """Serializes the segment together with its addresses."""
+        f = io.BytesIO()
+        np.savez(
+            f,
+            params=params,
+            ids=self.ids,
+            rows=self.rows,
+            weights=self.weights,
+            addresses=np.frombuffer("\n".join(addresses).encode(), dtype=np.uint8),
+        )
+        return f.getvalue()
+
+    @classmethod
+    def from_dump(
+        cls, data: bytes, params: np.ndarray, start: int, end: int
+    ) -> tuple[list[str], _IndexSegment]:
+        """Returns the addresses and the segment.
+
+        Raises ValueError, if the segment was indexed with other parameters.
+        """
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            if not np.array_equal(arrays["params"], params):
+                raise ValueError("The segment was indexed with other parameters")
+            addresses = arrays["addresses"].tobytes().decode().split("\n")
+            if len(addresses) != end - start:
+                raise ValueError(f"The segment has {len(addresses)} addresses instead of {end - start}")
+            return addresses, cls(
+                ids=arrays["ids"], rows=arrays["rows"], weights=arrays["weights"], start=start, end=end
+            )
+
+
+class AddressIndex:
+    """Incrementally updatable trigram index for the address poisoning detection.
+
+    The indexed addresses form a sparse (address x trigram) weight matrix. Comparing
+    new addresses against the index is the sparse product of their feature matrix with
+    the indexed one, where each shared trigram contributes min(weight_a, weight_b).
+
+    Added addresses are stored in segments (like a log-structured merge tree), so that adding
+    addresses never rebuilds the whole index.
+
+    If a store is given, the segments are loaded from it on first use and every changed
+    segment is written to it, so a wallet open only indexes the addresses that are new
+    since the last run.
+    """
+
+    # limits the size of the intermediate arrays of a query
+    max_query_entries = 4_000_000
+
+    def __init__(
+        self,
+        n_begin: int = 3,
+        m_end: int = 3,
+        weight_begin: float = 5.0,
+        weight_end: float = 5.0,
+        default_weight: float = 1.0,
+        candidate_threshold: float = 2.0,
+        store: AddressIndexStore | None = None,
+    ) -> None:
+        """Initialize instance."""
+        self.n_begin = n_begin
+        self.m_end = m_end
+        self.weight_begin = weight_begin
+        self.weight_end = weight_end
+        self.default_weight = default_weight
+        self.candidate_threshold = candidate_threshold
+
+        self.addresses: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._segments: list[_IndexSegment] = []
+        self._lock = threading.Lock()
+        self.store = store
+        # the row ranges of the segments that are written to the store
+        self._stored: set[tuple[int, int]] = set()
+        self._loaded = store is None
+
+    def __len__(self) -> int:
+        """Return the number of indexed addresses."""
+        with self._lock:
+            self._load()
+            return len(self.addresses)
+
+    def __contains__(self, address: str) -> bool:
+        """Return True if the address is indexed."""
+        with self._lock:
+            self._load()
+            return address in self._rows
+
+    def _params(self) -> np.ndarray:
+        """The parameters, which the stored segments must match."""
+        return np.array([self.n_begin, self.m_end, self.weight_begin, self.weight_end, self.default_weight])
+
+    def _load(self) -> None:
+        """Loads the stored segments, that cover the rows contiguously from row 0.
+
+        Must be called with the lock held.
+        """
+        if self._loaded or not self.store:
+            return
+        self._loaded = True
+        try:
+            ends_by_start: dict[int, int] = {}
+            for start, end in self.store.ranges():
+                # after an interrupted merge, the merged segment covers the old ones
+                ends_by_start[start] = max(end, ends_by_start.get(start, end))
+            start = 0
+            while start in ends_by_start:
+                end = ends_by_start[start]
+                addresses, segment = _IndexSegment.from_dump(
+                    self.store.read(start, end), self._params(), start, end
+                )
+                for i, address in enumerate(addresses):
+                    self._rows[address] = start + i
+                self.addresses += addresses
+                self._segments.append(segment)
+                self._stored.add((start, end))
+                start = end
+            if len(self._rows) != len(self.addresses):
+                raise ValueError("The stored segments contain duplicate addresses")
+        except Exception as e:
+            logger.warning(f"Discarding the stored address index: {e}")
+            self.addresses = []
+            self._rows = {}
+            self._segments = []
+            self._stored = set()
+        self._save()
+        logger.debug(f"Loaded {len(self.addresses)} addresses from the address index store")
+
+    def _save(self) -> None:
+        """Writes the new segments to the store and deletes the replaced ones.
+
+        Must be called with the lock held.
+        """
+        if not self.store:
+            return
+        current = {(segment.start, segment.end) for segment in self._segments}
+        try:
+            for segment in self._segments:
+                if (segment.start, segment.end) not in self._stored:
+                    self.store.write(
+                        segment.start,
+                        segment.end,
+                        segment.dump(self.addresses[segment.start : segment.end], self._params()),
+                    )
+                    self._stored.add((segment.start, segment.end))
+            # also deletes files of segments, that were not loaded
+            for start, end in set(self.store.ranges()) - current:
+                self.store.delete(start, end)
+            self._stored &= current
+        except OSError as e:
+            logger.warning(f"Could not write the address index: {e}")
+
+    def remove_store(self) -> None:
+        """Delete the stored segments and keep the index in memory only."""
+        with self._lock:
+            if self.store:
+                self.store.remove()
+            self.store = None
+            self._stored = set()
+
+    def _features(self, addresses: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Features."""
+        return AddressComparer.extract_trigram_features(
+            addresses,
+            n_begin=self.n_begin,
+            m_end=self.m_end,
+            weight_begin=self.weight_begin,
+            weight_end=self.weight_end,
+            default_weight=self.default_weight,
+        )
+
+    def add(self, addresses: Iterable[str]) -> list[str]:
+        """Adds the addresses that are not indexed yet and returns them."""
+        with self._lock:
+            self._load()
+            new_addresses = list(dict.fromkeys(a for a in addresses if a not in self._rows))
+            if not new_addresses:
+                return []
+
+            offset = len(self.addresses)
+            for i, address in enumerate(new_addresses):
+                self._rows[address] = offset + i
+            self.addresses += new_addresses
+
+            rows, ids, weights = self._features(new_addresses)
+            self._segments.append(
+                _IndexSegment.from_features(
+                    rows=rows + offset, ids=ids, weights=weights, start=offset, end=len(self.addresses)
+                )
+            )
+            # keep the number of segments logarithmic in the number of indexed addresses
+            while len(self._segments) > 1 and len(self._segments[-2].ids) <= len(self._segments[-1].ids):
+                last = self._segments.pop()
+                self._segments[-1] = _IndexSegment.merge(self._segments[-1], last)
+            self._save()
+            return new_addresses
+
+    def neighbors(self, addresses: Iterable[str]) -> dict[str, list[tuple[str, float]]]:
+        """Finds for each address the indexed addresses (except itself) with a candidate
+        score >= candidate_threshold.
+
+        The addresses do not need to be indexed.
+        """
+        query = list(dict.fromkeys(addresses))
+        neighbors: dict[str, list[tuple[str, float]]] = {address: [] for address in query}
+        q_rows, q_ids, q_weights = self._features(query)
+        if not len(q_rows):
+            return neighbors
+
+        with self._lock:
+            self._load()
+            for segment in self._segments:
+                # for every query entry, the range of postings with the same trigram
+                left = np.searchsorted(segment.ids, q_ids, side="left")
+                counts = np.searchsorted(segment.ids, q_ids, side="right") - left
+
+                # split the query into chunks of whole addresses to bound the memory
+                row_starts = np.flatnonzero(np.r_[True, q_rows[1:] != q_rows[:-1]])
+                row_ends = np.r_[row_starts[1:], len(q_rows)]
+                cum_counts_at_row_end = np.cumsum(counts)[row_ends - 1]
+                start_row = 0
+                while start_row < len(row_starts):
+                    done = cum_counts_at_row_end[start_row - 1] if start_row else 0
+                    end_row = int(
+                        np.searchsorted(cum_counts_at_row_end, done + self.max_query_entries, side="right")
+                    )
+                    end_row = max(end_row, start_row + 1)
+                    chunk = slice(row_starts[start_row], row_ends[end_row - 1])
+                    self._add_neighbors(
+                        neighbors,
+                        query,
+                        segment,
+                        q_rows[chunk],
+                        q_weights[chunk],
+                        left[chunk],
+                        counts[chunk],
+                    )
+                    start_row = end_row
+        return neighbors
+
+    def _add_neighbors(
+        self,
+        neighbors: dict[str, list[tuple[str, float]]],
+        query: list[str],
+        segment: _IndexSegment,
+        q_rows: np.ndarray,
+        q_weights: np.ndarray,
+        left: np.ndarray,
+        counts: np.ndarray,
+    ) -> None:
+        """Scores the query entries against one segment."""
+        total = int(counts.sum())
+        if not total:
+            return
+        # positions of all matching postings, e.g. left=[3, 7], counts=[2, 1] -> [3, 4, 7]
+        offsets = np.cumsum(counts) - counts
+        positions = np.arange(total) - np.repeat(offsets - left, counts)
+
+        pair_keys = np.repeat(q_rows, counts) * len(self.addresses) + segment.rows[positions]
+        scores = np.minimum(np.repeat(q_weights, counts), segment.weights[positions])
+
+        unique_keys, inverse = np.unique(pair_keys, return_inverse=True)
+        pair_scores = np.bincount(inverse, weights=scores)
+        selected = pair_scores >= self.candidate_threshold
+        for key, score in zip(unique_keys[selected].tolist(), pair_scores[selected].tolist(), strict=True):
+            address = query[key // len(self.addresses)]
+            candidate = self.addresses[key % len(self.addresses)]
+            if candidate != address:
+                neighbors[address].append((candidate, score))
+
+    def compare(self, addresses: Iterable[str]) -> dict[tuple[str, str], FuzzyMatch]:
+        """Compares the addresses with their indexed neighbors (see
+        AddressComparer.compare_all)."""
+        results: dict[tuple[str, str], FuzzyMatch] = {}
+        for address, candidates in self.neighbors(addresses).items():
+            for candidate, _ in candidates:
+                ordered_pair: tuple[str, str] = tuple(sorted([address, candidate]))  # type: ignore
+                if ordered_pair not in results:
+                    results[ordered_pair] = AddressComparer.compare_address_info(*ordered_pair)
+        return results
+
+    def poisonous(self, addresses: Iterable[str]) -> list[tuple[str, str, FuzzyMatch]]:
+        """Returns the poisonous pairs of the addresses with the indexed addresses."""
+        return AddressComparer._list_poisonous_pairs(self.compare(addresses))
@@ -0,0 +1,323 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import enum
+import logging
+from dataclasses import dataclass
+from math import ceil
+
+import numpy as np
+
+from bitcoin_safe.psbt_util import estimate_tx_weight
+
+logger = logging.getLogger(__name__)
+
+
+class CoinSelectionAlgorithm(enum.Enum):
+    bdk = "bdk"  # let bdk choose the coins
+    branch_and_bound = "branch_and_bound"
+    knapsack = "knapsack"
+    largest_first = "largest_first"
+    min_waste = "min_waste"  # the result of the other algorithms with the lowest waste
+
+
+@dataclass
+class CoinSelectionParams:
+    """The fee parameters of a coin selection.
+
+    All sizes are in vB and all fee rates in sat/vB.
+    """
+
+    target: int  # sum of the recipient amounts
+    fee_rate: float
+    long_term_fee_rate: float = 10.0
+    base_vsize: float = 11 + 31
+    input_vsize: float = 68
+    change_output_vsize: float = 31
+    dust_limit: int = 546
+    bnb_max_tries: int = 100_000
+    knapsack_iterations: int = 1000
+
+    @classmethod
+    def from_mn_tuple(
+        cls, target: int, fee_rate: float, mn_tuple: tuple[int, int], num_outputs: int, **kwargs
+    ) -> CoinSelectionParams:
+        """Estimates the sizes for inputs of a m-of-n wallet."""
+        empty_weight = estimate_tx_weight([], 0)
+        return cls(
+            target=target,
+            fee_rate=fee_rate,
+            base_vsize=estimate_tx_weight([], num_outputs) / 4,
+            input_vsize=(estimate_tx_weight([mn_tuple], 0) - empty_weight) / 4,
+            change_output_vsize=(estimate_tx_weight([], 1) - empty_weight) / 4,
+            **kwargs,
+        )
+
+    @property
+    def input_fee(self) -> int:
+        """The fee for spending one coin now."""
+        return ceil(self.fee_rate * self.input_vsize)
+
+    @property
+    def long_term_input_fee(self) -> int:
+        """The fee for spending one coin later."""
+        return ceil(self.long_term_fee_rate * self.input_vsize)
+
+    @property
+    def selection_target(self) -> int:
+        """The effective value that the inputs must cover without a change output."""
+        return self.target + ceil(self.fee_rate * self.base_vsize)
+
+    @property
+    def change_fee(self) -> int:
+        """Change fee."""
+        return ceil(self.fee_rate * self.change_output_vsize)
+
+    @property
+    def cost_of_change(self) -> int:
+        """The fee for creating the change output now and spending it later."""
+        return self.change_fee + self.long_term_input_fee
+
+    @property
+    def target_with_change(self) -> int:
+        """The effective value that the inputs must cover to create a change output."""
+        return self.selection_target + self.change_fee + self.dust_limit
+
+    def waste(self, num_inputs: int, selected_effective_value: int) -> tuple[int, bool]:
+        """Returns the waste metric of a selection and if it creates a change output.
+
+        The waste is the extra fee of spending the inputs now instead of at the long term fee rate,
+        plus either the cost of the change output or the excess that goes to the miners.
+        """
+        excess = selected_effective_value - self.selection_target
+        has_change = excess - self.change_fee >= self.dust_limit
+        input_waste = num_inputs * (self.input_fee - self.long_term_input_fee)
+        return input_waste + (self.cost_of_change if has_change else excess), has_change
+
+
+@dataclass
+class CoinSelectionResult:
+    indices: np.ndarray  # indices into the values passed to select_coins
+    algorithm: CoinSelectionAlgorithm
+    effective_value: int  # sum of the values minus the input fees
+    waste: int
+    has_change: bool
+
+
+def _branch_and_bound(effective_values: np.ndarray, params: CoinSelectionParams) -> np.ndarray | None:
+    """Depth first search for a selection without change output, that minimizes the
+    waste.
+
+    effective_values must be sorted in descending order. This follows the
+    Branch-and-Bound algorithm of Bitcoin Core.
+    """
+    values: list[int] = effective_values.tolist()
+    target = params.selection_target
+    # above this bdk would add a change output
+    upper_bound = target + min(params.cost_of_change, params.change_fee + params.dust_limit - 1)
+    input_waste = params.input_fee - params.long_term_input_fee
+    is_fee_rate_high = params.fee_rate > params.long_term_fee_rate
+
+    available = sum(values)
+    if available < target:
+        return None
+
+    current_value = 0
+    current_waste = 0
+    selection: list[int] = []
+    best_selection: list[int] | None = None
+    best_waste = float("inf")
+
+    index = 0
+    for _ in range(params.bnb_max_tries):
+        backtrack = False
+        if (
+            current_value + available < target
+            or current_value > upper_bound
+            or (current_waste > best_waste and is_fee_rate_high)
+        ):
+            backtrack = True
+        elif current_value >= target:
+            if current_waste + current_value - target <= best_waste:
+                best_selection = selection.copy()
+                best_waste = current_waste + current_value - target
+            backtrack = True
+
+        if backtrack:
+            if not selection:
+                break
+            # the excluded coins after the last included coin become available again
+            index -= 1
+            while index > selection[-1]:
+                available += values[index]
+                index -= 1
+            # now explore the branch that excludes the last included coin
+            current_value -= values[index]
+            current_waste -= input_waste
+            selection.pop()
+        else:
+            available -= values[index]
+            # skip the inclusion branch if the previous coin has the same value and was excluded
+            if not selection or index - 1 == selection[-1] or values[index] != values[index - 1]:
+                selection.append(index)
+                current_value += values[index]
+                current_waste += input_waste
+        index += 1
+
+    return np.array(best_selection, dtype=np.int64) if best_selection is not None else None
+
+
+def _largest_first(effective_values: np.ndarray, params: CoinSelectionParams) -> np.ndarray | None:
+    """Takes the largest coins until the target is reached.
+
+    effective_values must be sorted in descending order.
+    """
+    cumulative = np.cumsum(effective_values)
+    if not len(cumulative) or cumulative[-1] < params.selection_target:
+        return None
+    count = int(np.searchsorted(cumulative, params.target_with_change, side="left")) + 1
+    return np.arange(min(count, len(effective_values)), dtype=np.int64)
+
+
+def _knapsack(
+    effective_values: np.ndarray, params: CoinSelectionParams, rng: np.random.Generator
+) -> np.ndarray | None:
+    """Randomized approximation of the smallest subset above the target (similar to
+    the knapsack solver of Bitcoin Core).
+
+    effective_values must be sorted in descending order.
+    """
+    target = params.target_with_change
+    if not len(effective_values) or effective_values.sum() < params.selection_target:
+        return None
+
+    exact = np.flatnonzero(effective_values == target)
+    if len(exact):
+        return exact[:1]
+
+    # coins >= target are only considered alone; the smallest of them is a fallback
+    n_larger = int(np.searchsorted(-effective_values, -target, side="right"))
+    lowest_larger = n_larger - 1 if n_larger else None
+    smaller = effective_values[n_larger:]
+    smaller_total = int(smaller.sum())
+    if smaller_total < target:
+        if lowest_larger is not None:
+            return np.array([lowest_larger], dtype=np.int64)
+        # only possible without a change output
+        return np.arange(len(effective_values), dtype=np.int64)
+    if smaller_total == target:
+        return np.arange(n_larger, len(effective_values), dtype=np.int64)
+
+    # Coins after the prefix that holds twice the target are rarely reached by the random passes.
+    # Since the prefix alone covers the target, the iterations can be restricted to it.
+    smaller = smaller[: int(np.searchsorted(np.cumsum(smaller), 2 * target, side="left")) + 1]
+    smaller_total = int(smaller.sum())
+    positions = np.arange(len(smaller))
+    best_mask = np.ones(len(smaller), dtype=bool)
+    best_total = smaller_total
+    for _ in range(params.knapsack_iterations):
+        # first pass: each coin with probability 1/2, second pass: the remaining coins
+        include = rng.random(len(smaller)) < 0.5
+        first_pass = np.cumsum(np.where(include, smaller, 0))
+        if first_pass[-1] >= target:
+            last = int(np.searchsorted(first_pass, target, side="left"))
+            mask = include & (positions <= last)
+            total = int(first_pass[last])
+        else:
+            second_pass = first_pass[-1] + np.cumsum(np.where(include, 0, smaller))
+            last = int(np.searchsorted(second_pass, target, side="left"))
+            mask = include | (positions <= last)
+            total = int(second_pass[last])
+        if total < best_total or (total == best_total and mask.sum() < best_mask.sum()):
+            best_mask, best_total = mask, total
+            if total == target:
+                break
+
+    if lowest_larger is not None and effective_values[lowest_larger] <= best_total:
+        return np.array([lowest_larger], dtype=np.int64)
+    return n_larger + np.flatnonzero(best_mask)
+
+
+def select_coins(
+    values: np.ndarray,
+    params: CoinSelectionParams,
+    algorithm: CoinSelectionAlgorithm = CoinSelectionAlgorithm.min_waste,
+    rng: np.random.Generator | None = None,
+) -> CoinSelectionResult | None:
+    """Selects coins (given by their values in sat) for the params.target.
+
+    Returns None if the coins are insufficient.
+    """
+    if algorithm == CoinSelectionAlgorithm.bdk:
+        raise ValueError("The bdk coin selection runs inside bdk")
+    rng = rng if rng else np.random.default_rng()
+
+    # only coins that are worth more than the fee for spending them
+    effective_values = np.asarray(values, dtype=np.int64) - params.input_fee
+    candidates = np.flatnonzero(effective_values > 0)
+    order = candidates[np.argsort(-effective_values[candidates], kind="stable")]
+    sorted_values = effective_values[order]
+
+    algorithms = (
+        [
+            CoinSelectionAlgorithm.branch_and_bound,
+            CoinSelectionAlgorithm.knapsack,
+            CoinSelectionAlgorithm.largest_first,
+        ]
+        if algorithm == CoinSelectionAlgorithm.min_waste
+        else [algorithm]
+    )
+    best: CoinSelectionResult | None = None
+    for _algorithm in algorithms:
+        if _algorithm == CoinSelectionAlgorithm.branch_and_bound:
+            selection = _branch_and_bound(sorted_values, params)
+        elif _algorithm == CoinSelectionAlgorithm.knapsack:
+            selection = _knapsack(sorted_values, params, rng=rng)
+        else:
+            selection = _largest_first(sorted_values, params)
+        if selection is None:
+            continue
+
+        effective_value = int(sorted_values[selection].sum())
+        waste, has_change = params.waste(len(selection), effective_value)
+        if best is None or (waste, len(selection)) < (best.waste, len(best.indices)):
+            best = CoinSelectionResult(
+                indices=order[selection],
+                algorithm=_algorithm,
+                effective_value=effective_value,
+                waste=waste,
+                has_change=has_change,
+            )
+
+    logger.debug(
+        f"Coin selection {algorithm.name} of {len(values)} coins: "
+        f"{(best.algorithm.name, len(best.indices), best.waste) if best else None}"
+    )
+    return best
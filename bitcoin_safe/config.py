@@ -96,6 +96,10 @@ class UserConfig(BaseSaveableClass):
         self.currency: str = "USD"
         self.rates: dict[str, dict[str, Any]] = {}
         self.last_tab_title: list[str] = []
+        # store the bdk changeset of wallets in an append-only journal next to the wallet file
+        self.wallet_journal_mode = False
+        # value of ChangeSetEncoding, used when a wallet is saved
+        self.wallet_change_set_encoding = "json"
 
     def clean_recently_open_wallet(self):
         """Clean recently open wallet."""
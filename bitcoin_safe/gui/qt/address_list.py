@@ -83,7 +83,7 @@ from bitcoin_safe.gui.qt.category_manager.category_manager import AddressDragInf
 from bitcoin_safe.gui.qt.category_manager.category_menu import CategoryComboBox
 from bitcoin_safe.gui.qt.util import svg_tools
 from bitcoin_safe.gui.qt.wrappers import Menu
-from bitcoin_safe.pythonbdk_types import Balance
+from bitcoin_safe.pythonbdk_types import AddressInfoMin, Balance
 from bitcoin_safe.storage import BaseSaveableClass, filtered_for_init
 
 from ...config import UserConfig
@@ -100,9 +100,9 @@ from ...signals import (
 from ...wallet import TxStatus, Wallet
 from .my_treeview import (
     DropRule,
+    LazyTableModel,
     MyItemDataRole,
     MySortModel,
-    MyStandardItemModel,
     MyTreeView,
     TreeViewWithToolbar,
     header_item,
@@ -370,10 +370,21 @@ class AddressList(MyTreeView[str]):
         self.current_change_filter = AddressTypeFilter.ALL
         self.current_used_filter = AddressUsageStateFilter.ALL
         self.current_category_filter: str | None = None
-        self._source_model = MyStandardItemModel(
+        # wallet and derivation info of every listed address
+        self._address_infos: dict[str, tuple[Wallet, AddressInfoMin | None]] = {}
+        # number of listed addresses of each (wallet id, keychain), to find revealed addresses
+        self._listed_counts: dict[tuple[str, bdk.KeychainKind], int] = {}
+        # wallets can reveal a very large number of addresses, so the rows
+        # are only built when they are painted (or otherwise needed)
+        self._lazy_model = LazyTableModel(
             key_column=self.key_column,
+            column_count=len(self.Columns),
+            row_factory=self._build_row,
+            quick_data=self._quick_data,
+            editable_columns=self.editable_columns,
             parent=self,
         )
+        self._source_model = self._lazy_model  # type: ignore[assignment]
         self.proxy = MySortModel(
             key_column=self.key_column,
             Columns=self.Columns,
@@ -403,7 +414,9 @@ class AddressList(MyTreeView[str]):
             wallet_signals = self.wallet_functions.wallet_signals.get(wallet_id)
             if not wallet_signals:
                 continue
-            self._signal_tracker_wallet_signals.connect(wallet_signals.updated, self.update_with_filter)
+            self._signal_tracker_wallet_signals.connect(
+                wallet_signals.updated_coalesced, self.update_with_filter
+            )
 
     def set_wallets(self, wallets: list[Wallet] | None):
         """Set wallets."""
@@ -465,13 +478,13 @@ class AddressList(MyTreeView[str]):
 
     def get_wallet(self, row: int) -> None | Wallet:
         """Get wallet."""
-        item = self._source_model.item(row, self.Columns.WALLET_ID)
-        if not item:
-            return None
-        wallet_id = item.data(role=MyItemDataRole.ROLE_CLIPBOARD_DATA)
-        if not wallet_id:
+        return self._get_wallet_of_address(self._lazy_model.key_at(row))
+
+    def _get_wallet_of_address(self, address: str | None) -> None | Wallet:
+        """Get wallet of address."""
+        if address is None or not (address_info := self._address_infos.get(address)):
             return None
-        return self.wallets.get(wallet_id)
+        return address_info[0]
 
     def on_double_click(self, source_idx: QModelIndex) -> None:
         """On double click."""
@@ -547,14 +560,15 @@ class AddressList(MyTreeView[str]):
         hidden_rows_used = set()
         hidden_rows_category = set()
 
-        for row in range(self._source_model.rowCount()):
-            address = self._source_model.data(self._source_model.index(row, self.Columns.ADDRESS))
-            if not (wallet := self.get_wallet(row)):
+        for row, address in enumerate(self._lazy_model.keys()):
+            if not (address_info := self._address_infos.get(address)):
                 continue
+            wallet, address_info_min = address_info
 
-            if self.current_change_filter == AddressTypeFilter.RECEIVING and not wallet.is_receive(address):
+            is_change = address_info_min.is_change() if address_info_min else wallet.is_change(address)
+            if self.current_change_filter == AddressTypeFilter.RECEIVING and is_change:
                 hidden_rows_type.add(row)
-            elif self.current_change_filter == AddressTypeFilter.CHANGE and not wallet.is_change(address):
+            elif self.current_change_filter == AddressTypeFilter.CHANGE and not is_change:
                 hidden_rows_type.add(row)
 
             balance = wallet.get_addr_balance(address).total
@@ -583,16 +597,11 @@ class AddressList(MyTreeView[str]):
 
     def on_update_fx_rates(self):
         """On update fx rates."""
-        addresses_with_balance = []
-
-        model = self._source_model
-        for row in range(model.rowCount()):
-            address = model.data(model.index(row, self.Columns.ADDRESS))
-            balance = model.data(
-                model.index(row, self.Columns.COIN_BALANCE), role=MyItemDataRole.ROLE_CLIPBOARD_DATA
-            )
-            if balance:
-                addresses_with_balance.append(address)
+        addresses_with_balance = [
+            address
+            for address, (wallet, _) in self._address_infos.items()
+            if wallet.get_addr_balance(address).total
+        ]
 
         update_filter = UpdateFilter(addresses=addresses_with_balance, reason=UpdateFilterReason.NewFxRates)
         self.update_with_filter(update_filter)
@@ -600,6 +609,8 @@ class AddressList(MyTreeView[str]):
     @time_logger
     def update_with_filter(self, update_filter: UpdateFilter) -> None:
         """Update with filter."""
+        if update_filter.is_transaction_delta():
+            return self.update_transaction_delta(update_filter)
         if update_filter.refresh_all:
             return self.update_content()
         logger.debug(f"{self.__class__.__name__}  update_with_filter")
@@ -607,26 +618,25 @@ class AddressList(MyTreeView[str]):
         self._before_update_content()
         remaining_addresses = set(update_filter.addresses)
 
-        model = self._source_model
+        if update_filter.reason == UpdateFilterReason.ChainHeightAdvanced:
+            # only the rows that were built can show an outdated status icon
+            self._lazy_model.invalidate()
+
         log_info = []
+        refreshed_addresses = []
         # Select rows with an ID in id_list
-        for row in range(model.rowCount()):
-            address = model.data(model.index(row, self.Columns.ADDRESS))
+        for row, address in enumerate(self._lazy_model.keys()):
             address_match = address in update_filter.addresses
-            category_match = model.data(model.index(row, self.Columns.CATEGORY)) in update_filter.categories
-            if (
-                (
-                    update_filter.reason == UpdateFilterReason.ChainHeightAdvanced
-                    and model.data(
-                        model.index(row, self.key_column), role=MyItemDataRole.ROLE_FREQUENT_UPDATEFLAG
-                    )
-                )
-                or address_match
-                or (not update_filter.addresses and category_match or len(update_filter.categories) > 1)
+            category_match = False
+            if update_filter.categories and (wallet := self._get_wallet_of_address(address)):
+                category_match = wallet.labels.get_category(address) in update_filter.categories
+            if address_match or (
+                not update_filter.addresses and category_match or len(update_filter.categories) > 1
             ):
                 log_info.append((row, str(address)[:6]))  # no sensitive info in log
-                self.refresh_row(address, row)
+                refreshed_addresses.append(address)
                 remaining_addresses = remaining_addresses - set([address])
+        self._lazy_model.invalidate(refreshed_addresses)
 
         # get_maximum_index
         # address_infos_min = max([wallet.get_address_info_min( address) for address in remaining_addresses ])
@@ -644,6 +654,65 @@ class AddressList(MyTreeView[str]):
         logger.debug(f"Updated addresses  {log_info}.  {len(remaining_addresses)=}")
         self._after_update_content()
 
+    @time_logger
+    def update_transaction_delta(self, update_filter: UpdateFilter) -> None:
+        """Apply a transaction delta (see UpdateFilter.is_transaction_delta) row by row.
+
+        Only the rows of the involved addresses are refreshed, and addresses that
+        were revealed since the last update are appended.
+        """
+        if self._pending_update or not self._source_model.rowCount():
+            return self.update_content()
+        if self.maybe_defer_update():
+            return
+
+        model = self._source_model
+        # addresses are only revealed at the end of a keychain
+        new_addresses: list[tuple[Wallet, str]] = []
+        for wallet in self.wallets.values():
+            for keychain, addresses in (
+                (bdk.KeychainKind.EXTERNAL, wallet.get_receiving_addresses()),
+                (bdk.KeychainKind.INTERNAL, wallet.get_change_addresses()),
+            ):
+                listed_count = self._listed_counts.get((wallet.id, keychain), 0)
+                new_addresses += [
+                    (wallet, address)
+                    for address in addresses[listed_count:]
+                    if address not in self._address_infos
+                ]
+        if len(new_addresses) + len(update_filter.addresses) > self.max_incremental_row_changes:
+            return self.update_content()
+        logger.debug(
+            f"{self.__class__.__name__} update_transaction_delta "
+            f"{len(new_addresses)=} {len(update_filter.addresses)=}"
+        )
+
+        with self._incremental_update() as touched_rows:
+            for address in update_filter.addresses:
+                for row in model.rows_of_key(address):
+                    self.refresh_row(address, row)
+                    touched_rows.add(row)
+
+            for wallet, address in new_addresses:
+                self.append_address(wallet=wallet, address=address)
+                touched_rows.add(model.rowCount() - 1)
+            for wallet in self.wallets.values():
+                self._listed_counts[(wallet.id, bdk.KeychainKind.EXTERNAL)] = len(
+                    wallet.get_receiving_addresses()
+                )
+                self._listed_counts[(wallet.id, bdk.KeychainKind.INTERNAL)] = len(
+                    wallet.get_change_addresses()
+                )
+
+            if (
+                self.current_change_filter != AddressTypeFilter.ALL
+                or self.current_used_filter != AddressUsageStateFilter.ALL
+                or self.current_category_filter is not None
+            ):
+                # balances and usage changed, so the type/usage/category filters must be re-evaluated
+                self.update_base_hidden_rows()
+                touched_rows.update(range(model.rowCount()))
+
     def get_headers(self) -> dict[MyTreeView.BaseColumnsEnum, QStandardItem]:
         """Get headers."""
         currency_symbol = self.fx.get_currency_symbol()
@@ -666,11 +735,25 @@ class AddressList(MyTreeView[str]):
         logger.debug(f"{self.__class__.__name__} update")
         self._before_update_content()
 
-        self._source_model.clear()
+        self._lazy_model.clear()
+        self._address_infos.clear()
+        self._listed_counts.clear()
         self.update_headers(self.get_headers())
         for wallet in self.wallets.values():
-            for address in wallet.get_addresses():
-                self.append_address(wallet, address)
+            # same order as wallet.get_addresses(), without the linear
+            # searches of wallet.get_address_info_min
+            for keychain, addresses in (
+                (bdk.KeychainKind.EXTERNAL, wallet.get_receiving_addresses()),
+                (bdk.KeychainKind.INTERNAL, wallet.get_change_addresses()),
+            ):
+                self._listed_counts[(wallet.id, keychain)] = len(addresses)
+                for index, address in enumerate(addresses):
+                    if address not in self._address_infos:
+                        self._address_infos[address] = (
+                            wallet,
+                            AddressInfoMin(address=address, index=index, keychain=keychain),
+                        )
+        self._lazy_model.set_keys(self._address_infos.keys())
 
         self.update_base_hidden_rows()
         self._after_update_content()
@@ -678,35 +761,125 @@ class AddressList(MyTreeView[str]):
 
     def append_address(self, wallet: Wallet, address: str) -> None:
         """Append address."""
+        self._address_infos[address] = (wallet, wallet.get_address_info_min(address))
+        self._lazy_model.append_keys([address])
+
+    @staticmethod
+    def _sort_tuple(address_info_min: AddressInfoMin) -> tuple[int, int]:
+        """Sort tuple."""
+        return (address_info_min.address_path()[0], -address_info_min.address_path()[1])
+
+    def any_needs_frequent_flag(self) -> bool:
+        """Any needs frequent flag, without building the rows."""
+        return any(
+            self._quick_data(address, self.key_column, MyItemDataRole.ROLE_FREQUENT_UPDATEFLAG)
+            for address in self._lazy_model.keys()
+        )
+
+    def _type_text(self, address_info_min: AddressInfoMin) -> str:
+        """Type text."""
+        return self.tr("change") if address_info_min.is_change() else self.tr("receiving")
+
+    def _fiat_balance_str(self, fiat_value: float | None) -> str:
+        """Fiat balance str."""
+        if fiat_value is None:
+            return ""
+        return self.fx.fiat_to_str(fiat_value, use_currency_symbol=False)
+
+    @staticmethod
+    def _tx_summary(wallet: Wallet, address: str) -> tuple[int, TxStatus | None]:
+        """Number of transactions and the least advanced status of them."""
+        txids = wallet.get_involved_txids(address)
+        fulltxdetails = [wallet.get_dict_fulltxdetail().get(txid) for txid in txids]
+        txs_involed = [fulltxdetail.tx for fulltxdetail in fulltxdetails if fulltxdetail]
+
+        statuses = [TxStatus.from_wallet(tx.txid, wallet) for tx in txs_involed]
+        min_status = sorted(statuses, key=lambda status: status.sort_id())[0] if statuses else None
+        return len(txs_involed), min_status
+
+    def _quick_data(self, address: str, column: int, role: int) -> Any:
+        """Answer the roles used for sorting, filtering and selecting without building the row.
+
+        Must agree with the items of _build_row.
+        """
+        if not (address_info := self._address_infos.get(address)):
+            return LazyTableModel.MISSING
+        wallet, address_info_min = address_info
+
+        if role == MyItemDataRole.ROLE_FILTER_DATA:
+            return None
+        if role == MyItemDataRole.ROLE_FREQUENT_UPDATEFLAG and column == self.key_column:
+            return needs_frequent_flag(status=self._tx_summary(wallet, address)[1])
+        if role == MyItemDataRole.ROLE_CLIPBOARD_DATA:
+            if column == self.Columns.ADDRESS:
+                return address
+            if column == self.Columns.WALLET_ID:
+                return wallet.id if address_info_min else None
+            return LazyTableModel.MISSING
+        if role == MyItemDataRole.ROLE_SORT_ORDER:
+            if column in (self.Columns.TYPE, self.Columns.INDEX):
+                return self._sort_tuple(address_info_min) if address_info_min else None
+            if column == self.Columns.COIN_BALANCE:
+                return wallet.get_addr_balance(address).total
+            if column == self.Columns.FIAT_BALANCE:
+                return self.fx.btc_to_fiat(wallet.get_addr_balance(address).total)
+            if column == self.Columns.NUM_TXS:
+                _, min_status = self._tx_summary(wallet, address)
+                return min_status.sort_id() if min_status else -1
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.Columns.ADDRESS:
+                return address
+            if column == self.Columns.WALLET_ID:
+                return wallet.id if address_info_min else ""
+            if column == self.Columns.INDEX:
+                return str(address_info_min.index) if address_info_min else ""
+            if column == self.Columns.TYPE:
+                return self._type_text(address_info_min) if address_info_min else ""
+            if column == self.Columns.CATEGORY:
+                return wallet.labels.get_category(address) or ""
+            if column == self.Columns.LABEL:
+                return wallet.get_label_for_address(address)
+            if column == self.Columns.COIN_BALANCE:
+                return str(Satoshis(wallet.get_addr_balance(address).total, wallet.network))
+            if column == self.Columns.FIAT_BALANCE:
+                return self._fiat_balance_str(self.fx.btc_to_fiat(wallet.get_addr_balance(address).total))
+            if column == self.Columns.NUM_TXS:
+                return ""
+        return LazyTableModel.MISSING
+
+    def _build_row(self, address: str) -> list[QStandardItem]:
+        """Build the items of the row of address (called by the lazy model)."""
         labels = [""] * len(self.Columns)
         labels[self.Columns.ADDRESS] = address
         item = [QStandardItem(e) for e in labels]
         item[self.Columns.ADDRESS].setData(address, MyItemDataRole.ROLE_CLIPBOARD_DATA)
+        item[self.key_column].setData(address, MyItemDataRole.ROLE_KEY)
         # align text and set fonts
         # for i, item in enumerate(item):
         #     item.setTextAlignment(Qt.AlignmentFlag.AlignVCenter)
         #     if i in (self.Columns.ADDRESS,):
         #         item.setFont(QFont(MONOSPACE_FONT))
         self.set_editability(item)
-        # setup column 0
+        if not (address_info := self._address_infos.get(address)):
+            return item
+        wallet, address_info_min = address_info
 
-        address_info_min = wallet.get_address_info_min(address)
         if address_info_min:
-            sort_tuple = (address_info_min.address_path()[0], -address_info_min.address_path()[1])
+            sort_tuple = self._sort_tuple(address_info_min)
+            type_text = self._type_text(address_info_min)
             item[self.Columns.WALLET_ID].setText(wallet.id)
             item[self.Columns.WALLET_ID].setData(wallet.id, MyItemDataRole.ROLE_CLIPBOARD_DATA)
             item[self.Columns.INDEX].setText(str(address_info_min.index))
             item[self.Columns.INDEX].setData(address_info_min.index, MyItemDataRole.ROLE_CLIPBOARD_DATA)
             item[self.Columns.INDEX].setData(sort_tuple, MyItemDataRole.ROLE_SORT_ORDER)
-            if address_info_min.is_change():
-                item[self.Columns.TYPE].setText(self.tr("change"))
-                item[self.Columns.TYPE].setData(self.tr("change"), MyItemDataRole.ROLE_CLIPBOARD_DATA)
-                item[self.Columns.TYPE].setBackground(ColorScheme.YELLOW.as_color(True))
-            else:
-                item[self.Columns.TYPE].setText(self.tr("receiving"))
-                item[self.Columns.TYPE].setData(self.tr("receiving"), MyItemDataRole.ROLE_CLIPBOARD_DATA)
-                item[self.Columns.TYPE].setBackground(ColorScheme.GREEN.as_color(True))
-            item[self.key_column].setData(address, MyItemDataRole.ROLE_KEY)
+            item[self.Columns.TYPE].setText(type_text)
+            item[self.Columns.TYPE].setData(type_text, MyItemDataRole.ROLE_CLIPBOARD_DATA)
+            item[self.Columns.TYPE].setBackground(
+                ColorScheme.YELLOW.as_color(True)
+                if address_info_min.is_change()
+                else ColorScheme.GREEN.as_color(True)
+            )
             item[self.Columns.TYPE].setData(
                 sort_tuple,
                 MyItemDataRole.ROLE_SORT_ORDER,
@@ -714,41 +887,34 @@ class AddressList(MyTreeView[str]):
             item[self.Columns.TYPE].setToolTip(
                 f"""{address_info_min.address_path()[1]}. {self.tr("change address") if address_info_min.address_path()[0] else self.tr("receiving address")}"""
             )
-        # add item
-        count = self._source_model.rowCount()
-        self._source_model.insertRow(count, item)
-        self.refresh_row(address, count)
+        self._fill_row(item, wallet, address)
+        return item
 
     def refresh_row(self, key: str, row: int) -> None:
         """Refresh row."""
-        assert row is not None
-        address = key
-        wallet = self.get_wallet(row)
-        if not wallet:
+        # the row is rebuilt with fresh data the next time it is needed
+        self._lazy_model.invalidate([key])
+
+    def refresh_all(self) -> None:
+        """Refresh all."""
+        if self.maybe_defer_update():
             return
+        self._lazy_model.invalidate()
 
+    def _fill_row(self, items: list[QStandardItem], wallet: Wallet, address: str) -> None:
+        """Fill the wallet state dependent items of a row."""
         label = wallet.get_label_for_address(address)
         category = wallet.labels.get_category(address)
 
-        txids = wallet.get_involved_txids(address)
-        fulltxdetails = [wallet.get_dict_fulltxdetail().get(txid) for txid in txids]
-        txs_involed = [fulltxdetail.tx for fulltxdetail in fulltxdetails if fulltxdetail]
-
-        statuses = [TxStatus.from_wallet(tx.txid, wallet) for tx in txs_involed]
-        min_status = sorted(statuses, key=lambda status: status.sort_id())[0] if statuses else None
+        num, min_status = self._tx_summary(wallet, address)
         icon_path = sort_id_to_icon(min_status.sort_id()) if min_status else None
-        num = len(txs_involed)
 
         balance = wallet.get_addr_balance(address).total
         balance_text = str(Satoshis(balance, wallet.network))
         # create item
 
         fiat_value = self.fx.btc_to_fiat(balance)
-        fiat_balance_str = (
-            self.fx.fiat_to_str(fiat_value, use_currency_symbol=False) if fiat_value is not None else ""
-        )
-        _item = [self._source_model.item(row, col) for col in self.Columns]
-        items = [entry for entry in _item if entry]
+        fiat_balance_str = self._fiat_balance_str(fiat_value)
         items[self.key_column].setData(
             needs_frequent_flag(status=min_status), role=MyItemDataRole.ROLE_FREQUENT_UPDATEFLAG
         )
@@ -795,7 +961,7 @@ class AddressList(MyTreeView[str]):
         if not multi_select:
             addr = addrs[0]
 
-            wallet = self.get_wallet(selected_items[0].index().row())
+            wallet = self.get_wallet(selected[0].row())
             if wallet and (wallet_signals := self.wallet_functions.wallet_signals.get(wallet.id)):
                 menu.add_action(
                     self.tr("Details"), partial(wallet_signals.show_address.emit, addr, wallet.id)
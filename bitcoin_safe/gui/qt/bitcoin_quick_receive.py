@@ -64,7 +64,7 @@ class BitcoinQuickReceive(
         self._forced_update = False
 
         # signals
-        self.wallet_signals.updated.connect(self.update_content)
+        self.wallet_signals.updated_coalesced.connect(self.update_content)
         self.wallet_signals.language_switch.connect(self.refresh_all)
 
     def refresh_all(self):
@@ -182,12 +182,9 @@ class CategoryManager(QWidget):
         addresses = (
             addresses
             if addresses
-            else [
-                label.ref
-                for label in self.category_core.wallet.labels.get_category_dict_raw(
-                    filter_type=LabelType.addr
-                ).get(category, [])
-            ]
+            else list(
+                self.category_core.wallet.labels.get_refs_of_category(category, filter_type=LabelType.addr)
+            )
         )
         used_addresses = [
             address for address in addresses if self.category_core.wallet.address_is_used(address=address)
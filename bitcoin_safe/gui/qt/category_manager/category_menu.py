@@ -67,7 +67,9 @@ class CategoryComboBox(QComboBox):
         self.category_core = category_core
 
         if self.category_core:
-            self.signnal_tracker.connect(self.category_core.wallet_signals.updated, self.on_wallet_updated)
+            self.signnal_tracker.connect(
+                self.category_core.wallet_signals.updated_coalesced, self.on_wallet_updated
+            )
         self.update_content()
 
     def _get_category_infos(self) -> list[CategoryInfo]:
@@ -68,7 +68,6 @@ from bitcoin_safe.gui.qt.wrappers import Menu
 from bitcoin_safe.signals import SignalsMin, WalletFunctions
 from bitcoin_safe.wallet import Wallet
 
-from ...pdfrecovery import make_and_open_pdf
 from .util import set_no_margins
 
 logger = logging.getLogger(__name__)
@@ -246,6 +245,8 @@ class DescriptorEdit(QWidget):
             )
             return
 
+        from bitcoin_safe.pdfrecovery import make_and_open_pdf
+
         lang_code = QLocale().name() or DEFAULT_LANG_CODE
         make_and_open_pdf(self.wallet, lang_code=lang_code)
 
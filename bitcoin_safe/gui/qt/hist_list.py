@@ -56,7 +56,7 @@ import enum
 import logging
 import os
 import tempfile
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable, Iterator
 from enum import IntEnum
 from functools import partial
 from typing import Any, cast
@@ -89,9 +89,9 @@ from ...wallet import ToolsTxUiInfo, TxStatus, Wallet, get_wallets
 from .cbf_progress_bar import CBFProgressBar
 from .drag_info import AddressDragInfo
 from .my_treeview import (
+    LazyTableModel,
     MyItemDataRole,
     MySortModel,
-    MyStandardItemModel,
     MyTreeView,
     TreeViewWithToolbar,
     header_item,
@@ -218,6 +218,13 @@ class HistList(MyTreeView[str]):
         self.show_change = AddressTypeFilter.ALL  # type: AddressTypeFilter
         self.show_used = AddressUsageStateFilter.ALL  # type: AddressUsageStateFilter
         self.balance = 0
+        # (wallet_id, txid) -> (status_sort_index, amount, balance) of the shown rows
+        self._row_positions: dict[tuple[str, str], tuple[int, int, int]] = {}
+        # wallet_id -> the history order of the last update, its txid -> index
+        # and the balance before the first row of the wallet
+        self._tx_orders: dict[str, list[TransactionDetails]] = {}
+        self._tx_indexes: dict[str, dict[str, int]] = {}
+        self._start_balances: dict[str, int] = {}
         # self.change_button = QComboBox(self)
         # self.change_button.currentIndexChanged.connect(self.toggle_change)
         # for (
@@ -232,10 +239,19 @@ class HistList(MyTreeView[str]):
         #     AddressUsageStateFilter.__members__.values()
         # ):  # type: AddressUsageStateFilter
         #     self.used_button.addItem(addr_usage_state.ui_text())
-        self._source_model = MyStandardItemModel(
+        # long histories would need a QStandardItem per cell, so the rows
+        # are only built when they are painted (or otherwise needed)
+        self._lazy_model = LazyTableModel(
             key_column=self.key_column,
+            column_count=len(self.Columns),
+            row_factory=self._build_row,
+            quick_data=self._quick_data,
+            editable_columns=self.editable_columns,
+            # a tx between two open wallets has a row in each of them
+            key_of=lambda row_key: row_key[1],
             parent=self,
         )
+        self._source_model = self._lazy_model  # type: ignore[assignment]
         self.proxy = MySortModel(
             drag_key="txids",
             Columns=self.Columns,
@@ -255,7 +271,7 @@ class HistList(MyTreeView[str]):
 
         for wallet in self.wallets:
             self._signal_tracker_wallet_signals.connect(
-                self.wallet_functions.wallet_signals[wallet.id].updated, self.update_with_filter
+                self.wallet_functions.wallet_signals[wallet.id].updated_coalesced, self.update_with_filter
             )
 
         self.update_content()
@@ -346,11 +362,13 @@ class HistList(MyTreeView[str]):
     @time_logger
     def update_with_filter(self, update_filter: UpdateFilter) -> None:
         """Update with filter."""
+        if update_filter.is_transaction_delta():
+            return self.update_transaction_delta(update_filter)
         if update_filter.refresh_all:
             return self.update_content()
         logger.debug(f"{self.__class__.__name__} update_with_filter")
 
-        def categories_intersect(model: MyStandardItemModel, row) -> set:
+        def categories_intersect(model: LazyTableModel, row) -> set:
             """Categories intersect."""
             return set(model.data(model.index(row, self.Columns.CATEGORIES))).intersection(
                 set(update_filter.categories)
@@ -369,22 +387,21 @@ class HistList(MyTreeView[str]):
         logger.debug(f"{self.__class__.__name__}  update_with_filter")
         self._before_update_content()
 
+        if update_filter.reason == UpdateFilterReason.ChainHeightAdvanced:
+            # only the rows that were built can show an outdated status
+            self._lazy_model.invalidate()
+
         log_info = []
-        model = self._source_model
+        refreshed_txids = []
+        model = self._lazy_model
         # Select rows with an ID in id_list
-        for row in range(model.rowCount()):
-            txid = model.data(model.index(row, self.Columns.TXID))
-
-            if (
-                update_filter.reason == UpdateFilterReason.ChainHeightAdvanced
-                and model.data(
-                    model.index(row, self.key_column), role=MyItemDataRole.ROLE_FREQUENT_UPDATEFLAG
-                )
-            ) or any(
+        for row, (wallet_id, txid) in enumerate(model.keys()):
+            if any(
                 [txid in update_filter.txids, categories_intersect(model, row), tx_involves_address(txid)]
             ):
                 log_info.append((row, str(txid)[:4]))  # no sensitive info in log
-                self.refresh_row(txid, row)
+                refreshed_txids.append((wallet_id, txid))
+        model.invalidate(refreshed_txids)
 
         logger.debug(f"Updated  {log_info}")
 
@@ -403,12 +420,12 @@ class HistList(MyTreeView[str]):
         }
 
     def _init_row(
-        self, wallet: Wallet, tx: TransactionDetails, status_sort_index: int, old_balance: int
-    ) -> tuple[list[QStandardItem], int]:
+        self, wallet: Wallet, tx: TransactionDetails, status_sort_index: int, amount: int, new_balance: int
+    ) -> list[QStandardItem]:
         """
 
         Returns:
-            Tuple[List[QStandardItem] , int]: items, amount
+            List[QStandardItem]: items
         """
 
         # WALLET_ID = enum.auto()
@@ -416,32 +433,13 @@ class HistList(MyTreeView[str]):
         # BALANCE = enum.auto()
         # TXID = enum.auto()
 
-        # calculate the amount
-        if self.address_domain:
-            fulltxdetail = wallet.get_dict_fulltxdetail().get(tx.txid)
-            assert fulltxdetail, f"Could not find the transaction for {tx.txid}"
-            amount = fulltxdetail.sum_outputs(self.address_domain) - fulltxdetail.sum_inputs(
-                self.address_domain
-            )
-        else:
-            amount = int(tx.received - tx.sent)
-
-        new_balance = old_balance + amount
-
         labels = [""] * len(self.Columns)
         labels[self.Columns.WALLET_ID] = wallet.id
-        labels[self.Columns.AMOUNT] = Satoshis(amount, wallet.network).str_as_change()
-
-        labels[self.Columns.BALANCE] = str(Satoshis(new_balance, wallet.network))
         labels[self.Columns.TXID] = tx.txid
         items = [QStandardItem(e) for e in labels]
 
-        items[self.Columns.STATUS].setData(status_sort_index, MyItemDataRole.ROLE_SORT_ORDER)
+        self._set_position_data(items, wallet, status_sort_index, amount, new_balance)
         items[self.Columns.WALLET_ID].setData(wallet.id, MyItemDataRole.ROLE_CLIPBOARD_DATA)
-        items[self.Columns.AMOUNT].setData(amount, MyItemDataRole.ROLE_CLIPBOARD_DATA)
-        if amount < 0:
-            items[self.Columns.AMOUNT].setData(QBrush(QColor("red")), Qt.ItemDataRole.ForegroundRole)
-        items[self.Columns.BALANCE].setData(new_balance, MyItemDataRole.ROLE_CLIPBOARD_DATA)
         items[self.Columns.TXID].setData(tx.txid, MyItemDataRole.ROLE_CLIPBOARD_DATA)
 
         # align text and set fonts
@@ -454,7 +452,98 @@ class HistList(MyTreeView[str]):
 
         items[self.key_column].setData(tx.txid, MyItemDataRole.ROLE_KEY)
 
-        return items, amount
+        return items
+
+    def _get_amount(self, wallet: Wallet, tx: TransactionDetails) -> int:
+        """The balance change of tx, restricted to the address_domain if set."""
+        if self.address_domain:
+            fulltxdetail = wallet.get_dict_fulltxdetail().get(tx.txid)
+            assert fulltxdetail, f"Could not find the transaction for {tx.txid}"
+            return fulltxdetail.sum_outputs(self.address_domain) - fulltxdetail.sum_inputs(
+                self.address_domain
+            )
+        return int(tx.received - tx.sent)
+
+    def _set_position_data(
+        self,
+        items: list[QStandardItem],
+        wallet: Wallet,
+        status_sort_index: int,
+        amount: int,
+        new_balance: int,
+    ) -> None:
+        """Set the columns that depend on the position of the tx in the history."""
+        items[self.Columns.STATUS].setData(status_sort_index, MyItemDataRole.ROLE_SORT_ORDER)
+        items[self.Columns.AMOUNT].setText(Satoshis(amount, wallet.network).str_as_change())
+        items[self.Columns.AMOUNT].setData(amount, MyItemDataRole.ROLE_CLIPBOARD_DATA)
+        items[self.Columns.AMOUNT].setData(amount, MyItemDataRole.ROLE_SORT_ORDER)
+        items[self.Columns.AMOUNT].setData(
+            QBrush(QColor("red")) if amount < 0 else None, Qt.ItemDataRole.ForegroundRole
+        )
+        items[self.Columns.BALANCE].setText(str(Satoshis(new_balance, wallet.network)))
+        items[self.Columns.BALANCE].setData(new_balance, MyItemDataRole.ROLE_CLIPBOARD_DATA)
+        items[self.Columns.BALANCE].setData(new_balance, MyItemDataRole.ROLE_SORT_ORDER)
+
+    def _get_txid_domain(self, wallet: Wallet) -> set[str] | None:
+        """Txids involving the address_domain, or None if all txs are shown."""
+        if not self.address_domain:
+            return None
+        txid_domain: set[str] = set()
+        for address in self.address_domain:
+            txid_domain = txid_domain.union(wallet.get_involved_txids(address))
+        return txid_domain
+
+    def _iter_row_positions(
+        self,
+        wallet: Wallet,
+        txs: list[TransactionDetails],
+        start: int,
+        balance: int,
+        get_amount: Callable[[TransactionDetails], int],
+    ) -> Iterator[tuple[TransactionDetails, int, int, int]]:
+        """Yield tx, status_sort_index, amount, new_balance of the rows of txs[start:]."""
+        txid_domain = self._get_txid_domain(wallet)
+        for i in range(start, len(txs)):
+            tx = txs[i]
+            if txid_domain is not None and tx.txid not in txid_domain:
+                continue
+            amount = get_amount(tx)
+            balance += amount
+            yield tx, i, amount, balance
+
+    def _first_changed_index(
+        self, wallet: Wallet, txs: list[TransactionDetails], changed_txids: set[str]
+    ) -> int:
+        """Index of the first tx of wallet whose position or content may have changed."""
+        old_txs = self._tx_orders[wallet.id]
+        old_indexes = self._tx_indexes[wallet.id]
+        first = min(
+            [len(old_txs), len(txs)] + [old_indexes[txid] for txid in changed_txids if txid in old_indexes]
+        )
+        # the tx objects of unchanged txs are reused, so this is a cheap comparison
+        if old_txs[:first] == txs[:first]:
+            return first
+        # e.g. joined unconfirmed clusters can move txs in front of the changed ones
+        return next(
+            (i for i, (old_tx, tx) in enumerate(zip(old_txs, txs, strict=False)) if old_tx.txid != tx.txid),
+            first,
+        )
+
+    def _remember_tx_order(self, wallet: Wallet, txs: list[TransactionDetails], start: int) -> None:
+        """Store the history order of wallet, of which txs[:start] is unchanged."""
+        tx_indexes = self._tx_indexes.setdefault(wallet.id, {})
+        for tx in self._tx_orders.get(wallet.id, [])[start:]:
+            tx_indexes.pop(tx.txid, None)
+        for i in range(start, len(txs)):
+            tx_indexes[txs[i].txid] = i
+        self._tx_orders[wallet.id] = list(txs)
+
+    def _wallet_of_id(self, wallet_id: str) -> Wallet | None:
+        """The shown wallet with wallet_id."""
+        for wallet in self.wallets:
+            if wallet.id == wallet_id:
+                return wallet
+        return None
 
     def update_content(self) -> None:
         """Update content."""
@@ -463,70 +552,248 @@ class HistList(MyTreeView[str]):
 
         self._before_update_content()
 
-        self._source_model.clear()
+        self._lazy_model.clear()
+        self._row_positions.clear()
+        self._tx_orders.clear()
+        self._tx_indexes.clear()
+        self._start_balances.clear()
         self.update_headers(self.get_headers())
 
-        num_shown = 0
         self.balance = 0
+        row_keys: list[tuple[str, str]] = []
         for wallet in self.wallets:
-            txid_domain: set[str] | None = None
-            if self.address_domain:
-                txid_domain = set()
-                for address in self.address_domain:
-                    txid_domain = txid_domain.union(wallet.get_involved_txids(address))
-
             # always take sorted_delta_list_transactions().new as a start because it is correctly sorted
-            for i, tx in enumerate(wallet.sorted_delta_list_transactions()):
-                if txid_domain is not None:
-                    if tx.txid not in txid_domain:
-                        continue
-
-                items, amount = self._init_row(wallet, tx, i, self.balance)
-                self.balance += amount
-
-                num_shown += 1
-                # add item
-                count = self._source_model.rowCount()
-                self._source_model.insertRow(count, items)
-                self.refresh_row(tx.txid, count)
+            txs = wallet.sorted_delta_list_transactions()
+            self._remember_tx_order(wallet, txs, start=0)
+            self._start_balances[wallet.id] = self.balance
+            for tx, i, amount, new_balance in self._iter_row_positions(
+                wallet, txs, 0, self.balance, partial(self._get_amount, wallet)
+            ):
+                self.balance = new_balance
+                self._row_positions[(wallet.id, tx.txid)] = (i, amount, new_balance)
+                row_keys.append((wallet.id, tx.txid))
+        self._lazy_model.set_keys(row_keys)
 
         super().update_content()
         self._after_update_content()
 
+    @time_logger
+    def update_transaction_delta(self, update_filter: UpdateFilter) -> None:
+        """Apply a transaction delta (see UpdateFilter.is_transaction_delta) row by row.
+
+        update_filter.txids are the appended, removed and modified txs of the
+        DeltaCacheListTransactions. Only the history from the first of them
+        onwards is walked, reusing the amounts of the unchanged txs, and rows
+        are only inserted, removed or changed where the tx, its position or
+        its balance changed.
+        """
+        if self._pending_update or self._tx_orders.keys() != {wallet.id for wallet in self.wallets}:
+            return self.update_content()
+        if self.maybe_defer_update():
+            return
+
+        changed_txids = update_filter.txids
+        positions: dict[tuple[str, str], tuple[int, int, int]] = {}
+        inserted: list[tuple[Wallet, TransactionDetails, tuple[int, int, int]]] = []
+        moved: list[tuple[Wallet, str, tuple[int, int, int]]] = []
+        removed: set[tuple[str, str]] = set()
+        resorted = 0
+        balance = 0
+        for wallet in self.wallets:
+            txs = wallet.sorted_delta_list_transactions()
+            old_txs = self._tx_orders[wallet.id]
+
+            # a different start balance changes every row of this wallet
+            start = (
+                self._first_changed_index(wallet, txs, changed_txids)
+                if self._start_balances[wallet.id] == balance
+                else 0
+            )
+            self._start_balances[wallet.id] = balance
+            balance = self._balance_before(wallet, start, start_balance=balance)
+
+            def get_amount(tx: TransactionDetails, wallet: Wallet = wallet) -> int:
+                """The stored amount, unless tx changed."""
+                old_position = self._row_positions.get((wallet.id, tx.txid))
+                if old_position is None or tx.txid in changed_txids:
+                    return self._get_amount(wallet, tx)
+                return old_position[1]
+
+            for tx, i, amount, new_balance in self._iter_row_positions(
+                wallet, txs, start, balance, get_amount
+            ):
+                key = (wallet.id, tx.txid)
+                positions[key] = position = (i, amount, new_balance)
+                old_position = self._row_positions.get(key)
+                if old_position is None:
+                    inserted.append((wallet, tx, position))
+                elif old_position != position:
+                    moved.append((wallet, tx.txid, position))
+                    resorted += old_position[0] != i
+                balance = new_balance
+            removed.update(
+                key
+                for tx in old_txs[start:]
+                if (key := (wallet.id, tx.txid)) in self._row_positions and key not in positions
+            )
+            self._remember_tx_order(wallet, txs, start)
+
+        # rows whose balance changed are updated in place; only a changed sort
+        # order makes the proxy move rows
+        if len(inserted) + resorted + len(removed) > self.max_incremental_row_changes:
+            return self.update_content()
+        logger.debug(
+            f"{self.__class__.__name__} update_transaction_delta "
+            f"{len(inserted)=} {len(moved)=} {len(removed)=}"
+        )
+
+        model = self._lazy_model
+        with self._incremental_update() as touched_rows:
+            # remove from the bottom, so the rows found before stay valid
+            removed_rows = [row for key in removed for row in model.rows_of_row_key(key)]
+            for row in sorted(removed_rows, reverse=True):
+                model.removeRow(row)
+
+            # the lazy model reads the sort values of the rows from here
+            for key in removed:
+                del self._row_positions[key]
+            self._row_positions.update(positions)
+            self.balance = balance
+
+            moved_keys = [(wallet.id, txid) for wallet, txid, _ in moved]
+            changed_keys = [(wallet.id, txid) for wallet in self.wallets for txid in changed_txids]
+            model.invalidate(moved_keys + changed_keys)
+            model.resort_keys(moved_keys)
+            model.insert_keys((wallet.id, tx.txid) for wallet, tx, _ in inserted)
+
+            # rows are only known after all inserts and moves
+            for txid in {
+                *(txid for _, txid, _ in moved),
+                *changed_txids,
+                *(tx.txid for _, tx, _ in inserted),
+            }:
+                touched_rows.update(model.rows_of_key(txid))
+
+    def _balance_before(self, wallet: Wallet, start: int, start_balance: int) -> int:
+        """The balance after the last row of wallet before its tx index start."""
+        old_txs = self._tx_orders[wallet.id]
+        for i in range(min(start, len(old_txs)) - 1, -1, -1):
+            if position := self._row_positions.get((wallet.id, old_txs[i].txid)):
+                return position[2]
+        return start_balance
+
     def refresh_row(self, key: str, row: int) -> None:
         """Refresh row."""
-        assert row is not None
-        wallet = self.get_wallet(txid=key)
-        if not wallet:
-            return
-        if not (tx := wallet.get_tx(txid=key)):
-            return
-        # STATUS = enum.auto()
-        # CATEGORIES = enum.auto()
-        # LABEL = enum.auto()
+        self._lazy_model.invalidate([self._lazy_model.key_at(row)])
 
-        label = wallet.get_label_for_txid(tx.txid)
-        categories = wallet.get_categories_for_txid(tx.txid)
+    def any_needs_frequent_flag(self) -> bool:
+        """Any needs frequent flag."""
+        # the last shown tx of the history order has the fewest confirmations
+        for wallet in self.wallets:
+            for tx in reversed(self._tx_orders.get(wallet.id, [])):
+                if (wallet.id, tx.txid) in self._row_positions:
+                    if needs_frequent_flag(status=TxStatus.from_wallet(tx.txid, wallet)):
+                        return True
+                    break
+        return False
+
+    def _status_text(self, tx: TransactionDetails, status: TxStatus) -> str:
+        """Status text."""
+        if tx.chain_position.is_confirmed():
+            return tx.get_datetime().strftime("%Y-%m-%d %H:%M")
+        if status.is_in_mempool():
+            fee_info = FeeInfo.from_txdetails(tx)
+            fee_rate = fee_info.fee_rate() if fee_info else MIN_RELAY_FEE
+            return confirmation_wait_formatted(
+                self.mempool_manager.fee_rate_to_projected_block_index(fee_rate)
+            )
+        return self.tr("Local")
+
+    @staticmethod
+    def _category(wallet: Wallet, txid: str) -> tuple[str, list[str]]:
+        """The shown category and all categories of txid."""
+        categories = wallet.get_categories_for_txid(txid)
         categories_without_default = set(categories) - set([wallet.labels.get_default_category()])
         category = (
             list(categories_without_default)[0]
             if categories_without_default
             else (categories[0] if categories else "")
         )
-        status = TxStatus.from_wallet(tx.txid, wallet)
+        return category, categories
 
-        fee_info = FeeInfo.from_txdetails(tx)
-        fee_rate = fee_info.fee_rate() if fee_info else MIN_RELAY_FEE
-        status_text = ""
-        if tx.chain_position.is_confirmed():
-            status_text = tx.get_datetime().strftime("%Y-%m-%d %H:%M")
-        else:
-            if status.is_in_mempool():
-                status_text = confirmation_wait_formatted(
-                    self.mempool_manager.fee_rate_to_projected_block_index(fee_rate)
-                )
-            else:
-                status_text = self.tr("Local")
+    def _quick_data(self, row_key: tuple[str, str], column: int, role: int) -> Any:
+        """Answer the roles used for sorting, filtering and selecting without building the row.
+
+        Must agree with the items of _build_row.
+        """
+        wallet_id, txid = row_key
+        wallet = self._wallet_of_id(wallet_id)
+        position = self._row_positions.get(row_key)
+        if not wallet or not position:
+            return LazyTableModel.MISSING
+        status_sort_index, amount, new_balance = position
+
+        if role == MyItemDataRole.ROLE_FILTER_DATA:
+            return None
+        if role == MyItemDataRole.ROLE_SORT_ORDER:
+            if column == self.Columns.STATUS:
+                return status_sort_index
+            if column == self.Columns.AMOUNT:
+                return amount
+            if column == self.Columns.BALANCE:
+                return new_balance
+            return None
+        if role == MyItemDataRole.ROLE_CLIPBOARD_DATA:
+            if column == self.Columns.WALLET_ID:
+                return wallet.id
+            if column == self.Columns.TXID:
+                return txid
+            if column == self.Columns.AMOUNT:
+                return amount
+            if column == self.Columns.BALANCE:
+                return new_balance
+            if column == self.Columns.LABEL:
+                return wallet.get_label_for_txid(txid)
+            if column == self.Columns.CATEGORIES:
+                return self._category(wallet, txid)[1]
+            return LazyTableModel.MISSING
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.Columns.WALLET_ID:
+                return wallet.id
+            if column == self.Columns.TXID:
+                return txid
+            if column == self.Columns.AMOUNT:
+                return Satoshis(amount, wallet.network).str_as_change()
+            if column == self.Columns.BALANCE:
+                return str(Satoshis(new_balance, wallet.network))
+            if column == self.Columns.LABEL:
+                return wallet.get_label_for_txid(txid)
+            if column == self.Columns.CATEGORIES:
+                return self._category(wallet, txid)[0]
+            if column == self.Columns.STATUS and (tx := wallet.get_tx(txid=txid)):
+                return self._status_text(tx, TxStatus.from_wallet(txid, wallet))
+        return LazyTableModel.MISSING
+
+    def _build_row(self, row_key: tuple[str, str]) -> list[QStandardItem]:
+        """Build the items of the row of (wallet_id, txid) (called by the lazy model)."""
+        wallet_id, txid = row_key
+        wallet = self._wallet_of_id(wallet_id)
+        position = self._row_positions.get(row_key)
+        tx = wallet.get_tx(txid=txid) if wallet else None
+        if not wallet or not position or not tx:
+            items = [QStandardItem("") for _ in self.Columns]
+            items[self.key_column].setData(txid, MyItemDataRole.ROLE_KEY)
+            return items
+
+        items = self._init_row(wallet, tx, *position)
+        # STATUS = enum.auto()
+        # CATEGORIES = enum.auto()
+        # LABEL = enum.auto()
+
+        label = wallet.get_label_for_txid(tx.txid)
+        category, categories = self._category(wallet, tx.txid)
+        status = TxStatus.from_wallet(tx.txid, wallet)
+        status_text = self._status_text(tx, status)
 
         if 1 <= status.confirmations() <= 6:
             status_tooltip = self.tr("{number} Confirmations").format(number=status.confirmations())
@@ -538,20 +805,19 @@ class HistList(MyTreeView[str]):
         else:
             status_tooltip = status_text
 
-        _item = [self._source_model.item(row, col) for col in self.Columns]
-        item = [entry for entry in _item if entry]
-        item[self.key_column].setData(
+        items[self.key_column].setData(
             needs_frequent_flag(status=status), role=MyItemDataRole.ROLE_FREQUENT_UPDATEFLAG
         )
-        item[self.Columns.STATUS].setText(status_text)
-        item[self.Columns.STATUS].setData(status_text, MyItemDataRole.ROLE_CLIPBOARD_DATA)
-        item[self.Columns.STATUS].setIcon(svg_tools.get_QIcon(sort_id_to_icon(status.sort_id())))
-        item[self.Columns.STATUS].setToolTip(status_tooltip)
-        item[self.Columns.LABEL].setText(label)
-        item[self.Columns.LABEL].setData(label, MyItemDataRole.ROLE_CLIPBOARD_DATA)
-        item[self.Columns.CATEGORIES].setText(category)
-        item[self.Columns.CATEGORIES].setData(categories, MyItemDataRole.ROLE_CLIPBOARD_DATA)
-        item[self.Columns.CATEGORIES].setBackground(category_color(category))
+        items[self.Columns.STATUS].setText(status_text)
+        items[self.Columns.STATUS].setData(status_text, MyItemDataRole.ROLE_CLIPBOARD_DATA)
+        items[self.Columns.STATUS].setIcon(svg_tools.get_QIcon(sort_id_to_icon(status.sort_id())))
+        items[self.Columns.STATUS].setToolTip(status_tooltip)
+        items[self.Columns.LABEL].setText(label)
+        items[self.Columns.LABEL].setData(label, MyItemDataRole.ROLE_CLIPBOARD_DATA)
+        items[self.Columns.CATEGORIES].setText(category)
+        items[self.Columns.CATEGORIES].setData(categories, MyItemDataRole.ROLE_CLIPBOARD_DATA)
+        items[self.Columns.CATEGORIES].setBackground(category_color(category))
+        return items
 
     def create_menu(self, position: QPoint) -> Menu:
         """Create menu."""
@@ -782,7 +1048,8 @@ class HistList(MyTreeView[str]):
         """On edited."""
         txid = edit_key
 
-        wallet = self.get_wallet(txid=txid)
+        row_key = self._lazy_model.key_at(source_idx.row())
+        wallet = self._wallet_of_id(row_key[0]) if row_key else self.get_wallet(txid=txid)
         if not wallet:
             return
         wallet.labels.set_tx_label(edit_key, text, timestamp="now")
@@ -853,7 +1120,9 @@ class HistListWithToolbar(TreeViewWithToolbar):
         # signals
         self.hist_list.signals.language_switch.connect(self.updateUi)
         for wallet in self.hist_list.wallets:
-            self.hist_list.wallet_functions.wallet_signals[wallet.id].updated.connect(self.update_with_filter)
+            self.hist_list.wallet_functions.wallet_signals[wallet.id].updated_coalesced.connect(
+                self.update_with_filter
+            )
 
     def _on_sync_button_clicked(self):
         """On sync button clicked."""
@@ -208,6 +208,9 @@ class LabelSyncer(QObject):
         if update_filter.refresh_all:
             logger.debug("on_labels_updated: Do nothing on refresh_all.")
             return
+        if update_filter.reason == UpdateFilterReason.TransactionChange:
+            # transactions do not change labels
+            return
 
         should_update = False
         if should_update or update_filter.refresh_all:
@@ -34,11 +34,12 @@ import os
 import signal as syssignal
 import sys
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import partial
 from pathlib import Path
 from types import FrameType
-from typing import Literal, cast
+from typing import Any, Literal, cast
 
 import bdkpython as bdk
 from bitcoin_qr_tools.data import Data, DataType
@@ -108,9 +109,9 @@ from bitcoin_safe.network_utils import ProxyInfo
 from bitcoin_safe.p2p.p2p_client import ConnectionInfo
 from bitcoin_safe.p2p.p2p_listener import P2pListener
 from bitcoin_safe.p2p.tools import transaction_table
-from bitcoin_safe.pdfrecovery import make_and_open_pdf
 from bitcoin_safe.util import OptExcInfo
 
+from ...address_cache import AddressCache
 from ...config import UserConfig
 from ...fx import FX
 from ...mempool_manager import MempoolManager
@@ -1210,6 +1211,9 @@ class MainWindow(QMainWindow):
             Message(self.tr("Please select the wallet first."), type=MessageType.Warning)
             return
 
+        # reportlab is only loaded once a pdf is actually requested
+        from bitcoin_safe.pdfrecovery import make_and_open_pdf
+
         make_and_open_pdf(qt_wallet.wallet, lang_code=QLocale().name())
 
     def open_tx_file(self, file_path: str | None = None) -> None:
@@ -1627,13 +1631,53 @@ class MainWindow(QMainWindow):
         )
         viewer.set_tab_properties(chain_position=None)
 
+    @staticmethod
+    def _read_wallet_file(file_path: str, password: str | None, config: UserConfig) -> tuple[Any, str | None]:
+        """Reads, decrypts and parses a wallet file and deserializes its Wallet. Runs in
+        a worker thread.
+
+        Returns (preloaded, password).
+        """
+        if not Storage.has_password(file_path):
+            password = None
+        elif not password:
+            raise ValueError(f"No password for {file_path}")
+        return QTWallet.preload_file(file_path, password=password, config=config), password
+
     def open_last_opened_wallets(self) -> list[QTWallet]:
-        """Open last opened wallets."""
+        """Open last opened wallets.
+
+        The files are read, decrypted, parsed and their Wallets (including the bdk
+        wallets) are deserialized concurrently in worker threads. Only the QTWallets
+        are created in the GUI thread, because they consist of Qt widgets. The wallets
+        are attached in their previous order, each as soon as its file is read.
+        """
+        file_paths = [
+            str(rel_home_path_to_abs_path(file_path))
+            for file_path in self.config.last_wallet_files.get(str(self.config.network), [])
+        ]
+        # caches of wallets that were deleted or not opened for a long time
+        AddressCache.prune(Wallet.address_cache_dir_for(self.config))
+        password = self.password_cache.get_password("wallet")
         opened_wallets: list[QTWallet] = []
-        for file_path in self.config.last_wallet_files.get(str(self.config.network), []):
-            qt_wallet = self.open_wallet(file_path=str(rel_home_path_to_abs_path(file_path)), focus=False)
-            if qt_wallet:
-                opened_wallets.append(qt_wallet)
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(len(file_paths), os.cpu_count() or 1)),
+            thread_name_prefix="read_wallet_file",
+        ) as executor:
+            futures = [
+                executor.submit(self._read_wallet_file, file_path, password, self.config)
+                for file_path in file_paths
+            ]
+            for file_path, future in zip(file_paths, futures, strict=True):
+                try:
+                    preloaded = future.result()
+                except Exception as e:
+                    # e.g. missing files or unknown passwords are handled by open_wallet
+                    logger.debug(f"Could not read {file_path} in advance: {e}")
+                    preloaded = None
+                qt_wallet = self.open_wallet(file_path=file_path, focus=False, preloaded=preloaded)
+                if qt_wallet:
+                    opened_wallets.append(qt_wallet)
         return opened_wallets
 
     def open_last_opened_tx(self) -> None:
@@ -1655,7 +1699,29 @@ class MainWindow(QMainWindow):
         for file_path in file_paths:
             self.open_wallet(file_path=file_path, focus=focus)
 
-    def open_wallet(self, file_path: str | None = None, focus=True) -> QTWallet | None:
+    def open_wallet(
+        self,
+        file_path: str | None = None,
+        focus=True,
+        preloaded: tuple[Any, str | None] | None = None,
+    ) -> QTWallet | None:
+        """Open wallet.
+
+        preloaded is (result of QTWallet.preload_file, password) of a file that was already read.
+        """
+        qt_wallet = self._open_wallet(file_path=file_path, focus=focus, preloaded=preloaded)
+        if preloaded and isinstance(wallet := preloaded[0].get("wallet"), Wallet):
+            if not qt_wallet or qt_wallet.wallet is not wallet:
+                # the preloaded wallet was not used, so its threads must be stopped
+                wallet.close()
+        return qt_wallet
+
+    def _open_wallet(
+        self,
+        file_path: str | None = None,
+        focus=True,
+        preloaded: tuple[Any, str | None] | None = None,
+    ) -> QTWallet | None:
         """Open wallet."""
         if not file_path:
             file_path, _ = QFileDialog.getOpenFileName(
@@ -1692,13 +1758,16 @@ class MainWindow(QMainWindow):
             )
             return None
 
-        def try_load_without_error(password: str | None) -> QTWallet | tuple[Exception, OptExcInfo]:
+        def try_load_without_error(
+            password: str | None, preloaded_file: Any = None
+        ) -> QTWallet | tuple[Exception, OptExcInfo]:
             """Try load without error."""
             try:
                 return QTWallet.from_file(
                     file_path=file_path,
                     config=self.config,
                     password=password,
+                    preloaded=preloaded_file,
                     wallet_functions=self.wallet_functions,
                     mempool_manager=self.mempool_manager,
                     fx=self.fx,
@@ -1708,6 +1777,12 @@ class MainWindow(QMainWindow):
 
         def try_load(file_path: str) -> tuple[QTWallet | None, str | None]:
             """Try load."""
+            if (
+                preloaded
+                and (result := try_load_without_error(password=preloaded[1], preloaded_file=preloaded[0]))
+                and isinstance(result, QTWallet)
+            ):
+                return result, preloaded[1]
             password = None
             if (
                 not Storage().has_password(file_path)
@@ -61,7 +61,9 @@ import logging
 import os
 import os.path
 import tempfile
-from collections.abc import Callable, Iterable, Sequence
+from collections import OrderedDict
+from collections.abc import Callable, Collection, Iterable, Iterator, Sequence
+from contextlib import contextmanager
 from decimal import Decimal
 from functools import partial
 from typing import (
@@ -77,6 +79,8 @@ from bitcoin_safe_lib.gui.qt.util import str_to_qbytearray
 from bitcoin_safe_lib.util import unique_elements
 from PyQt6 import QtCore
 from PyQt6.QtCore import (
+    QAbstractItemModel,
+    QAbstractTableModel,
     QEvent,
     QItemSelection,
     QItemSelectionModel,
@@ -191,6 +195,193 @@ class MyStandardItemModel(QStandardItemModel):
         """Initialize instance."""
         super().__init__(parent)
         self.key_column = key_column
+        # ROLE_KEY of every top-level row (mirrors the key column) and the reverse
+        # lookup key -> rows, so rows can be found without scanning the model.
+        # Inserts and removals shift the stored rows, and a reordering (e.g.
+        # QStandardItemModel.sort) is remapped with persistent indexes. Both are
+        # only rebuilt lazily (None) after a reset, so a full clear-and-fill pays
+        # for a single scan on the first lookup.
+        self._row_keys: list[Any] | None = []
+        self._key_rows: dict[Any, list[int]] | None = {}
+        self._layout_rows: list[QPersistentModelIndex] | None = None
+        self.rowsInserted.connect(self._on_rows_inserted)
+        self.rowsRemoved.connect(self._on_rows_removed)
+        self.modelReset.connect(self._on_model_reset)
+        self.layoutAboutToBeChanged.connect(self._on_layout_about_to_be_changed)
+        self.layoutChanged.connect(self._on_layout_changed)
+        self.dataChanged.connect(self._on_data_changed)
+
+    def _key_of_row(self, row: int) -> Any:
+        """Read the ROLE_KEY of a top-level row from the model."""
+        return self.index(row, self.key_column).data(MyItemDataRole.ROLE_KEY)
+
+    def _add_to_key_rows(self, key: Any, row: int) -> None:
+        """Add to key rows."""
+        if self._key_rows is None or key is None:
+            return
+        try:
+            rows = self._key_rows.setdefault(key, [])
+        except TypeError:
+            # unhashable keys are found by scanning self._row_keys
+            return
+        rows.append(row)
+        rows.sort()
+
+    def _remove_from_key_rows(self, key: Any, row: int) -> None:
+        """Remove from key rows."""
+        if self._key_rows is None or key is None:
+            return
+        try:
+            rows = self._key_rows.get(key)
+        except TypeError:
+            return
+        if rows and row in rows:
+            rows.remove(row)
+            if not rows:
+                del self._key_rows[key]
+
+    def _shift_key_rows(self, shifted_keys: list[Any], from_row: int, delta: int) -> None:
+        """Add delta to the stored rows >= from_row of shifted_keys."""
+        if self._key_rows is None:
+            return
+        for key in set(self._iter_hashable(shifted_keys)):
+            rows = self._key_rows.get(key)
+            if rows:
+                self._key_rows[key] = [row + delta if row >= from_row else row for row in rows]
+
+    @staticmethod
+    def _iter_hashable(keys: list[Any]) -> Iterator[Any]:
+        """The keys that can be stored in self._key_rows."""
+        for key in keys:
+            if key is None:
+                continue
+            try:
+                hash(key)
+            except TypeError:
+                continue
+            yield key
+
+    def _on_rows_inserted(self, parent: QModelIndex, first: int, last: int) -> None:
+        """On rows inserted."""
+        if parent.isValid() or self._row_keys is None:
+            return
+        keys = [self._key_of_row(row) for row in range(first, last + 1)]
+        self._row_keys[first:first] = keys
+        # the rows after the inserted ones moved down
+        self._shift_key_rows(self._row_keys[last + 1 :], from_row=first, delta=len(keys))
+        for row, key in enumerate(keys, start=first):
+            self._add_to_key_rows(key, row)
+
+    def _on_rows_removed(self, parent: QModelIndex, first: int, last: int) -> None:
+        """On rows removed."""
+        if parent.isValid() or self._row_keys is None:
+            return
+        removed = self._row_keys[first : last + 1]
+        del self._row_keys[first : last + 1]
+        for row, key in enumerate(removed, start=first):
+            self._remove_from_key_rows(key, row)
+        # the rows after the removed ones moved up
+        self._shift_key_rows(self._row_keys[first:], from_row=last + 1, delta=-len(removed))
+
+    def _on_layout_about_to_be_changed(self, *args) -> None:
+        """Remember where every row is, to remap the keys in _on_layout_changed."""
+        if self._row_keys is None or len(self._row_keys) != self.rowCount():
+            self._layout_rows = None
+            return
+        self._layout_rows = [QPersistentModelIndex(self.index(row, 0)) for row in range(self.rowCount())]
+
+    def _on_layout_changed(self, *args) -> None:
+        """Move the keys along with their rows."""
+        layout_rows, self._layout_rows = self._layout_rows, None
+        if (
+            layout_rows is None
+            or self._row_keys is None
+            or len(layout_rows) != len(self._row_keys)
+            or len(layout_rows) != self.rowCount()
+        ):
+            self._on_model_reset()
+            return
+
+        row_keys: list[Any] = [None] * len(self._row_keys)
+        for old_row, index in enumerate(layout_rows):
+            new_row = index.row()
+            if not index.isValid() or index.parent().isValid():
+                self._on_model_reset()
+                return
+            row_keys[new_row] = self._row_keys[old_row]
+        self._row_keys = row_keys
+        self._key_rows = None
+
+    def _on_model_reset(self) -> None:
+        """On model reset."""
+        self._row_keys = None
+        self._key_rows = None
+
+    def _on_data_changed(self, top_left: QModelIndex, bottom_right: QModelIndex, roles: list[int]) -> None:
+        """Re-index rows whose key changed in place."""
+        if top_left.parent().isValid() or self._row_keys is None:
+            return
+        if not top_left.column() <= self.key_column <= bottom_right.column():
+            return
+        if roles and MyItemDataRole.ROLE_KEY not in roles:
+            return
+        for row in range(top_left.row(), min(bottom_right.row() + 1, len(self._row_keys))):
+            old_key = self._row_keys[row]
+            key = self._key_of_row(row)
+            if key is old_key or key == old_key:
+                continue
+            self._row_keys[row] = key
+            self._remove_from_key_rows(old_key, row)
+            self._add_to_key_rows(key, row)
+
+    def _get_row_keys(self) -> list[Any]:
+        """Return self._row_keys, rebuilding it if needed."""
+        if self._row_keys is None:
+            self._row_keys = [self._key_of_row(row) for row in range(self.rowCount())]
+            self._key_rows = None
+        return self._row_keys
+
+    def keys(self) -> list[Any]:
+        """Return the ROLE_KEY of every top-level row, in row order."""
+        return self._get_row_keys().copy()
+
+    def rows_of_key(self, key: Any) -> list[int]:
+        """Return the sorted top-level rows whose key column carries `key`."""
+        if key is None:
+            return []
+        row_keys = self._get_row_keys()
+        try:
+            hash(key)
+        except TypeError:
+            return [row for row, row_key in enumerate(row_keys) if row_key == key]
+
+        if self._key_rows is None:
+            key_rows: dict[Any, list[int]] = {}
+            for row, row_key in enumerate(row_keys):
+                if row_key is None:
+                    continue
+                try:
+                    key_rows.setdefault(row_key, []).append(row)
+                except TypeError:
+                    continue
+            self._key_rows = key_rows
+        return list(self._key_rows.get(key, []))
+
+    def key_at(self, row: int) -> Any:
+        """Return the key of top-level `row`, or None if out of range."""
+        row_keys = self._get_row_keys()
+        if 0 <= row < len(row_keys):
+            return row_keys[row]
+        return None
+
+    def has_key(self, key: Any) -> bool:
+        """Return True if a top-level row carries `key`."""
+        return bool(self.rows_of_key(key))
+
+    def row_of_key(self, key: Any) -> int | None:
+        """Return the lowest top-level row whose key column carries `key`."""
+        rows = self.rows_of_key(key)
+        return rows[0] if rows else None
 
     def flags(self, index: QModelIndex) -> Qt.ItemFlag:
         """Flags."""
@@ -205,6 +396,380 @@ class MyStandardItemModel(QStandardItemModel):
         return f
 
 
+class LazyTableModel(QAbstractTableModel):
+    """Flat table model that builds the QStandardItems of a row only when a cell
+    of it is requested, and keeps the most recently used rows in a small cache.
+
+    The model only stores the keys of its rows. ``row_factory(key)`` builds the
+    (detached) items of a row, ``quick_data(key, column, role)`` may answer
+    roles that are cheap to compute without the full row (sort values, filter
+    text, ...) and returns ``LazyTableModel.MISSING`` otherwise. Sorting is
+    done here on ``ROLE_SORT_ORDER`` (see ``MySortModel.sort``), so neither
+    sorting nor filtering has to build every row. ``insert_keys`` and
+    ``resort_keys`` keep the last sort order for incremental updates.
+
+    If the same key can appear in several rows, the rows are identified by
+    row keys instead, and ``key_of(row_key)`` returns their key (ROLE_KEY).
+    ``rows_of_key`` still looks up keys, all other methods take row keys.
+    """
+
+    MISSING = object()
+
+    def __init__(
+        self,
+        key_column: int,
+        column_count: int,
+        row_factory: Callable[[Any], list[QStandardItem]],
+        quick_data: Callable[[Any, int, int], Any] | None = None,
+        editable_columns: Collection[int] = (),
+        cache_size: int = 1000,
+        key_of: Callable[[Any], Any] | None = None,
+        parent=None,
+    ) -> None:
+        """Initialize instance."""
+        super().__init__(parent)
+        self.key_column = key_column
+        self.key_of: Callable[[Any], Any] = key_of if key_of else (lambda row_key: row_key)
+        self.editable_columns = editable_columns
+        self._column_count = column_count
+        self.row_factory = row_factory
+        self.quick_data = quick_data
+        self.cache_size = cache_size
+        self._row_keys: list[Any] = []
+        self._key_rows: dict[Any, list[int]] | None = None
+        self._row_cache: OrderedDict[Any, list[QStandardItem]] = OrderedDict()
+        self._header_data: dict[tuple[int, int], Any] = {}
+        # the last sort, kept by insert_keys and resort_keys
+        self._sort_column: int | None = None
+        self._sort_order = Qt.SortOrder.AscendingOrder
+
+    def rowCount(self, parent: QModelIndex | None = None) -> int:
+        """RowCount."""
+        if parent is not None and parent.isValid():
+            return 0
+        return len(self._row_keys)
+
+    def columnCount(self, parent: QModelIndex | None = None) -> int:
+        """ColumnCount."""
+        if parent is not None and parent.isValid():
+            return 0
+        return self._column_count
+
+    def _row_items(self, key: Any) -> list[QStandardItem]:
+        """Return the (cached) items of the row with `key`."""
+        try:
+            items = self._row_cache[key]
+        except KeyError:
+            items = self.row_factory(key)
+            self._row_cache[key] = items
+            while len(self._row_cache) > self.cache_size:
+                self._row_cache.popitem(last=False)
+            return items
+        self._row_cache.move_to_end(key)
+        return items
+
+    def is_cached(self, key: Any) -> bool:
+        """Return True if the items of the row with `key` are currently built."""
+        return key in self._row_cache
+
+    def key_at(self, row: int) -> Any:
+        """Return the key of `row`, or None if out of range."""
+        if 0 <= row < len(self._row_keys):
+            return self._row_keys[row]
+        return None
+
+    def item(self, row: int, column: int = 0) -> QStandardItem | None:
+        """Item."""
+        if not (0 <= row < len(self._row_keys) and 0 <= column < self._column_count):
+            return None
+        return self._row_items(self._row_keys[row])[column]
+
+    def itemFromIndex(self, index: QModelIndex) -> QStandardItem | None:
+        """ItemFromIndex."""
+        if not index.isValid() or index.model() is not self:
+            return None
+        return self.item(index.row(), index.column())
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        """Data."""
+        if not index.isValid() or not 0 <= index.row() < len(self._row_keys):
+            return None
+        return self._data(self._row_keys[index.row()], index.column(), role)
+
+    def _data(self, key: Any, column: int, role: int) -> Any:
+        """Data of the cell of the row with `key`."""
+        if role == MyItemDataRole.ROLE_KEY and column == self.key_column:
+            return self.key_of(key)
+        if self.quick_data is not None and key not in self._row_cache:
+            value = self.quick_data(key, column, role)
+            if value is not self.MISSING:
+                return value
+        if role == Qt.ItemDataRole.EditRole:
+            role = Qt.ItemDataRole.DisplayRole
+        return self._row_items(key)[column].data(role)
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.ItemDataRole.EditRole) -> bool:
+        """Store an edit in the cached row; the owner is expected to persist it and call invalidate."""
+        if not (item := self.itemFromIndex(index)):
+            return False
+        item.setData(value, role)
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        """Flags."""
+        # the view needs this on *every* index (and on the root) to show the in-between line
+        f = Qt.ItemFlag.ItemIsDropEnabled
+        if not index.isValid():
+            return f
+        # not taken from the items, the view asks for the flags of every row
+        f |= Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemNeverHasChildren
+        if index.column() in self.editable_columns:
+            f |= Qt.ItemFlag.ItemIsEditable
+
+        # drag is still restricted to the key column
+        if index.column() == self.key_column:
+            f |= Qt.ItemFlag.ItemIsDragEnabled
+        return f
+
+    def headerData(
+        self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole
+    ) -> Any:
+        """HeaderData."""
+        if orientation != Qt.Orientation.Horizontal:
+            return super().headerData(section, orientation, role)
+        if role == Qt.ItemDataRole.EditRole:
+            role = Qt.ItemDataRole.DisplayRole
+        return self._header_data.get((section, role))
+
+    def setHeaderData(
+        self, section: int, orientation: Qt.Orientation, value: Any, role: int = Qt.ItemDataRole.EditRole
+    ) -> bool:
+        """SetHeaderData."""
+        if orientation != Qt.Orientation.Horizontal or not 0 <= section < self._column_count:
+            return False
+        if role == Qt.ItemDataRole.EditRole:
+            role = Qt.ItemDataRole.DisplayRole
+        self._header_data[(section, role)] = value
+        self.headerDataChanged.emit(orientation, section, section)
+        return True
+
+    def setHorizontalHeaderLabels(self, labels: Iterable[str]) -> None:
+        """SetHorizontalHeaderLabels."""
+        for section, label in enumerate(labels):
+            self.setHeaderData(section, Qt.Orientation.Horizontal, label, Qt.ItemDataRole.DisplayRole)
+
+    def set_keys(self, keys: Iterable[Any]) -> None:
+        """Replace all rows (and drop all cached items)."""
+        self.beginResetModel()
+        self._row_keys = list(keys)
+        self._key_rows = None
+        self._row_cache.clear()
+        self.endResetModel()
+
+    def append_keys(self, keys: Iterable[Any]) -> None:
+        """Append rows for `keys`."""
+        keys = list(keys)
+        if not keys:
+            return
+        first = len(self._row_keys)
+        self.beginInsertRows(QModelIndex(), first, first + len(keys) - 1)
+        self._row_keys.extend(keys)
+        if self._key_rows is not None:
+            for row, key in enumerate(keys, start=first):
+                self._key_rows.setdefault(self.key_of(key), []).append(row)
+        self.endInsertRows()
+
+    @staticmethod
+    def _sort_key(value: Any) -> tuple[bool, Any]:
+        """Sort key of a sort value, None last."""
+        return (value is None, value)
+
+    def _sorted_row(self, key: Any, row_keys: list[Any]) -> int:
+        """Row in row_keys at which `key` keeps the last sort order (the end, if not sorted)."""
+        if self._sort_column is None:
+            return len(row_keys)
+        sort_key = self._sort_key(self._sort_value(key, self._sort_column))
+        descending = self._sort_order == Qt.SortOrder.DescendingOrder
+        low, high = 0, len(row_keys)
+        try:
+            while low < high:
+                middle = (low + high) // 2
+                middle_key = self._sort_key(self._sort_value(row_keys[middle], self._sort_column))
+                if (middle_key < sort_key) if descending else (sort_key < middle_key):
+                    high = middle
+                else:
+                    low = middle + 1
+        except TypeError:
+            return len(row_keys)
+        return low
+
+    def _merged_order(self, rows: list[int], placed_rows: list[int]) -> list[int]:
+        """Merge placed_rows into the sorted rows, such that the placed rows keep the
+        last sort order.
+
+        Returns the new order as a list of old rows.
+        """
+        kept_keys = [self._row_keys[row] for row in rows]
+        placed_keys = [self._row_keys[row] for row in placed_rows]
+        positions = [self._sorted_row(key, kept_keys) for key in placed_keys]
+        # rows placed at the same position are ordered among themselves
+        placed = list(range(len(placed_rows)))
+        try:
+            values = [self._sort_key(self._sort_value(key, self._sort_column)) for key in placed_keys]
+            placed.sort(key=lambda i: values[i], reverse=self._sort_order == Qt.SortOrder.DescendingOrder)
+        except TypeError:
+            pass
+        placed.sort(key=lambda i: positions[i])
+
+        new_order: list[int] = []
+        start = 0
+        for i in placed:
+            new_order += rows[start : positions[i]]
+            new_order.append(placed_rows[i])
+            start = positions[i]
+        new_order += rows[start:]
+        return new_order
+
+    def _reorder_rows(self, new_order: list[int]) -> None:
+        """Move the rows, such that row i is the old row new_order[i], with one layout change."""
+        self.layoutAboutToBeChanged.emit([], QAbstractItemModel.LayoutChangeHint.VerticalSortHint)
+        new_row_of_old = [0] * len(new_order)
+        for new_row, old_row in enumerate(new_order):
+            new_row_of_old[old_row] = new_row
+        old_indexes = self.persistentIndexList()
+        new_indexes = [
+            self.index(new_row_of_old[index.row()], index.column()) if index.isValid() else index
+            for index in old_indexes
+        ]
+        self._row_keys = [self._row_keys[old_row] for old_row in new_order]
+        self._key_rows = None
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit([], QAbstractItemModel.LayoutChangeHint.VerticalSortHint)
+
+    def insert_keys(self, keys: Iterable[Any]) -> None:
+        """Insert rows for `keys`, each where it keeps the last sort order.
+
+        The rows are appended and moved into place with one layout change, instead
+        of shifting all following rows once per key.
+        """
+        keys = list(keys)
+        first = len(self._row_keys)
+        self.append_keys(keys)
+        if self._sort_column is None or not keys or not first:
+            return
+        self._reorder_rows(self._merged_order(list(range(first)), list(range(first, len(self._row_keys)))))
+
+    def resort_keys(self, keys: Iterable[Any]) -> None:
+        """Move the rows of `keys`, whose sort values changed, to where they keep the
+        last sort order (with one layout change)."""
+        if self._sort_column is None:
+            return
+        moved_rows: set[int] = set()
+        for key in keys:
+            rows = self.rows_of_row_key(key)
+            # only rows with a unique key are moved
+            if len(rows) == 1:
+                moved_rows.add(rows[0])
+        if not moved_rows:
+            return
+        rows = [row for row in range(len(self._row_keys)) if row not in moved_rows]
+        new_order = self._merged_order(rows, sorted(moved_rows))
+        if new_order != list(range(len(new_order))):
+            self._reorder_rows(new_order)
+
+    def removeRows(self, row: int, count: int, parent: QModelIndex | None = None) -> bool:
+        """RemoveRows."""
+        if (parent is not None and parent.isValid()) or count <= 0:
+            return False
+        if row < 0 or row + count > len(self._row_keys):
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        for key in self._row_keys[row : row + count]:
+            self._row_cache.pop(key, None)
+        del self._row_keys[row : row + count]
+        self._key_rows = None
+        self.endRemoveRows()
+        return True
+
+    def clear(self) -> None:
+        """Remove all rows."""
+        self.set_keys([])
+
+    def invalidate(self, keys: Iterable[Any] | None = None) -> None:
+        """Drop the cached items of `keys` (all rows if None), so they are rebuilt
+        with fresh data the next time they are painted."""
+        if not self._row_keys:
+            self._row_cache.clear()
+            return
+        last_column = self._column_count - 1
+        if keys is None:
+            self._row_cache.clear()
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._row_keys) - 1, last_column))
+            return
+        rows: list[int] = []
+        for key in keys:
+            self._row_cache.pop(key, None)
+            rows += self.rows_of_row_key(key)
+        if rows:
+            # one signal, the view only repaints the visible part of the range
+            self.dataChanged.emit(self.index(min(rows), 0), self.index(max(rows), last_column))
+
+    def keys(self) -> list[Any]:
+        """Return the row key of every row, in row order."""
+        return self._row_keys.copy()
+
+    def rows_of_key(self, key: Any) -> list[int]:
+        """Return the sorted rows carrying `key`."""
+        if key is None:
+            return []
+        if self._key_rows is None:
+            self._key_rows = {}
+            for row, row_key in enumerate(self._row_keys):
+                self._key_rows.setdefault(self.key_of(row_key), []).append(row)
+        return list(self._key_rows.get(key, []))
+
+    def rows_of_row_key(self, row_key: Any) -> list[int]:
+        """Return the sorted rows carrying `row_key`."""
+        return [row for row in self.rows_of_key(self.key_of(row_key)) if self._row_keys[row] == row_key]
+
+    def has_key(self, key: Any) -> bool:
+        """Return True if a row carries `key`."""
+        return bool(self.rows_of_key(key))
+
+    def row_of_key(self, key: Any) -> int | None:
+        """Return the lowest row carrying `key`."""
+        rows = self.rows_of_key(key)
+        return rows[0] if rows else None
+
+    def _sort_value(self, key: Any, column: int) -> Any:
+        """Value by which the row with `key` is ordered in `column` (ROLE_SORT_ORDER, else the text)."""
+        value = self._data(key, column, MyItemDataRole.ROLE_SORT_ORDER)
+        if value is None:
+            value = self._data(key, column, Qt.ItemDataRole.DisplayRole)
+        return value
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:
+        """Sort the rows by `column` without building their items."""
+        if not 0 <= column < self._column_count:
+            return
+        self._sort_column = column
+        self._sort_order = order
+        if len(self._row_keys) < 2:
+            return
+        values = [self._sort_value(key, column) for key in self._row_keys]
+        reverse = order == Qt.SortOrder.DescendingOrder
+        try:
+            new_order = sorted(range(len(values)), key=lambda row: self._sort_key(values[row]))
+        except TypeError:
+            # mixed types, fall back to comparing the string representation
+            new_order = sorted(range(len(values)), key=lambda row: str(values[row]))
+        if reverse:
+            new_order.reverse()
+
+        self._reorder_rows(new_order)
+
+
 class MySortModel(QSortFilterProxyModel):
     role_drag_key = MyItemDataRole.ROLE_CLIPBOARD_DATA
 
@@ -218,7 +783,7 @@ class MySortModel(QSortFilterProxyModel):
         self,
         key_column: int,
         parent,
-        source_model: MyStandardItemModel,
+        source_model: MyStandardItemModel | LazyTableModel,
         sort_role: int,
         Columns: Iterable[int],
         drag_key: str = "item",
@@ -235,15 +800,26 @@ class MySortModel(QSortFilterProxyModel):
         self.setSourceModel(source_model)
         self.setSortRole(sort_role)
 
-    def setSourceModel(self, sourceModel: MyStandardItemModel) -> None:  # type: ignore[override]
+    def setSourceModel(  # type: ignore[override]
+        self, sourceModel: MyStandardItemModel | LazyTableModel
+    ) -> None:
         """SetSourceModel."""
         self._source_model = sourceModel
         super().setSourceModel(sourceModel)
 
-    def sourceModel(self) -> MyStandardItemModel:
+    def sourceModel(self) -> MyStandardItemModel | LazyTableModel:
         """SourceModel."""
         return self._source_model
 
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:
+        """Sort."""
+        if isinstance(self._source_model, LazyTableModel):
+            # lessThan would build every row, so the lazy model sorts itself
+            # and this proxy keeps the source order
+            self._source_model.sort(column, order)
+            return
+        super().sort(column, order)
+
     def lessThan(self, left: QModelIndex, right: QModelIndex) -> bool:
         """LessThan."""
         item1 = self._source_model.itemFromIndex(left)
@@ -276,7 +852,7 @@ class MySortModel(QSortFilterProxyModel):
         def get_data(
             row,
             col,
-            model: MyStandardItemModel | MySortModel,
+            model: MyStandardItemModel | LazyTableModel | MySortModel,
             role=MyItemDataRole.ROLE_CLIPBOARD_DATA,
         ) -> Any:
             """Get data."""
@@ -558,6 +1134,9 @@ class MyTreeView(QTreeView, BaseSaveableClass, Generic[T]):
     column_alignments: dict[int, Qt.AlignmentFlag] = {}
 
     key_column = 0
+    # above this many row changes, a rebuild with a single sort is faster than
+    # letting the proxy re-sort every changed row
+    max_incremental_row_changes = 500
 
     class BaseColumnsEnum(enum.IntEnum):
         @staticmethod
@@ -991,17 +1570,18 @@ class MyTreeView(QTreeView, BaseSaveableClass, Generic[T]):
         self._currently_updating = True
         content_index: QModelIndex | None = None
 
+        content_list = list(content_list)
         if clear_previous_selection:
             selection_model.clear()  # Clear previous selection
-        for row in range(model.rowCount()):
-            index = model.index(row, column)
-            this_content = model.data(index, role)
-            if this_content in content_list:
-                # Select the item
-                selection_model.select(
-                    index, QItemSelectionModel.SelectionFlag.Select | QItemSelectionModel.SelectionFlag.Rows
-                )
+        selection = QItemSelection()
+        for index in self._find_proxy_indexes(content_list, column, role):
+            selection.select(index, index)
+            if content_index is None or index.row() > content_index.row():
                 content_index = index
+        if not selection.isEmpty():
+            selection_model.select(
+                selection, QItemSelectionModel.SelectionFlag.Select | QItemSelectionModel.SelectionFlag.Rows
+            )
 
         if not model.rowCount() or (retry_next_time and content_index is None):
             # schedule selection for next update
@@ -1025,15 +1605,39 @@ class MyTreeView(QTreeView, BaseSaveableClass, Generic[T]):
         role: MyItemDataRole,
     ) -> None:
         """Scroll to."""
-        model = self.proxy
+        indexes = self._find_proxy_indexes([content], column, role)
+        if indexes:
+            index = min(indexes, key=lambda index: index.row())
+            self.scrollTo(index)
+            self._scroll_position = index.row()
+
+    def _find_proxy_indexes(
+        self, content_list: Sequence[Any], column: int, role: MyItemDataRole
+    ) -> list[QModelIndex]:
+        """Return the visible proxy indexes in `column` whose `role` data is in content_list."""
+        if role == MyItemDataRole.ROLE_KEY and column == self.key_column:
+            # use the key index of the source model instead of scanning all rows
+            indexes = []
+            for content in content_list:
+                for row in self._source_model.rows_of_key(content):
+                    index = self._s2p(self._source_model.index(row, column))
+                    if index.isValid():
+                        indexes.append(index)
+            return indexes
+
+        lookup: Collection[Any]
+        try:
+            lookup = set(content_list)
+        except TypeError:
+            lookup = content_list
 
+        model = self.proxy
+        indexes = []
         for row in range(model.rowCount()):
             index = model.index(row, column)
-            this_content = model.data(index, role)
-            if this_content == content:
-                self.scrollTo(index)
-                self._scroll_position = index.row()
-                break
+            if model.data(index, role) in lookup:
+                indexes.append(index)
+        return indexes
 
     def column_alignment(self, index: int) -> Qt.AlignmentFlag:
         """Column alignment."""
@@ -1187,18 +1791,15 @@ class MyTreeView(QTreeView, BaseSaveableClass, Generic[T]):
 
     def get_text_from_coordinate(self, row: int, col: int) -> str:
         """Get text from coordinate."""
-        item = self.item_from_index(self._source_model.index(row, col))
-        if not item:
+        text = self._source_model.data(self._source_model.index(row, col))
+        if text is None:
             return ""
-        return item.text()
+        return str(text)
 
     def get_role_data_from_coordinate(self, row: int, col: int, role) -> Any:
         """Get role data from coordinate."""
-        item = self.item_from_index(self._source_model.index(row, col))
-        if not item:
-            return None
-        role_data = item.data(role)
-        return role_data
+        # model.data (instead of the item) lets a LazyTableModel answer without building the row
+        return self._source_model.data(self._source_model.index(row, col), role)
 
     def get_edit_key_from_coordinate(self, row: int, col: int) -> Any:
         # overriding this might allow avoiding storing duplicate data
@@ -1294,21 +1895,13 @@ class MyTreeView(QTreeView, BaseSaveableClass, Generic[T]):
 
     def find_row_by_key(self, key: T) -> int | None:
         """Find row by key."""
-        for row in range(0, self._source_model.rowCount()):
-            item = self._source_model.item(row, self.key_column)
-            if item and item.data(MyItemDataRole.ROLE_KEY) == key:
-                return row
-        return None
+        return self._source_model.row_of_key(key)
 
     def refresh_all(self) -> None:
         """Refresh all."""
         if self.maybe_defer_update():
             return
-        for row in range(0, self._source_model.rowCount()):
-            item = self._source_model.item(row, self.key_column)
-            if not item:
-                continue
-            key = item.data(MyItemDataRole.ROLE_KEY)
+        for row, key in enumerate(self._source_model.keys()):
             self.refresh_row(key, row)
 
     def refresh_row(self, key: T, row: int) -> None:
@@ -1325,7 +1918,7 @@ class MyTreeView(QTreeView, BaseSaveableClass, Generic[T]):
         """Delete item."""
         row = self.find_row_by_key(key)
         if row is not None:
-            self._source_model.takeRow(row)
+            self._source_model.removeRow(row)
 
     @staticmethod
     def _recognized_files(mime_data: QMimeData) -> list[str]:
@@ -1483,6 +2076,33 @@ class MyTreeView(QTreeView, BaseSaveableClass, Generic[T]):
 
         self.signal_finished_update.emit()
 
+    @contextmanager
+    def _incremental_update(self) -> Iterator[set[int]]:
+        """Apply a few row inserts, removals and refreshes in place.
+
+        Unlike _before_update_content/_after_update_content, the proxy keeps
+        sorting dynamically, so only the changed rows are re-sorted, and the
+        selection survives because the model is not cleared.
+        Add the source rows that were inserted or refreshed to the yielded set,
+        so the current filter is applied to them.
+        """
+        self._currently_updating = True
+        scrollbar = self.verticalScrollBar()
+        scroll_position = scrollbar.value() if scrollbar else None
+        touched_rows: set[int] = set()
+        try:
+            yield touched_rows
+        finally:
+            for row in sorted(touched_rows):
+                if row < self._source_model.rowCount():
+                    self.hide_row(row)
+            if scrollbar and scroll_position is not None:
+                scrollbar.setValue(scroll_position)
+            self._currently_updating = False
+
+        self.signal_update.emit()
+        self.signal_finished_update.emit()
+
     def update_content(self) -> None:
         """Update content."""
         super().update()
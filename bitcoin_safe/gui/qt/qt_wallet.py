@@ -39,6 +39,7 @@ from concurrent.futures import Future
 from datetime import timedelta
 from pathlib import Path
 from typing import (
+    TYPE_CHECKING,
     Any,
     TypeVar,
     cast,
@@ -59,6 +60,7 @@ from PyQt6.QtWidgets import (
     QLabel,
     QMenu,
     QMessageBox,
+    QProgressDialog,
     QSplitter,
     QVBoxLayout,
     QWidget,
@@ -80,8 +82,8 @@ from bitcoin_safe.gui.qt.sidebar.sidebar_tree import SidebarNode
 from bitcoin_safe.gui.qt.ui_tx.ui_tx_creator import UITx_Creator
 from bitcoin_safe.gui.qt.util import svg_tools
 from bitcoin_safe.gui.qt.utxo_list import UTXOList, UtxoListWithToolbar
-from bitcoin_safe.labels import LabelType
-from bitcoin_safe.pdf_statement import make_and_open_pdf_statement
+from bitcoin_safe.labels import LabelType, ProgressCallback
+from bitcoin_safe.persister.serialize_persistence import ChangeSetEncoding, SerializePersistence
 from bitcoin_safe.plugin_framework.plugin_list_widget import PluginListWidget
 from bitcoin_safe.plugin_framework.plugin_manager import PluginManager
 from bitcoin_safe.plugin_framework.plugins.chat_sync.client import SyncClient
@@ -89,10 +91,20 @@ from bitcoin_safe.plugin_framework.plugins.walletgraph.client import WalletGraph
 from bitcoin_safe.pythonbdk_types import (
     Balance,
     BlockchainType,
+    OutPoint,
     TransactionDetails,
+    TxOut,
     python_utxo_balance,
 )
-from bitcoin_safe.storage import BaseSaveableClass, filtered_for_init
+from bitcoin_safe.storage import (
+    BaseSaveableClass,
+    ClassSerializer,
+    Journal,
+    Storage,
+    background_saver,
+    derived_key_cache,
+    filtered_for_init,
+)
 from bitcoin_safe.util import filename_clean
 from bitcoin_safe.wallet_util import WalletDifferenceType
 
@@ -104,6 +116,7 @@ from ...tx import TxBuilderInfos, TxUiInfos, short_tx_id
 from ...util import fast_version
 from ...wallet import (
     LOCAL_TX_LAST_SEEN,
+    BdkWallet,
     DeltaCacheListTransactions,
     ProtoWallet,
     Wallet,
@@ -115,7 +128,9 @@ from .descriptor_ui import DescriptorUI
 from .dialogs import PasswordCreation, PasswordQuestion
 from .hist_list import HistList, HistListWithToolbar
 from .util import Message, MessageType, caught_exception_message
-from .wallet_balance_chart import WalletBalanceChart
+
+if TYPE_CHECKING:
+    from .wallet_balance_chart import WalletBalanceChart
 
 logger = logging.getLogger(__name__)
 
@@ -245,6 +260,7 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
     signal_client_log_str = cast(SignalProtocol[[str]], pyqtSignal(str))
     signal_wallet_update = cast(SignalProtocol[[UpdateInfo]], pyqtSignal(UpdateInfo))
     signal_refresh_sync_status = cast(SignalProtocol[[]], pyqtSignal())
+    signal_save_failed = cast(SignalProtocol[[str, Exception]], pyqtSignal(str, object))
 
     def __init__(
         self,
@@ -279,6 +295,9 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
         self.fx = fx
         self.plugins_menu = QMenu()
         self._file_path = file_path
+        if file_path:
+            # the derived key of the wallet file is kept, while the wallet is open
+            derived_key_cache.open_session(file_path)
         self._client_bridge_tasks: list[Future[Any]] = []
         self.progress_update_timer = QTimer()
         self.timer_sync_retry = QTimer()
@@ -355,7 +374,8 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
         # only signals, not member of [wallet_signals, wallet_signals] have to be tracked,
         # all others I can connect automatically
         self.signal_tracker.connect(self.signals.language_switch, self.updateUi)
-        self.wallet_signals.updated.connect(self.signals.any_wallet_updated)
+        self.wallet_signals.connect_coalescing()
+        self.wallet_signals.updated_coalesced.connect(self.signals.any_wallet_updated)
         self.wallet_signals.updated.connect(self.on_updated)
         self.wallet_signals.export_labels.connect(self.export_labels)
         self.wallet_signals.export_bip329_labels.connect(self.export_bip329_labels)
@@ -376,7 +396,10 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
         self.signal_tracker.connect(self.signal_client_log_str, self._handle_client_log_str)
         self.signal_tracker.connect(self.signal_wallet_update, self._handle_client_update)
         self.signal_tracker.connect(self.signal_refresh_sync_status, self.update_sync_status)
+        self.signal_tracker.connect(self.signal_save_failed, self._on_save_failed)
 
+        if self.wallet.is_loading_history():
+            self.load_history_in_background()
         self._start_progress_update_timer()
         self._start_sync_retry_timer()
         self._start_sync_regularly_timer()
@@ -409,15 +432,18 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
         mempool_manager: MempoolManager,
         fx: FX,
         password: str | None = None,
+        preloaded: Any = None,
     ) -> QTWallet:
-        """From file."""
+        """From file.
+
+        preloaded can be given, if the file was already read with preload_file.
+        """
         return super()._from_file(
             filename=file_path,
             password=password,
+            preloaded=preloaded,
             class_kwargs={
-                Wallet.__name__: {
-                    "config": config,
-                },
+                **cls._wallet_class_kwargs(file_path, config=config, password=password),
                 QTWallet.__name__: {
                     "config": config,
                     "wallet_functions": wallet_functions,
@@ -477,11 +503,50 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
             },
         )
 
+    @staticmethod
+    def _wallet_class_kwargs(file_path: str, config: UserConfig, password: str | None) -> dict[str, Any]:
+        """Class kwargs of the Wallet in a wallet file."""
+        return {
+            Wallet.__name__: {
+                "config": config,
+                "address_cache_dir": Wallet.address_cache_dir_for(config),
+            },
+            SerializePersistence.__name__: {
+                "journal_filename": Journal.path_for(file_path),
+                "password": password,
+                # the wallet tab is shown before the transaction history is deserialized
+                "defer_tx_graph": True,
+            },
+        }
+
+    @classmethod
+    def preload_file(
+        cls, filename: str, password: str | None = None, config: UserConfig | None = None
+    ) -> Any:
+        """Reads and parses the wallet file (parsing it only once).
+
+        If config is given, the Wallet is deserialized as well, including the bdk
+        wallet (without the deferred transaction history). It creates no Qt objects,
+        unlike the rest of the QTWallet, which is therefore deserialized by from_file
+        in the GUI thread.
+        """
+        dct = cls._migrate_dict(json.loads(Storage().load(filename, password=password)))
+        if config and isinstance(dct.get("wallet"), dict):
+            dct["wallet"] = ClassSerializer.deserialize(
+                dct["wallet"],
+                Wallet.get_known_classes(),
+                cls._wallet_class_kwargs(filename, config=config, password=password),
+            )
+        return dct
+
     @classmethod
     def file_migration(cls, file_content: str):
         "this class can be overwritten in child classes"
+        return json.dumps(cls._migrate_dict(json.loads(file_content)))
 
-        dct = json.loads(file_content)
+    @classmethod
+    def _migrate_dict(cls, dct: dict[str, Any]) -> dict[str, Any]:
+        """Migrates the parsed file content."""
         qt_wallet_version = dct.get("VERSION")
 
         if dct["__class__"] == "Wallet":
@@ -513,7 +578,7 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
                 del dct["sync_tab"]
 
         # in the function above, only default json serilizable things can be set in dct
-        return json.dumps(dct)
+        return dct
 
     @classmethod
     def from_dump_downgrade_migration(cls, dct: dict[str, Any]):
@@ -571,7 +636,9 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
         if _node := self.tabs.findNodeByWidget(self.wallet_descriptor_ui):
             _node.setTitle(self.tr("Descriptor"))
         if _node := self.tabs.findNodeByWidget(self.history_tab):
-            _node.setTitle(self.tr("History"))
+            _node.setTitle(
+                self.tr("History (loading...)") if self.wallet.is_loading_history() else self.tr("History")
+            )
         if _node := self.tabs.findNodeByWidget(self.address_tab):
             _node.setTitle(self.tr("Addresses"))
         if _node := self.tabs.findNodeByWidget(self.plugin_manager_widget):
@@ -587,6 +654,51 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
         balance_total = Satoshis(self.wallet.get_balance().total, self.config.network)
         self.balance_label.setText(balance_total.str_with_unit())
         self.fiat_value_label.setText(self.fx.btc_to_fiat_str(amount=balance_total.value))
+        self.balance_label.setToolTip(
+            self.tr("Loading history of {num} transactions. The balance is from the last save.").format(
+                num=self.wallet.history_summary.get("num_transactions", 0)
+            )
+            if self.wallet.is_loading_history()
+            else ""
+        )
+
+    async def _load_history(self) -> tuple[BdkWallet, bdk.ChangeSet] | None:
+        """Load history."""
+        return await asyncio.to_thread(self.wallet.build_history_bdkwallet)
+
+    def load_history_in_background(self) -> None:
+        """Applies the deferred transaction history, while the wallet tab is
+        already shown.
+
+        The bdk wallet is built in a worker thread, but installed in the GUI thread,
+        such that no cache can be filled from the previous bdk wallet afterwards.
+        """
+        self.wallet.loop_in_thread.run_task(
+            self._load_history(),
+            on_success=self._load_history_on_success,
+            on_error=self._load_history_on_error,
+            key=f"{id(self)}load_history",
+            multiple_strategy=MultipleStrategy.REJECT_NEW_TASK,
+        )
+
+    def _load_history_on_success(self, result: tuple[BdkWallet, bdk.ChangeSet] | None) -> None:
+        """Load history on success."""
+        self.wallet.install_history_bdkwallet(result)
+        self.updateUi()
+        self.update_sync_status()
+        self.wallet_signals.updated.emit(UpdateFilter(refresh_all=True))
+
+    def _load_history_on_error(self, packed_error_info) -> None:
+        """Load history on error."""
+        self.wallet.stop_loading_history()
+        self.updateUi()
+        self.update_display_balance()
+        self.wallet_signals.updated.emit(UpdateFilter(refresh_all=True))
+        caught_exception_message(
+            packed_error_info[1],
+            self.tr("The transaction history of wallet {id} could not be loaded.").format(id=self.wallet.id),
+            exc_info=packed_error_info,
+        )
 
     def stop_sync_timer(self) -> None:
         """Stop sync timer."""
@@ -665,7 +777,11 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
     @file_path.setter
     def file_path(self, value: str | None) -> None:
         """File path."""
+        if self._file_path:
+            derived_key_cache.close_session(self._file_path)
         self._file_path = value
+        if value:
+            derived_key_cache.open_session(value)
 
     def create_and_add_settings_tab(self) -> tuple[DescriptorUI, SidebarNode]:
         "Create a wallet settings tab, such that one can create a wallet (e.g. with xpub)"
@@ -796,7 +912,10 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
         self.tabs.setTitle(new_id)
 
         # move wallet
+        background_saver.wait(old_file_path)
         shutil.move(old_file_path, new_file_path)
+        if os.path.exists(old_journal_path := Journal.path_for(old_file_path)):
+            shutil.move(old_journal_path, Journal.path_for(new_file_path))
         self.remove_lockfile(Path(old_file_path))
 
         # set the new file_path
@@ -854,9 +973,10 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
                 ):
                     logger.info("No file selected")
                     return None
+            derived_key_cache.open_session(self._file_path)
 
         # if it is the first time saving, then the user can set a password
-        if not os.path.isfile(self.file_path):
+        if not os.path.isfile(self.file_path) and not background_saver.is_pending(self.file_path):
             self.password = PasswordCreation().get_password()
 
         self.save_to(file_path=self.file_path)
@@ -867,13 +987,63 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
         original_id = self.wallet.id
         if wallet_id:
             self.wallet.id = wallet_id
-        super().save(
-            file_path,
-            password=self.password,
-        )
+
+        serialize_persistence = self.wallet.serialize_persistence
+        try:
+            serialize_persistence.change_set_encoding = ChangeSetEncoding(
+                self.config.wallet_change_set_encoding
+            )
+        except ValueError:
+            logger.warning(f"Unknown change_set encoding {self.config.wallet_change_set_encoding}")
+        # only the json dumps is created here; encrypting and writing is done in the background
+        if file_path != self.file_path:
+            # e.g. backups must be self-contained
+            super().save(
+                file_path,
+                password=self.password,
+                in_background=True,
+                on_error=self.signal_save_failed.emit,
+            )
+        elif self.config.wallet_journal_mode:
+            # the journal must be written first, such that the wallet file never refers to missing records
+            serialize_persistence.save_to_journal(
+                file_path,
+                password=self.password,
+                loop_in_thread=self.loop_in_thread,
+                labels=self.wallet.labels,
+            )
+            with serialize_persistence.change_set_in_journal(), self.wallet.labels.data_in_journal():
+                super().save(
+                    file_path,
+                    password=self.password,
+                    in_background=True,
+                    on_error=self.signal_save_failed.emit,
+                )
+        elif os.path.exists(Journal.path_for(file_path)):
+            # the wallet file must be written and self-contained, before the journal can be removed
+            background_saver.wait(file_path)
+            super().save(file_path, password=self.password)
+            serialize_persistence.remove_journal(file_path)
+        else:
+            super().save(
+                file_path,
+                password=self.password,
+                in_background=True,
+                on_error=self.signal_save_failed.emit,
+            )
         self.wallet.id = original_id
         logger.info(f"wallet {self.wallet.id} saved to {file_path}")
 
+    def _on_save_failed(self, file_path: str, e: Exception) -> None:
+        """Shows the error of a failed background save."""
+        caught_exception_message(
+            e,
+            self.tr("Wallet {id} could not be saved to {file_path}").format(
+                id=self.wallet.id, file_path=file_path
+            ),
+            exc_info=(type(e), e, e.__traceback__),
+        )
+
     def change_password(self) -> str | None:
         """Change password."""
         if self.password:
@@ -952,8 +1122,7 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
             )
 
         self.notified_tx_ids -= set([tx.txid for tx in removed_txs])
-        # all the lists must be updated
-        self.refresh_caches_and_ui_lists(force_ui_refresh=True)
+        # the lists are updated by refresh_caches_and_ui_lists, which includes the removed txs
 
     def handle_appended_txs(self, appended_txs: list[TransactionDetails]) -> None:
         """Handle appended txs."""
@@ -986,6 +1155,31 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
         self.hanlde_removed_txs(delta_txs.removed)
         self.handle_appended_txs(delta_txs.appended)
 
+    def _update_filter_of_delta_txs(self, delta_txs: DeltaCacheListTransactions) -> UpdateFilter:
+        """UpdateFilter with every txid, outpoint and address touched by delta_txs."""
+        txids: set[str] = set()
+        outpoints: set[OutPoint] = set()
+        addresses: set[str] = set()
+        for tx in delta_txs.appended + delta_txs.removed + delta_txs.modified:
+            txids.add(tx.txid)
+            for vout, txout in enumerate(tx.transaction.output()):
+                outpoints.add(OutPoint(txid=tx.bdk_txid, vout=vout))
+                if address := self.wallet.get_address_of_txout(tx.txid, vout, TxOut.from_bdk(txout)):
+                    addresses.add(address)
+            for tx_input in tx.transaction.input():
+                outpoint = OutPoint.from_bdk(tx_input.previous_output)
+                outpoints.add(outpoint)
+                if python_txo := self.wallet.get_python_txo(str(outpoint)):
+                    addresses.add(python_txo.address)
+
+        return UpdateFilter(
+            txids=txids,
+            outpoints=outpoints,
+            # foreign addresses would make the address handlers search for them
+            addresses={address for address in addresses if self.wallet.is_my_address(address)},
+            reason=UpdateFilterReason.TransactionChange,
+        )
+
     @time_logger
     def refresh_caches_and_ui_lists(
         self,
@@ -1029,15 +1223,11 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
             # now do the UI
             logger.debug("start refresh ui")
 
+            # the delta lets the lists update only the affected rows
             self.wallet_signals.updated.emit(
-                UpdateFilter(
-                    refresh_all=True,
-                    reason=(
-                        UpdateFilterReason.TransactionChange
-                        if change_dict
-                        else UpdateFilterReason.ForceRefresh
-                    ),
-                )
+                self._update_filter_of_delta_txs(delta_txs)
+                if change_dict
+                else UpdateFilter(refresh_all=True, reason=UpdateFilterReason.ForceRefresh)
             )
         elif chain_height_advanced:
             self.wallet_signals.updated.emit(UpdateFilter(reason=UpdateFilterReason.ChainHeightAdvanced))
@@ -1240,6 +1430,9 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
             self.wallet_signals, self.wallet, parent=top_widget, signals_min=self.signals
         )
 
+        # QtCharts is only loaded once the first wallet history is shown
+        from .wallet_balance_chart import WalletBalanceChart
+
         wallet_balance_chart = WalletBalanceChart(
             self.wallet,
             wallet_signals=self.wallet_signals,
@@ -1309,7 +1502,6 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
         category_python_txo_dict = self.wallet.get_category_python_txo_dict(include_spent=True)
 
         category_infos: list[CategoryInfo] = []
-        address_category_dict_raw = self.wallet.labels.get_category_dict_raw(filter_type=LabelType.addr)
 
         for category in self.wallet.labels.categories:
             txos = category_python_txo_dict.get(category, [])
@@ -1318,7 +1510,9 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
             utxo_balance = python_utxo_balance(utxos)
             item = CategoryInfo(
                 category=category,
-                address_count=len(address_category_dict_raw[category]),
+                address_count=self.wallet.labels.count_labels_of_category(
+                    category, filter_type=LabelType.addr
+                ),
                 txo_balance=txo_balance,
                 utxo_balance=utxo_balance,
                 txo_count=len(txos),
@@ -1381,7 +1575,7 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
 
         It should be called via a signal, since the caller is likely from another thread, and the UI update wont work properly.
         """
-        if not self.wallet.client:
+        if not self.wallet.client or self.wallet.is_loading_history():
             return
 
         sync_status = self.wallet.client.sync_status
@@ -1635,9 +1829,23 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
         """Get editable protowallet."""
         return self.wallet.as_protowallet()
 
+    def _create_file_progress_dialog(self, text: str) -> QProgressDialog:
+        """A window modal progress dialog, whose setValue keeps the ui responsive."""
+        dialog = QProgressDialog(text, None, 0, 100, self)
+        dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        dialog.setMinimumDuration(500)
+        return dialog
+
+    def _run_with_file_progress(self, text: str, f: Callable[[ProgressCallback], T]) -> T:
+        """Call f with a progress callback that is shown in a progress dialog."""
+        dialog = self._create_file_progress_dialog(text)
+        try:
+            return f(lambda done, total: dialog.setValue(int(100 * done / total) if total else 100))
+        finally:
+            dialog.close()
+
     def export_bip329_labels(self) -> None:
         """Export bip329 labels."""
-        s = self.wallet.labels.export_bip329_jsonlines()
         file_path, _ = QFileDialog.getSaveFileName(
             self,
             self.tr("Export labels"),
@@ -1648,12 +1856,13 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
             logger.info(self.tr("No file selected"))
             return
 
-        with open(file_path, "w") as file:
-            file.write(s)
+        self._run_with_file_progress(
+            self.tr("Exporting labels"),
+            lambda progress: self.wallet.labels.export_bip329_file(file_path, progress=progress),
+        )
 
     def export_labels(self) -> None:
         """Export labels."""
-        s = self.wallet.labels.dumps_data_jsonlines()
         file_path, _ = QFileDialog.getSaveFileName(
             self,
             self.tr("Export labels"),
@@ -1664,8 +1873,10 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
             logger.info(self.tr("No file selected"))
             return
 
-        with open(file_path, "w") as file:
-            file.write(s)
+        self._run_with_file_progress(
+            self.tr("Exporting labels"),
+            lambda progress: self.wallet.labels.export_dumps_data_file(file_path, progress=progress),
+        )
 
     def import_bip329_labels(self) -> None:
         """Import bip329 labels."""
@@ -1679,10 +1890,10 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
             logger.info(self.tr("No file selected"))
             return
 
-        with open(file_path) as file:
-            lines = file.read()
-
-        changed_data = self.wallet.labels.import_bip329_jsonlines(lines)
+        changed_data = self._run_with_file_progress(
+            self.tr("Importing labels"),
+            lambda progress: self.wallet.labels.import_bip329_file(file_path, progress=progress),
+        )
         self.wallet_signals.updated.emit(UpdateFilter(refresh_all=True, reason=UpdateFilterReason.UserImport))
         Message(
             self.tr("Successfully updated {number} Labels").format(number=len(changed_data)),
@@ -1701,9 +1912,6 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
             logger.info(self.tr("No file selected"))
             return
 
-        with open(file_path) as file:
-            lines = file.read()
-
         force_overwrite = not bool(
             question_dialog(
                 "Do you want to keep existing labels?",
@@ -1712,7 +1920,12 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
             )
         )
 
-        changed_data = self.wallet.labels.import_dumps_data(lines, force_overwrite=force_overwrite)
+        changed_data = self._run_with_file_progress(
+            self.tr("Importing labels"),
+            lambda progress: self.wallet.labels.import_dumps_data_file(
+                file_path, force_overwrite=force_overwrite, progress=progress
+            ),
+        )
         self.wallet_signals.updated.emit(UpdateFilter(refresh_all=True, reason=UpdateFilterReason.UserImport))
         Message(
             self.tr("Successfully updated {number} Labels").format(number=len(changed_data)),
@@ -1768,6 +1981,8 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
         if not sync_client:
             return
 
+        from bitcoin_safe.pdf_statement import make_and_open_pdf_statement
+
         make_and_open_pdf_statement(
             self.wallet,
             lang_code=QLocale().name() or DEFAULT_LANG_CODE,
@@ -1782,6 +1997,13 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
         # crucial is to explicitly close everything that has a wallet attached
         """Close."""
         self.stop_sync_timer()
+        if self._file_path:
+            # the failure signal of the last save would not be delivered after closing
+            background_saver.wait(self._file_path)
+            if e := background_saver.failure(self._file_path):
+                self._on_save_failed(self._file_path, e)
+        if self._file_path:
+            derived_key_cache.close_session(self._file_path)
         if self.plugin_manager:
             self.plugin_manager.disconnect_all()
         self.quick_receive.close()
@@ -1797,6 +2019,9 @@ class QTWallet(QtWalletBase, BaseSaveableClass):
             self.plugin_manager.close()
         self.tabs.clearChildren()
         self.tabs.close()
+        if self._file_path and not Path(self._file_path).exists():
+            # the wallet file was deleted, so its cached addresses must not stay behind
+            self.wallet.remove_address_cache()
         self.wallet.close()
         SignalTools.disconnect_all_signals_from(self.wallet_signals)
         self.setParent(None)  #  THIS made it that the qt wallet is destroyed
@@ -30,11 +30,14 @@ from __future__ import annotations
 
 import logging
 
+from bitcoin_safe_lib.gui.qt.signal_tracker import SignalTracker
+
 from bitcoin_safe.gui.qt.my_treeview import MyTreeView
 from bitcoin_safe.gui.qt.qt_wallet import QTWallet
 from bitcoin_safe.gui.qt.sidebar.sidebar_tree import SidebarNode
 from bitcoin_safe.gui.qt.ui_tx.ui_tx_creator import UITx_Creator
 from bitcoin_safe.html_utils import html_f
+from bitcoin_safe.search_index import SubstringIndex, WalletSearchIndex
 from bitcoin_safe.signals import WalletFunctions
 
 from .search_tree_view import ResultItem, SearchTreeView, format_result_text
@@ -46,6 +49,8 @@ logger = logging.getLogger(__name__)
 
 
 class SearchWallets(SearchTreeView):
+    max_results_per_group = 50
+
     def __init__(self, wallet_functions: WalletFunctions, parent=None, search_box_on_bottom=True) -> None:
         """Initialize instance."""
         super().__init__(
@@ -55,6 +60,8 @@ class SearchWallets(SearchTreeView):
             search_box_on_bottom=search_box_on_bottom,
         )
         self.wallet_functions = wallet_functions
+        self._search_indexes: dict[str, WalletSearchIndex] = {}
+        self._signal_tracker_wallet_signals = SignalTracker()
 
         self.updateUi()
 
@@ -82,12 +89,64 @@ class SearchWallets(SearchTreeView):
             if isinstance(result_item.obj.data, UITx_Creator):
                 result_item.obj.data.set_utxo_list_visible(True)
 
+    def _get_search_index(self, qt_wallet: QTWallet) -> WalletSearchIndex:
+        """Get the search index of the wallet, creating it on first use."""
+        wallet = qt_wallet.wallet
+        search_index = self._search_indexes.get(wallet.id)
+        if search_index and search_index.wallet is wallet:
+            return search_index
+
+        search_index = WalletSearchIndex(wallet)
+        self._search_indexes[wallet.id] = search_index
+        self._signal_tracker_wallet_signals.connect(
+            qt_wallet.wallet_signals.updated_coalesced, search_index.update_with_filter
+        )
+        return search_index
+
+    def _get_search_indexes(self, qt_wallets: list[QTWallet]) -> list[WalletSearchIndex]:
+        """Get the search indexes of the open wallets (and forget closed ones)."""
+        search_indexes = [self._get_search_index(qt_wallet) for qt_wallet in qt_wallets]
+        if len(self._search_indexes) != len(search_indexes) or any(
+            self._search_indexes.get(search_index.wallet.id) is not search_index
+            for search_index in search_indexes
+        ):
+            # a wallet was closed or reopened
+            self._signal_tracker_wallet_signals.disconnect_all()
+            self._search_indexes.clear()
+            search_indexes = [self._get_search_index(qt_wallet) for qt_wallet in qt_wallets]
+        return search_indexes
+
+    def _add_results(
+        self,
+        keys: list[str],
+        texts: SubstringIndex,
+        search_text: str,
+        parent: ResultItem,
+        obj,
+        obj_keys: dict[str, str] | None = None,
+    ) -> None:
+        """Add a ResultItem for each of keys (at most max_results_per_group)."""
+        for key in keys[: self.max_results_per_group]:
+            ResultItem(
+                format_result_text(full_text=texts.get(key) or key, search_text=search_text),
+                parent=parent,
+                obj=obj,
+                obj_key=obj_keys.get(key) if obj_keys is not None else key,
+            )
+        if len(keys) > self.max_results_per_group:
+            ResultItem(self.tr("More results, refine the search"), parent=parent)
+
     def do_search(self, search_text: str) -> ResultItem:
         """Do search."""
         search_text = search_text.strip()
         root = ResultItem("")
+        if not search_text:
+            return root
         qt_wallets: list[QTWallet] = list(self.wallet_functions.get_qt_wallets.emit().values())
-        for qt_wallet in qt_wallets:
+        # one more than shown, to know whether there are more results
+        limit = self.max_results_per_group + 1
+        for qt_wallet, search_index in zip(qt_wallets, self._get_search_indexes(qt_wallets), strict=True):
+            search_index.ensure_built()
             wallet_item = ResultItem(
                 html_f(qt_wallet.wallet.id, bf=True), icon=qt_wallet.tabs.icon, obj=qt_wallet
             )
@@ -98,28 +157,14 @@ class SearchWallets(SearchTreeView):
                 icon=qt_wallet.hist_node.icon,
                 obj=qt_wallet.hist_node,
             )
-            for txid in qt_wallet.wallet.get_dict_fulltxdetail().keys():
-                if search_text in txid:
-                    ResultItem(
-                        format_result_text(full_text=txid, search_text=search_text),
-                        parent=wallet_tx_ids,
-                        obj=qt_wallet.history_list,
-                        obj_key=txid,
-                    )
-                    # connect also the higher parents, so the results appear at all
-                    wallet_tx_ids.set_parent(wallet_item)
-                    wallet_item.set_parent(root)
-                label = qt_wallet.wallet.get_label_for_txid(txid, autofill_from_addresses=False)
-                if label and (search_text.lower() in label.lower()):
-                    ResultItem(
-                        format_result_text(full_text=label, search_text=search_text),
-                        parent=wallet_tx_ids,
-                        obj=qt_wallet.history_list,
-                        obj_key=txid,
-                    )
-                    # connect also the higher parents, so the results appear at all
-                    wallet_tx_ids.set_parent(wallet_item)
-                    wallet_item.set_parent(root)
+            for texts in [search_index.txids, search_index.tx_labels]:
+                self._add_results(
+                    texts.search(search_text, limit=limit),
+                    texts,
+                    search_text,
+                    parent=wallet_tx_ids,
+                    obj=qt_wallet.history_list,
+                )
 
             # addresses
             wallet_addresses = ResultItem(
@@ -127,28 +172,14 @@ class SearchWallets(SearchTreeView):
                 icon=qt_wallet.address_node.icon,
                 obj=qt_wallet.address_node,
             )
-            for address in qt_wallet.wallet.get_addresses():
-                if search_text in address:
-                    ResultItem(
-                        format_result_text(full_text=address, search_text=search_text),
-                        parent=wallet_addresses,
-                        obj=qt_wallet.address_list,
-                        obj_key=address,
-                    )
-                    # connect also the higher parents, so the results appear at all
-                    wallet_addresses.set_parent(wallet_item)
-                    wallet_item.set_parent(root)
-                label = qt_wallet.wallet.get_label_for_address(address, autofill_from_txs=False)
-                if label and (search_text.lower() in label.lower()):
-                    ResultItem(
-                        format_result_text(full_text=label, search_text=search_text),
-                        parent=wallet_addresses,
-                        obj=qt_wallet.address_list,
-                        obj_key=address,
-                    )
-                    # connect also the higher parents, so the results appear at all
-                    wallet_addresses.set_parent(wallet_item)
-                    wallet_item.set_parent(root)
+            for texts in [search_index.addresses, search_index.address_labels]:
+                self._add_results(
+                    texts.search(search_text, limit=limit),
+                    texts,
+                    search_text,
+                    parent=wallet_addresses,
+                    obj=qt_wallet.address_list,
+                )
 
             # utxos
             wallet_utxos = ResultItem(
@@ -161,28 +192,27 @@ class SearchWallets(SearchTreeView):
                 icon=qt_wallet.hist_node.icon,
                 obj=qt_wallet.hist_node,
             )
-            for pythonutxo in qt_wallet.wallet.get_all_txos_dict().values():
-                outpoint_str = str(pythonutxo.outpoint)
-                if search_text in outpoint_str:
-                    if pythonutxo.is_spent_by_txid:
-                        ResultItem(
-                            format_result_text(full_text=outpoint_str, search_text=search_text),
-                            parent=wallet_txos,
-                            obj=qt_wallet.history_list,
-                            obj_key=pythonutxo.is_spent_by_txid,
-                        )
-                        # connect also the higher parents, so the results appear at all
-                        wallet_txos.set_parent(wallet_item)
-                        wallet_item.set_parent(root)
-                    else:
-                        ResultItem(
-                            format_result_text(full_text=outpoint_str, search_text=search_text),
-                            parent=wallet_utxos,
-                            obj=qt_wallet.uitx_creator.utxo_list,
-                            obj_key=outpoint_str,
-                        )
-                        # connect also the higher parents, so the results appear at all
-                        wallet_utxos.set_parent(wallet_item)
-                        wallet_item.set_parent(root)
+            self._add_results(
+                search_index.spent_txos.search(search_text, limit=limit),
+                search_index.spent_txos,
+                search_text,
+                parent=wallet_txos,
+                obj=qt_wallet.history_list,
+                obj_keys=search_index.spent_by,
+            )
+            self._add_results(
+                search_index.utxos.search(search_text, limit=limit),
+                search_index.utxos,
+                search_text,
+                parent=wallet_utxos,
+                obj=qt_wallet.uitx_creator.utxo_list,
+            )
+
+            # connect also the higher parents, so the results appear at all
+            for group in [wallet_tx_ids, wallet_addresses, wallet_txos, wallet_utxos]:
+                if group.children:
+                    group.set_parent(wallet_item)
+            if wallet_item.children:
+                wallet_item.set_parent(root)
 
         return root
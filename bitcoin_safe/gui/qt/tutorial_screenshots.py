@@ -40,13 +40,14 @@ from bitcoin_safe.gui.qt.notification_bar import NotificationBar
 from bitcoin_safe.gui.qt.synced_tab_widget import SyncedTabWidget
 from bitcoin_safe.gui.qt.util import svg_tools
 from bitcoin_safe.i18n import translate
-from bitcoin_safe.pdfrecovery import TEXT_24_WORDS
 
 from ...hardware_signers import HardwareSigners
 from .util import adjust_bg_color_for_darkmode, screenshot_path
 
 logger = logging.getLogger(__name__)
 
+TEXT_24_WORDS = translate("pdf", "12 or 24")
+
 
 class ScreenshotsTutorial(QWidget):
     enabled_hardware_signers = HardwareSigners.as_list()  # activate all of them
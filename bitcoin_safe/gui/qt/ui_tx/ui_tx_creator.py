@@ -289,7 +289,9 @@ class UITx_Creator(UITx_Base, BaseSaveableClass):
         self.category_list.set_category_core(category_core)
         self.wallet = category_core.wallet if category_core else None
         if self.wallet and (_wallet_signals := self.wallet_functions.wallet_signals.get(self.wallet.id)):
-            self._signal_tracker_wallet_signals.connect(_wallet_signals.updated, self.update_with_filter)
+            self._signal_tracker_wallet_signals.connect(
+                _wallet_signals.updated_coalesced, self.update_with_filter
+            )
 
         if self.wallet and (_wallet_signal := self.wallet_functions.wallet_signals.get(self.wallet.id)):
             self.button_ok.set_enable_signal(enable_signal=(_wallet_signal.finished_psbt_creation))
@@ -1163,10 +1163,20 @@ class UITx_Viewer(UITx_Base):
                     continue
                 all_addresses.add(address)
 
+        # the transaction addresses are also compared to all addresses of the wallets
+        wallet_addresses = [(wallet.address_poisoning_index, wallet.get_addresses()) for wallet in wallets]
+
         async def do() -> Any:
             """Do."""
             start_time = time()
             poisonous_matches = AddressComparer.poisonous(all_addresses)
+            known_pairs = {(a, b) for a, b, _ in poisonous_matches}
+            for index, addresses in wallet_addresses:
+                index.add(addresses)
+                for a, b, match in index.poisonous(all_addresses):
+                    if (a, b) not in known_pairs:
+                        known_pairs.add((a, b))
+                        poisonous_matches.append((a, b, match))
             logger.debug(
                 f"AddressComparer.poisonous {len(poisonous_matches)} results in {time() - start_time}s"
             )
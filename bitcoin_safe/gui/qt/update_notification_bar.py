@@ -86,7 +86,7 @@ class UpdateNotificationBar(NotificationBar):
         refresh_icon = svg_tools.get_QIcon("bi--arrow-clockwise.svg")
         self.optionalButton.setIcon(refresh_icon)
 
-        self.verifyer = SignatureVerifyer(list_of_known_keys=[self.key], proxies=self.proxies)
+        self._verifyer: SignatureVerifyer | None = None
         self.assets: list[Asset] = []
         self.setVisible(False)
 
@@ -106,6 +106,17 @@ class UpdateNotificationBar(NotificationBar):
         self.refresh()
         self.signals_min.language_switch.connect(self.refresh)
 
+    @property
+    def verifyer(self) -> SignatureVerifyer:
+        """The signature verifyer, created on first use.
+
+        Creating it parses the known gpg keys, which loads pgpy, so it is deferred until a download is
+        actually verified.
+        """
+        if self._verifyer is None:
+            self._verifyer = SignatureVerifyer(list_of_known_keys=[self.key], proxies=self.proxies)
+        return self._verifyer
+
     def get_asset_tag(self) -> str | None:
         """Get asset tag."""
         if self.assets:
@@ -57,6 +57,7 @@ from __future__ import annotations
 
 import enum
 import logging
+from collections.abc import Iterable
 from functools import partial
 from typing import Any
 
@@ -200,6 +201,8 @@ class UTXOList(MyTreeView[OutPoint]):
         self.txout_dict: dict[str, bdk.TxOut] | dict[str, TxOut] = txout_dict if txout_dict else {}
         self._pythonutxo_dict: dict[str, PythonUtxo] = {}  # outpoint --> txdetails
         self._wallet_dict: dict[str, Wallet] = {}  # outpoint --> wallet
+        # outpoint --> ROLE_SORT_ORDER of the shown rows
+        self._sort_indexes: dict[OutPoint, int] = {}
         self.current_categories_filter: set[str] | None = None
 
         self.setTextElideMode(Qt.TextElideMode.ElideMiddle)
@@ -244,7 +247,7 @@ class UTXOList(MyTreeView[OutPoint]):
     def set_outpoints(self, outpoints: list[OutPoint]):
         """Set outpoints."""
         self.outpoints = outpoints
-        self.update_content()
+        self.update_outpoint_rows()
 
     def create_menu(self, position: QPoint) -> Menu:
         """Create menu."""
@@ -372,6 +375,10 @@ class UTXOList(MyTreeView[OutPoint]):
         ):
             should_update = True
 
+        if update_filter.is_transaction_delta():
+            # rows of added or spent outpoints are inserted/removed by set_outpoints
+            return self.refresh_outpoints(update_filter.outpoints)
+
         if should_update:
             return self.update_content()
 
@@ -398,54 +405,77 @@ class UTXOList(MyTreeView[OutPoint]):
 
         self._after_update_content()
 
-    def update_content(self):
-        """Update content."""
-        if self.maybe_defer_update():
-            return
+    def _fill_lookup_dicts(self) -> None:
+        """Build dicts to look up the outpoints later (fast)."""
+        self._wallet_dict = {}  # outpoint_str:Wallet
+        self._pythonutxo_dict = {}  # outpoint_str:PythonUTXO
+        for wallet_ in get_wallets(self.wallet_functions):
+            txos_dict = wallet_.get_all_txos_dict(include_not_mine=True)
+            self._pythonutxo_dict.update(txos_dict)
+            self._wallet_dict.update({outpoint_str: wallet_ for outpoint_str in txos_dict.keys()})
+
+    def _update_lookup_dicts(self, outpoints: Iterable[OutPoint]) -> None:
+        """Update the lookup dicts (see _fill_lookup_dicts) for outpoints only."""
+        txos_dicts = [
+            (wallet_, wallet_.get_all_txos_dict(include_not_mine=True))
+            for wallet_ in get_wallets(self.wallet_functions)
+        ]
+        for outpoint in outpoints:
+            outpoint_str = str(outpoint)
+            self._wallet_dict.pop(outpoint_str, None)
+            self._pythonutxo_dict.pop(outpoint_str, None)
+            for wallet_, txos_dict in txos_dicts:
+                if python_utxo := txos_dict.get(outpoint_str):
+                    self._pythonutxo_dict[outpoint_str] = python_utxo
+                    self._wallet_dict[outpoint_str] = wallet_
+
+    def _init_row(self, outpoint: OutPoint, sort_index: int) -> list[QStandardItem]:
+        """Init row."""
 
         def str_format(v):
             """Str format."""
             return str(v) if v else "Unknown"
 
-        self._before_update_content()
+        wallet, python_utxo, address, satoshis = self.get_wallet_address_satoshis(outpoint)
 
-        # build dicts to look up the outpoints later (fast)
+        labels = [""] * len(self.Columns)
+        labels[self.Columns.OUTPOINT] = str(outpoint)
+        labels[self.Columns.ADDRESS] = str_format(address)
+        labels[self.Columns.AMOUNT] = str_format(satoshis)
+        items = [QStandardItem(x) for x in labels]
+        self.set_editability(items)
+        items[self.Columns.OUTPOINT].setText(str(outpoint))
+        items[self.Columns.OUTPOINT].setData(sort_index, MyItemDataRole.ROLE_SORT_ORDER)
+        items[self.Columns.OUTPOINT].setData(outpoint, MyItemDataRole.ROLE_KEY)
+        items[self.Columns.OUTPOINT].setData(str(outpoint), MyItemDataRole.ROLE_CLIPBOARD_DATA)
+        items[self.Columns.OUTPOINT].setToolTip(str(outpoint))
+
+        # items[self.Columns.ADDRESS].setFont(QFont(MONOSPACE_FONT))
+        items[self.Columns.ADDRESS].setData(labels[self.Columns.ADDRESS], MyItemDataRole.ROLE_CLIPBOARD_DATA)
+        items[self.Columns.ADDRESS].setData(sort_index, MyItemDataRole.ROLE_SORT_ORDER)
+        items[self.Columns.ADDRESS].setToolTip(labels[self.Columns.ADDRESS])
+        # items[self.Columns.AMOUNT].setFont(QFont(MONOSPACE_FONT))
+        items[self.Columns.AMOUNT].setData(
+            satoshis.value if satoshis else str_format(satoshis), MyItemDataRole.ROLE_CLIPBOARD_DATA
+        )
+        return items
 
-        self._wallet_dict = {}  # outpoint_str:Wallet
-        self._pythonutxo_dict = {}  # outpoint_str:PythonUTXO
-        for wallet_ in get_wallets(self.wallet_functions):
-            txos_dict = wallet_.get_all_txos_dict(include_not_mine=True)
-            self._pythonutxo_dict.update(txos_dict)
-            self._wallet_dict.update({outpoint_str: wallet_ for outpoint_str in txos_dict.keys()})
+    def update_content(self):
+        """Update content."""
+        if self.maybe_defer_update():
+            return
+
+        self._before_update_content()
+
+        self._fill_lookup_dicts()
 
         self._source_model.clear()
+        self._sort_indexes.clear()
         self.update_headers(self.get_headers())
         for i, outpoint in enumerate(self.outpoints):
             outpoint = OutPoint.from_bdk(outpoint)
-            wallet, python_utxo, address, satoshis = self.get_wallet_address_satoshis(outpoint)
-
-            labels = [""] * len(self.Columns)
-            labels[self.Columns.OUTPOINT] = str(outpoint)
-            labels[self.Columns.ADDRESS] = str_format(address)
-            labels[self.Columns.AMOUNT] = str_format(satoshis)
-            items = [QStandardItem(x) for x in labels]
-            self.set_editability(items)
-            items[self.Columns.OUTPOINT].setText(str(outpoint))
-            items[self.Columns.OUTPOINT].setData(i, MyItemDataRole.ROLE_SORT_ORDER)
-            items[self.Columns.OUTPOINT].setData(outpoint, MyItemDataRole.ROLE_KEY)
-            items[self.Columns.OUTPOINT].setData(str(outpoint), MyItemDataRole.ROLE_CLIPBOARD_DATA)
-            items[self.Columns.OUTPOINT].setToolTip(str(outpoint))
-
-            # items[self.Columns.ADDRESS].setFont(QFont(MONOSPACE_FONT))
-            items[self.Columns.ADDRESS].setData(
-                labels[self.Columns.ADDRESS], MyItemDataRole.ROLE_CLIPBOARD_DATA
-            )
-            items[self.Columns.ADDRESS].setData(i, MyItemDataRole.ROLE_SORT_ORDER)
-            items[self.Columns.ADDRESS].setToolTip(labels[self.Columns.ADDRESS])
-            # items[self.Columns.AMOUNT].setFont(QFont(MONOSPACE_FONT))
-            items[self.Columns.AMOUNT].setData(
-                satoshis.value if satoshis else str_format(satoshis), MyItemDataRole.ROLE_CLIPBOARD_DATA
-            )
+            items = self._init_row(outpoint, i)
+            self._sort_indexes[outpoint] = i
 
             # add item
             count = self._source_model.rowCount()
@@ -459,6 +489,76 @@ class UTXOList(MyTreeView[OutPoint]):
         self._after_update_content()
         super().update_content()
 
+    @time_logger
+    def update_outpoint_rows(self) -> None:
+        """Insert and remove rows such that they match self.outpoints.
+
+        Rows of outpoints that stay are not rebuilt, only their sort position
+        is updated if it shifted.
+        """
+        if self._pending_update or not self._source_model.rowCount():
+            return self.update_content()
+        if self.maybe_defer_update():
+            return
+
+        model = self._source_model
+        shown = self._sort_indexes
+        sort_indexes = {OutPoint.from_bdk(outpoint): i for i, outpoint in enumerate(self.outpoints)}
+        removed = shown.keys() - sort_indexes.keys()
+        inserted = [outpoint for outpoint in sort_indexes if outpoint not in shown]
+        shifted = [
+            outpoint for outpoint, i in sort_indexes.items() if outpoint in shown and shown[outpoint] != i
+        ]
+        if not removed and not inserted and not shifted:
+            return
+        if len(removed) + len(inserted) + len(shifted) > self.max_incremental_row_changes:
+            return self.update_content()
+        logger.debug(
+            f"{self.__class__.__name__} update_outpoint_rows {len(inserted)=} {len(removed)=} {len(shifted)=}"
+        )
+
+        self._update_lookup_dicts([*removed, *inserted])
+        with self._incremental_update() as touched_rows:
+            # remove from the bottom, so the rows found before stay valid
+            removed_rows = [row for outpoint in removed for row in model.rows_of_key(outpoint)]
+            for row in sorted(removed_rows, reverse=True):
+                model.removeRow(row)
+
+            for outpoint in shifted:
+                for row in model.rows_of_key(outpoint):
+                    for column in (self.Columns.OUTPOINT, self.Columns.ADDRESS):
+                        if item := model.item(row, column):
+                            item.setData(sort_indexes[outpoint], MyItemDataRole.ROLE_SORT_ORDER)
+                    touched_rows.add(row)
+
+            for outpoint in inserted:
+                items = self._init_row(outpoint, sort_indexes[outpoint])
+                count = model.rowCount()
+                model.insertRow(count, items)
+                self.refresh_row(outpoint, count)
+                touched_rows.add(count)
+
+            if self.current_categories_filter is not None:
+                self.update_base_hidden_rows()
+                touched_rows.update(range(model.rowCount()))
+            self._sort_indexes = sort_indexes
+
+    @time_logger
+    def refresh_outpoints(self, outpoints: Iterable[OutPoint]) -> None:
+        """Refresh the rows of outpoints in place."""
+        if self._pending_update or not self._source_model.rowCount():
+            return self.update_content()
+        if self.maybe_defer_update():
+            return
+
+        outpoints = list(outpoints)
+        self._update_lookup_dicts(outpoints)
+        with self._incremental_update() as touched_rows:
+            for outpoint in outpoints:
+                for row in self._source_model.rows_of_key(outpoint):
+                    self.refresh_row(outpoint, row)
+                    touched_rows.add(row)
+
     def refresh_row(self, key: bdk.OutPoint, row: int):
         """Refresh row."""
         assert row is not None
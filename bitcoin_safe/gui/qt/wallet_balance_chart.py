@@ -467,7 +467,7 @@ class WalletBalanceChart(BalanceChart):
         self.updateUi()
 
         # signals
-        self.signal_tracker.connect(self.wallet_signals.updated, self.update_balances)
+        self.signal_tracker.connect(self.wallet_signals.updated_coalesced, self.update_balances)
         self.signal_tracker.connect(self.wallet_signals.language_switch, self.updateUi)
 
     def highlight_txids(self, txids: set[str]):
@@ -69,6 +69,7 @@ from bitcoin_safe.gui.qt.keystore_ui import (
 from bitcoin_safe.gui.qt.qt_wallet import QTWallet, QtWalletBase, SyncStatus
 from bitcoin_safe.gui.qt.register_multisig import RegisterMultisigInteractionWidget
 from bitcoin_safe.gui.qt.tutorial_screenshots import (
+    TEXT_24_WORDS,
     ScreenshotsGenerateSeed,
     ScreenshotsViewSeed,
 )
@@ -80,8 +81,6 @@ from bitcoin_safe.signals import UpdateFilter, UpdateFilterReason
 from bitcoin_safe.wallet import Wallet
 from bitcoin_safe.wallet_util import signer_name
 
-from ...pdf_labels import make_and_open_labels_pdf
-from ...pdfrecovery import TEXT_24_WORDS, make_and_open_pdf
 from ...pythonbdk_types import PythonUtxo, Recipient
 from ...signals import Signals
 from ...tx import TxUiInfos
@@ -543,6 +542,8 @@ class StickerTheHardware(BaseTab):
             for i in range(self.num_keystores())
         ]
 
+        from bitcoin_safe.pdf_labels import make_and_open_labels_pdf
+
         make_and_open_labels_pdf(
             wallet_id=protowallet.id,
             label_pairs=label_pairs,
@@ -880,6 +881,8 @@ class BackupSeed(BaseTab):
         if not self.refs.qt_wallet:
             Message(self.tr("Please complete the previous steps."))
             return
+        from bitcoin_safe.pdfrecovery import make_and_open_pdf
+
         make_and_open_pdf(
             self.refs.qt_wallet.wallet,
             lang_code=QLocale().name() or DEFAULT_LANG_CODE,
@@ -1650,9 +1653,9 @@ class Wizard(WizardBase):
 
         self.qtwalletbase.signals.language_switch.connect(self.updateUi)
         if self.qt_wallet:
-            self.qtwalletbase.wallet_functions.wallet_signals[self.qt_wallet.wallet.id].updated.connect(
-                self.on_utxo_update
-            )
+            self.qtwalletbase.wallet_functions.wallet_signals[
+                self.qt_wallet.wallet.id
+            ].updated_coalesced.connect(self.on_utxo_update)
 
     def on_hide_clicked(self, obj: object):
         """On hide clicked."""
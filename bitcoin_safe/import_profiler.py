@@ -0,0 +1,178 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import builtins
+import importlib.util
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, TextIO
+
+
+@dataclass
+class ImportRecord:
+    name: str
+    cumulative_ms: float = 0.0
+    self_ms: float = 0.0
+    children: list[str] = field(default_factory=list)
+
+
+class ImportTimeRecorder:
+    """Records how long the first import of every module takes.
+
+    This wraps ``builtins.__import__``, so only imports executed while the recorder is installed are
+    measured. Already loaded modules cost nothing and are not recorded. The cumulative time of a
+    module includes all modules it imports for the first time, the self time excludes them.
+    """
+
+    def __init__(self) -> None:
+        """Initialize instance."""
+        self.records: dict[str, ImportRecord] = {}
+        self._stack: list[ImportRecord] = []
+        self._original_import: Callable[..., Any] | None = None
+
+    @property
+    def is_installed(self) -> bool:
+        """Is installed."""
+        return self._original_import is not None
+
+    def install(self) -> None:
+        """Install."""
+        if self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        """Uninstall."""
+        if self._original_import is None:
+            return
+        builtins.__import__ = self._original_import
+        self._original_import = None
+
+    @staticmethod
+    def _resolve_name(name: str, globals: dict[str, Any] | None, level: int) -> str:
+        """Resolve name."""
+        if level == 0:
+            return name
+        package = (globals or {}).get("__package__") or ""
+        try:
+            return importlib.util.resolve_name("." * level + name, package)
+        except (ImportError, ValueError):
+            return name
+
+    def _timed(self, module_name: str, load: Callable[[], Any]) -> Any:
+        """Run load() and record its duration as the import time of module_name."""
+        record = ImportRecord(name=module_name)
+        self.records[module_name] = record
+        if self._stack:
+            self._stack[-1].children.append(module_name)
+        self._stack.append(record)
+        start = time.perf_counter()
+        try:
+            return load()
+        finally:
+            record.cumulative_ms = (time.perf_counter() - start) * 1000
+            self._stack.pop()
+            record.self_ms = record.cumulative_ms - sum(
+                self.records[child].cumulative_ms for child in record.children
+            )
+
+    def _forget(self, module_name: str) -> None:
+        """Forget a record, e.g. of a name that turned out not to be a module."""
+        self.records.pop(module_name, None)
+        if self._stack and module_name in self._stack[-1].children:
+            self._stack[-1].children.remove(module_name)
+
+    def _import_submodules(self, module_name: str, fromlist: tuple[str, ...] | list[str]) -> None:
+        """Time the submodules of ``from package import a, b`` individually.
+
+        The import machinery loads them without going through ``builtins.__import__``.
+        """
+        assert self._original_import is not None
+        module = sys.modules.get(module_name)
+        if module is None or not hasattr(module, "__path__"):
+            return
+        for item in fromlist:
+            submodule_name = f"{module_name}.{item}"
+            if (
+                not isinstance(item, str)
+                or item == "*"
+                or hasattr(module, item)
+                or submodule_name in sys.modules
+                or submodule_name in self.records
+            ):
+                continue
+            try:
+                self._timed(submodule_name, partial(self._original_import, submodule_name))
+            except ModuleNotFoundError as e:
+                # a plain attribute of the package, the import machinery ignores it as well
+                if e.name != submodule_name:
+                    raise
+                self._forget(submodule_name)
+
+    def _import(
+        self,
+        name: str,
+        globals: dict[str, Any] | None = None,
+        locals: dict[str, Any] | None = None,
+        fromlist: tuple[str, ...] | list[str] | None = (),
+        level: int = 0,
+    ) -> Any:
+        """Import."""
+        assert self._original_import is not None
+        module_name = self._resolve_name(name, globals, level)
+        if module_name not in sys.modules and module_name not in self.records:
+            self._timed(module_name, partial(self._original_import, name, globals, locals, (), level))
+        if fromlist:
+            self._import_submodules(module_name, fromlist)
+        return self._original_import(name, globals, locals, fromlist, level)
+
+    def top_level_records(self) -> list[ImportRecord]:
+        """Records that were not imported by another recorded module."""
+        children = {child for record in self.records.values() for child in record.children}
+        return [record for name, record in self.records.items() if name not in children]
+
+    def total_ms(self) -> float:
+        """Total import time of everything recorded."""
+        return sum(record.cumulative_ms for record in self.top_level_records())
+
+    def sorted_records(self) -> list[ImportRecord]:
+        """Records sorted by cumulative time, slowest first."""
+        return sorted(self.records.values(), key=lambda record: record.cumulative_ms, reverse=True)
+
+    def write_report(self, stream: TextIO, limit: int | None = None) -> None:
+        """Write a table of the per module import times, slowest first."""
+        stream.write(f"Total import time: {self.total_ms():.1f} ms for {len(self.records)} modules\n")
+        stream.write(f"{'cumulative ms':>14} {'self ms':>10}  module\n")
+        for record in self.sorted_records()[:limit]:
+            stream.write(f"{record.cumulative_ms:>14.1f} {record.self_ms:>10.1f}  {record.name}\n")
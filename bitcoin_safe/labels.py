@@ -30,10 +30,14 @@ from __future__ import annotations
 
 import copy
 import enum
+import functools
+import heapq
 import json
 import logging
+import os
 from collections import defaultdict
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Literal
@@ -43,9 +47,8 @@ from bitcoin_qr_tools.data import Data, DataType
 
 from bitcoin_safe.signals import UpdateFilter, UpdateFilterReason
 from bitcoin_safe.util import (
+    iter_jsonlines,
     jsonlines_to_list_of_dict,
-    list_of_dict_to_jsonline_list,
-    list_of_dict_to_jsonlines,
 )
 
 from .storage import BaseSaveableClass, SaveAllClass, filtered_for_init
@@ -56,6 +59,54 @@ logger = logging.getLogger(__name__)
 
 
 AUTOMATIC_TIMESTAMP = 0.1
+# labels merged per batch by the file imports
+IMPORT_BATCH_SIZE = 10_000
+
+# progress(done, total) of the file imports and exports
+ProgressCallback = Callable[[int, int], None]
+
+
+class RunningTimestampRange:
+    """Running min and max of the timestamps of refs.
+
+    Removed and replaced timestamps stay in the heaps until they reach the
+    top, so add and remove are O(log n) and min and max amortized O(1).
+    """
+
+    def __init__(self) -> None:
+        """Initialize instance."""
+        self._timestamps: dict[str, float] = {}
+        self._min_heap: list[tuple[float, str]] = []
+        self._max_heap: list[tuple[float, str]] = []
+
+    def add(self, ref: str, timestamp: float) -> None:
+        """Add."""
+        self._timestamps[ref] = timestamp
+        heapq.heappush(self._min_heap, (timestamp, ref))
+        heapq.heappush(self._max_heap, (-timestamp, ref))
+
+    def remove(self, ref: str) -> None:
+        """Remove."""
+        self._timestamps.pop(ref, None)
+        if len(self._min_heap) > 2 * len(self._timestamps) + 64:
+            self._min_heap = [(timestamp, ref) for ref, timestamp in self._timestamps.items()]
+            self._max_heap = [(-timestamp, ref) for ref, timestamp in self._timestamps.items()]
+            heapq.heapify(self._min_heap)
+            heapq.heapify(self._max_heap)
+
+    def min(self) -> float | None:
+        """Min."""
+        heap = self._min_heap
+        while heap and self._timestamps.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def max(self) -> float | None:
+        """Max."""
+        heap = self._max_heap
+        while heap and self._timestamps.get(heap[0][1]) != -heap[0][0]:
+            heapq.heappop(heap)
+        return -heap[0][0] if heap else None
 
 
 class Key(enum.Enum):
@@ -204,7 +255,8 @@ class Label(SaveAllClass):
         """Eq."""
         if not isinstance(other, Label):
             return False
-        return self.dump() == other.dump()
+        # same as comparing the dumps, without building them
+        return self.__class__ is other.__class__ and self.__dict__ == other.__dict__
 
 
 class LabelSnapshotReason(enum.Enum):
@@ -214,14 +266,27 @@ class LabelSnapshotReason(enum.Enum):
 
 @dataclass
 class LabelSnapshot(SaveAllClass):
-    VERSION = "0.0.0"
+    """The labels as they were before a change.
+
+    A snapshot is either a checkpoint with the complete ``state`` (jsonlines),
+    or an undo step: ``changes`` maps every ref the change touched to the dump
+    of its label before the change (None if it did not exist). The state of an
+    undo step is reconstructed by undoing all later steps, starting from the
+    current labels (or a later checkpoint).
+
+    Versions before Labels 0.2.0 can only restore checkpoints (see Labels.dump).
+    """
+
+    VERSION = "0.0.1"
     known_classes = {**BaseSaveableClass.known_classes, LabelSnapshotReason.__name__: LabelSnapshotReason}
 
     created_at: datetime
-    state: str
+    state: str | None = None
     reason: LabelSnapshotReason = LabelSnapshotReason.AUTOMATIC
     count: int = 0
     count_address_labels: int = 0
+    # loading the wallet turns the label dumps back into Label objects
+    changes: dict[str, dict[str, Any] | Label | None] | None = None
 
     def dump(self):
         """Dump."""
@@ -251,7 +316,8 @@ class ChangedItems(dict[str, Label]):
 
 
 class Labels(BaseSaveableClass):
-    VERSION = "0.1.0"
+    # 0.2.0: the undo steps are stored in "snapshot_steps", "_snapshots" only has the checkpoints
+    VERSION = "0.2.0"
     known_classes = {
         **BaseSaveableClass.known_classes,
         Label.__name__: Label,
@@ -259,6 +325,9 @@ class Labels(BaseSaveableClass):
     }
 
     _snapshot_limit = 20
+    # a checkpoint is written once the undo steps since the last one changed this many
+    # labels (and at least as many as there are labels)
+    _checkpoint_min_changes = 100
 
     def __init__(
         self,
@@ -266,8 +335,14 @@ class Labels(BaseSaveableClass):
         categories: list[str] | None = None,
         default_category: str = "default",
         _snapshots: list[LabelSnapshot] | None = None,
+        snapshot_steps: list[LabelSnapshot | None] | None = None,
+        data_in_journal: bool = False,
     ) -> None:
-        """Initialize instance."""
+        """Initialize instance.
+
+        data_in_journal means that data was saved in the journal of
+        the wallet file and still have to be loaded with load_journal_state.
+        """
         super().__init__()
 
         # "tb1q6xhxcrzmjwf6ce5jlj08gyrmu4eq3zwpv0ss3f":{ "type": "addr",
@@ -275,53 +350,239 @@ class Labels(BaseSaveableClass):
         self.data: dict[str, Label] = data if data else {}
         self.categories: list[str] = categories if categories else []
         self.default_category = default_category
-        self._snapshots: list[LabelSnapshot] = _snapshots if _snapshots else []
-
-    def count_address_labels(self):
+        self._snapshots = self._merge_snapshots(_snapshots if _snapshots else [], snapshot_steps)
+        # the number of label changes of the undo steps after the last checkpoint
+        self._changes_since_checkpoint = 0
+        for snapshot in reversed(self._snapshots):
+            if snapshot.state is not None:
+                break
+            self._changes_since_checkpoint += len(snapshot.changes or {})
+        # the undo step that records the changes currently being made
+        self._snapshot_step: LabelSnapshot | None = None
+
+        # secondary indexes of self.data, every change has to be wrapped in _unindex and _index
+        self._refs_by_category: dict[str | None, dict[LabelType, set[str]]] = {}
+        # the timestamps of the automatic (<= AUTOMATIC_TIMESTAMP) and the other labels
+        self._automatic_timestamps = RunningTimestampRange()
+        self._timestamps = RunningTimestampRange()
+        self._count_labeled = 0
+        self._rebuild_indexes()
+
+        self.missing_journal_data = data_in_journal
+        # called after the labels or categories changed, e.g. to reset caches
+        self.on_changed: Callable[[], None] | None = None
+        self._dump_data_in_journal = False
+        # the refs changed since the last journal_state or journal_changes
+        self._journal_refs: set[str] = set()
+
+    def _rebuild_indexes(self) -> None:
+        """Rebuild indexes."""
+        self._refs_by_category = {}
+        self._automatic_timestamps = RunningTimestampRange()
+        self._timestamps = RunningTimestampRange()
+        self._count_labeled = 0
+        self._journal_refs = set()
+        for label in self.data.values():
+            self._index(label)
+
+    def _index(self, label: Label) -> None:
+        """Add label to the indexes."""
+        self._refs_by_category.setdefault(label.category, {}).setdefault(label.type, set()).add(label.ref)
+        if label.timestamp:
+            timestamps = (
+                self._automatic_timestamps if label.timestamp <= AUTOMATIC_TIMESTAMP else self._timestamps
+            )
+            timestamps.add(label.ref, label.timestamp)
+        self._count_labeled += bool(label.label)
+        self._journal_refs.add(label.ref)
+
+    def _unindex(self, label: Label) -> None:
+        """Remove label from the indexes, it must be unchanged since _index."""
+        refs_by_type = self._refs_by_category.get(label.category, {})
+        refs = refs_by_type.get(label.type, set())
+        refs.discard(label.ref)
+        if not refs:
+            refs_by_type.pop(label.type, None)
+            if not refs_by_type:
+                self._refs_by_category.pop(label.category, None)
+
+        self._automatic_timestamps.remove(label.ref)
+        self._timestamps.remove(label.ref)
+        self._count_labeled -= bool(label.label)
+        self._journal_refs.add(label.ref)
+
+    def count_address_labels(self) -> int:
         """Count address labels."""
-        return sum(1 for label in self.data.values() if label.label)
+        return self._count_labeled
+
+    def get_refs_of_category(self, category: str | None, filter_type: LabelType | None = None) -> set[str]:
+        """The refs with exactly this (raw) category."""
+        refs_by_type = self._refs_by_category.get(category, {})
+        if filter_type:
+            return set(refs_by_type.get(filter_type, ()))
+        return set().union(*refs_by_type.values())
+
+    def count_labels_of_category(self, category: str | None, filter_type: LabelType | None = None) -> int:
+        """Count labels of category."""
+        refs_by_type = self._refs_by_category.get(category, {})
+        if filter_type:
+            return len(refs_by_type.get(filter_type, ()))
+        return sum(len(refs) for refs in refs_by_type.values())
+
+    def used_categories(self) -> list[str]:
+        """The categories of all labels, in the order they were first used."""
+        return [category for category in self._refs_by_category if category is not None]
+
+    def timestamp_range(self, exclude_automatic=True) -> tuple[float | None, float | None]:
+        """Like get_timestamp_range for all labels, from the running timestamp ranges."""
+        earliest, latest = self._timestamps.min(), self._timestamps.max()
+        if exclude_automatic:
+            return earliest, latest
+        automatic_earliest = self._automatic_timestamps.min()
+        return (
+            automatic_earliest if automatic_earliest is not None else earliest,
+            latest if latest is not None else self._automatic_timestamps.max(),
+        )
+
+    @contextmanager
+    def _record_snapshot(self, reason: LabelSnapshotReason | None = None) -> Iterator[None]:
+        """Record the changes made inside the block as one snapshot (undo step).
 
-    def _store_snapshot(self, reason: LabelSnapshotReason | None = None) -> bool:
-        """Store snapshot."""
-        snapshot = LabelSnapshot(
+        Refs must be announced with _touch before they are changed. Nested
+        blocks belong to the outermost one, and a block that did not change
+        any label does not create a snapshot.
+        """
+        if self._snapshot_step is not None:
+            yield
+            return
+
+        step = LabelSnapshot(
             created_at=datetime.now(),
-            state=self.dumps_data_jsonlines(),
             count_address_labels=self.count_address_labels(),
             reason=reason or LabelSnapshotReason.AUTOMATIC,
             count=len(self.data),
+            changes={},
         )
-        if self._snapshots and self._snapshots[-1].state == snapshot.state:
+        self._snapshot_step = step
+        categories = list(self.categories)
+        try:
+            yield
+        finally:
+            self._snapshot_step = None
+            if self._store_snapshot(step) or self.categories != categories:
+                self._notify_changed()
+
+    def _notify_changed(self) -> None:
+        """Call on_changed."""
+        if self.on_changed:
+            self.on_changed()
+
+    def _touch(self, ref: str) -> None:
+        """Remember the label of ref before it is changed."""
+        step = self._snapshot_step
+        if step is None or step.changes is None or ref in step.changes:
+            return
+        label = self.data.get(ref)
+        step.changes[ref] = label.dump() if label else None
+
+    def _store_snapshot(self, step: LabelSnapshot) -> bool:
+        """Store the undo step, if it changed anything.
+
+        The step becomes a checkpoint, once the steps since the last checkpoint
+        changed as many labels as there are, so a checkpoint costs amortized O(1)
+        per change and restoring never has to undo more changes than there are
+        labels.
+        """
+        changes: dict[str, dict[str, Any] | Label | None] = {}
+        for ref, before in (step.changes or {}).items():
+            label = self.data.get(ref)
+            if before != (label.dump() if label else None):
+                changes[ref] = before
+        if not changes:
             return False
-        self._snapshots.append(snapshot)
+
+        self._changes_since_checkpoint += len(changes)
+        if self._changes_since_checkpoint >= max(len(self.data), self._checkpoint_min_changes):
+            step.state = self._checkpoint_state(changes)
+            step.changes = None
+            self._changes_since_checkpoint = 0
+        else:
+            step.changes = changes
+        self._snapshots.append(step)
         while len(self._snapshots) > self._snapshot_limit:
             self._snapshots.pop(0)
         return True
 
+    def _checkpoint_state(self, changes: dict[str, Any]) -> str:
+        """The labels before the changes (label dumps, see _touch), as jsonlines."""
+        lines = []
+        for ref, label in self.data.items():
+            label_dict = changes[ref] if ref in changes else label.dump()
+            if label_dict is not None:
+                lines.append(json.dumps(label_dict))
+        for ref, before in changes.items():
+            if before is not None and ref not in self.data:
+                lines.append(json.dumps(before))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _merge_snapshots(
+        checkpoints: list[LabelSnapshot], snapshot_steps: list[LabelSnapshot | None] | None
+    ) -> list[LabelSnapshot]:
+        """Puts the checkpoints in place of the None entries of snapshot_steps."""
+        if snapshot_steps is None or snapshot_steps.count(None) != len(checkpoints):
+            # saved by a version that only knows _snapshots
+            return checkpoints
+        remaining = iter(checkpoints)
+        return [step if step is not None else next(remaining) for step in snapshot_steps]
+
     def get_snapshots(self) -> list[LabelSnapshot]:
         """Get snapshots."""
         return list(self._snapshots)
 
+    def get_snapshot_labels(self, snapshot: LabelSnapshot) -> list[Label]:
+        """Reconstruct the labels as they were when snapshot was taken."""
+        index = next(i for i, _snapshot in enumerate(self._snapshots) if _snapshot is snapshot)
+
+        # start from the first checkpoint at or after the snapshot, or from the current labels
+        start = next(
+            (i for i in range(index, len(self._snapshots)) if self._snapshots[i].state is not None),
+            len(self._snapshots),
+        )
+        checkpoint = self._snapshots[start].state if start < len(self._snapshots) else None
+        state: dict[str, dict[str, Any]] = (
+            {label_dict["ref"]: label_dict for label_dict in jsonlines_to_list_of_dict(checkpoint)}
+            if checkpoint is not None
+            else {ref: label.dump() for ref, label in self.data.items()}
+        )
+        for step in reversed(self._snapshots[index:start]):
+            for ref, before in (step.changes or {}).items():
+                if before is None:
+                    state.pop(ref, None)
+                else:
+                    state[ref] = before.dump() if isinstance(before, Label) else before
+        return [Label.from_dump(dict(label_dict)) for label_dict in state.values()]
+
     def restore_snapshot(self, snapshot: LabelSnapshot) -> ChangedItems:
         """Restore snapshot."""
-        self._store_snapshot(reason=LabelSnapshotReason.RESTORE)
-        return self.import_dumps_data(
-            snapshot.state,
-            force_overwrite=True,
-        )
+        labels = self.get_snapshot_labels(snapshot)
+        with self._record_snapshot(reason=LabelSnapshotReason.RESTORE):
+            return self.import_labels(labels=labels, force_overwrite=True)
 
     def add_category(self, value: str) -> None:
         """Add category."""
         if value in self.categories:
             return
-        self._store_snapshot()
         self.categories.append(value)
+        self._notify_changed()
 
     def del_item(self, ref: str) -> None:
         """Del item."""
         if ref not in self.data:
             return
-        self._store_snapshot()
-        del self.data[ref]
+        with self._record_snapshot():
+            self._touch(ref)
+            self._unindex(self.data.pop(ref))
 
     def get_label(self, ref: str, default_value: str | None = None) -> str | None:
         """Get label."""
@@ -358,35 +619,45 @@ class Labels(BaseSaveableClass):
         self, type: LabelType, ref: str, label_value, timestamp: Literal["now", "old"] | float = "now"
     ) -> None:
         """Set label."""
-        self._store_snapshot()
-        label = self.data.get(ref)
+        with self._record_snapshot():
+            self._touch(ref)
+            label = self.data.get(ref)
 
-        if not label:
-            self.data[ref] = label = Label(type, ref, timestamp)
+            if label:
+                self._unindex(label)
+            else:
+                self.data[ref] = label = Label(type, ref, timestamp)
 
-        label.label = label_value
-        label.set_timestamp(timestamp)
+            label.label = label_value
+            label.set_timestamp(timestamp)
 
-        if all(value is None for value in [label.category, label.spendable, label.label, label.origin]):
-            del self.data[ref]
+            if all(value is None for value in [label.category, label.spendable, label.label, label.origin]):
+                del self.data[ref]
+            else:
+                self._index(label)
 
     def set_category(
         self, type: LabelType, ref: str, category, timestamp: Literal["now", "old"] | float = "now"
     ) -> None:
         """Set category."""
-        self._store_snapshot()
-        label = self.data.get(ref)
-        if not label:
-            self.data[ref] = label = Label(type, ref, timestamp)
+        with self._record_snapshot():
+            self._touch(ref)
+            label = self.data.get(ref)
+            if label:
+                self._unindex(label)
+            else:
+                self.data[ref] = label = Label(type, ref, timestamp)
 
-        label.category = category
-        label.set_timestamp(timestamp)
+            label.category = category
+            label.set_timestamp(timestamp)
 
-        if all(value is None for value in [label.category, label.spendable, label.label, label.origin]):
-            del self.data[ref]
+            if all(value is None for value in [label.category, label.spendable, label.label, label.origin]):
+                del self.data[ref]
+            else:
+                self._index(label)
 
-        if category and category not in self.categories:
-            self.categories.append(category)
+            if category and category not in self.categories:
+                self.categories.append(category)
 
     def set_tx_label(self, label_value, value, timestamp: Literal["now", "old"] | float = "now") -> None:
         """Set tx label."""
@@ -433,19 +704,70 @@ class Labels(BaseSaveableClass):
     def get_category_dict_raw(self, filter_type: LabelType | None) -> dict[str | None, list[Label]]:
         """Get category dict raw."""
         d: dict[str | None, list[Label]] = defaultdict(list)
-        for label in self.data.values():
-            if filter_type and label.type != filter_type:
-                continue
-            d[label.category].append(label)
+        for category, refs_by_type in self._refs_by_category.items():
+            for label_type, refs in refs_by_type.items():
+                if filter_type and label_type != filter_type:
+                    continue
+                d[category].extend(self.data[ref] for ref in refs)
         return d
 
+    #####
+    # Journal
+    #####
+
+    @contextmanager
+    def data_in_journal(self) -> Iterator[None]:
+        """Within this context, dump() leaves data to the journal (see
+        SerializePersistence.save_to_journal)."""
+        self._dump_data_in_journal = True
+        try:
+            yield
+        finally:
+            self._dump_data_in_journal = False
+
+    def journal_state(self) -> dict[str, Any]:
+        """All labels, as stored in a journal snapshot record."""
+        self._journal_refs = set()
+        return {"data": {ref: label.dump() for ref, label in self.data.items()}}
+
+    def journal_changes(self) -> dict[str, Any] | None:
+        """The labels changed since the last journal_state or journal_changes, as
+        stored in a journal delta record (None if nothing changed)."""
+        if not self._journal_refs:
+            return None
+        data: dict[str, dict[str, Any] | None] = {}
+        for ref in self._journal_refs:
+            label = self.data.get(ref)
+            data[ref] = label.dump() if label else None
+        self._journal_refs = set()
+        return {"data": data}
+
+    def load_journal_state(self, state: dict[str, Any]) -> None:
+        """Replaces data by the merged journal records."""
+        self.data = {
+            ref: Label.from_dump(dict(label_dict))
+            for ref, label_dict in state["data"].items()
+            if label_dict is not None
+        }
+        self._rebuild_indexes()
+        self.missing_journal_data = False
+        self._journal_refs = set()
+
     def dump(self) -> dict:
         """Dump."""
         d = super().dump()
 
-        d["data"] = self.data
+        if self._dump_data_in_journal:
+            d["data"] = {}
+            d["data_in_journal"] = True
+        else:
+            d["data"] = self.data
         d["default_category"] = self.default_category
-        d["_snapshots"] = self._snapshots
+        # older versions only read _snapshots, and can only restore the checkpoints
+        d["_snapshots"] = [snapshot for snapshot in self._snapshots if snapshot.state is not None]
+        d["snapshot_steps"] = [
+            None if snapshot.state is not None else snapshot for snapshot in self._snapshots
+        ]
 
         keys = ["categories"]
         for k in keys:
@@ -488,10 +810,42 @@ class Labels(BaseSaveableClass):
                 }
         return super().from_dump_migration(dct=dct)
 
+    def iter_bip329_jsonlines(self) -> Iterator[str]:
+        """Iter bip329 jsonlines."""
+        for label in self.data.values():
+            yield json.dumps(label.to_bip329())
+
     def export_bip329_jsonlines(self) -> str:
         """Export bip329 jsonlines."""
-        list_of_dict = [item.to_bip329() for item in self.data.values()]
-        return list_of_dict_to_jsonlines(list_of_dict)
+        return "\n".join(self.iter_bip329_jsonlines())
+
+    def export_bip329_file(self, file_path: str, progress: ProgressCallback | None = None) -> int:
+        """Write the bip329 labels line by line and return the number of labels."""
+        return self._write_jsonlines_file(file_path, self.iter_bip329_jsonlines(), progress=progress)
+
+    def export_dumps_data_file(
+        self, file_path: str, refs: Iterable[str] | None = None, progress: ProgressCallback | None = None
+    ) -> int:
+        """Write the labels (like dumps_data_jsonlines) line by line and return the number of labels."""
+        return self._write_jsonlines_file(
+            file_path, self.iter_dumps_data_jsonlines(refs=refs), progress=progress
+        )
+
+    def _write_jsonlines_file(
+        self, file_path: str, lines: Iterable[str], progress: ProgressCallback | None = None
+    ) -> int:
+        """Write jsonlines file."""
+        total = len(self.data)
+        count = 0
+        with open(file_path, "w") as file:
+            for line in lines:
+                file.write(line + "\n")
+                count += 1
+                if progress and count % IMPORT_BATCH_SIZE == 0:
+                    progress(count, total)
+        if progress:
+            progress(total, total)
+        return count
 
     def import_bip329_jsonlines(
         self, jsonlines: str, fill_categories=True, timestamp: Literal["now", "old"] | float = "now"
@@ -501,6 +855,94 @@ class Labels(BaseSaveableClass):
         labels = [Label.from_bip329(d, timestamp=timestamp) for d in list_of_dict]
         return self.import_labels(labels=labels, fill_categories=fill_categories)
 
+    def import_bip329_file(
+        self,
+        file_path: str,
+        fill_categories=True,
+        timestamp: Literal["now", "old"] | float = "now",
+        batch_size: int = IMPORT_BATCH_SIZE,
+        progress: ProgressCallback | None = None,
+    ) -> ChangedItems:
+        """Like import_bip329_jsonlines, but reads and merges the file in batches."""
+        if timestamp == "now":
+            # both passes over the file must see the same timestamps
+            timestamp = datetime.now().timestamp()
+        return self._import_jsonlines_file(
+            file_path,
+            to_label=lambda d: Label.from_bip329(d, timestamp=timestamp),
+            fill_categories=fill_categories,
+            force_overwrite=False,
+            batch_size=batch_size,
+            progress=progress,
+        )
+
+    def import_dumps_data_file(
+        self,
+        file_path: str,
+        fill_categories=True,
+        force_overwrite=False,
+        batch_size: int = IMPORT_BATCH_SIZE,
+        progress: ProgressCallback | None = None,
+    ) -> ChangedItems:
+        """Like import_dumps_data, but reads and merges the file in batches."""
+        return self._import_jsonlines_file(
+            file_path,
+            to_label=Label.from_dump,
+            fill_categories=fill_categories,
+            force_overwrite=force_overwrite,
+            batch_size=batch_size,
+            progress=progress,
+        )
+
+    @staticmethod
+    def _iter_jsonlines_file(
+        file_path: str, to_label: Callable[[dict], Label]
+    ) -> Iterator[tuple[int, Label]]:
+        """Yield (bytes read so far, label) for every line of the file."""
+        bytes_read = 0
+        with open(file_path, "rb") as file:
+            for line in file:
+                bytes_read += len(line)
+                for d in iter_jsonlines([line]):
+                    yield bytes_read, to_label(d)
+
+    def _import_jsonlines_file(
+        self,
+        file_path: str,
+        to_label: Callable[[dict], Label],
+        fill_categories: bool,
+        force_overwrite: bool,
+        batch_size: int,
+        progress: ProgressCallback | None,
+    ) -> ChangedItems:
+        """Merge the labels of the file in batches of batch_size.
+
+        The tiebreaker needs the earliest timestamp of the whole file. Only
+        if there is a tie, it costs a separate pass over the file, instead
+        of holding all labels in memory.
+        """
+        changed_data = ChangedItems()
+        total = os.path.getsize(file_path)
+        tiebreaker = self._lazy_tiebreaker(
+            lambda: (label for _, label in self._iter_jsonlines_file(file_path, to_label))
+        )
+
+        with self._record_snapshot():
+            batch: list[Label] = []
+            for bytes_read, label in self._iter_jsonlines_file(file_path, to_label):
+                batch.append(label)
+                if len(batch) >= batch_size:
+                    self._merge_labels(batch, tiebreaker, force_overwrite, changed_data)
+                    batch = []
+                    if progress:
+                        progress(bytes_read, total)
+            self._merge_labels(batch, tiebreaker, force_overwrite, changed_data)
+            if fill_categories:
+                self._fill_categories()
+        if progress:
+            progress(total, total)
+        return changed_data
+
     def import_electrum_wallet_json(
         self,
         file_content: str,
@@ -521,7 +963,9 @@ class Labels(BaseSaveableClass):
         labels = [Label.from_bip329(d, timestamp=timestamp) for d in list_of_dict]
         return self.import_labels(labels=labels, fill_categories=fill_categories)
 
-    def _should_overwrite(self, new_label: Label, old_label: Label | None, tiebreaker: bool | None) -> bool:
+    def _should_overwrite(
+        self, new_label: Label, old_label: Label | None, tiebreaker: Callable[[], bool | None]
+    ) -> bool:
         """Should overwrite."""
         if not old_label:
             return True
@@ -529,8 +973,8 @@ class Labels(BaseSaveableClass):
             return False
         if not old_label.timestamp:
             return True
-        if new_label.timestamp == old_label.timestamp and tiebreaker is not None:
-            return tiebreaker
+        if new_label.timestamp == old_label.timestamp and (tie := tiebreaker()) is not None:
+            return tie
         return new_label.timestamp > old_label.timestamp
 
     @staticmethod
@@ -552,9 +996,25 @@ class Labels(BaseSaveableClass):
                 )
         return earliest_timestamp, latest_timestamp
 
-    def _should_overwrite_mine_when_tie(self, new_labels: list[Label]) -> None | bool:
+    def _should_overwrite_mine_when_tie(self, new_labels: Iterable[Label]) -> None | bool:
         """Should overwrite mine when tie."""
-        my_earliest_timestamp, _ = self.get_timestamp_range(self.data.values())
+        my_earliest_timestamp, _ = self.timestamp_range()
+        return self._prefer_other_labels(my_earliest_timestamp, new_labels)
+
+    def _lazy_tiebreaker(self, new_labels: Callable[[], Iterable[Label]]) -> Callable[[], bool | None]:
+        """_should_overwrite_mine_when_tie for the current labels, but new_labels are
+        only scanned when the first tie occurs."""
+        my_earliest_timestamp, _ = self.timestamp_range()
+
+        @functools.cache
+        def tiebreaker() -> bool | None:
+            """Tiebreaker."""
+            return self._prefer_other_labels(my_earliest_timestamp, new_labels())
+
+        return tiebreaker
+
+    def _prefer_other_labels(self, my_earliest_timestamp: float | None, new_labels: Iterable[Label]) -> bool:
+        """Prefer other labels."""
         other_earliest_timestamp, _ = self.get_timestamp_range(new_labels)
 
         if not other_earliest_timestamp:
@@ -566,45 +1026,70 @@ class Labels(BaseSaveableClass):
         return False if my_earliest_timestamp < other_earliest_timestamp else True
 
     def import_labels(self, labels: list[Label], fill_categories=True, force_overwrite=False) -> ChangedItems:
-        """Import labels."""
-        self._store_snapshot()
+        """Import labels, in time proportional to len(labels)."""
         changed_data = ChangedItems()
 
-        tiebreaker = self._should_overwrite_mine_when_tie(new_labels=labels)
+        tiebreaker = self._lazy_tiebreaker(lambda: labels)
+
+        with self._record_snapshot():
+            self._merge_labels(labels, tiebreaker, force_overwrite, changed_data)
+            if fill_categories:
+                self._fill_categories()
+        return changed_data
+
+    def _merge_labels(
+        self,
+        labels: Iterable[Label],
+        tiebreaker: Callable[[], bool | None],
+        force_overwrite: bool,
+        changed_data: ChangedItems,
+    ) -> None:
+        """Merge labels into self.data and add the changed ones to changed_data.
 
+        The cheap timestamp comparison decides first, so most labels of a
+        sync message that are already known are skipped without comparing
+        their content.
+        """
         for label in labels:
             old_label = self.data.get(label.ref)
 
-            if self.data.get(label.ref) != label and (
+            if (
                 force_overwrite
                 or self._should_overwrite(new_label=label, old_label=old_label, tiebreaker=tiebreaker)
-            ):
+            ) and old_label != label:
                 if force_overwrite:
                     # setting timestamp as now ensures
                     # that it doesnt get reset by an old state (for example from the LabelSyncer)
                     label.timestamp = datetime.now().timestamp()
+                self._touch(label.ref)
+                if old_label:
+                    self._unindex(old_label)
                 self.data[label.ref] = label
+                self._index(label)
                 changed_data[label.ref] = label
 
-        if fill_categories:
-            for item in self.data.values():
-                if item.category is None:
-                    continue
-                if item.category not in self.categories:
-                    self.categories.append(item.category)
-        return changed_data
-
-    def dumps_data_jsonline_list(self, refs: list[str] | None = None) -> list[str]:
+    def _fill_categories(self) -> None:
+        """Add the used categories to self.categories."""
+        known = set(self.categories)
+        for category in self.used_categories():
+            if category not in known:
+                self.categories.append(category)
+                known.add(category)
+
+    def iter_dumps_data_jsonlines(self, refs: Iterable[str] | None = None) -> Iterator[str]:
+        """Iter dumps data jsonlines."""
+        ref_set = None if refs is None else set(refs)
+        for ref, label in self.data.items():
+            if ref_set is None or ref in ref_set:
+                yield json.dumps(label.dump())
+
+    def dumps_data_jsonline_list(self, refs: Iterable[str] | None = None) -> list[str]:
         """Dumps data jsonline list."""
-        return list_of_dict_to_jsonline_list(
-            [label.dump() for ref, label in self.data.items() if (refs is None) or (ref in refs)]
-        )
+        return list(self.iter_dumps_data_jsonlines(refs=refs))
 
-    def dumps_data_jsonlines(self, refs: list[str] | None = None) -> str:
+    def dumps_data_jsonlines(self, refs: Iterable[str] | None = None) -> str:
         """Dumps data jsonlines."""
-        return list_of_dict_to_jsonlines(
-            [label.dump() for ref, label in self.data.items() if (refs is None) or (ref in refs)]
-        )
+        return "\n".join(self.iter_dumps_data_jsonlines(refs=refs))
 
     def import_dumps_data(self, dumps_data: str, fill_categories=True, force_overwrite=False) -> ChangedItems:
         """Import dumps data."""
@@ -617,15 +1102,20 @@ class Labels(BaseSaveableClass):
         """Rename category."""
         if old_category == new_category:
             return []
-        self._store_snapshot()
+        affected_categories: list[str | None] = [old_category] if old_category else []
+        if old_category == self.default_category:
+            affected_categories += [None, ""]
         affected_keys: list[str] = []
-        for key, item in list(self.data.items()):
-            if (item.category and item.category == old_category) or (
-                not item.category and old_category == self.default_category
-            ):
-                item.category = new_category
-                item.set_timestamp(datetime.now().timestamp())
-                affected_keys.append(key)
+        with self._record_snapshot():
+            for category in affected_categories:
+                for key in self.get_refs_of_category(category):
+                    item = self.data[key]
+                    self._touch(key)
+                    self._unindex(item)
+                    item.category = new_category
+                    item.set_timestamp(datetime.now().timestamp())
+                    self._index(item)
+                    affected_keys.append(key)
 
         if old_category in self.categories:
             idx = self.categories.index(old_category)
@@ -636,13 +1126,16 @@ class Labels(BaseSaveableClass):
 
     def delete_category(self, category: str) -> list[str]:
         """Delete category."""
-        self._store_snapshot()
         affected_keys = []
-        for key, item in list(self.data.items()):
-            if item.category and item.category == category:
+        with self._record_snapshot():
+            for key in self.get_refs_of_category(category) if category else set():
+                item = self.data[key]
                 affected_keys.append(key)
+                self._touch(key)
+                self._unindex(item)
                 item.category = self.get_default_category()
                 item.set_timestamp(datetime.now().timestamp())
+                self._index(item)
 
         if category in self.categories:
             idx = self.categories.index(category)
@@ -65,7 +65,6 @@ from .wallet import Wallet
 logger = logging.getLogger(__name__)
 
 
-TEXT_24_WORDS = translate("pdf", "12 or 24")
 DEFAULT_MARGIN = 36
 
 
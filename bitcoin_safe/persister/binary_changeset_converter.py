@@ -0,0 +1,328 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from __future__ import annotations
+
+import logging
+
+import bdkpython as bdk
+
+from bitcoin_safe.persister.changeset_converter import DEFAULT_CHAIN_PRUNE_DEPTH, ChangeSetConverter
+
+logger = logging.getLogger(__name__)
+
+
+class _Writer:
+    def __init__(self) -> None:
+        """Initialize instance."""
+        self.buffer = bytearray()
+
+    def varint(self, value: int) -> None:
+        """Unsigned LEB128."""
+        while value >= 0x80:
+            self.buffer.append((value & 0x7F) | 0x80)
+            value >>= 7
+        self.buffer.append(value)
+
+    def fixed(self, data: bytes, size: int) -> None:
+        """Fixed."""
+        if len(data) != size:
+            raise ValueError(f"Expected {size} bytes, got {len(data)}")
+        self.buffer += data
+
+    def bytes(self, data: bytes) -> None:
+        """Length prefixed bytes."""
+        self.varint(len(data))
+        self.buffer += data
+
+    def optional_str(self, value: str | None) -> None:
+        """None is encoded as length 0, and other strings with length + 1."""
+        if value is None:
+            self.varint(0)
+            return
+        data = value.encode()
+        self.varint(len(data) + 1)
+        self.buffer += data
+
+
+class _Reader:
+    def __init__(self, data: bytes, pos: int = 0) -> None:
+        """Initialize instance."""
+        self.data = data
+        self.pos = pos
+
+    def varint(self) -> int:
+        """Unsigned LEB128."""
+        value = shift = 0
+        while True:
+            if self.pos >= len(self.data):
+                raise ValueError("Unexpected end of data")
+            byte = self.data[self.pos]
+            self.pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def fixed(self, size: int) -> bytes:
+        """Fixed."""
+        end = self.pos + size
+        if end > len(self.data):
+            raise ValueError("Unexpected end of data")
+        data = self.data[self.pos : end]
+        self.pos = end
+        return data
+
+    def bytes(self) -> bytes:
+        """Length prefixed bytes."""
+        return self.fixed(self.varint())
+
+    def optional_str(self) -> str | None:
+        """Optional str."""
+        size = self.varint()
+        return self.fixed(size - 1).decode() if size else None
+
+
+class BinaryChangeSetConverter:
+    """Convert between bdk.ChangeSet and a compact binary encoding.
+
+    Layout (all integers are unsigned LEB128 varints, hashes are 32 raw bytes):
+        MAGIC, VERSION
+        descriptor, change_descriptor, network        (optional strings)
+        local_chain:  n, n * (height, has_hash, [hash])
+        indexer:      n, n * (descriptor_id, last_revealed)
+        tx_graph (last, such that it can be read on its own):
+            txs:          n, n * (length, consensus serialized tx)
+            txouts:       n, n * (txid, vout, value, length, script_pubkey)
+            anchors:      n, n * (txid, height, block_hash, confirmation_time)
+            last_seen, first_seen, last_evicted:  n, n * (txid, value)
+    """
+
+    MAGIC = b"BSCS"
+    VERSION = 1
+    HASH_SIZE = 32
+
+    @classmethod
+    def is_binary(cls, data: bytes) -> bool:
+        """Is binary."""
+        return data.startswith(cls.MAGIC)
+
+    # -----------
+    # TO BYTES
+    # -----------
+
+    @classmethod
+    def to_bytes(
+        cls,
+        changeset: bdk.ChangeSet,
+        prune_depth: int = DEFAULT_CHAIN_PRUNE_DEPTH,
+        restrict_chain_changes: bool = True,
+    ) -> bytes:
+        """Serialize a bdk.ChangeSet (pruned like ChangeSetConverter.to_dict)."""
+        w = _Writer()
+        w.fixed(cls.MAGIC, len(cls.MAGIC))
+        w.varint(cls.VERSION)
+
+        descriptor = changeset.descriptor()
+        change_descriptor = changeset.change_descriptor()
+        network = changeset.network()
+        w.optional_str(None if descriptor is None else str(descriptor))
+        w.optional_str(None if change_descriptor is None else str(change_descriptor))
+        w.optional_str(None if network is None else network.name)
+
+        tx_graph = changeset.tx_graph_changeset()
+        chain_changes = list(
+            ChangeSetConverter._filter_chain_changes(
+                changeset.localchain_changeset().changes, tx_graph, prune_depth
+            )
+            if restrict_chain_changes
+            else changeset.localchain_changeset().changes
+        )
+        w.varint(len(chain_changes))
+        for cc in chain_changes:
+            w.varint(cc.height)
+            if cc.hash is None:
+                w.varint(0)
+            else:
+                w.varint(1)
+                w.fixed(cc.hash.serialize(), cls.HASH_SIZE)
+
+        last_revealed = changeset.indexer_changeset().last_revealed
+        w.varint(len(last_revealed))
+        for descriptor_id, index in last_revealed.items():
+            w.fixed(descriptor_id.serialize(), cls.HASH_SIZE)
+            w.varint(index)
+
+        cls._write_tx_graph(w, tx_graph)
+        return bytes(w.buffer)
+
+    @classmethod
+    def _write_tx_graph(cls, w: _Writer, tx_graph: bdk.TxGraphChangeSet) -> None:
+        """Write tx graph."""
+        w.varint(len(tx_graph.txs))
+        for tx in tx_graph.txs:
+            w.bytes(tx.serialize())
+
+        w.varint(len(tx_graph.txouts))
+        for hop, txout in tx_graph.txouts.items():
+            outpoint = hop.outpoint()
+            w.fixed(outpoint.txid.serialize(), cls.HASH_SIZE)
+            w.varint(outpoint.vout)
+            w.varint(txout.value.to_sat())
+            w.bytes(txout.script_pubkey.to_bytes())
+
+        w.varint(len(tx_graph.anchors))
+        for anchor in tx_graph.anchors:
+            cbt = anchor.confirmation_block_time
+            w.fixed(anchor.txid.serialize(), cls.HASH_SIZE)
+            w.varint(cbt.block_id.height)
+            w.fixed(cbt.block_id.hash.serialize(), cls.HASH_SIZE)
+            w.varint(cbt.confirmation_time)
+
+        for txid_map in [tx_graph.last_seen, tx_graph.first_seen, tx_graph.last_evicted]:
+            w.varint(len(txid_map))
+            for txid, value in txid_map.items():
+                w.fixed(txid.serialize(), cls.HASH_SIZE)
+                w.varint(value)
+
+    # -------------
+    # FROM BYTES
+    # -------------
+
+    @classmethod
+    def from_bytes(
+        cls, data: bytes, with_tx_graph: bool = True, only_tx_graph: bool = False
+    ) -> bdk.ChangeSet:
+        """Deserialize data (as produced by to_bytes).
+
+        Like ChangeSetConverter.split_tx_graph, the expensive tx_graph can be
+        deserialized separately (only_tx_graph) from the rest (with_tx_graph=False).
+        """
+        r = _Reader(data)
+        if r.fixed(len(cls.MAGIC)) != cls.MAGIC:
+            raise ValueError("Not a binary changeset")
+        if (version := r.varint()) != cls.VERSION:
+            raise ValueError(f"Unknown binary changeset version {version}")
+
+        descriptor_str = r.optional_str()
+        change_descriptor_str = r.optional_str()
+        network_name = r.optional_str()
+        network = None if network_name is None else bdk.Network[network_name]
+
+        chain_changes: list[bdk.ChainChange] = []
+        for _ in range(r.varint()):
+            height = r.varint()
+            block_hash = bdk.BlockHash.from_bytes(r.fixed(cls.HASH_SIZE)) if r.varint() else None
+            chain_changes.append(bdk.ChainChange(height=height, hash=block_hash))
+
+        last_revealed: dict[bdk.DescriptorId, int] = {}
+        for _ in range(r.varint()):
+            descriptor_id = bdk.DescriptorId.from_bytes(r.fixed(cls.HASH_SIZE))
+            last_revealed[descriptor_id] = r.varint()
+
+        if only_tx_graph:
+            return bdk.ChangeSet.from_tx_graph_changeset(tx_graph_changeset=cls._read_tx_graph(r))
+
+        changeset = bdk.ChangeSet.from_descriptor_and_network(
+            descriptor=(
+                bdk.Descriptor(descriptor_str, network) if descriptor_str is not None and network else None
+            ),
+            change_descriptor=(
+                bdk.Descriptor(change_descriptor_str, network)
+                if change_descriptor_str is not None and network
+                else None
+            ),
+            network=network,
+        )
+        changeset = bdk.ChangeSet.from_merge(
+            changeset,
+            bdk.ChangeSet.from_local_chain_changes(
+                local_chain_changes=bdk.LocalChainChangeSet(changes=chain_changes)
+            ),
+        )
+        if with_tx_graph:
+            changeset = bdk.ChangeSet.from_merge(
+                changeset, bdk.ChangeSet.from_tx_graph_changeset(tx_graph_changeset=cls._read_tx_graph(r))
+            )
+        return bdk.ChangeSet.from_merge(
+            changeset,
+            bdk.ChangeSet.from_indexer_changeset(
+                indexer_changes=bdk.IndexerChangeSet(last_revealed=last_revealed)
+            ),
+        )
+
+    @classmethod
+    def _read_txid_map(cls, r: _Reader) -> dict[bdk.Txid, int]:
+        """Read txid map."""
+        txid_map: dict[bdk.Txid, int] = {}
+        for _ in range(r.varint()):
+            txid = bdk.Txid.from_bytes(r.fixed(cls.HASH_SIZE))
+            txid_map[txid] = r.varint()
+        return txid_map
+
+    @classmethod
+    def _read_tx_graph(cls, r: _Reader) -> bdk.TxGraphChangeSet:
+        """Read tx graph."""
+        txs = [bdk.Transaction(r.bytes()) for _ in range(r.varint())]
+
+        txouts: dict[bdk.HashableOutPoint, bdk.TxOut] = {}
+        for _ in range(r.varint()):
+            txid = bdk.Txid.from_bytes(r.fixed(cls.HASH_SIZE))
+            outpoint = bdk.OutPoint(txid=txid, vout=r.varint())
+            value = bdk.Amount.from_sat(r.varint())
+            txouts[bdk.HashableOutPoint(outpoint=outpoint)] = bdk.TxOut(
+                value=value, script_pubkey=bdk.Script(r.bytes())
+            )
+
+        anchors: list[bdk.Anchor] = []
+        for _ in range(r.varint()):
+            txid = bdk.Txid.from_bytes(r.fixed(cls.HASH_SIZE))
+            height = r.varint()
+            block_hash = bdk.BlockHash.from_bytes(r.fixed(cls.HASH_SIZE))
+            anchors.append(
+                bdk.Anchor(
+                    confirmation_block_time=bdk.ConfirmationBlockTime(
+                        block_id=bdk.BlockId(height=height, hash=block_hash),
+                        confirmation_time=r.varint(),
+                    ),
+                    txid=txid,
+                )
+            )
+
+        last_seen = cls._read_txid_map(r)
+        first_seen = cls._read_txid_map(r)
+        last_evicted = cls._read_txid_map(r)
+        if r.pos != len(r.data):
+            raise ValueError("Unexpected data after the tx_graph")
+        return bdk.TxGraphChangeSet(
+            txs=txs,
+            txouts=txouts,
+            anchors=anchors,
+            last_seen=last_seen,
+            first_seen=first_seen,
+            last_evicted=last_evicted,
+        )
@@ -351,6 +351,19 @@ class ChangeSetConverter:
         }
         return out
 
+    @staticmethod
+    def split_tx_graph(parsed_json: JsonDict) -> tuple[JsonDict, JsonDict]:
+        """Split a dict (as produced by to_dict) into (everything except the tx_graph,
+        only the tx_graph).
+
+        The tx_graph contains every transaction and txout, and is by far the most
+        expensive part to deserialize. Both parts can be deserialized with from_dict
+        and merged.
+        """
+        without_tx_graph = {**parsed_json, "tx_graph": {}}
+        only_tx_graph = {"tx_graph": parsed_json.get("tx_graph", {}), "local_chain": {}, "indexer": {}}
+        return without_tx_graph, only_tx_graph
+
     # -------------
     # FROM DICT
     # -------------
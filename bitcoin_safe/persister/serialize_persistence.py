@@ -26,34 +26,119 @@
 # CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from typing import Any
+from __future__ import annotations
+
+import base64
+import enum
+import logging
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+from uuid import uuid4
 
 import bdkpython as bdk
+from bitcoin_safe_lib.async_tools.loop_in_thread import LoopInThread, MultipleStrategy
 
+from bitcoin_safe.persister.binary_changeset_converter import BinaryChangeSetConverter
 from bitcoin_safe.persister.changeset_converter import (
     DEFAULT_CHAIN_PRUNE_DEPTH,
     ChangeSetConverter,
 )
-from bitcoin_safe.storage import BaseSaveableClass, filtered_for_init
+from bitcoin_safe.storage import BaseSaveableClass, Journal, JournalError, filtered_for_init
+from bitcoin_safe.util import fast_version
+
+if TYPE_CHECKING:
+    from bitcoin_safe.labels import Labels
+
+logger = logging.getLogger(__name__)
+
+# after this many records the journal is compacted into a single snapshot record
+JOURNAL_COMPACT_AFTER_RECORDS = 100
+
+
+class ChangeSetEncoding(enum.Enum):
+    json = "json"
+    # BinaryChangeSetConverter, base64 encoded in the json
+    binary = "binary"
+
+
+# a tx_graph that is not deserialized yet: a dict of ChangeSetConverter.split_tx_graph,
+# or a complete binary changeset of BinaryChangeSetConverter
+DeferredTxGraph = dict[str, Any] | bytes
+
+
+@dataclass
+class PreloadedChangeSet:
+    """The deserialized change_set entries of a dump or journal."""
+
+    change_set: bdk.ChangeSet | None
+    deferred_tx_graphs: list[DeferredTxGraph] = field(default_factory=list)
+    journal: Journal | None = None
+    journal_records: int = 0
+    # the labels of the journal (see Labels.journal_state), if it contains labels
+    labels: dict[str, Any] | None = None
 
 
 class SerializePersistence(bdk.Persistence, BaseSaveableClass):
-    VERSION = "0.0.0"
+    """Keeps the bdk.ChangeSet in memory and serializes it into the wallet file.
+
+    In journal mode the change_set is not embedded in the wallet file. Instead
+    every persisted changeset is appended to a journal next to the wallet file
+    (see save_to_journal), such that a save costs proportional to what changed.
+    The journal can also hold the labels of the wallet, which are then applied
+    by the wallet with pop_journal_labels.
+
+    If loaded with defer_tx_graph, the change_set initially lacks the tx_graph,
+    which is only deserialized and merged by load_deferred_tx_graph. Until then,
+    dumps and journal snapshots store the deferred tx_graph as it was read.
+
+    The change_set_encoding is chosen per wallet and applies to the wallet file
+    and the journal records. Both encodings can always be read.
+    """
+
+    # 0.1.0: the change_set may be stored outside of "change_set" (journal)
+    # 0.2.0: parts of the tx_graph may be stored in "deferred_tx_graphs"
+    VERSION = "0.2.0"
     known_classes = {
         **BaseSaveableClass.known_classes,
     }
+    # stored in "change_set" if the change_set is stored elsewhere (journal or
+    # "change_set_binary"). Versions before 0.1.0 would read a None as an empty
+    # history, but fail to load this string.
+    CHANGE_SET_NOT_EMBEDDED = "not embedded"
 
     def __init__(
         self,
         change_set: bdk.ChangeSet | None = None,
         restrict_chain_changes: bool = True,
         chain_prune_depth: int = DEFAULT_CHAIN_PRUNE_DEPTH,
+        journal_id: str | None = None,
+        change_set_encoding: ChangeSetEncoding = ChangeSetEncoding.json,
     ):
         """Initialize instance."""
         super().__init__()
         self.change_set = change_set if change_set else bdk.ChangeSet()
         self.restrict_chain_changes = restrict_chain_changes
         self.chain_prune_depth = chain_prune_depth
+        self.journal_id = journal_id
+        self.change_set_encoding = change_set_encoding
+
+        self._lock = threading.Lock()
+        self._journal: Journal | None = None
+        self._journal_records = 0
+        # changesets that were persisted, but not yet appended to the journal
+        self._unsaved_changesets: list[bdk.ChangeSet] = []
+        self._change_set_in_journal = False
+        # True if the snapshot record of the journal contains the labels
+        self._journal_has_labels = False
+        # the labels read from the journal, until the wallet takes them
+        self._journal_labels: dict[str, Any] | None = None
+        # tx_graph parts (dicts from ChangeSetConverter.split_tx_graph, or binary
+        # changesets) that are not merged yet
+        self._deferred_tx_graphs: list[DeferredTxGraph] = []
+        self._deferred_lock = threading.Lock()
 
     #####
     # Persistence
@@ -65,12 +150,326 @@ class SerializePersistence(bdk.Persistence, BaseSaveableClass):
 
     def persist(self, changeset: bdk.ChangeSet):
         """Persist."""
-        self.change_set = bdk.ChangeSet.from_merge(self.change_set, changeset)
+        with self._lock:
+            self.change_set = bdk.ChangeSet.from_merge(self.change_set, changeset)
+            if self._journal:
+                self._unsaved_changesets.append(changeset)
 
     def has_descriptor(self) -> bool:
         """Has descriptor."""
         return bool(self.change_set.descriptor())
 
+    #####
+    # Deferred tx_graph
+    #####
+
+    def _encode(
+        self,
+        change_set: bdk.ChangeSet,
+        restrict_chain_changes: bool,
+        prune_depth: int = DEFAULT_CHAIN_PRUNE_DEPTH,
+    ) -> dict[str, Any]:
+        """Returns the entries that store change_set in a record or dump."""
+        if self.change_set_encoding == ChangeSetEncoding.binary:
+            data = BinaryChangeSetConverter.to_bytes(
+                change_set, prune_depth=prune_depth, restrict_chain_changes=restrict_chain_changes
+            )
+            return {
+                "change_set": self.CHANGE_SET_NOT_EMBEDDED,
+                "change_set_binary": base64.b64encode(data).decode(),
+            }
+        return {
+            "change_set": ChangeSetConverter.to_dict(
+                change_set, prune_depth=prune_depth, restrict_chain_changes=restrict_chain_changes
+            )
+        }
+
+    def _encode_deferred(self, deferred_tx_graphs: list[DeferredTxGraph]) -> dict[str, Any]:
+        """Returns the entries that store the deferred tx_graphs in a record or dump."""
+        if not deferred_tx_graphs:
+            return {}
+        return {
+            "deferred_tx_graphs": [
+                base64.b64encode(deferred).decode() if isinstance(deferred, bytes) else deferred
+                for deferred in deferred_tx_graphs
+            ]
+        }
+
+    @staticmethod
+    def _decode_deferred(deferred: DeferredTxGraph) -> bdk.ChangeSet:
+        """Deserializes a deferred tx_graph."""
+        if isinstance(deferred, bytes):
+            return BinaryChangeSetConverter.from_bytes(deferred, only_tx_graph=True)
+        return ChangeSetConverter.from_dict(deferred)
+
+    @classmethod
+    def _decode(
+        cls, d: dict[str, Any], defer_tx_graph: bool
+    ) -> tuple[bdk.ChangeSet | None, list[DeferredTxGraph]]:
+        """Deserializes the change_set entries of a record or dump.
+
+        If defer_tx_graph, the tx_graph is not deserialized, but returned as deferred
+        tx_graphs.
+        """
+        deferred_tx_graphs: list[DeferredTxGraph] = [
+            base64.b64decode(deferred) if isinstance(deferred, str) else deferred
+            for deferred in d.get("deferred_tx_graphs") or []
+        ]
+        change_set: bdk.ChangeSet | None = None
+        if encoded := d.get("change_set_binary"):
+            data = base64.b64decode(encoded)
+            if defer_tx_graph:
+                deferred_tx_graphs.append(data)
+                change_set = BinaryChangeSetConverter.from_bytes(data, with_tx_graph=False)
+            else:
+                change_set = BinaryChangeSetConverter.from_bytes(data)
+        elif (change_set_dict := d.get("change_set")) and change_set_dict != cls.CHANGE_SET_NOT_EMBEDDED:
+            if defer_tx_graph:
+                without_tx_graph, only_tx_graph = ChangeSetConverter.split_tx_graph(change_set_dict)
+                deferred_tx_graphs.append(only_tx_graph)
+                change_set = ChangeSetConverter.from_dict(without_tx_graph)
+            else:
+                change_set = ChangeSetConverter.from_dict(change_set_dict)
+
+        if defer_tx_graph or not deferred_tx_graphs:
+            return change_set, deferred_tx_graphs
+        # the deferred tx_graphs are older than the change_set
+        tx_graph = bdk.ChangeSet()
+        for deferred in deferred_tx_graphs:
+            tx_graph = bdk.ChangeSet.from_merge(tx_graph, cls._decode_deferred(deferred))
+        return bdk.ChangeSet.from_merge(tx_graph, change_set or bdk.ChangeSet()), []
+
+    def has_deferred_tx_graph(self) -> bool:
+        """Has deferred tx graph."""
+        return bool(self._deferred_tx_graphs)
+
+    def load_deferred_tx_graph(self) -> bool:
+        """Deserializes the deferred tx_graph and merges it into the change_set.
+
+        The deserialization does not block dump() and persist(). Changesets that were
+        persisted in the meantime are kept. Returns True if something was merged.
+        """
+        with self._deferred_lock:
+            deferred_tx_graphs = self._deferred_tx_graphs
+        if not deferred_tx_graphs:
+            return False
+        tx_graph = bdk.ChangeSet()
+        for deferred in deferred_tx_graphs:
+            tx_graph = bdk.ChangeSet.from_merge(tx_graph, self._decode_deferred(deferred))
+        with self._deferred_lock, self._lock:
+            if self._deferred_tx_graphs is not deferred_tx_graphs:
+                # merged by a concurrent call
+                return False
+            self.change_set = bdk.ChangeSet.from_merge(tx_graph, self.change_set)
+            self._deferred_tx_graphs = []
+        return True
+
+    def _current(self) -> tuple[bdk.ChangeSet, list[DeferredTxGraph]]:
+        """Returns the change_set and the deferred tx_graphs that are not merged into
+        it."""
+        with self._deferred_lock, self._lock:
+            return self.change_set, self._deferred_tx_graphs
+
+    #####
+    # Journal
+    #####
+
+    def _snapshot_record(
+        self,
+        change_set: bdk.ChangeSet,
+        deferred_tx_graphs: list[DeferredTxGraph],
+        labels_state: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Snapshot record."""
+        record = {
+            "type": "snapshot",
+            **self._encode(
+                change_set,
+                restrict_chain_changes=self.restrict_chain_changes,
+                prune_depth=self.chain_prune_depth,
+            ),
+            **self._encode_deferred(deferred_tx_graphs),
+        }
+        if labels_state is not None:
+            record["labels"] = labels_state
+        return record
+
+    def _delta_record(self, change_set: bdk.ChangeSet) -> dict[str, Any]:
+        """Delta record."""
+        # deltas are small and are not pruned, because the anchors of the delta
+        # can refer to chain changes in other records
+        return {
+            "type": "delta",
+            **self._encode(change_set, restrict_chain_changes=False),
+        }
+
+    @staticmethod
+    def _labels_record(labels_changes: dict[str, Any]) -> dict[str, Any]:
+        """Delta record of label changes (see Labels.journal_changes)."""
+        return {"type": "delta", "labels": labels_changes}
+
+    def save_to_journal(
+        self,
+        filename: str,
+        password: str | None = None,
+        loop_in_thread: LoopInThread | None = None,
+        labels: Labels | None = None,
+    ) -> None:
+        """Appends the changesets persisted since the last save to the journal of
+        filename.
+
+        If labels are given, the labels changed since the last save are appended
+        as well, such that the wallet file can be saved without them (see
+        Labels.data_in_journal).
+
+        If there is no matching journal yet, a journal with a single snapshot
+        record is written. Once the journal has more than JOURNAL_COMPACT_AFTER_RECORDS
+        records it is compacted (in the background if loop_in_thread is given).
+        """
+        journal_filename = Journal.path_for(filename)
+        with self._deferred_lock, self._lock:
+            pending, self._unsaved_changesets = self._unsaved_changesets, []
+            # snapshot records must contain the complete change_set
+            change_set, deferred_tx_graphs = self.change_set, self._deferred_tx_graphs
+            journal = self._journal
+            if (
+                not journal
+                or journal.filename != journal_filename
+                or journal.password != password
+                or not journal.exists()
+            ):
+                journal = self._journal = Journal(journal_filename, password=password)
+                self.journal_id = uuid4().hex
+                self._journal_records = 0
+            if labels is not None and not self._journal_has_labels:
+                # label deltas need the complete labels in the snapshot record
+                self._journal_records = 0
+
+        if not self._journal_records:
+            labels_state = labels.journal_state() if labels is not None else None
+            journal.rewrite(
+                self.journal_id, [self._snapshot_record(change_set, deferred_tx_graphs, labels_state)]
+            )
+            with self._lock:
+                self._journal_records = 1
+                self._journal_has_labels = labels_state is not None
+            logger.debug(f"Wrote journal snapshot {journal_filename}")
+            return
+
+        records = [self._delta_record(cs) for cs in pending]
+        if labels is not None and (labels_changes := labels.journal_changes()) is not None:
+            records.append(self._labels_record(labels_changes))
+        if records:
+            journal.append(self.journal_id, records)
+            with self._lock:
+                self._journal_records += len(records)
+            logger.debug(f"Appended {len(records)} records to {journal_filename}")
+
+        if self._journal_records > JOURNAL_COMPACT_AFTER_RECORDS:
+            # change_set and labels contain exactly the content of the first covered_records records
+            covered_records = self._journal_records
+            labels_state = labels.journal_state() if labels is not None else None
+            if loop_in_thread:
+                loop_in_thread.run_background(
+                    self._compact_journal(
+                        journal, change_set, deferred_tx_graphs, covered_records, labels_state
+                    ),
+                    key=f"{id(self)}compact_journal",
+                    multiple_strategy=MultipleStrategy.REJECT_NEW_TASK,
+                )
+            else:
+                self._compact_journal_sync(
+                    journal, change_set, deferred_tx_graphs, covered_records, labels_state
+                )
+
+    def _compact_journal_sync(
+        self,
+        journal: Journal,
+        change_set: bdk.ChangeSet,
+        deferred_tx_graphs: list[DeferredTxGraph],
+        covered_records: int,
+        labels_state: dict[str, Any] | None = None,
+    ):
+        """Replaces the first covered_records records by a snapshot of change_set (and
+        labels_state)."""
+        if journal is not self._journal or not self.journal_id:
+            return
+        journal.rewrite(
+            self.journal_id,
+            [self._snapshot_record(change_set, deferred_tx_graphs, labels_state)],
+            replaces_records=covered_records,
+        )
+        with self._lock:
+            self._journal_records -= covered_records - 1
+            self._journal_has_labels = labels_state is not None
+        logger.info(f"Compacted {covered_records} records of {journal.filename}")
+
+    async def _compact_journal(
+        self,
+        journal: Journal,
+        change_set: bdk.ChangeSet,
+        deferred_tx_graphs: list[DeferredTxGraph],
+        covered_records: int,
+        labels_state: dict[str, Any] | None = None,
+    ):
+        """Compact journal."""
+        self._compact_journal_sync(journal, change_set, deferred_tx_graphs, covered_records, labels_state)
+
+    @classmethod
+    def _read_journal(
+        cls, journal: Journal, journal_id: str, defer_tx_graph: bool = False
+    ) -> PreloadedChangeSet:
+        """Merges the records of the journal."""
+        records = journal.read(journal_id)
+        change_set = bdk.ChangeSet()
+        deferred_tx_graphs: list[DeferredTxGraph] = []
+        labels: dict[str, Any] | None = None
+        for record in records:
+            record_change_set, record_deferred = cls._decode(record, defer_tx_graph=defer_tx_graph)
+            change_set = bdk.ChangeSet.from_merge(change_set, record_change_set or bdk.ChangeSet())
+            deferred_tx_graphs += record_deferred
+
+            record_labels = record.get("labels")
+            if record.get("type") == "snapshot":
+                labels = {"data": {}} if record_labels is not None else None
+            if labels is not None and record_labels is not None:
+                # a label dump, or None if the label was deleted
+                labels["data"].update(record_labels["data"])
+        return PreloadedChangeSet(
+            change_set=change_set,
+            deferred_tx_graphs=deferred_tx_graphs,
+            journal=journal,
+            journal_records=len(records),
+            labels=labels,
+        )
+
+    def pop_journal_labels(self) -> dict[str, Any] | None:
+        """Returns the labels read from the journal (see Labels.load_journal_state)
+        once, or None if the journal contains no labels."""
+        labels, self._journal_labels = self._journal_labels, None
+        return labels
+
+    def remove_journal(self, filename: str) -> None:
+        """Stops journaling and removes the journal of filename."""
+        with self._lock:
+            self._journal = None
+            self._journal_records = 0
+            self._journal_has_labels = False
+            self._unsaved_changesets = []
+        Journal(Journal.path_for(filename)).remove()
+
+    @contextmanager
+    def change_set_in_journal(self) -> Iterator[None]:
+        """Within this context, dump() refers to the journal instead of embedding
+        the change_set."""
+        if not self._journal:
+            raise JournalError("Call save_to_journal first")
+        self._change_set_in_journal = True
+        try:
+            yield
+        finally:
+            self._change_set_in_journal = False
+
     #####
     # BaseSaveableClass
     #####
@@ -78,23 +477,85 @@ class SerializePersistence(bdk.Persistence, BaseSaveableClass):
     def dump(self) -> dict[str, Any]:
         """Dump."""
         d = super().dump()
-        d["change_set"] = ChangeSetConverter.to_dict(
-            self.change_set,
-            restrict_chain_changes=self.restrict_chain_changes,
-            prune_depth=self.chain_prune_depth,
-        )
+        if self._change_set_in_journal:
+            d["change_set"] = self.CHANGE_SET_NOT_EMBEDDED
+            d["journal_id"] = self.journal_id
+        else:
+            change_set, deferred_tx_graphs = self._current()
+            d.update(
+                self._encode(
+                    change_set,
+                    restrict_chain_changes=self.restrict_chain_changes,
+                    prune_depth=self.chain_prune_depth,
+                )
+            )
+            d.update(self._encode_deferred(deferred_tx_graphs))
+        d["change_set_encoding"] = self.change_set_encoding.value
         d["restrict_chain_changes"] = self.restrict_chain_changes
         d["chain_prune_depth"] = self.chain_prune_depth
         return d
 
+    @classmethod
+    def from_dump_downgrade_migration(cls, dct: dict[str, Any]) -> dict[str, Any]:
+        """Refuse files of a newer minor version, which may store the change_set in a
+        way this version cannot read."""
+        file_version = fast_version(str(dct["VERSION"]))
+        if file_version.release[:2] > fast_version(cls.VERSION).release[:2]:
+            raise ValueError(
+                f"The wallet history was saved by a newer version ({file_version}) "
+                f"of {cls.__name__} and cannot be loaded by version {cls.VERSION}"
+            )
+        return dct
+
+    @classmethod
+    def _preload(
+        cls,
+        dct: dict[str, Any],
+        journal_filename: str | None,
+        password: str | None,
+        defer_tx_graph: bool,
+    ) -> PreloadedChangeSet:
+        """Pops the change_set entries of dct and deserializes them."""
+        encoded_change_set = {
+            "change_set": dct.pop("change_set", None),
+            "change_set_binary": dct.pop("change_set_binary", None),
+            "deferred_tx_graphs": dct.pop("deferred_tx_graphs", None),
+        }
+        change_set, deferred_tx_graphs = cls._decode(encoded_change_set, defer_tx_graph=defer_tx_graph)
+        if (journal_id := dct.get("journal_id")) and not change_set:
+            if not journal_filename:
+                raise JournalError("The change_set is stored in a journal, but no journal_filename was given")
+            return cls._read_journal(
+                Journal(journal_filename, password=password), journal_id, defer_tx_graph=defer_tx_graph
+            )
+        return PreloadedChangeSet(change_set=change_set, deferred_tx_graphs=deferred_tx_graphs)
+
     @classmethod
     def from_dump(cls, dct: dict, class_kwargs: dict | None = None):
         """From dump."""
         super()._from_dump(dct, class_kwargs=class_kwargs)
-
-        dct["change_set"] = (
-            ChangeSetConverter.from_dict(change_set) if (change_set := dct.get("change_set")) else None
+        # set via class_kwargs
+        journal_filename: str | None = dct.pop("journal_filename", None)
+        password: str | None = dct.pop("password", None)
+        defer_tx_graph: bool = dct.pop("defer_tx_graph", False)
+        preloaded = cls._preload(
+            dct, journal_filename=journal_filename, password=password, defer_tx_graph=defer_tx_graph
         )
+
         dct.setdefault("restrict_chain_changes", True)
         dct.setdefault("chain_prune_depth", DEFAULT_CHAIN_PRUNE_DEPTH)
-        return cls(**filtered_for_init(dct, cls))
+        dct["change_set_encoding"] = ChangeSetEncoding(
+            dct.get("change_set_encoding", ChangeSetEncoding.json.value)
+        )
+        instance = cls(**filtered_for_init(dct, cls))
+        if preloaded.change_set:
+            instance.change_set = preloaded.change_set
+        instance._deferred_tx_graphs = preloaded.deferred_tx_graphs
+        if preloaded.journal:
+            instance._journal = preloaded.journal
+            instance._journal_records = preloaded.journal_records
+            instance._journal_has_labels = preloaded.labels is not None
+            instance._journal_labels = preloaded.labels
+        else:
+            instance.journal_id = None
+        return instance
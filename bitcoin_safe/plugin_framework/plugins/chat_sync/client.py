@@ -158,6 +158,7 @@ class SyncClient(PluginClient):
         nostr_sync: NostrSync | None = None,
         enabled: bool = False,
         auto_open_psbts: bool = True,
+        label_sync_summaries: dict[str, list[str]] | None = None,
     ):
         """Initialize instance."""
         super().__init__(enabled=enabled, icon=svg_tools.get_QIcon("bi--cloud.svg"))
@@ -168,6 +169,7 @@ class SyncClient(PluginClient):
         self.signals = signals
         self.network = network
         self.auto_open_psbts = auto_open_psbts
+        self.label_sync_summaries = label_sync_summaries or {}
 
         self.nostr_sync = (
             nostr_sync
@@ -238,6 +240,7 @@ class SyncClient(PluginClient):
                 nostr_sync=self.nostr_sync,
                 enabled=self.enabled,
                 wallet_signals=wallet_signals,
+                sent_summaries=self.label_sync_summaries,
             )
 
     @classmethod
@@ -318,6 +321,8 @@ class SyncClient(PluginClient):
 
     def close(self) -> bool:
         """Close."""
+        if self.label_syncer:
+            self.label_syncer.close()
         self.nostr_sync.unsubscribe()
         self.nostr_sync.ui.close()
         return super().close()
@@ -379,6 +384,9 @@ class SyncClient(PluginClient):
         d = super().dump()
         d["auto_open_psbts"] = self.checkbox_auto_open_psbts.isChecked()
         d["nostr_sync_dump"] = self.nostr_sync.dump()
+        d["label_sync_summaries"] = (
+            self.label_syncer.dump_sent_summaries() if self.label_syncer else self.label_sync_summaries
+        )
 
         return d
 
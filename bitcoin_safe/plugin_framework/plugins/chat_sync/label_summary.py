@@ -0,0 +1,94 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Iterable
+
+from bitcoin_safe.labels import Label
+
+# refs are spread over this many buckets, a bucket is the unit that is resent
+SUMMARY_BUCKETS = 256
+
+
+def bucket_of(ref: str) -> int:
+    """Bucket of ref."""
+    return hashlib.blake2b(ref.encode(), digest_size=2).digest()[0] % SUMMARY_BUCKETS
+
+
+def label_hash(label: Label) -> int:
+    """Hash of the content of the label, including its timestamp."""
+    content = json.dumps(label.dump(), sort_keys=True).encode()
+    return int.from_bytes(hashlib.blake2b(content, digest_size=8).digest(), "big")
+
+
+class LabelSetSummary:
+    """The xor of the label hashes in each bucket.
+
+    Two label sets with equal digests in a bucket contain (up to hash
+    collisions) the same labels in this bucket, so only the labels of the
+    differing buckets have to be exchanged.
+    """
+
+    def __init__(self, digests: list[int] | None = None) -> None:
+        """Initialize instance."""
+        self.digests = digests if digests is not None else [0] * SUMMARY_BUCKETS
+
+    @classmethod
+    def from_labels(cls, labels: Iterable[Label]) -> LabelSetSummary:
+        """From labels."""
+        summary = cls()
+        for label in labels:
+            summary.add(label)
+        return summary
+
+    def add(self, label: Label) -> int:
+        """Add (or, because of xor, remove again) the label and return its bucket."""
+        bucket = bucket_of(label.ref)
+        self.digests[bucket] ^= label_hash(label)
+        return bucket
+
+    def differing_buckets(self, other: LabelSetSummary | None) -> set[int]:
+        """Differing buckets, all if other is unknown."""
+        if other is None:
+            return set(range(SUMMARY_BUCKETS))
+        return {
+            bucket for bucket, (a, b) in enumerate(zip(self.digests, other.digests, strict=True)) if a != b
+        }
+
+    def dump(self) -> list[str]:
+        """Dump."""
+        return [f"{digest:x}" for digest in self.digests]
+
+    @classmethod
+    def from_dump(cls, digests: list[str]) -> LabelSetSummary | None:
+        """From dump, None if it was created with a different bucket count."""
+        if len(digests) != SUMMARY_BUCKETS:
+            return None
+        return cls([int(digest, 16) for digest in digests])
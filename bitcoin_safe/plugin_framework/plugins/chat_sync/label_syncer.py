@@ -29,24 +29,51 @@
 from __future__ import annotations
 
 import logging
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass
 from datetime import datetime
-from time import sleep
+from typing import cast
 
 from bitcoin_nostr_chat.chat_dm import ChatDM, ChatLabel
 from bitcoin_nostr_chat.nostr_sync import Data, DataType, NostrSync
 from bitcoin_nostr_chat.ui.ui import short_key
+from bitcoin_safe_lib.gui.qt.signal_tracker import SignalProtocol
 from nostr_sdk import PublicKey
-from PyQt6.QtCore import QObject
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
 
 from bitcoin_safe.labels import Labels, LabelType
+from bitcoin_safe.plugin_framework.plugins.chat_sync.label_summary import LabelSetSummary
+from bitcoin_safe.plugin_framework.plugins.chat_sync.send_queue import SendQueue
 from bitcoin_safe.signals import UpdateFilter, UpdateFilterReason, WalletSignals
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class LabelDelivery:
+    """The chunks of one send_all_labels, and the summary of the labels they contain."""
+
+    pub_key_bech32: str
+    summary: LabelSetSummary
+    pending: int
+    failed: bool = False
+
+
 class LabelSyncer(QObject):
+    # label changes within this window are sent in one message
+    send_updates_delay_ms = 500
+
+    # the publish results arrive on any thread, they are handled on the gui thread
+    signal_chunk_published = cast(SignalProtocol[[LabelDelivery, bool]], pyqtSignal(object, bool))
+
     def __init__(
-        self, labels: Labels, enabled: bool, nostr_sync: NostrSync, wallet_signals: WalletSignals
+        self,
+        labels: Labels,
+        enabled: bool,
+        nostr_sync: NostrSync,
+        wallet_signals: WalletSignals,
+        sent_summaries: dict[str, list[str]] | None = None,
     ) -> None:
         """Initialize instance."""
         super().__init__()
@@ -57,10 +84,30 @@ class LabelSyncer(QObject):
 
         self.apply_own_labels = True
 
+        # per device (bech32 public key): the summary of the labels, when a send to this
+        # device was last confirmed by the relays. This is what was delivered from here,
+        # not what the device has. It is reset when the device is (un)trusted again.
+        self.sent_summaries: dict[str, LabelSetSummary] = {}
+        for pub_key_bech32, dumped_summary in (sent_summaries or {}).items():
+            if summary := LabelSetSummary.from_dump(dumped_summary):
+                self.sent_summaries[pub_key_bech32] = summary
+
+        self.send_queue: SendQueue[
+            tuple[list[str], PublicKey | None, LabelDelivery | None],
+            tuple[ChatDM, PublicKey | None, LabelDelivery | None],
+        ] = SendQueue(prepare=self._create_dm, publish=self._publish_dm)
+        self.signal_chunk_published.connect(self._on_chunk_published)
+        self._pending_refs: set[str] = set()
+        self._send_updates_timer = QTimer(self)
+        self._send_updates_timer.setSingleShot(True)
+        self._send_updates_timer.setInterval(self.send_updates_delay_ms)
+        self._send_updates_timer.timeout.connect(self.send_pending_label_updates)
+
         self.nostr_sync.label_connector.signal_label_bip329_received.connect(
             self.on_nostr_label_bip329_received
         )
         self.nostr_sync.signal_add_trusted_device.connect(self.on_add_trusted_device)
+        self.nostr_sync.signal_remove_trusted_device.connect(self.reset_sent_summary)
         self.nostr_sync.signal_trusted_device_published_trust_me_back.connect(
             self.on_trusted_device_published_trust_me_back
         )
@@ -113,28 +160,114 @@ class LabelSyncer(QObject):
             for chunk in chunks
         ]
 
-    def send_all_labels(self, pub_key_bech32: str) -> None:
-        """Send all labels."""
+    def queue_labels(
+        self,
+        refs: list[str],
+        receiver: PublicKey | None,
+        summary: LabelSetSummary | None = None,
+    ) -> None:
+        """Queue the labels of refs in chunks for the receiver, or the group chat if
+        receiver is None.
+
+        If a summary is given, it is stored for the receiver once all chunks are sent.
+        """
+        lines = self.labels.dumps_data_jsonline_list(refs=refs)
+        chunks = self.chunk_lines(lines, max_len=60_000)
+        delivery = (
+            LabelDelivery(pub_key_bech32=receiver.to_bech32(), summary=summary, pending=len(chunks))
+            if receiver and summary and chunks
+            else None
+        )
+        for chunk in chunks:
+            self.send_queue.submit((chunk, receiver, delivery))
+        logger.debug(f"{self.__class__.__name__}: {self.send_queue.metrics()}")
+
+    def _create_dm(
+        self, item: tuple[list[str], PublicKey | None, LabelDelivery | None]
+    ) -> tuple[ChatDM, PublicKey | None, LabelDelivery | None]:
+        """Create the dm of a chunk, runs in the worker pool of the send_queue."""
+        chunk, receiver, delivery = item
+        dm = ChatDM(
+            event=None,
+            label=ChatLabel.SingleRecipient if receiver else ChatLabel.GroupChat,
+            description="",
+            data=Data(
+                data="\n".join(chunk), data_type=DataType.LabelsBip329, network=self.nostr_sync.network
+            ),
+            created_at=datetime.now(),
+            use_compression=self.nostr_sync.group_chat.use_compression,
+        )
+        return dm, receiver, delivery
+
+    def _publish_dm(
+        self,
+        payload: tuple[ChatDM, PublicKey | None, LabelDelivery | None],
+        on_done: Callable[[bool], None],
+    ) -> None:
+        """Publish dm."""
+        dm, receiver, delivery = payload
+        if receiver is None:
+            # the group chat sends to every member and reports no result
+            self.nostr_sync.group_chat.send(dm)
+            on_done(True)
+            return
+
+        def on_dm_done(event_id) -> None:
+            """On dm done."""
+            success = event_id is not None
+            on_done(success)
+            if delivery:
+                self.signal_chunk_published.emit(delivery, success)
+
+        self.nostr_sync.group_chat.dm_connection.send(dm, receiver, on_done=on_dm_done)
+
+    def _on_chunk_published(self, delivery: LabelDelivery, success: bool) -> None:
+        """Store the summary, once all chunks of the delivery were sent."""
+        delivery.pending -= 1
+        delivery.failed = delivery.failed or not success
+        if delivery.pending > 0:
+            return
+        if delivery.failed:
+            logger.info(f"Not all labels reached trusted device {short_key(delivery.pub_key_bech32)}")
+            return
+        self.sent_summaries[delivery.pub_key_bech32] = delivery.summary
+
+    def dump_sent_summaries(self) -> dict[str, list[str]]:
+        """Dump sent summaries."""
+        return {pub_key_bech32: summary.dump() for pub_key_bech32, summary in self.sent_summaries.items()}
+
+    def reset_sent_summary(self, pub_key_bech32: str) -> None:
+        """Forget what was sent to the device, so that the next send contains all labels."""
+        self.sent_summaries.pop(pub_key_bech32, None)
+
+    def get_changed_refs(self, pub_key_bech32: str) -> tuple[list[str], LabelSetSummary]:
+        """The refs in the buckets that changed since the labels were last sent to this
+        device, and the current summary."""
+        summary = LabelSetSummary()
+        refs_by_bucket: defaultdict[int, list[str]] = defaultdict(list)
+        for label in self.labels.data.values():
+            refs_by_bucket[summary.add(label)].append(label.ref)
+
+        buckets = summary.differing_buckets(self.sent_summaries.get(pub_key_bech32))
+        return [ref for bucket in buckets for ref in refs_by_bucket[bucket]], summary
+
+    def send_all_labels(self, pub_key_bech32: str, only_changes: bool = True) -> None:
+        """Send all labels, that the device didn't get already from here."""
         if not self.enabled:
             return
         logger.debug("send_all_labels")
 
-        # send entire label data
-        refs = list(self.labels.data.keys())
-
-        for bitcoin_data in self.get_chunked_bitcoin_data(refs):
-            self.nostr_sync.group_chat.dm_connection.send(
-                ChatDM(
-                    event=None,
-                    label=ChatLabel.SingleRecipient,
-                    description="",
-                    data=bitcoin_data,
-                    created_at=datetime.now(),
-                    use_compression=self.nostr_sync.group_chat.use_compression,
-                ),
-                PublicKey.parse(pub_key_bech32),
-            )
-        logger.info(f"Sent all labels to trusted device {short_key(pub_key_bech32)}")
+        summary: LabelSetSummary | None = None
+        if only_changes:
+            refs, summary = self.get_changed_refs(pub_key_bech32)
+        else:
+            refs = list(self.labels.data.keys())
+        if not refs:
+            logger.info(f"Labels of trusted device {short_key(pub_key_bech32)} are up to date")
+            return
+
+        self.queue_labels(refs, receiver=PublicKey.parse(pub_key_bech32), summary=summary)
+        logger.info(f"Queued {len(refs)} labels for trusted device {short_key(pub_key_bech32)}")
 
     def send_all_labels_to_myself(self) -> None:
         """Send all labels to myself."""
@@ -143,18 +276,16 @@ class LabelSyncer(QObject):
         logger.debug("send_all_labels_to_myself")
 
         my_key = self.nostr_sync.group_chat.dm_connection.async_dm_connection.keys.public_key()
-        self.send_all_labels(my_key.to_bech32())
-        # sleep here to give the relays time to receive the message
-        # but if the relays fail, then better fail sending the messages,
-        # than blocking the wallet from closing
-        sleep(0.2)
+        # the messages to myself are the backup, so they always contain everything
+        self.send_all_labels(my_key.to_bech32(), only_changes=False)
 
     def on_trusted_device_published_trust_me_back(self, pub_key_bech32: str) -> None:
         """On trusted device published trust me back."""
         if not self.enabled:
             return
-        logger.debug("on_add_trusted_device")
+        logger.debug("on_trusted_device_published_trust_me_back")
 
+        # a trusted device publishes this on every start, so it gets only the changes
         self.send_all_labels(pub_key_bech32)
 
     def on_add_trusted_device(self, pub_key_bech32: str) -> None:
@@ -163,6 +294,8 @@ class LabelSyncer(QObject):
             return
         logger.debug("on_add_trusted_device")
 
+        # a newly trusted device may not have anything of what was sent before
+        self.reset_sent_summary(pub_key_bech32)
         self.send_all_labels(pub_key_bech32)
 
     def on_nostr_label_bip329_received(self, data: Data, author: PublicKey) -> None:
@@ -219,6 +352,9 @@ class LabelSyncer(QObject):
         if update_filter.refresh_all:
             logger.debug("on_labels_updated: Do nothing on refresh_all.")
             return
+        if update_filter.reason == UpdateFilterReason.TransactionChange:
+            # transactions do not change labels
+            return
 
         should_update = False
         if should_update or update_filter.refresh_all:
@@ -237,19 +373,27 @@ class LabelSyncer(QObject):
         if not refs:
             return
 
-        for bitcoin_data in self.get_chunked_bitcoin_data(refs):
-            self.nostr_sync.group_chat.send(
-                ChatDM(
-                    event=None,
-                    label=ChatLabel.GroupChat,
-                    description="",
-                    data=bitcoin_data,
-                    created_at=datetime.now(),
-                    use_compression=self.nostr_sync.group_chat.use_compression,
-                )
-            )
+        self._pending_refs.update(refs)
+        if not self._send_updates_timer.isActive():
+            self._send_updates_timer.start()
+
+    def close(self) -> None:
+        """Send the pending label updates and stop the send queue.
+
+        Chunks that are prepared already are still published, the rest is dropped.
+        """
+        self.send_pending_label_updates()
+        self.send_queue.close()
+
+    def send_pending_label_updates(self) -> None:
+        """Send the labels changed since the last call in one go."""
+        self._send_updates_timer.stop()
+        refs, self._pending_refs = list(self._pending_refs), set()
+        if not refs or not self.enabled:
+            return
+
+        self.queue_labels(refs, receiver=None)
         logger.info(
-            f"{self.__class__.__name__}: Sent {len(update_filter.addresses)} addresses, "
-            f"{len(update_filter.txids)} txids to "
+            f"{self.__class__.__name__}: Queued {len(refs)} labels for "
             f"{[short_key(m.to_bech32()) for m in self.nostr_sync.group_chat.members]}"
         )
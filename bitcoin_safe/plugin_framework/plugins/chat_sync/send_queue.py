@@ -0,0 +1,188 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+P = TypeVar("P")
+
+
+@dataclass
+class SendQueueMetrics:
+    waiting: int
+    preparing: int
+    ready: int
+    in_flight: int
+    sent: int
+    failed: int
+    elapsed: float
+
+    @property
+    def depth(self) -> int:
+        """Items submitted, but not yet published."""
+        return self.waiting + self.preparing + self.ready + self.in_flight
+
+    @property
+    def throughput(self) -> float:
+        """Published items per second."""
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+
+class SendQueue(Generic[T, P]):
+    """Prepares items on a worker pool and publishes them with bounded concurrency.
+
+    publish(payload, on_done) must not block, and call on_done(success)
+    (from any thread) once the payload was published. At most
+    max_in_flight payloads are published at the same time, and at most
+    max_prepared payloads are prepared ahead, so that a long queue does not
+    hold all prepared payloads in memory. submit never blocks.
+    """
+
+    def __init__(
+        self,
+        prepare: Callable[[T], P],
+        publish: Callable[[P, Callable[[bool], None]], None],
+        max_workers: int = 4,
+        max_in_flight: int = 4,
+        max_prepared: int = 8,
+    ) -> None:
+        """Initialize instance."""
+        self.prepare = prepare
+        self.publish = publish
+        self.max_in_flight = max_in_flight
+        self.max_prepared = max_prepared
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="SendQueue")
+        self._condition = threading.Condition()
+        self._waiting: deque[T] = deque()
+        self._ready: deque[P] = deque()
+        self._preparing = 0
+        self._in_flight = 0
+        self._sent = 0
+        self._failed = 0
+        self._started_at: float | None = None
+        self._closed = False
+
+    def submit(self, item: T) -> None:
+        """Submit."""
+        with self._condition:
+            if self._closed:
+                logger.warning(f"{self.__class__.__name__} is closed, dropping item")
+                return
+            if self._started_at is None:
+                self._started_at = time.monotonic()
+            self._waiting.append(item)
+        self._pump()
+
+    def metrics(self) -> SendQueueMetrics:
+        """Metrics."""
+        with self._condition:
+            return SendQueueMetrics(
+                waiting=len(self._waiting),
+                preparing=self._preparing,
+                ready=len(self._ready),
+                in_flight=self._in_flight,
+                sent=self._sent,
+                failed=self._failed,
+                elapsed=time.monotonic() - self._started_at if self._started_at is not None else 0.0,
+            )
+
+    def _is_idle(self) -> bool:
+        """Is idle, requires self._condition."""
+        return not (self._waiting or self._ready or self._preparing or self._in_flight)
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """Wait until everything submitted is published, False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(self._is_idle, timeout=timeout)
+
+    def _pump(self) -> None:
+        """Start preparing and publishing as far as the limits allow."""
+        to_prepare: list[T] = []
+        to_publish: list[P] = []
+        with self._condition:
+            while self._waiting and self._preparing + len(self._ready) < self.max_prepared:
+                to_prepare.append(self._waiting.popleft())
+                self._preparing += 1
+            while self._ready and self._in_flight < self.max_in_flight:
+                to_publish.append(self._ready.popleft())
+                self._in_flight += 1
+
+        for item in to_prepare:
+            self._executor.submit(self._prepare, item)
+        for payload in to_publish:
+            try:
+                self.publish(payload, self._on_published)
+            except Exception as e:
+                logger.error(f"{self.__class__.__name__}: publishing failed with {e}")
+                self._on_published(False)
+
+    def _prepare(self, item: T) -> None:
+        """Prepare, runs in the worker pool."""
+        try:
+            payload = self.prepare(item)
+        except Exception as e:
+            logger.error(f"{self.__class__.__name__}: preparing failed with {e}")
+            with self._condition:
+                self._preparing -= 1
+                self._failed += 1
+                self._condition.notify_all()
+        else:
+            with self._condition:
+                self._preparing -= 1
+                self._ready.append(payload)
+        self._pump()
+
+    def _on_published(self, success: bool) -> None:
+        """On published."""
+        with self._condition:
+            self._in_flight -= 1
+            if success:
+                self._sent += 1
+            else:
+                self._failed += 1
+            self._condition.notify_all()
+        self._pump()
+
+    def close(self) -> None:
+        """Drop the items that are not prepared yet, and stop the worker pool."""
+        with self._condition:
+            self._closed = True
+            self._waiting.clear()
+            self._condition.notify_all()
+        self._executor.shutdown(wait=False)
@@ -212,7 +212,7 @@ class WalletGraphClient(PluginClient):
         """Connect wallet signal."""
         if not self.server or self._wallet_signal_connected or not self.wallet_id:
             return
-        self.server.wallet_signals.updated.connect(self.on_wallet_updated)
+        self.server.wallet_signals.updated_coalesced.connect(self.on_wallet_updated)
         self._wallet_signal_connected = True
 
     def _disconnect_wallet_signal(self) -> None:
@@ -220,7 +220,7 @@ class WalletGraphClient(PluginClient):
         if not self.server or not self._wallet_signal_connected or not self.wallet_id:
             return
         try:
-            self.server.wallet_signals.updated.disconnect(self.on_wallet_updated)
+            self.server.wallet_signals.updated_coalesced.disconnect(self.on_wallet_updated)
         except TypeError:
             pass
         self._wallet_signal_connected = False
@@ -33,7 +33,8 @@ import enum
 import ipaddress
 import logging
 import socket
-from collections.abc import Callable
+from collections import defaultdict
+from collections.abc import Callable, Iterable
 from concurrent.futures import ThreadPoolExecutor
 from concurrent.futures import TimeoutError as FutureTimeoutError
 from dataclasses import dataclass
@@ -461,6 +462,112 @@ class FullTxDetail:
         )
 
 
+class FullTxDetailGraph:
+    """The FullTxDetails of a wallet, linked by their spent outputs, updated tx by tx.
+
+    An input points to the PythonUtxo of the spent output (if that tx is known) and the PythonUtxo
+    points back with is_spent_by_txid. Adding or removing a tx only touches the tx itself and the
+    txs directly linked to it.
+    """
+
+    def __init__(self) -> None:
+        """Initialize instance."""
+        self.fulltxdetails: dict[str, FullTxDetail] = {}  # txid: FullTxDetail
+        self.address_to_txids: defaultdict[str, set[str]] = defaultdict(set)
+        # outpoint_str: txid of the spending tx, also for outpoints whose tx is not known (yet)
+        self.spenders: dict[str, str] = {}
+
+    def _unindex_address(self, address: str, txid: str) -> None:
+        """Unindex address."""
+        txids = self.address_to_txids.get(address)
+        if txids is None:
+            return
+        txids.discard(txid)
+        if not txids:
+            del self.address_to_txids[address]
+
+    def add(
+        self,
+        txs: Iterable[TransactionDetails],
+        get_address_of_txout: Callable[[str, int, TxOut], str | None],
+    ) -> None:
+        """Add txs and link them to the known txs they spend from or that spend from them."""
+        new_fulltxdetails: list[FullTxDetail] = []
+        for tx in txs:
+            if tx.txid in self.fulltxdetails:
+                if not tx.transaction.is_coinbase():
+                    logger.error(f"Trying to add a tx with txid {tx.txid} twice.")
+                self.remove([tx.txid])
+            fulltxdetail = FullTxDetail.fill_received(tx, get_address_of_txout)
+            self.fulltxdetails[fulltxdetail.txid] = fulltxdetail
+            new_fulltxdetails.append(fulltxdetail)
+
+        # this must be done AFTER all outputs are known
+        for fulltxdetail in new_fulltxdetails:
+            fulltxdetail.fill_inputs(self.fulltxdetails)
+            for outpoint_str in fulltxdetail.inputs:
+                self.spenders[outpoint_str] = fulltxdetail.txid
+
+        for fulltxdetail in new_fulltxdetails:
+            # txs that were added before the tx they spend from
+            for outpoint_str, python_utxo in fulltxdetail.outputs.items():
+                spender_txid = self.spenders.get(outpoint_str)
+                spender = self.fulltxdetails.get(spender_txid) if spender_txid else None
+                if not spender or spender.inputs.get(outpoint_str) is python_utxo:
+                    continue
+                spender.inputs[outpoint_str] = python_utxo
+                python_utxo.is_spent_by_txid = spender.txid
+                self.address_to_txids[python_utxo.address].add(spender.txid)
+
+            for address in fulltxdetail.involved_addresses():
+                self.address_to_txids[address].add(fulltxdetail.txid)
+
+    def update(
+        self,
+        txs: Iterable[TransactionDetails],
+        get_address_of_txout: Callable[[str, int, TxOut], str | None],
+    ) -> None:
+        """Replace the TransactionDetails of known txs, e.g. after a confirmation.
+
+        The inputs and outputs of a txid cannot change, so all links are kept.
+        """
+        unknown_txs: list[TransactionDetails] = []
+        for tx in txs:
+            old = self.fulltxdetails.get(tx.txid)
+            if old is None:
+                unknown_txs.append(tx)
+                continue
+            self.fulltxdetails[tx.txid] = FullTxDetail(tx, received=old.outputs, send=old.inputs)
+        if unknown_txs:
+            self.add(unknown_txs, get_address_of_txout)
+
+    def remove(self, txids: Iterable[str]) -> None:
+        """Remove txs and unlink them from the txs they spend from and that spend from them."""
+        for txid in txids:
+            fulltxdetail = self.fulltxdetails.pop(txid, None)
+            if not fulltxdetail:
+                continue
+
+            for address in fulltxdetail.involved_addresses():
+                self._unindex_address(address, txid)
+
+            for outpoint_str, python_utxo in fulltxdetail.inputs.items():
+                if self.spenders.get(outpoint_str) == txid:
+                    del self.spenders[outpoint_str]
+                if python_utxo and python_utxo.is_spent_by_txid == txid:
+                    python_utxo.is_spent_by_txid = None
+
+            for outpoint_str, python_utxo in fulltxdetail.outputs.items():
+                spender_txid = self.spenders.get(outpoint_str)
+                spender = self.fulltxdetails.get(spender_txid) if spender_txid else None
+                if not spender:
+                    continue
+                spender.inputs[outpoint_str] = None
+                # the spender can still involve the address with another input or output
+                if python_utxo.address not in spender.involved_addresses():
+                    self._unindex_address(python_utxo.address, spender.txid)
+
+
 class AddressInfoMin(SaveAllClass):
     def __init__(self, address: str, index: int, keychain: bdk.KeychainKind) -> None:
         """Initialize instance."""
@@ -0,0 +1,286 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import logging
+from bisect import bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass
+from itertools import islice
+from typing import TYPE_CHECKING
+
+from bitcoin_safe.signals import UpdateFilter
+
+if TYPE_CHECKING:
+    from bitcoin_safe.wallet import Wallet
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _TextSegment:
+    """Texts joined into one haystack, with the key and slot of each text."""
+
+    keys: list[str]
+    slots: list[int]
+    starts: list[int]
+    haystack: str
+
+
+class SubstringIndex:
+    """Keys with one text each, searchable by substring.
+
+    The texts are joined into haystacks, so a query is a few str.find calls
+    plus a bisect per hit, instead of a python loop over every key.
+
+    Changed texts are joined into a new, small segment on the next search,
+    and their old slot is outdated (like in a log-structured merge tree), so a
+    change never rejoins all texts. A segment is merged with the one before,
+    once it is as large, which also drops the outdated slots.
+    """
+
+    SEPARATOR = "\x00"
+
+    def __init__(self, ignore_case: bool = False) -> None:
+        """Initialize instance."""
+        self.ignore_case = ignore_case
+        self._texts: dict[str, str] = {}
+        # key -> slot of its current text, segment entries with another slot are outdated
+        self._slots: dict[str, int] = {}
+        self._next_slot = 0
+        self._segments: list[_TextSegment] = []
+        # keys whose current text is not joined into a segment yet
+        self._pending: list[str] = []
+
+    def __len__(self) -> int:
+        """Return the number of keys."""
+        return len(self._texts)
+
+    def __contains__(self, key: str) -> bool:
+        """Return True if key has a text."""
+        return key in self._texts
+
+    def get(self, key: str) -> str | None:
+        """Return the text of key."""
+        return self._texts.get(key)
+
+    def set(self, key: str, text: str | None) -> None:
+        """Set the text of key (an empty text removes the key)."""
+        if not text:
+            self.remove(key)
+            return
+        if self._texts.get(key) == text:
+            return
+        self._texts[key] = text
+        self._slots[key] = self._next_slot
+        self._next_slot += 1
+        self._pending.append(key)
+
+    def remove(self, key: str) -> None:
+        """Remove key."""
+        if self._texts.pop(key, None) is not None:
+            del self._slots[key]
+
+    def replace(self, items: Iterable[tuple[str, str | None]]) -> None:
+        """Replace all keys and texts."""
+        self._texts = {key: text for key, text in items if text}
+        self._slots = {key: slot for slot, key in enumerate(self._texts, start=self._next_slot)}
+        self._next_slot += len(self._texts)
+        self._segments = [self._segment(list(self._texts))] if self._texts else []
+        self._pending = []
+
+    def clear(self) -> None:
+        """Remove all keys."""
+        self.replace([])
+
+    def _segment(self, keys: list[str]) -> _TextSegment:
+        """Join the current texts of keys into a segment."""
+        texts = [self._texts[key] for key in keys]
+        if self.ignore_case:
+            texts = [text.lower() for text in texts]
+        starts = []
+        position = 0
+        for text in texts:
+            starts.append(position)
+            position += len(text) + len(self.SEPARATOR)
+        return _TextSegment(
+            keys=keys,
+            slots=[self._slots[key] for key in keys],
+            starts=starts,
+            haystack=self.SEPARATOR.join(texts),
+        )
+
+    def _current_keys(self, segment: _TextSegment) -> list[str]:
+        """The keys of segment, whose text is still current."""
+        return [
+            key for key, slot in zip(segment.keys, segment.slots, strict=True) if self._slots.get(key) == slot
+        ]
+
+    def _flush(self) -> None:
+        """Join the pending texts into a segment and merge the segments if necessary."""
+        if not self._pending:
+            return
+        keys = [key for key in dict.fromkeys(self._pending) if key in self._texts]
+        self._pending = []
+        if keys:
+            self._segments.append(self._segment(keys))
+        # keep the number of segments logarithmic in the number of changes
+        while len(self._segments) > 1 and len(self._segments[-2].keys) <= len(self._segments[-1].keys):
+            last = self._segments.pop()
+            self._segments[-1] = self._segment(
+                self._current_keys(self._segments[-1]) + self._current_keys(last)
+            )
+
+    def search(self, needle: str, limit: int | None = None) -> list[str]:
+        """Return the keys whose text contains needle, at most limit many."""
+        if self.SEPARATOR in needle:
+            return []
+        self._flush()
+        if not needle:
+            return list(islice(self._texts, limit))
+        if self.ignore_case:
+            needle = needle.lower()
+
+        results: list[str] = []
+        if limit is not None and limit <= 0:
+            return results
+        for segment in self._segments:
+            find = segment.haystack.find
+            position = find(needle)
+            while position != -1:
+                i = bisect_right(segment.starts, position) - 1
+                key = segment.keys[i]
+                if self._slots.get(key) == segment.slots[i]:
+                    results.append(key)
+                    if limit is not None and len(results) >= limit:
+                        return results
+                # every key is reported once, so continue with the next text
+                if i + 1 >= len(segment.starts):
+                    break
+                position = find(needle, segment.starts[i + 1])
+        return results
+
+
+class WalletSearchIndex:
+    """Searchable txids, addresses, outpoints and labels of a wallet.
+
+    Built on the first search and afterwards kept current with the
+    UpdateFilter events of the wallet (see update_with_filter).
+    """
+
+    def __init__(self, wallet: Wallet) -> None:
+        """Initialize instance."""
+        self.wallet = wallet
+        self.txids = SubstringIndex()
+        self.tx_labels = SubstringIndex(ignore_case=True)
+        self.addresses = SubstringIndex()
+        self.address_labels = SubstringIndex(ignore_case=True)
+        self.utxos = SubstringIndex()
+        self.spent_txos = SubstringIndex()
+        # spent outpoint -> txid of the spending transaction
+        self.spent_by: dict[str, str] = {}
+        self._needs_rebuild = True
+
+    def _tx_label(self, txid: str) -> str:
+        """Tx label."""
+        return self.wallet.get_label_for_txid(txid, autofill_from_addresses=False)
+
+    def _address_label(self, address: str) -> str:
+        """Address label."""
+        return self.wallet.get_label_for_address(address, autofill_from_txs=False)
+
+    def rebuild(self) -> None:
+        """Rebuild the index from the wallet."""
+        txids = list(self.wallet.get_dict_fulltxdetail().keys())
+        self.txids.replace((txid, txid) for txid in txids)
+        self.tx_labels.replace((txid, self._tx_label(txid)) for txid in txids)
+
+        addresses = self.wallet.get_addresses()
+        self.addresses.replace((address, address) for address in addresses)
+        self.address_labels.replace((address, self._address_label(address)) for address in addresses)
+
+        txos = self.wallet.get_all_txos_dict()
+        self.spent_by = {
+            outpoint_str: txo.is_spent_by_txid for outpoint_str, txo in txos.items() if txo.is_spent_by_txid
+        }
+        self.utxos.replace(
+            (outpoint_str, outpoint_str) for outpoint_str in txos if outpoint_str not in self.spent_by
+        )
+        self.spent_txos.replace((outpoint_str, outpoint_str) for outpoint_str in self.spent_by)
+        self._needs_rebuild = False
+
+    def ensure_built(self) -> None:
+        """Rebuild the index if an update could not be applied incrementally."""
+        if self._needs_rebuild:
+            self.rebuild()
+
+    def invalidate(self) -> None:
+        """Rebuild the index before the next search."""
+        self._needs_rebuild = True
+
+    def update_with_filter(self, update_filter: UpdateFilter) -> None:
+        """Apply the changed txids, addresses and outpoints of update_filter."""
+        if self._needs_rebuild:
+            # nothing to update, the next search rebuilds everything anyway
+            return
+        if update_filter.refresh_all:
+            self.invalidate()
+            return
+
+        if update_filter.txids:
+            dict_fulltxdetail = self.wallet.get_dict_fulltxdetail()
+            for txid in update_filter.txids:
+                if txid in dict_fulltxdetail:
+                    self.txids.set(txid, txid)
+                    self.tx_labels.set(txid, self._tx_label(txid))
+                else:
+                    self.txids.remove(txid)
+                    self.tx_labels.remove(txid)
+
+        if update_filter.addresses:
+            for address in update_filter.addresses:
+                if self.wallet.is_my_address(address):
+                    self.addresses.set(address, address)
+                    self.address_labels.set(address, self._address_label(address))
+                else:
+                    self.addresses.remove(address)
+                    self.address_labels.remove(address)
+
+        if update_filter.outpoints:
+            txos = self.wallet.get_all_txos_dict()
+            for outpoint in update_filter.outpoints:
+                outpoint_str = str(outpoint)
+                txo = txos.get(outpoint_str)
+                if txo and txo.is_spent_by_txid:
+                    self.spent_by[outpoint_str] = txo.is_spent_by_txid
+                    self.spent_txos.set(outpoint_str, outpoint_str)
+                else:
+                    self.spent_by.pop(outpoint_str, None)
+                    self.spent_txos.remove(outpoint_str)
+                self.utxos.set(outpoint_str, outpoint_str if txo and not txo.is_spent_by_txid else None)
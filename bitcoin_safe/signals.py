@@ -56,7 +56,7 @@ if TYPE_CHECKING:
 import bdkpython as bdk
 from bitcoin_nostr_chat.signals_min import SignalsMin as NostrSignalsMin
 from bitcoin_safe_lib.gui.qt.signal_tracker import SignalProtocol
-from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 
 from bitcoin_safe.category_info import CategoryInfo
 from bitcoin_safe.pythonbdk_types import OutPoint
@@ -102,6 +102,25 @@ class UpdateFilter:
         self.refresh_all = refresh_all
         self.reason = reason
 
+    def is_transaction_delta(self) -> bool:
+        """Whether txids, outpoints and addresses cover everything a transaction change touched,
+        such that row based lists can update just the affected rows."""
+        return (
+            self.reason == UpdateFilterReason.TransactionChange and bool(self.txids) and not self.refresh_all
+        )
+
+    def is_full_refresh(self) -> bool:
+        """Whether every view has to refresh everything, which covers any other update."""
+        return self.refresh_all
+
+    def merge(self, other: UpdateFilter) -> None:
+        """Add the txids, addresses, outpoints and categories of other (with the same reason)."""
+        self.outpoints.update(other.outpoints)
+        self.addresses.update(other.addresses)
+        self.categories.update(other.categories)
+        self.txids.update(other.txids)
+        self.refresh_all = self.refresh_all or other.refresh_all
+
     def __key__(self) -> tuple:
         """Key."""
         return tuple(self.__dict__.items())
@@ -115,6 +134,48 @@ class UpdateFilter:
         return hash(str(self))
 
 
+class UpdateFilterCoalescer:
+    """Collects UpdateFilters and merges them into as few as possible.
+
+    Filters with the same reason are merged into one, because consumers treat some reasons specially.
+    The order of emission is kept: the filters pending before a full refresh are returned before it,
+    and the full refresh absorbs everything added after it, since it is emitted later and covers them.
+    """
+
+    def __init__(self) -> None:
+        """Initialize instance."""
+        self._pending: dict[UpdateFilterReason, UpdateFilter] = {}
+        self._full_refresh: UpdateFilter | None = None
+
+    def __bool__(self) -> bool:
+        """Whether updates are pending."""
+        return bool(self._pending) or self._full_refresh is not None
+
+    def add(self, update_filter: UpdateFilter) -> None:
+        """Add."""
+        if self._full_refresh is None and update_filter.is_full_refresh():
+            self._full_refresh = UpdateFilter(reason=update_filter.reason)
+        if self._full_refresh is not None:
+            self._full_refresh.merge(update_filter)
+            return
+
+        pending = self._pending.get(update_filter.reason)
+        if pending is None:
+            # copy, since the filter instance is shared by all consumers of the signal
+            pending = UpdateFilter(reason=update_filter.reason)
+            self._pending[update_filter.reason] = pending
+        pending.merge(update_filter)
+
+    def take(self) -> list[UpdateFilter]:
+        """Return the merged filters in the order their reasons first appeared and reset."""
+        update_filters = list(self._pending.values())
+        if self._full_refresh is not None:
+            update_filters.append(self._full_refresh)
+        self._pending = {}
+        self._full_refresh = None
+        return update_filters
+
+
 T = TypeVar("T")
 
 
@@ -224,6 +285,9 @@ class SignalsMin(NostrSignalsMin):
 
 class WalletSignals(SignalsMin):
     updated = cast(SignalProtocol[[UpdateFilter]], pyqtSignal(UpdateFilter))
+    # the same updates as updated, but merged over coalesce_interval_ms. For views, that rebuild rows
+    # and should not run dozens of times during a bulk label import or sync
+    updated_coalesced = cast(SignalProtocol[[UpdateFilter]], pyqtSignal(UpdateFilter))
     completions_updated = cast(SignalProtocol[[]], pyqtSignal())
 
     show_address = cast(SignalProtocol[[str, str]], pyqtSignal(str, str))  # address, wallet_id
@@ -237,11 +301,44 @@ class WalletSignals(SignalsMin):
 
     finished_psbt_creation = cast(SignalProtocol[[]], pyqtSignal())
 
+    coalesce_interval_ms = 16  # about one frame
+
     def __init__(self) -> None:
         """Initialize instance."""
         super().__init__()
         self.get_category_infos = SingularSignalFunction[list[CategoryInfo]](name="get_category_infos")
 
+        self.update_coalescer = UpdateFilterCoalescer()
+        self._coalesce_timer = QTimer(self)
+        self._coalesce_timer.setSingleShot(True)
+        self._coalesce_timer.setInterval(self.coalesce_interval_ms)
+        self._coalesce_timer.timeout.connect(self.flush_coalesced_updates)
+        self.connect_coalescing()
+
+    def connect_coalescing(self) -> None:
+        """Feed updated into updated_coalesced.
+
+        SignalTools.disconnect_all_signals_from removes this connection too, so it has to be
+        restored when the signals are reused.
+        """
+        try:
+            self.updated.connect(self._queue_coalesced_update, type=Qt.ConnectionType.UniqueConnection)
+        except TypeError:
+            pass  # already connected
+
+    def _queue_coalesced_update(self, update_filter: UpdateFilter) -> None:
+        """Queue coalesced update."""
+        self.update_coalescer.add(update_filter)
+        # the timer is not restarted, so a steady stream of updates is still dispatched every frame
+        if not self._coalesce_timer.isActive():
+            self._coalesce_timer.start()
+
+    def flush_coalesced_updates(self) -> None:
+        """Emit the pending merged updates now."""
+        self._coalesce_timer.stop()
+        for update_filter in self.update_coalescer.take():
+            self.updated_coalesced.emit(update_filter)
+
 
 class Signals(SignalsMin):
     """The idea here is to define events that might need to trigger updates of the UI or
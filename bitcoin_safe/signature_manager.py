@@ -39,11 +39,13 @@ import subprocess
 from dataclasses import dataclass
 from functools import partial
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import pgpy  # Python-native OpenPGP library
 import requests
 
+if TYPE_CHECKING:
+    import pgpy
+
 gnupg = None
 logger = logging.getLogger(__name__)
 
@@ -185,6 +187,7 @@ class SignatureVerifyer:
         :param public_key_block: The public key block in ASCII armor format.
         :return: The fingerprint of the imported public key.
         """
+        import pgpy  # Python-native OpenPGP library, loaded on first use
 
         result = pgpy.PGPKey.from_blob(public_key_block)
         public_key = None
@@ -288,6 +291,8 @@ class SignatureVerifyer:
         self, public_key: pgpy.PGPKey, binary_file: Path | str, signature_file: Path | str
     ) -> bool:
         """Verify file."""
+        import pgpy
+
         try:
             with open(str(signature_file), "rb") as sig_file:
                 signature = pgpy.PGPSignature.from_blob(sig_file.read())
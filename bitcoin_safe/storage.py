@@ -28,25 +28,35 @@
 
 from __future__ import annotations
 
+import codecs
 import enum
+import hashlib
+import hmac
 import json
 import logging
 import os
 
 # from https://stackoverflow.com/questions/2490334/simple-way-to-encode-a-string-according-to-a-password
 import secrets
+import struct
+import tempfile
+import threading
 from abc import abstractmethod
 from base64 import urlsafe_b64decode as b64d
 from base64 import urlsafe_b64encode as b64e
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, TypeVar
+from typing import Any, BinaryIO, TypeVar
 
 import bdkpython as bdk
 from bitcoin_safe_lib.util import time_logger
-from cryptography.fernet import Fernet
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from typing_extensions import Self
 
@@ -72,7 +82,116 @@ def filtered_for_init(d: dict, cls: type[T]) -> dict:
     return filtered_dict(d, varnames(cls.__init__))
 
 
+@dataclass
+class _DerivedKey:
+    salt: bytes
+    iterations: int
+    password_digest: bytearray
+    key: bytearray
+
+
+class DerivedKeyCache:
+    """In-memory cache of the derived keys of the currently open encrypted files.
+
+    Keys are only cached while a session for the file is open. Keys and password
+    digests are overwritten with zeros when the session is closed or the entry is
+    replaced.
+    """
+
+    def __init__(self) -> None:
+        """Initialize instance."""
+        self._lock = threading.Lock()
+        self._sessions: set[str] = set()
+        self._keys: dict[str, _DerivedKey] = {}
+
+    @staticmethod
+    def _normalize(filename: Path | str) -> str:
+        """Normalize."""
+        return os.path.abspath(filename)
+
+    @staticmethod
+    def _password_digest(password: bytes, salt: bytes) -> bytes:
+        """Password digest."""
+        return hashlib.sha256(salt + password).digest()
+
+    @staticmethod
+    def _zero(entry: _DerivedKey) -> None:
+        """Overwrite the key and the password digest with zeros."""
+        entry.key[:] = bytes(len(entry.key))
+        entry.password_digest[:] = bytes(len(entry.password_digest))
+
+    def open_session(self, filename: Path | str) -> None:
+        """Start caching derived keys of filename."""
+        with self._lock:
+            self._sessions.add(self._normalize(filename))
+
+    def close_session(self, filename: Path | str) -> None:
+        """Stop caching derived keys of filename and wipe the cached key."""
+        filename = self._normalize(filename)
+        with self._lock:
+            self._sessions.discard(filename)
+            if entry := self._keys.pop(filename, None):
+                self._zero(entry)
+
+    def clear(self) -> None:
+        """Close all sessions."""
+        with self._lock:
+            for entry in self._keys.values():
+                self._zero(entry)
+            self._keys.clear()
+            self._sessions.clear()
+
+    def has_session(self, filename: Path | str) -> bool:
+        """Has session."""
+        with self._lock:
+            return self._normalize(filename) in self._sessions
+
+    def get(
+        self, filename: Path | str, password: bytes, iterations: int, salt: bytes | None = None
+    ) -> tuple[bytes, bytes] | None:
+        """Returns (salt, key) of filename, if it was derived from password.
+
+        If salt is None, any cached salt is accepted.
+        """
+        with self._lock:
+            entry = self._keys.get(self._normalize(filename))
+            if (
+                not entry
+                or entry.iterations != iterations
+                or (salt is not None and entry.salt != salt)
+                or not hmac.compare_digest(entry.password_digest, self._password_digest(password, entry.salt))
+            ):
+                return None
+            return entry.salt, bytes(entry.key)
+
+    def put(self, filename: Path | str, password: bytes, iterations: int, salt: bytes, key: bytes) -> None:
+        """Put."""
+        filename = self._normalize(filename)
+        with self._lock:
+            if filename not in self._sessions:
+                return
+            if old_entry := self._keys.get(filename):
+                self._zero(old_entry)
+            self._keys[filename] = _DerivedKey(
+                salt=salt,
+                iterations=iterations,
+                password_digest=bytearray(self._password_digest(password, salt)),
+                key=bytearray(key),
+            )
+
+
+derived_key_cache = DerivedKeyCache()
+
+
 class Encrypt:
+    # chunked stream format: magic, version, iterations, salt, file nonce, segment size
+    STREAM_MAGIC = b"\x00BSE"
+    STREAM_VERSION = 1
+    STREAM_SEGMENT_SIZE = 64 * 1024
+    STREAM_MAX_SEGMENT_SIZE = 16 * 1024 * 1024
+    STREAM_TAG_SIZE = 16
+    _stream_header = struct.Struct(">4sBI16s16sI")
+
     def _derive_key(self, password: bytes, salt: bytes, iterations: int) -> bytes:
         """Derive a secret key from a given password and salt."""
         kdf = PBKDF2HMAC(
@@ -84,8 +203,31 @@ class Encrypt:
         )
         return b64e(kdf.derive(password))
 
+    def _get_key(
+        self,
+        password: str,
+        iterations: int,
+        salt: bytes | None = None,
+        cache_id: Path | str | None = None,
+    ) -> tuple[bytes, bytes, bool]:
+        """Returns (salt, key, is_cached).
+
+        If salt is None, the salt of the open session of cache_id or a new salt is used.
+        """
+        cached = (
+            derived_key_cache.get(cache_id, password.encode(), iterations, salt=salt) if cache_id else None
+        )
+        if cached:
+            return cached[0], cached[1], True
+        salt = salt if salt is not None else secrets.token_bytes(16)
+        return salt, self._derive_key(password.encode(), salt, iterations), False
+
     def password_encrypt(self, message: bytes, password: str, iterations: int = 100_000) -> bytes:
-        """Password encrypt."""
+        """Encrypts in the single token format of older versions.
+
+        Files are written with stream_encrypt. This is kept as the reference of the legacy
+        format, which password_decrypt still reads.
+        """
         salt = secrets.token_bytes(16)
         key = self._derive_key(password.encode(), salt, iterations)
         return b64e(
@@ -97,51 +239,495 @@ class Encrypt:
             )
         )
 
-    def password_decrypt(self, token: bytes, password: str) -> bytes:
+    def password_decrypt(self, token: bytes, password: str, cache_id: Path | str | None = None) -> bytes:
         """Password decrypt."""
         decoded = b64d(token)
         salt, iter, token = decoded[:16], decoded[16:20], b64e(decoded[20:])
         iterations = int.from_bytes(iter, "big")
         if iterations > 1e6:
             raise Exception("Error in decrypting")
-        key = self._derive_key(password.encode(), salt, iterations)
-        return Fernet(key).decrypt(token)
+        salt, key, is_cached = self._get_key(password, iterations, salt=salt, cache_id=cache_id)
+        message = Fernet(key).decrypt(token)
+        if cache_id and not is_cached:
+            # only keys that could decrypt the file are cached
+            derived_key_cache.put(cache_id, password.encode(), iterations, salt, key)
+        return message
+
+    @classmethod
+    def is_stream_encrypted(cls, header: bytes) -> bool:
+        """Is stream encrypted."""
+        return header.startswith(cls.STREAM_MAGIC)
+
+    @staticmethod
+    def _segment_key(key: bytes, file_nonce: bytes) -> bytes:
+        """Derives the key of the segments of one file from the password derived key."""
+        return HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=file_nonce,
+            info=b"bitcoin-safe stream segments",
+            backend=default_backend(),
+        ).derive(b64d(key))
+
+    @staticmethod
+    def _segment_nonce(index: int, is_last: bool) -> bytes:
+        """The last segment has a different nonce, such that truncation is detected."""
+        return index.to_bytes(11, "big") + (b"\x01" if is_last else b"\x00")
+
+    def stream_encrypt(
+        self,
+        chunks: Iterable[bytes],
+        out: BinaryIO,
+        password: str,
+        iterations: int = 100_000,
+        cache_id: Path | str | None = None,
+        segment_size: int | None = None,
+    ) -> None:
+        """Encrypts chunks into out, without holding the whole plaintext in memory.
+
+        The container consists of a header (magic, version, KDF parameters, file
+        nonce, segment size) and AES-GCM authenticated segments of segment_size
+        bytes of plaintext. The header is authenticated as associated data of every
+        segment.
+        """
+        salt, key, is_cached = self._get_key(password, iterations, cache_id=cache_id)
+        if cache_id and not is_cached:
+            derived_key_cache.put(cache_id, password.encode(), iterations, salt, key)
+
+        segment_size = segment_size if segment_size else self.STREAM_SEGMENT_SIZE
+        file_nonce = secrets.token_bytes(16)
+        header = self._stream_header.pack(
+            self.STREAM_MAGIC, self.STREAM_VERSION, iterations, salt, file_nonce, segment_size
+        )
+        aead = AESGCM(self._segment_key(key, file_nonce))
+        out.write(header)
+
+        index = 0
+        buffer = bytearray()
+        for chunk in chunks:
+            buffer += chunk
+            # a full buffer is only written, once it is clear that it is not the last segment
+            while len(buffer) > segment_size:
+                out.write(
+                    aead.encrypt(self._segment_nonce(index, False), bytes(buffer[:segment_size]), header)
+                )
+                del buffer[:segment_size]
+                index += 1
+        out.write(aead.encrypt(self._segment_nonce(index, True), bytes(buffer), header))
+
+    def stream_decrypt(
+        self, f: BinaryIO, password: str, cache_id: Path | str | None = None
+    ) -> Iterator[bytes]:
+        """Decrypts and verifies the segments of f one by one.
+
+        Raises InvalidToken for a wrong password, or when any segment was modified,
+        reordered, or the file was truncated.
+        """
+        header = f.read(self._stream_header.size)
+        if len(header) != self._stream_header.size:
+            raise InvalidToken
+        magic, version, iterations, salt, file_nonce, segment_size = self._stream_header.unpack(header)
+        if magic != self.STREAM_MAGIC or version != self.STREAM_VERSION:
+            raise Exception(f"Unknown encryption format version {version}")
+        if iterations > 1e6 or not 0 < segment_size <= self.STREAM_MAX_SEGMENT_SIZE:
+            raise Exception("Error in decrypting")
+
+        salt, key, is_cached = self._get_key(password, iterations, salt=salt, cache_id=cache_id)
+        aead = AESGCM(self._segment_key(key, file_nonce))
+        encrypted_size = segment_size + self.STREAM_TAG_SIZE
+
+        index = 0
+        segment = f.read(encrypted_size)
+        while True:
+            next_segment = f.read(encrypted_size) if len(segment) == encrypted_size else b""
+            is_last = not next_segment
+            try:
+                plaintext = aead.decrypt(self._segment_nonce(index, is_last), segment, header)
+            except InvalidTag as e:
+                raise InvalidToken from e
+            if index == 0 and cache_id and not is_cached:
+                # only keys that could decrypt the file are cached
+                derived_key_cache.put(cache_id, password.encode(), iterations, salt, key)
+            yield plaintext
+            if is_last:
+                return
+            segment = next_segment
+            index += 1
 
 
 class Storage:
+    # number of characters that are encoded at once when writing a file
+    CHUNK_CHARS = 64 * 1024
+
     def __init__(self) -> None:
         """Initialize instance."""
         self.encrypt = Encrypt()
 
+    @classmethod
+    def _iter_encoded(cls, message: str) -> Iterator[bytes]:
+        """Iter encoded."""
+        for i in range(0, len(message), cls.CHUNK_CHARS):
+            yield message[i : i + cls.CHUNK_CHARS].encode()
+
     def save(self, message: str, filename: str, password: str | None = None) -> None:
-        """Save."""
-        token = self.encrypt.password_encrypt(message.encode(), password) if password else message.encode()
+        """Save.
 
-        with open(filename, "wb") as f:
-            f.write(token)
+        Encrypted files are written in the chunked stream format. The file is replaced
+        atomically, such that it is never left truncated.
+        """
+        fd, tmp_filename = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(filename)),
+            prefix=f"{os.path.basename(filename)}.",
+            suffix=".tmp",
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if password:
+                    self.encrypt.stream_encrypt(
+                        self._iter_encoded(message), f, password=password, cache_id=filename
+                    )
+                else:
+                    for chunk in self._iter_encoded(message):
+                        f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_filename, filename)
+        finally:
+            if os.path.exists(tmp_filename):
+                os.unlink(tmp_filename)
 
     @classmethod
     def has_password(cls, filename: str) -> bool:
         """Has password."""
+        if (unsaved := background_saver.unsaved(filename)) is not None:
+            # the file on disk is outdated, but the pending save knows the password
+            return bool(unsaved[1])
+        # unencrypted files are json, while encrypted files are base64 encoded or
+        # start with the stream magic
         with open(filename, "rb") as f:
-            token = f.read()
-
-        if token.decode()[0] == "{":
-            return False
+            header = f.read(1)
 
-        return True
+        return header != b"{"
 
     def load(self, filename: str, password: str | None = None) -> str:
-        """Load."""
+        """Load.
+
+        Reads the chunked stream format and the older single token format.
+        If a background save of filename is pending, its content is returned
+        without waiting for the write (if the password matches).
+        """
+        if (unsaved := background_saver.unsaved(filename)) is not None:
+            message, unsaved_password = unsaved
+            if hmac.compare_digest((unsaved_password or "").encode(), (password or "").encode()):
+                return message
+            # the read below fails in the same way as for a saved file
+            background_saver.wait(filename)
         with open(filename, "rb") as f:
-            token = f.read()
+            if not password:
+                logger.debug(f"Opening {filename} without password")
+                return f.read().decode()
 
-        if not password:
-            logger.debug(f"Opening {filename} without password")
-            return token.decode()
-        else:
             logger.debug(f"Decrypting {filename}")
-            return self.encrypt.password_decrypt(token, password).decode()
+            if not self.encrypt.is_stream_encrypted(f.read(len(Encrypt.STREAM_MAGIC))):
+                f.seek(0)
+                return self.encrypt.password_decrypt(f.read(), password, cache_id=filename).decode()
+
+            f.seek(0)
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            parts = [
+                decoder.decode(segment)
+                for segment in self.encrypt.stream_decrypt(f, password, cache_id=filename)
+            ]
+            parts.append(decoder.decode(b"", final=True))
+            return "".join(parts)
+
+
+class BackgroundSaver:
+    """Encrypts and writes files on a worker thread.
+
+    Save requests for a file that is still waiting to be written are coalesced, such
+    that only the newest content is written. The worker is not a daemon thread, so
+    pending saves are completed before the interpreter exits. A failed write is passed
+    to the on_error callback of the request (called on the worker thread) and kept
+    until the next successful write of the file.
+    """
+
+    def __init__(self) -> None:
+        """Initialize instance."""
+        self._pending: dict[str, tuple[str, str | None, Callable[[str, Exception], None] | None]] = {}
+        self._writing: str | None = None
+        # message and password of the file that is being written
+        self._writing_content: tuple[str, str | None] | None = None
+        self._failures: dict[str, Exception] = {}
+        self._thread: threading.Thread | None = None
+        self._condition = threading.Condition()
+
+    @staticmethod
+    def _key(filename: Path | str) -> str:
+        """Key."""
+        return os.path.abspath(str(filename))
+
+    def save(
+        self,
+        message: str,
+        filename: Path | str,
+        password: str | None = None,
+        on_error: Callable[[str, Exception], None] | None = None,
+    ) -> None:
+        """Queues the message to be saved to filename."""
+        with self._condition:
+            key = self._key(filename)
+            # re-insert, such that the files are written in the order of their newest request
+            self._pending.pop(key, None)
+            self._pending[key] = (message, password, on_error)
+            if not self._thread:
+                self._thread = threading.Thread(target=self._run, name="BackgroundSaver")
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Writes the pending files until there are none left."""
+        while True:
+            with self._condition:
+                if not self._pending:
+                    self._thread = None
+                    self._condition.notify_all()
+                    return
+                filename = next(iter(self._pending))
+                message, password, on_error = self._pending.pop(filename)
+                self._writing = filename
+                self._writing_content = (message, password)
+
+            try:
+                Storage().save(message, filename, password=password)
+                logger.debug(f"Saved {filename} in the background")
+                with self._condition:
+                    self._failures.pop(filename, None)
+            except Exception as e:
+                logger.error(f"Could not save {filename}: {e}")
+                with self._condition:
+                    self._failures[filename] = e
+                if on_error:
+                    try:
+                        on_error(filename, e)
+                    except Exception as callback_error:
+                        logger.error(f"Could not report the failed save of {filename}: {callback_error}")
+            finally:
+                with self._condition:
+                    self._writing = None
+                    self._writing_content = None
+                    self._condition.notify_all()
+
+    def failure(self, filename: Path | str) -> Exception | None:
+        """Returns the error of the last write of filename, if it failed."""
+        with self._condition:
+            return self._failures.get(self._key(filename))
+
+    def unsaved(self, filename: Path | str) -> tuple[str, str | None] | None:
+        """Returns the newest message and password of filename, if they are not
+        written yet."""
+        with self._condition:
+            key = self._key(filename)
+            if key in self._pending:
+                message, password, _ = self._pending[key]
+                return message, password
+            if self._writing == key:
+                return self._writing_content
+            return None
+
+    def is_pending(self, filename: Path | str | None = None) -> bool:
+        """Returns True if filename (or any file if None) is not written yet."""
+        with self._condition:
+            return self._is_pending(filename)
+
+    def _is_pending(self, filename: Path | str | None) -> bool:
+        """Is pending."""
+        if filename is None:
+            return bool(self._pending) or self._writing is not None
+        key = self._key(filename)
+        return key in self._pending or self._writing == key
+
+    def wait(self, filename: Path | str | None = None, timeout: float | None = None) -> bool:
+        """Waits until filename (or all files if None) is written.
+
+        Returns False on timeout.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._is_pending(filename), timeout=timeout)
+
+
+background_saver = BackgroundSaver()
+
+
+class JournalError(Exception):
+    pass
+
+
+class Journal:
+    """Append-only file of json records, stored next to a saved file.
+
+    The first line is a plain json header containing the journal_id and the
+    key derivation parameters. Every following line is one record. If a password
+    is given, each record is encrypted on its own (with a key that is derived only
+    once per journal), such that appending never requires rewriting existing lines.
+    """
+
+    SUFFIX = ".journal"
+    VERSION = 1
+
+    def __init__(self, filename: str, password: str | None = None, iterations: int = 100_000) -> None:
+        """Initialize instance."""
+        self.filename = filename
+        self.password = password
+        self.iterations = iterations
+        self.encrypt = Encrypt()
+        self._fernet: Fernet | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def path_for(cls, filename: Path | str) -> str:
+        """Path of the journal belonging to filename."""
+        return str(filename) + cls.SUFFIX
+
+    def exists(self) -> bool:
+        """Exists."""
+        return os.path.isfile(self.filename)
+
+    def _get_fernet(self, header: dict[str, Any]) -> Fernet | None:
+        """Get fernet."""
+        if not header.get("salt"):
+            return None
+        if not self.password:
+            raise JournalError(f"{self.filename} is encrypted, but no password was given")
+        if self._fernet is None:
+            self._fernet = Fernet(
+                self.encrypt._derive_key(
+                    self.password.encode(), bytes.fromhex(header["salt"]), int(header["iterations"])
+                )
+            )
+        return self._fernet
+
+    def _new_header(self, journal_id: str) -> dict[str, Any]:
+        """New header."""
+        header: dict[str, Any] = {"journal_id": journal_id, "VERSION": self.VERSION}
+        if self.password:
+            header["salt"] = secrets.token_bytes(16).hex()
+            header["iterations"] = self.iterations
+        self._fernet = None
+        return header
+
+    def _encode(self, record: dict[str, Any], fernet: Fernet | None) -> bytes:
+        """Encode."""
+        line = json.dumps(record, separators=(",", ":")).encode()
+        return fernet.encrypt(line) if fernet else line
+
+    def _decode(self, line: bytes, fernet: Fernet | None) -> dict[str, Any]:
+        """Decode."""
+        return json.loads(fernet.decrypt(line) if fernet else line)
+
+    def _read_lines(self) -> list[bytes]:
+        """Read lines."""
+        with open(self.filename, "rb") as f:
+            content = f.read()
+        lines = content.split(b"\n")
+        # a crash during append can leave an incomplete last line, which is not terminated by \n
+        return [line for line in lines[:-1] if line]
+
+    def read_header(self) -> dict[str, Any]:
+        """Read header."""
+        with open(self.filename, "rb") as f:
+            return json.loads(f.readline())
+
+    def read(self, journal_id: str) -> list[dict[str, Any]]:
+        """Returns all records.
+
+        Raises JournalError if the journal doesn't belong to journal_id.
+        """
+        with self._lock:
+            lines = self._read_lines()
+        if not lines:
+            raise JournalError(f"{self.filename} is empty")
+        header = json.loads(lines[0])
+        if header.get("journal_id") != journal_id:
+            raise JournalError(f"{self.filename} does not belong to journal {journal_id}")
+        fernet = self._get_fernet(header)
+
+        records = []
+        for i, line in enumerate(lines[1:]):
+            try:
+                records.append(self._decode(line, fernet))
+            except (InvalidToken, json.JSONDecodeError) as e:
+                if i == len(lines) - 2:
+                    logger.warning(f"Ignoring corrupted last record in {self.filename}: {e}")
+                    break
+                raise JournalError(f"{self.filename} contains a corrupted record") from e
+        return records
+
+    def count_records(self) -> int:
+        """Count records."""
+        with self._lock:
+            return max(len(self._read_lines()) - 1, 0)
+
+    def append(self, journal_id: str, records: Iterable[dict[str, Any]]) -> None:
+        """Appends records. Creates the journal if necessary."""
+        with self._lock:
+            if self.exists():
+                header = self.read_header()
+                if header.get("journal_id") != journal_id:
+                    raise JournalError(f"{self.filename} does not belong to journal {journal_id}")
+                prefix = b""
+            else:
+                header = self._new_header(journal_id)
+                prefix = json.dumps(header).encode() + b"\n"
+
+            fernet = self._get_fernet(header)
+            with open(self.filename, "ab") as f:
+                f.write(prefix + b"".join(self._encode(record, fernet) + b"\n" for record in records))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def rewrite(
+        self, journal_id: str, records: Iterable[dict[str, Any]], replaces_records: int | None = None
+    ) -> None:
+        """Atomically replaces the first replaces_records records by records.
+
+        Records that were appended after replaces_records (e.g. while the
+        replacement was computed in the background) are kept.
+        If replaces_records is None, the whole journal is replaced (with a new salt).
+        """
+        with self._lock:
+            kept: list[bytes] = []
+            if replaces_records is None or not self.exists():
+                header = self._new_header(journal_id)
+            else:
+                old_lines = self._read_lines()
+                header = json.loads(old_lines[0])
+                if header.get("journal_id") != journal_id:
+                    raise JournalError(f"{self.filename} does not belong to journal {journal_id}")
+                kept = old_lines[1 + replaces_records :]
+
+            fernet = self._get_fernet(header)
+            fd, tmp_filename = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(self.filename)),
+                prefix=f"{os.path.basename(self.filename)}.",
+                suffix=".tmp",
+            )
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(json.dumps(header).encode() + b"\n")
+                    f.write(b"".join(self._encode(record, fernet) + b"\n" for record in records))
+                    f.write(b"".join(line + b"\n" for line in kept))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_filename, self.filename)
+            finally:
+                if os.path.exists(tmp_filename):
+                    os.unlink(tmp_filename)
+
+    def remove(self) -> None:
+        """Remove."""
+        with self._lock:
+            if self.exists():
+                os.remove(self.filename)
 
 
 class ClassSerializer:
@@ -193,6 +779,25 @@ class ClassSerializer:
 
         return deserializer
 
+    @classmethod
+    def deserialize(cls, obj: Any, known_classes, class_kwargs) -> Any:
+        """Applies the general_deserializer to an already parsed json object, like the
+        object_hook of json.loads (inner objects first).
+
+        Values that are not json types, e.g. preloaded objects, are kept as they are.
+        """
+        deserializer = cls.general_deserializer(known_classes, class_kwargs)
+
+        def walk(value: Any) -> Any:
+            """Walk."""
+            if isinstance(value, dict):
+                return deserializer({k: walk(v) for k, v in value.items()})
+            if isinstance(value, list):
+                return [walk(v) for v in value]
+            return value
+
+        return walk(obj)
+
     @classmethod
     def general_serializer(cls, obj):
         """General serializer."""
@@ -258,13 +863,27 @@ class BaseSaveableClass:
         return self.from_dump(self.dump(), class_kwargs=class_kwargs)
 
     @time_logger
-    def save(self, filename: Path | str, password: str | None = None):
-        "Saves the json dumps to a file"
+    def save(
+        self,
+        filename: Path | str,
+        password: str | None = None,
+        in_background: bool = False,
+        on_error: Callable[[str, Exception], None] | None = None,
+    ):
+        """Saves the json dumps to a file.
+
+        If in_background, only the json dumps is created here, and the encryption and
+        writing is done by the background_saver, which reports failures to on_error.
+        """
         directory = os.path.dirname(str(filename))
         # Create the directories
         if directory:
             os.makedirs(directory, exist_ok=True)
 
+        if in_background:
+            background_saver.save(self.dumps(), str(filename), password=password, on_error=on_error)
+            return
+
         storage = Storage()
         storage.save(
             self.dumps(),
@@ -298,9 +917,30 @@ class BaseSaveableClass:
         "Gets a flattened list of known classes that a json deserializer needs to interpet all objects"
         return BaseSaveableClass._flatten_known_classes({cls.__name__: cls})
 
+    @classmethod
+    def read_file(cls, filename: str, password: str | None = None) -> str:
+        """Reads, decrypts and migrates the content of a file."""
+        return cls.file_migration(Storage().load(filename, password=password))
+
+    @classmethod
+    def preload_file(cls, filename: str, password: str | None = None) -> Any:
+        """Reads, decrypts, migrates and parses a file.
+
+        No instances are created, such that this can run in a worker thread. The result
+        can be passed to _from_file as preloaded. Child classes can deserialize
+        expensive parts here already.
+        """
+        return json.loads(cls.read_file(filename, password=password))
+
     @classmethod
     @time_logger
-    def _from_file(cls, filename: str, password: str | None = None, class_kwargs: dict | None = None):
+    def _from_file(
+        cls,
+        filename: str,
+        password: str | None = None,
+        class_kwargs: dict | None = None,
+        preloaded: Any = None,
+    ):
         """Loads the class from a file. This offers the option of add class_kwargs args.
 
         Args:
@@ -310,17 +950,19 @@ class BaseSaveableClass:
                 example:
                     class_kwargs= {'Wallet':{'config':config}}.
                 Defaults to None.
+            preloaded (Any, optional): The result of preload_file, if the file
+                was already read. Defaults to None.
 
         Returns:
             _type_: _description_
         """
         class_kwargs = class_kwargs if class_kwargs else {}
-        storage = Storage()
 
-        json_string = cls.file_migration(storage.load(filename, password=password))
+        if preloaded is not None:
+            return ClassSerializer.deserialize(preloaded, cls.get_known_classes(), class_kwargs)
 
         instance = json.loads(
-            json_string,
+            cls.read_file(filename, password=password),
             object_hook=ClassSerializer.general_deserializer(cls.get_known_classes(), class_kwargs),
         )
         return instance
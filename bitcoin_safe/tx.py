@@ -35,6 +35,7 @@ from typing import Any
 import bdkpython as bdk
 from bitcoin_safe_lib.tx_util import hex_to_serialized, serialized_to_hex
 
+from bitcoin_safe.coin_selection import CoinSelectionAlgorithm
 from bitcoin_safe.mempool_manager import MempoolManager
 from bitcoin_safe.psbt_util import FeeInfo
 from bitcoin_safe.storage import BaseSaveableClass, filtered_for_init
@@ -125,6 +126,8 @@ class TxUiInfos(BaseSaveableClass):
     recipient_read_only: bool = False
     utxos_read_only: bool = False
     replace_tx: bdk.Transaction | None = None
+    # anything else than bdk takes precedence over opportunistic_merge_utxos
+    coin_selection_algorithm: CoinSelectionAlgorithm = CoinSelectionAlgorithm.bdk
 
     def dump(self) -> dict[str, Any]:
         """Dump."""
@@ -135,6 +138,7 @@ class TxUiInfos(BaseSaveableClass):
         d["utxos_read_only"] = self.utxos_read_only
         d["replace_tx"] = serialized_to_hex(self.replace_tx.serialize()) if self.replace_tx else None
         d["utxo_dict"] = {str(k): v for k, v in self.utxo_dict.items()}
+        d["coin_selection_algorithm"] = self.coin_selection_algorithm.value
         return d
 
     @classmethod
@@ -148,6 +152,8 @@ class TxUiInfos(BaseSaveableClass):
 
         if isinstance(utxo_dict := dct.get("utxo_dict"), dict):
             dct["utxo_dict"] = {OutPoint.from_str(k): v for k, v in utxo_dict.items()}
+        if coin_selection_algorithm := dct.get("coin_selection_algorithm"):
+            dct["coin_selection_algorithm"] = CoinSelectionAlgorithm(coin_selection_algorithm)
 
         return cls(**filtered_for_init(dct, cls))
 
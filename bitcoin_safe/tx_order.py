@@ -0,0 +1,294 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import enum
+import logging
+from bisect import bisect_left, insort
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any
+
+import bdkpython as bdk
+
+from bitcoin_safe.pythonbdk_types import FullTxDetail
+
+logger = logging.getLogger(__name__)
+
+
+class TxSection(enum.IntEnum):
+    """The parts of the history, in display order."""
+
+    Confirmed = 0
+    Unconfirmed = 1
+    Initial = 2
+    Local = 3
+
+
+CLUSTERED_SECTIONS = (TxSection.Unconfirmed, TxSection.Local)
+
+# (section, height or cluster id)
+GroupKey = tuple[TxSection, int]
+
+
+def topo_sort(tx_list: list[FullTxDetail]) -> list[FullTxDetail]:
+    """Return a *full* topological ordering of the given transactions.
+
+    Every parent precedes *all* of its children (parents are *not* guaranteed to be *immediately*
+    before their children). Dependencies to transactions outside tx_list are ignored.
+
+    Roots are visited by descending (lock_time, txid) with a depth-first post-order walk, which
+    is reversed at the end. The walk uses an explicit stack, so long unconfirmed chains cannot
+    hit the recursion limit.
+    """
+    tx_map: dict[str, FullTxDetail] = {fx.txid: fx for fx in tx_list}
+    children: defaultdict[str, list[str]] = defaultdict(list)
+    indegree: dict[str, int] = {txid: 0 for txid in tx_map}
+
+    for fx in tx_list:
+        for inp in fx.inputs.values():
+            if not inp:
+                continue
+            parent_id = inp.outpoint.txid_str
+            if parent_id in tx_map:  # dependency inside list
+                children[parent_id].append(fx.txid)
+                indegree[fx.txid] += 1
+
+    roots: list[str] = [txid for txid, deg in indegree.items() if deg == 0]
+    roots.sort(key=lambda tid: (tx_map[tid].tx.transaction.lock_time(), tid), reverse=True)
+
+    sorted_order: list[FullTxDetail] = []
+    visited: set[str] = set()
+    for root in roots:
+        if root in visited:
+            continue
+        visited.add(root)
+        stack = [(root, iter(children.get(root, ())))]
+        while stack:
+            txid, remaining_children = stack[-1]
+            for child_id in remaining_children:
+                if child_id not in visited:
+                    visited.add(child_id)
+                    stack.append((child_id, iter(children.get(child_id, ()))))
+                    break
+            else:
+                # all descendants are emitted, post-order emit
+                stack.pop()
+                sorted_order.append(tx_map[txid])
+
+    # post-order → topo order
+    sorted_order.reverse()
+    return sorted_order
+
+
+class TxOrderIndex:
+    """The txs of a wallet in history order, updated tx by tx.
+
+    The order is:
+    1) confirmed txs by height, within a block parents before children
+    2) mempool txs
+    3) the initial txs in their given order
+    4) local txs
+
+    Mempool and local txs are grouped into clusters of txs connected by spent outputs. Each
+    cluster is sorted topologically and the clusters are ordered by their smallest root
+    (lock_time, txid). An update only re-sorts the height buckets and clusters of changed txs.
+    """
+
+    def __init__(
+        self, is_local: Callable[[bdk.ChainPosition], bool], initial_txids: Iterable[str] = ()
+    ) -> None:
+        """Initialize instance."""
+        self.is_local = is_local
+        self._initial_order = {txid: i for i, txid in enumerate(initial_txids)}
+        self._group_of: dict[str, GroupKey] = {}
+        self._members: dict[GroupKey, set[str]] = {}
+        self._sorted: dict[GroupKey, list[FullTxDetail]] = {}
+        # sorted entries (section, sort key, group id)
+        self._order: list[tuple[TxSection, tuple[Any, ...], int]] = []
+        self._order_entry: dict[GroupKey, tuple[TxSection, tuple[Any, ...], int]] = {}
+        self._next_cluster_id = 0
+        self._ordered: list[FullTxDetail] | None = None
+
+    def section_of(self, fulltxdetail: FullTxDetail) -> TxSection:
+        """Section of."""
+        chain_position = fulltxdetail.tx.chain_position
+        if isinstance(chain_position, bdk.ChainPosition.CONFIRMED):
+            return TxSection.Confirmed
+        if not self.is_local(chain_position):
+            return TxSection.Unconfirmed
+        if fulltxdetail.txid in self._initial_order:
+            return TxSection.Initial
+        return TxSection.Local
+
+    @staticmethod
+    def _parents(fulltxdetail: FullTxDetail) -> Iterable[str]:
+        """The txids of the parents."""
+        return (python_utxo.outpoint.txid_str for python_utxo in fulltxdetail.inputs.values() if python_utxo)
+
+    @classmethod
+    def _neighbors(cls, fulltxdetail: FullTxDetail) -> Iterable[str]:
+        """The txids of the parents and children."""
+        yield from cls._parents(fulltxdetail)
+        for python_utxo in fulltxdetail.outputs.values():
+            if python_utxo.is_spent_by_txid:
+                yield python_utxo.is_spent_by_txid
+
+    def update(self, dict_fulltxdetail: Mapping[str, FullTxDetail], changed_txids: Iterable[str]) -> None:
+        """Move the changed (added, modified or removed) txs to their place.
+
+        dict_fulltxdetail must contain all current txs, the changed ones already updated.
+        """
+        dirty: set[GroupKey] = set()
+        cluster_seeds: defaultdict[TxSection, set[str]] = defaultdict(set)
+        for txid in changed_txids:
+            old_group = self._group_of.pop(txid, None)
+            if old_group is not None:
+                self._members[old_group].discard(txid)
+                dirty.add(old_group)
+
+            fulltxdetail = dict_fulltxdetail.get(txid)
+            if not fulltxdetail:
+                continue
+            section = self.section_of(fulltxdetail)
+            if section in CLUSTERED_SECTIONS:
+                cluster_seeds[section].add(txid)
+                continue
+            group: GroupKey = (section, 0)
+            if section == TxSection.Confirmed:
+                chain_position = fulltxdetail.tx.chain_position
+                assert isinstance(chain_position, bdk.ChainPosition.CONFIRMED)
+                group = (section, chain_position.confirmation_block_time.block_id.height)
+            self._group_of[txid] = group
+            self._members.setdefault(group, set()).add(txid)
+            dirty.add(group)
+
+        # a changed cluster can split or join others, so its txs are clustered again
+        for group in [group for group in dirty if group[0] in CLUSTERED_SECTIONS]:
+            dirty.discard(group)
+            cluster_seeds[group[0]].update(self._dissolve(group))
+
+        for section, seeds in cluster_seeds.items():
+            for component in self._components(section, seeds, dict_fulltxdetail):
+                group = (section, self._next_cluster_id)
+                self._next_cluster_id += 1
+                self._members[group] = component
+                for txid in component:
+                    self._group_of[txid] = group
+                dirty.add(group)
+
+        for group in dirty:
+            self._sort_group(group, dict_fulltxdetail)
+        if dirty:
+            self._ordered = None
+
+    def _remove_from_order(self, group: GroupKey) -> None:
+        """Remove from order."""
+        entry = self._order_entry.pop(group, None)
+        if entry is None:
+            return
+        i = bisect_left(self._order, entry)
+        if i < len(self._order) and self._order[i] == entry:
+            del self._order[i]
+
+    def _dissolve(self, group: GroupKey) -> set[str]:
+        """Delete the group and return its txs."""
+        self._remove_from_order(group)
+        self._sorted.pop(group, None)
+        members = self._members.pop(group, set())
+        for txid in members:
+            self._group_of.pop(txid, None)
+        return members
+
+    def _components(
+        self, section: TxSection, seeds: set[str], dict_fulltxdetail: Mapping[str, FullTxDetail]
+    ) -> list[set[str]]:
+        """The clusters containing seeds, joined with the existing clusters they touch."""
+        unvisited = {txid for txid in seeds if txid in dict_fulltxdetail}
+        components: list[set[str]] = []
+        while unvisited:
+            start = unvisited.pop()
+            component = {start}
+            queue = [start]
+            while queue:
+                txid = queue.pop()
+                for neighbor in self._neighbors(dict_fulltxdetail[txid]):
+                    if neighbor in component:
+                        continue
+                    if neighbor in unvisited:
+                        unvisited.discard(neighbor)
+                        component.add(neighbor)
+                        queue.append(neighbor)
+                        continue
+                    group = self._group_of.get(neighbor)
+                    if group is not None and group[0] == section:
+                        # an unchanged cluster, that is now connected to this one
+                        members = {txid for txid in self._dissolve(group) if txid in dict_fulltxdetail}
+                        component.update(members)
+                        queue.extend(members)
+            components.append(component)
+        return components
+
+    def _sort_group(self, group: GroupKey, dict_fulltxdetail: Mapping[str, FullTxDetail]) -> None:
+        """(Re)sort a group and (re)insert it into the order."""
+        self._remove_from_order(group)
+        members = self._members.get(group)
+        if not members:
+            self._members.pop(group, None)
+            self._sorted.pop(group, None)
+            return
+
+        section, group_id = group
+        # sorted txids make the order independent of the order the txs arrived in
+        fulltxdetails = [dict_fulltxdetail[txid] for txid in sorted(members)]
+        sort_key: tuple[Any, ...] = (group_id,) if section == TxSection.Confirmed else ()
+        if section == TxSection.Initial:
+            sorted_group = sorted(fulltxdetails, key=lambda fx: self._initial_order.get(fx.txid, 0))
+        else:
+            sorted_group = topo_sort(fulltxdetails)
+        if section in CLUSTERED_SECTIONS:
+            sort_key = min(
+                (fx.tx.transaction.lock_time(), fx.txid)
+                for fx in fulltxdetails
+                if not any(neighbor in members for neighbor in self._parents(fx))
+            )
+
+        self._sorted[group] = sorted_group
+        entry = (section, sort_key, group_id)
+        self._order_entry[group] = entry
+        insort(self._order, entry)
+
+    def ordered(self) -> list[FullTxDetail]:
+        """All txs in history order."""
+        if self._ordered is None:
+            ordered: list[FullTxDetail] = []
+            for section, _, group_id in self._order:
+                ordered.extend(self._sorted[(section, group_id)])
+            self._ordered = ordered
+        return self._ordered
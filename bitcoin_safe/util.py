@@ -32,7 +32,7 @@ import json
 import logging
 import math
 import os
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Hashable, Iterable, Iterator
 from datetime import datetime, timedelta
 from functools import cache, lru_cache, wraps
 from pathlib import Path
@@ -163,7 +163,14 @@ def clean_lines(lines: list[str]) -> list[str]:
 
 def jsonlines_to_list_of_dict(jsonlines: str) -> list[dict]:
     """Jsonlines to list of dict."""
-    return [json.loads(line) for line in clean_lines(jsonlines.splitlines())]
+    return list(iter_jsonlines(jsonlines.splitlines()))
+
+
+def iter_jsonlines(lines: Iterable[str] | Iterable[bytes]) -> Iterator[dict]:
+    """Parse the lines one by one (e.g. of an open file), skipping empty lines."""
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
 
 
 P = ParamSpec("P")
@@ -174,6 +181,7 @@ class _CacheHost(Protocol):
     _instance_cache: dict[Callable[..., Any], Callable[..., Any]]
     _cached_instance_methods_always_keep: list[Callable[..., Any]]
     _cached_instance_methods: list[Callable[..., Any]]
+    _cached_instance_method_dependencies: dict[Callable[..., Any], frozenset[Hashable] | None]
 
 
 T = TypeVar("T", bound=_CacheHost)
@@ -181,8 +189,15 @@ T = TypeVar("T", bound=_CacheHost)
 
 def instance_lru_cache(
     always_keep: bool = False,
+    depends_on: Iterable[Hashable] | None = None,
 ) -> Callable[[Callable[Concatenate[T, P], R]], Callable[Concatenate[T, P], R]]:
-    """Instance lru cache."""
+    """Instance lru cache.
+
+    depends_on declares what the cached result depends on, such that
+    CacheManager.clear_instance_cache(dependencies=...) only clears the affected
+    methods. If None, the method is cleared on every clear_instance_cache.
+    """
+    dependencies = frozenset(depends_on) if depends_on is not None else None
 
     def decorator(func: Callable[Concatenate[T, P], R]) -> Callable[Concatenate[T, P], R]:
         @wraps(func)
@@ -199,6 +214,7 @@ def instance_lru_cache(
                     if always_keep
                     else self._cached_instance_methods
                 ).append(cached)
+                self._cached_instance_method_dependencies[cached] = dependencies
             result: R = cache[func](*args, **kwargs)
             return result
 
@@ -214,15 +230,31 @@ class CacheManager:
         self._instance_cache: dict[Callable, Any] = {}
         self._cached_instance_methods: list[Any] = []
         self._cached_instance_methods_always_keep: list[Any] = []
+        self._cached_instance_method_dependencies: dict[Any, frozenset[Hashable] | None] = {}
+
+    def clear_instance_cache(self, clear_always_keep=False, dependencies: Iterable[Hashable] | None = None):
+        """Clear instance cache.
+
+        If dependencies is given, only the methods that depend on any of them
+        (or that declared no dependencies) are cleared.
+        """
+        logger.debug(f"clear_instance_cache {self.__class__.__name__} {dependencies=}")
+        changed = set(dependencies) if dependencies is not None else None
+
+        def is_affected(cached_method) -> bool:
+            """Is affected."""
+            if changed is None:
+                return True
+            method_dependencies = self._cached_instance_method_dependencies.get(cached_method)
+            return method_dependencies is None or not method_dependencies.isdisjoint(changed)
 
-    def clear_instance_cache(self, clear_always_keep=False):
-        """Clear instance cache."""
-        logger.debug(f"clear_instance_cache {self.__class__.__name__}")
         for cached_method in self._cached_instance_methods:
-            cached_method.cache_clear()
+            if is_affected(cached_method):
+                cached_method.cache_clear()
         if clear_always_keep:
             for cached_method in self._cached_instance_methods_always_keep:
-                cached_method.cache_clear()
+                if is_affected(cached_method):
+                    cached_method.cache_clear()
 
     def clear_method(self, method):
         """Clear method."""
@@ -31,9 +31,10 @@ from __future__ import annotations
 import logging
 import random
 from collections import defaultdict
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Iterable, Mapping
 from pathlib import Path
 from time import time
+from types import MappingProxyType
 from typing import (
     Any,
     Final,
@@ -61,8 +62,11 @@ from bitcoin_usb.address_types import DescriptorInfo
 from bitcoin_usb.software_signer import derive as software_signer_derive
 from typing_extensions import Self
 
+from bitcoin_safe.address_cache import AddressCache, AddressIndexStore
+from bitcoin_safe.address_comparer import AddressIndex
 from bitcoin_safe.client import Client
 from bitcoin_safe.client_helpers import UpdateInfo
+from bitcoin_safe.coin_selection import CoinSelectionAlgorithm, CoinSelectionParams, select_coins
 from bitcoin_safe.network_utils import ProxyInfo
 from bitcoin_safe.persister.serialize_persistence import SerializePersistence
 from bitcoin_safe.psbt_util import FeeInfo, FeeRate
@@ -87,6 +91,7 @@ from .pythonbdk_types import (
     Balance,
     BlockchainType,
     FullTxDetail,
+    FullTxDetailGraph,
     OutPoint,
     PythonUtxo,
     Recipient,
@@ -98,8 +103,9 @@ from .pythonbdk_types import (
     robust_address_str_from_txout,
 )
 from .signals import UpdateFilter, WalletFunctions
-from .storage import BaseSaveableClass, filtered_for_init
+from .storage import BaseSaveableClass, Journal, JournalError, filtered_for_init
 from .tx import TxBuilderInfos, TxUiInfos, short_tx_id
+from .tx_order import TxOrderIndex
 from .util import CacheManager, calculate_ema, fast_version, instance_lru_cache
 
 _LOOKAHEAD_SENTINEL: Final = object()  # unique marker
@@ -464,6 +470,21 @@ class TxoType(enum.Enum):
     OutputTxo = enum.auto()
 
 
+class CacheDependency(enum.Enum):
+    "What the result of a cached wallet method depends on"
+
+    TxGraph = enum.auto()
+    AddressTips = enum.auto()
+    ChainHeight = enum.auto()
+    Labels = enum.auto()
+
+
+# the relevant transactions depend on the tx graph and on the revealed (and thereby indexed) scripts
+TX_CACHE_DEPENDENCIES = (CacheDependency.TxGraph, CacheDependency.AddressTips)
+# labels that are autofilled from the transactions
+LABEL_CACHE_DEPENDENCIES = (*TX_CACHE_DEPENDENCIES, CacheDependency.Labels)
+
+
 BDK_DEFAULT_LOOKAHEAD = 25
 
 
@@ -501,6 +522,8 @@ class BdkWallet(bdk.Wallet, CacheManager):
         """Reset address and transaction delta caches."""
         self._address_cache: dict[tuple[str, int], str | None] = {}
         self._delta_cache: dict[str, DeltaCacheListTransactions] = {}
+        # persistent cache of derived addresses, set by the Wallet
+        self.derived_address_cache: AddressCache | None = None
 
     @classmethod
     def load(
@@ -534,13 +557,18 @@ class BdkWallet(bdk.Wallet, CacheManager):
         is_change=False,
     ) -> str:
         """Return the string form of the address at the given index."""
-        return str(
+        if self.derived_address_cache and (address := self.derived_address_cache.get(index, is_change)):
+            return address
+        address = str(
             self.peek_address(
                 index=index, keychain=AddressInfoMin.is_change_to_keychain(is_change=is_change)
             ).address
         )
+        if self.derived_address_cache:
+            self.derived_address_cache.add(index, is_change, address)
+        return address
 
-    @instance_lru_cache()
+    @instance_lru_cache(depends_on=TX_CACHE_DEPENDENCIES)
     @time_logger
     def list_output(self) -> list[bdk.LocalOutput]:
         """Return cached local outputs from the underlying bdk wallet."""
@@ -550,7 +578,7 @@ class BdkWallet(bdk.Wallet, CacheManager):
 
         return result
 
-    @instance_lru_cache()
+    @instance_lru_cache(depends_on=TX_CACHE_DEPENDENCIES)
     @time_logger
     def list_unspent_outpoints(self, include_spent=False) -> list[str]:
         """Return a list of tracked outpoints, optionally including spent ones."""
@@ -593,7 +621,7 @@ class BdkWallet(bdk.Wallet, CacheManager):
             chain_position=canonical_tx.chain_position,
         )
 
-    @instance_lru_cache()
+    @instance_lru_cache(depends_on=TX_CACHE_DEPENDENCIES)
     def list_transactions(self) -> list[TransactionDetails]:
         """Return cached transaction details for the wallet history."""
         start_time = time()
@@ -713,9 +741,17 @@ class Wallet(BaseSaveableClass, CacheManager):
         serialize_persistence: SerializePersistence | None = None,
         cbf_uuid: str | None = None,
         is_new_wallet=False,
+        address_cache_dir: Path | None = None,
+        history_summary: dict[str, Any] | None = None,
         **kwargs,
     ) -> None:
-        """Initialize a wallet with descriptors, keystores, and runtime context."""
+        """Initialize a wallet with descriptors, keystores, and runtime context.
+
+        If serialize_persistence was loaded with a deferred tx_graph, the wallet
+        starts without its transaction history, until load_history (or
+        build_history_bdkwallet and install_history_bdkwallet) is called. Meanwhile
+        get_balance returns the balance of history_summary.
+        """
         super().__init__()
         CacheManager.__init__(self)
         self.check_consistency(keystores, descriptor_str, network=network)
@@ -739,7 +775,16 @@ class Wallet(BaseSaveableClass, CacheManager):
         self.serialize_persistence = (
             serialize_persistence if serialize_persistence else SerializePersistence()
         )
+        if (journal_labels := self.serialize_persistence.pop_journal_labels()) is not None:
+            self.labels.load_journal_state(journal_labels)
+        elif self.labels.missing_journal_data:
+            raise JournalError("The labels are stored in a journal, but the journal contains no labels")
+        self.labels.on_changed = self._on_labels_changed
         self.cbf_uuid = cbf_uuid if cbf_uuid else uuid4().hex
+        self.address_cache_dir = address_cache_dir
+        # balance and number of transactions at the last save
+        self.history_summary = history_summary if history_summary else {}
+        self._history_loaded = not self.serialize_persistence.has_deferred_tx_graph()
 
         self.refresh_wallet = False
         # end refresh dependent values
@@ -748,12 +793,77 @@ class Wallet(BaseSaveableClass, CacheManager):
 
         self.client: Client | None = None
         self._initial_txs = initial_txs if initial_txs else []
+        # addresses are only ever added, so the index survives cache clears
+        self.address_poisoning_index = AddressIndex(
+            store=(
+                AddressIndexStore(self.address_cache_dir, self.multipath_descriptor)
+                if self.address_cache_dir
+                else None
+            )
+        )
         self.clear_cache()
         if initial_txs:
+            self.load_history()
             # must appear after clear_cache such that the caches are defined
             self.apply_unconfirmed_txs(txs=initial_txs)
         self.mark_all_labeled_addresses_used(include_receiving_addresses=False)
 
+    def is_loading_history(self) -> bool:
+        """True, while the transaction history of a staged load is not applied yet."""
+        return not self._history_loaded
+
+    def build_history_bdkwallet(self) -> tuple[BdkWallet, bdk.ChangeSet] | None:
+        """Deserializes the deferred transaction history and builds a bdk wallet with
+        it, without changing this wallet. Can run in a worker thread.
+
+        Returns (bdkwallet, change_set it was loaded from) for
+        install_history_bdkwallet, or None if the history is loaded already.
+        """
+        if self._history_loaded:
+            return None
+        self.serialize_persistence.load_deferred_tx_graph()
+        change_set = self.serialize_persistence.change_set
+        return self._build_bdkwallet(self.multipath_descriptor), change_set
+
+    def install_history_bdkwallet(self, built: tuple[BdkWallet, bdk.ChangeSet] | None) -> bool:
+        """Replaces the bdk wallet by the result of build_history_bdkwallet and clears
+        the caches. Must run in the thread that uses the wallet.
+
+        Returns True if the history was applied by this call.
+        """
+        if self._history_loaded or not built:
+            return False
+        bdkwallet, change_set = built
+        if change_set is not self.serialize_persistence.change_set:
+            # changes were persisted by the current bdk wallet in the meantime
+            self.serialize_persistence.load_deferred_tx_graph()
+            bdkwallet = self._build_bdkwallet(self.multipath_descriptor)
+        bdkwallet.derived_address_cache = self.bdkwallet.derived_address_cache
+        self._install_bdkwallet(bdkwallet)
+        self._history_loaded = True
+        self.clear_cache()
+        # mark_used is not persisted by bdk
+        self.mark_all_labeled_addresses_used(include_receiving_addresses=False)
+        logger.info(f"{self.id} loaded the transaction history")
+        return True
+
+    def stop_loading_history(self) -> None:
+        """Continues without the deferred transaction history, e.g. if it cannot be
+        deserialized.
+
+        The deferred history is still written to the wallet file.
+        """
+        self._history_loaded = True
+        self.clear_cache()
+
+    def load_history(self) -> bool:
+        """Deserializes the deferred transaction history and reloads the bdk wallet
+        with it (blocking).
+
+        Returns True if the history was applied by this call.
+        """
+        return self.install_history_bdkwallet(self.build_history_bdkwallet())
+
     def get_cbf_data_dir(
         self,
     ) -> Path:
@@ -762,8 +872,38 @@ class Wallet(BaseSaveableClass, CacheManager):
 
     def persist(self) -> None:
         """Flush wallet data to the configured persistence backend."""
+        staged = self.bdkwallet.staged()
         self.bdkwallet.persist(self.persister)
-        self.clear_cache()
+        if staged:
+            self.clear_cache(dependencies=self._changed_cache_dependencies(staged))
+
+    def _changed_cache_dependencies(self, changeset: bdk.ChangeSet) -> set[CacheDependency]:
+        """Return which cache dependencies are affected by the changeset."""
+        dependencies: set[CacheDependency] = set()
+
+        tx_graph = changeset.tx_graph_changeset()
+        if (
+            tx_graph.txs
+            or tx_graph.txouts
+            or tx_graph.anchors
+            or tx_graph.last_seen
+            or tx_graph.first_seen
+            or tx_graph.last_evicted
+        ):
+            dependencies.add(CacheDependency.TxGraph)
+
+        if changeset.indexer_changeset().last_revealed:
+            dependencies.add(CacheDependency.AddressTips)
+
+        if chain_changes := changeset.localchain_changeset().changes:
+            dependencies.add(CacheDependency.ChainHeight)
+            # A reorg (removed or replaced blocks) changes the chain position of transactions.
+            # Appending new blocks does not.
+            if any(cc.hash is None or cc.height <= self._persisted_chain_height for cc in chain_changes):
+                dependencies.add(CacheDependency.TxGraph)
+            self._persisted_chain_height = self.get_height_no_cache()
+
+        return dependencies
 
     @staticmethod
     def check_consistency(keystores: list[KeyStore], descriptor_str: str, network: bdk.Network):
@@ -833,15 +973,29 @@ class Wallet(BaseSaveableClass, CacheManager):
         if include_receiving_addresses:
             self.mark_labeled_addresses_used(self._get_addresses_infos(is_change=False))
 
-    def clear_cache(self, clear_always_keep=False) -> None:
-        """Reset wallet caches and propagate the clear to nested caches."""
-        self.cache_dict_fulltxdetail: dict[str, FullTxDetail] = {}  # txid:FullTxDetail
-        self.cache_address_to_txids: dict[str, set[str]] = defaultdict(set)  # address:[txid]
+    def clear_cache(
+        self, clear_always_keep=False, dependencies: Iterable[CacheDependency] | None = None
+    ) -> None:
+        """Reset wallet caches and propagate the clear to nested caches.
+
+        If dependencies is given, only the caches depending on them are reset.
+        The FullTxDetail graph and the history order index are kept then, because
+        get_dict_fulltxdetail and sorted_delta_list_transactions apply the delta
+        of the transactions to them.
+        """
+        dependencies = set(dependencies) if dependencies is not None else None
+        if dependencies is None:
+            self.fulltxdetail_graph = FullTxDetailGraph()
+            self.tx_order_index: TxOrderIndex | None = None
+
+        self.clear_instance_cache(clear_always_keep=clear_always_keep, dependencies=dependencies)
+        self.bdkwallet.clear_instance_cache(clear_always_keep=clear_always_keep, dependencies=dependencies)
 
-        self.clear_instance_cache(clear_always_keep=clear_always_keep)
-        self.bdkwallet.clear_instance_cache(clear_always_keep=clear_always_keep)
+    def _on_labels_changed(self) -> None:
+        """Reset the caches that depend on the labels."""
+        self.clear_cache(dependencies=[CacheDependency.Labels])
 
-    @instance_lru_cache()
+    @instance_lru_cache(depends_on=[CacheDependency.AddressTips])
     def _get_addresses_infos(
         self,
         is_change=False,
@@ -849,7 +1003,7 @@ class Wallet(BaseSaveableClass, CacheManager):
         """Return address info entries for change or receive keychains."""
         if (not is_change) and (not self.multipath_descriptor):
             return []
-        return [
+        address_infos = [
             AddressInfoMin(
                 address=self.bdkwallet.peek_address_str(index, is_change=is_change),
                 index=index,
@@ -857,8 +1011,9 @@ class Wallet(BaseSaveableClass, CacheManager):
             )
             for index in range(0, self.tips[int(is_change)] + 1)
         ]
+        return address_infos
 
-    @instance_lru_cache()
+    @instance_lru_cache(depends_on=[CacheDependency.AddressTips])
     def _get_addresses(
         self,
         is_change=False,
@@ -867,6 +1022,11 @@ class Wallet(BaseSaveableClass, CacheManager):
         addresses_infos = self._get_addresses_infos(is_change=is_change)
         return [addresses_info.address for addresses_info in addresses_infos]
 
+    @instance_lru_cache(depends_on=[CacheDependency.AddressTips])
+    def _get_address_set(self) -> frozenset[str]:
+        """Return the derived addresses of both keychains for membership tests."""
+        return frozenset(self.get_addresses())
+
     @instance_lru_cache(always_keep=True)
     def get_mn_tuple(self) -> tuple[int, int]:
         """Return the (threshold, signer count) tuple for the wallet."""
@@ -1008,6 +1168,8 @@ class Wallet(BaseSaveableClass, CacheManager):
 
     def dump(self, exclude_keys: list[str] | None = None) -> dict[str, Any]:
         """Serialize the wallet state to a dictionary."""
+        if self.bdkwallet.derived_address_cache:
+            self.bdkwallet.derived_address_cache.flush()
         d = super().dump()
 
         keys = [
@@ -1027,6 +1189,15 @@ class Wallet(BaseSaveableClass, CacheManager):
 
         d["initialization_tips"] = self.tips
         d["descriptor_str"] = self.multipath_descriptor.to_string_with_secret()
+        d["history_summary"] = (
+            # the history is still deferred and is dumped as it was read
+            self.history_summary
+            if self.is_loading_history()
+            else {
+                "balance": self.get_balance(),
+                "num_transactions": len(self.sorted_delta_list_transactions()),
+            }
+        )
 
         # initial_txs is a legacy way of storing transactions
         # can be removed > 1.5.0
@@ -1038,13 +1209,27 @@ class Wallet(BaseSaveableClass, CacheManager):
             ]
         return d
 
+    @staticmethod
+    def address_cache_dir_for(config: UserConfig) -> Path:
+        """Directory of the persistent address caches of wallets opened from files."""
+        return Path(config.wallet_dir) / "data" / "address_cache"
+
     @classmethod
     def from_file(cls, filename: str, config: UserConfig, password: str | None = None) -> Wallet:
         """Load a wallet from a serialized file on disk."""
         return super()._from_file(
             filename=filename,
             password=password,
-            class_kwargs={"Wallet": {"config": config}},
+            class_kwargs={
+                "Wallet": {
+                    "config": config,
+                    "address_cache_dir": cls.address_cache_dir_for(config),
+                },
+                SerializePersistence.__name__: {
+                    "journal_filename": Journal.path_for(filename),
+                    "password": password,
+                },
+            },
         )
 
     @classmethod
@@ -1127,22 +1312,33 @@ class Wallet(BaseSaveableClass, CacheManager):
         assert multipath_descriptor.is_multipath()
         self.persister = bdk.Persister.custom(self.serialize_persistence)
 
-        descriptor, change_descriptor = self.multipath_descriptor.to_single_descriptors()
+        bdkwallet = self._build_bdkwallet(multipath_descriptor)
+        if self.address_cache_dir:
+            bdkwallet.derived_address_cache = AddressCache(self.address_cache_dir, multipath_descriptor)
+        self._install_bdkwallet(bdkwallet)
+
+    def _build_bdkwallet(self, multipath_descriptor: bdk.Descriptor) -> BdkWallet:
+        """Loads the bdk wallet from the serialize_persistence, or creates a new one."""
+        descriptor, change_descriptor = multipath_descriptor.to_single_descriptors()
         if self.serialize_persistence.has_descriptor():
-            self.bdkwallet = BdkWallet.load(
-                descriptor=descriptor,
-                change_descriptor=change_descriptor,
-                persister=self.persister,
-                lookahead=self.calc_best_lookahead(),
-            )
-        else:
-            self.bdkwallet = BdkWallet(
+            return BdkWallet.load(
                 descriptor=descriptor,
                 change_descriptor=change_descriptor,
-                network=self.config.network,
                 persister=self.persister,
                 lookahead=self.calc_best_lookahead(),
             )
+        return BdkWallet(
+            descriptor=descriptor,
+            change_descriptor=change_descriptor,
+            network=self.config.network,
+            persister=self.persister,
+            lookahead=self.calc_best_lookahead(),
+        )
+
+    def _install_bdkwallet(self, bdkwallet: BdkWallet) -> None:
+        """Install bdkwallet."""
+        self.bdkwallet = bdkwallet
+        self._persisted_chain_height = self.get_height_no_cache()
         for is_change, tip in enumerate(self._initialization_tips):
             self.bdkwallet.reveal_addresses_to(
                 keychain=AddressInfoMin.is_change_to_keychain(is_change=bool(is_change)), index=tip
@@ -1242,6 +1438,8 @@ class Wallet(BaseSaveableClass, CacheManager):
         if not self.bdkwallet:
             logger.warning("Wallet not initialized; cannot sync.")
             return None
+        # the sync must be applied to the complete history
+        self.load_history()
         if not self.client:
             logger.error(
                 "This should never be called. Because init_blockchain  should be called before by qt_wallet"
@@ -1383,16 +1581,16 @@ class Wallet(BaseSaveableClass, CacheManager):
     @time_logger
     def fill_commonly_used_caches_min(self) -> None:
         """Prime essential caches for quick wallet lookups."""
-        self.clear_cache()
+        # persist() already invalidated the caches affected by wallet changes
         self.get_addresses()
         self.set_categories_of_used_addresses()
 
-    @instance_lru_cache()
+    @instance_lru_cache(depends_on=TX_CACHE_DEPENDENCIES)
     def get_txs(self) -> dict[str, TransactionDetails]:
         """Return a mapping from transaction ID to details."""
         return {tx.txid: tx for tx in self.sorted_delta_list_transactions()}
 
-    @instance_lru_cache()
+    @instance_lru_cache(depends_on=TX_CACHE_DEPENDENCIES)
     def get_tx(self, txid: str) -> TransactionDetails | None:
         """Return transaction details for the given txid."""
         return self.get_txs().get(txid)
@@ -1576,7 +1774,7 @@ class Wallet(BaseSaveableClass, CacheManager):
             return txo_dict[outpoint_str]
         return None
 
-    @instance_lru_cache()
+    @instance_lru_cache(depends_on=TX_CACHE_DEPENDENCIES)
     def get_address_balances(self) -> defaultdict[str, Balance]:
         """Converts the known utxos into a dict of addresses and their balance."""
 
@@ -1613,7 +1811,7 @@ class Wallet(BaseSaveableClass, CacheManager):
 
         return balances
 
-    @instance_lru_cache()
+    @instance_lru_cache(depends_on=TX_CACHE_DEPENDENCIES)
     def get_addr_balance(self, address: str) -> Balance:
         """Return the balance of a set of addresses:
         confirmed and matured, unconfirmed, unmatured
@@ -1621,10 +1819,10 @@ class Wallet(BaseSaveableClass, CacheManager):
         return self.get_address_balances()[address]
 
     def get_involved_txids(self, address: str) -> set[str]:
-        # this also fills self.cache_address_to_txids
+        # this also fills self.fulltxdetail_graph.address_to_txids
         """Return transaction IDs that involve the provided addresses."""
         self.get_dict_fulltxdetail()
-        return self.cache_address_to_txids.get(address, set())
+        return self.fulltxdetail_graph.address_to_txids.get(address, set())
 
     def set_categories_of_used_addresses(self):
         """Set address categories for used outputs."""
@@ -1637,71 +1835,37 @@ class Wallet(BaseSaveableClass, CacheManager):
                 self.labels.set_addr_category(ref=utxo.address, category=category, timestamp="old")
                 logger.info(f"Set {category=} for {utxo.address=}")
 
-    @instance_lru_cache()
+    @instance_lru_cache(depends_on=TX_CACHE_DEPENDENCIES)
     @time_logger
-    def get_dict_fulltxdetail(self) -> dict[str, FullTxDetail]:
+    def get_dict_fulltxdetail(self) -> Mapping[str, FullTxDetail]:
         """
         Createa a map of txid : to FullTxDetail
 
         Returns:
-            FullTxDetail
+            A read-only view of the wallet's FullTxDetail graph. It is updated in place
+            by later calls, so copy it before keeping it across updates.
         """
         start_time = time()
         delta_txs = self.bdkwallet.list_delta_transactions(access_marker="get_dict_fulltxdetail")
-        cache_dict_fulltxdetail = self.cache_dict_fulltxdetail.copy()
-
-        # if transactions were removed (reorg or other), then recalculate everything
-        if delta_txs.removed or not cache_dict_fulltxdetail:
-            cache_dict_fulltxdetail = {}
-            txs = delta_txs.new_state
+        graph = self.fulltxdetail_graph
+        get_address_of_txout = self.bdkwallet.get_address_of_txout
+
+        # only the changed txs and the txs linked to them are touched,
+        # also if transactions were removed (reorg, rbf replacement, eviction)
+        if not graph.fulltxdetails:
+            graph.add(delta_txs.new_state, get_address_of_txout)
+            num_changed = len(delta_txs.new_state)
         else:
-            txs = delta_txs.appended + delta_txs.modified
+            graph.remove(tx.txid for tx in delta_txs.removed)
+            graph.update(delta_txs.modified, get_address_of_txout)
+            graph.add(delta_txs.appended, get_address_of_txout)
+            num_changed = len(delta_txs.removed) + len(delta_txs.modified) + len(delta_txs.appended)
 
-        def append_dicts(txid, python_utxos: Iterable[PythonUtxo | None]) -> None:
-            """Append transaction data into the accumulation dictionaries."""
-            for python_utxo in python_utxos:
-                if not python_utxo:
-                    continue
-                self.cache_address_to_txids[python_utxo.address].add(txid)
-
-        def process_outputs(tx: TransactionDetails) -> tuple[str, FullTxDetail]:
-            """Process outputs while compiling transaction details."""
-            fulltxdetail = FullTxDetail.fill_received(tx, self.bdkwallet.get_address_of_txout)
-            if fulltxdetail.txid in cache_dict_fulltxdetail:
-                if not tx.transaction.is_coinbase():
-                    logger.error(f"Trying to add a tx with txid {fulltxdetail.txid} twice.")
-            return fulltxdetail.txid, fulltxdetail
-
-        def process_inputs(tx: TransactionDetails) -> tuple[str, FullTxDetail]:
-            "this must be done AFTER process_outputs"
-            txid = tx.txid
-            fulltxdetail = cache_dict_fulltxdetail[txid]
-            fulltxdetail.fill_inputs(cache_dict_fulltxdetail)
-            return txid, fulltxdetail
-
-        key_value_pairs = list(map(process_outputs, txs))
-
-        cache_dict_fulltxdetail.update(key_value_pairs)
-        for txid, fulltxdetail in key_value_pairs:
-            append_dicts(txid, list(fulltxdetail.outputs.values()))
-
-        # speed test for wallet 600 transactions (with many inputs each) without profiling:
-        # map : 2.714s
-        # for loop:  2.76464
-        # multithreading : 6.3021s
-        # threadtable_batched: 4.1 s , this should perform best, however bdk is
-        #                           probably the bottleneck and not-multithreading capable
-        key_value_pairs = list(map(process_inputs, txs))
-        for txid, fulltxdetail in key_value_pairs:
-            append_dicts(txid, fulltxdetail.inputs.values())
-
-        if txs:
-            logger.debug(f"get_dict_fulltxdetail  with {len(txs)} txs in {time() - start_time}")
-
-        self.cache_dict_fulltxdetail = cache_dict_fulltxdetail
-        return self.cache_dict_fulltxdetail
-
-    @instance_lru_cache(always_keep=False)
+        if num_changed:
+            logger.debug(f"get_dict_fulltxdetail  with {num_changed} txs in {time() - start_time}")
+        return MappingProxyType(graph.fulltxdetails)
+
+    @instance_lru_cache(depends_on=TX_CACHE_DEPENDENCIES)
     def get_all_txos_dict(self, include_not_mine=False) -> dict[str, PythonUtxo]:
         "Returns {str(outpoint) : python_utxo}"
         dict_fulltxdetail = self.get_dict_fulltxdetail()
@@ -1727,7 +1891,7 @@ class Wallet(BaseSaveableClass, CacheManager):
             if not txo.is_spent_by_txid
         ]
 
-    @instance_lru_cache()
+    @instance_lru_cache(depends_on=TX_CACHE_DEPENDENCIES)
     def address_is_used(self, address: str) -> bool:
         """Check if any tx had this address as an output."""
         return bool(self.get_involved_txids(address))
@@ -1764,6 +1928,7 @@ class Wallet(BaseSaveableClass, CacheManager):
         """Return TXOs spent by the given transaction."""
         return self.get_input_and_output_txo_dict(txid)[TxoType.InputTxo]
 
+    @instance_lru_cache(depends_on=LABEL_CACHE_DEPENDENCIES)
     def get_categories_for_txid(self, txid: str) -> list[str]:
         """Return label categories associated with a transaction."""
         input_and_output_txo_dict = self.get_input_and_output_txo_dict(txid)
@@ -1779,6 +1944,7 @@ class Wallet(BaseSaveableClass, CacheManager):
             categories = [self.labels.get_default_category()]
         return categories
 
+    @instance_lru_cache(depends_on=LABEL_CACHE_DEPENDENCIES)
     def get_label_for_address(self, address: str, autofill_from_txs=True, verbose_label=False) -> str:
         """Return the stored label for an address."""
         stored_label = self.labels.get_label(address, "")
@@ -1802,6 +1968,7 @@ class Wallet(BaseSaveableClass, CacheManager):
 
         return label
 
+    @instance_lru_cache(depends_on=LABEL_CACHE_DEPENDENCIES)
     def get_label_for_txid(self, txid: str, autofill_from_addresses=True, verbose_label=False) -> str:
         """Return the stored label for a transaction."""
         stored_label = self.labels.get_label(txid, "")
@@ -1837,6 +2004,8 @@ class Wallet(BaseSaveableClass, CacheManager):
 
     def get_balance(self) -> Balance:
         """Return the wallet balance summary."""
+        if self.is_loading_history() and (balance := self.history_summary.get("balance")):
+            return balance
         return Balance.from_bdk(balance=self.bdkwallet.balance())
 
     def get_txo_name(self, utxo: PythonUtxo) -> str:
@@ -1849,7 +2018,7 @@ class Wallet(BaseSaveableClass, CacheManager):
         """Query the chain height from the blockchain backend."""
         return self.bdkwallet.latest_checkpoint().height
 
-    @instance_lru_cache()
+    @instance_lru_cache(depends_on=[CacheDependency.ChainHeight])
     # caching is crucial, because this function is called vor every row in the hist table
     def get_height(self) -> int:
         """Return the current chain height, using cache when possible."""
@@ -1864,14 +2033,6 @@ class Wallet(BaseSaveableClass, CacheManager):
             """Return the value of a candidate UTXO."""
             return utxo.value
 
-        def is_outpoint_in_list(outpoint, utxos) -> bool:
-            """Return True if the outpoint appears in the provided list."""
-            outpoint = OutPoint.from_bdk(outpoint)
-            for utxo in utxos:
-                if outpoint == OutPoint.from_bdk(utxo.outpoint):
-                    return True
-            return False
-
         # 1. select random utxos until >= total_sent_value
         utxos = list(utxos).copy()
         random.shuffle(utxos)
@@ -1887,8 +2048,9 @@ class Wallet(BaseSaveableClass, CacheManager):
 
         # 2. opportunistically  add additional outputs for merging
         if opportunistic_merge_utxos:
+            selected_outpoints = {OutPoint.from_bdk(utxo.outpoint) for utxo in selected_utxos}
             non_selected_utxos = [
-                utxo for utxo in utxos if not is_outpoint_in_list(utxo.outpoint, selected_utxos)
+                utxo for utxo in utxos if OutPoint.from_bdk(utxo.outpoint) not in selected_outpoints
             ]
 
             # never choose more than half of all remaining outputs
@@ -1922,6 +2084,28 @@ class Wallet(BaseSaveableClass, CacheManager):
             spend_all_utxos=True,
         )
 
+    def coin_select(
+        self, utxos: list[PythonUtxo], txinfos: TxUiInfos, fee_rate: float
+    ) -> UtxosForInputs | None:
+        """Select the coins with txinfos.coin_selection_algorithm.
+
+        Returns None if the coins are insufficient.
+        """
+        params = CoinSelectionParams.from_mn_tuple(
+            target=sum(recipient.amount for recipient in txinfos.recipients),
+            fee_rate=fee_rate,
+            mn_tuple=self.get_mn_tuple(),
+            num_outputs=len(txinfos.recipients),
+        )
+        result = select_coins(
+            np.array([utxo.value for utxo in utxos], dtype=np.int64),
+            params,
+            algorithm=txinfos.coin_selection_algorithm,
+        )
+        if result is None:
+            return None
+        return UtxosForInputs(utxos=[utxos[i] for i in result.indices.tolist()], spend_all_utxos=True)
+
     def handle_opportunistic_merge_utxos(self, txinfos: TxUiInfos) -> UtxosForInputs:
         "This does the initial coin selection if opportunistic_merge_utxos"
         utxos_for_input = UtxosForInputs(
@@ -1937,6 +2121,14 @@ class Wallet(BaseSaveableClass, CacheManager):
         # check if you should spend all utxos, then there is no coin selection necessary
         if utxos_for_input.spend_all_utxos:
             return utxos_for_input
+        elif txinfos.coin_selection_algorithm != CoinSelectionAlgorithm.bdk and (
+            utxos_for_coin_selection := self.coin_select(
+                utxos=utxos_for_input.utxos,
+                txinfos=txinfos,
+                fee_rate=txinfos.fee_rate if txinfos.fee_rate is not None else MIN_RELAY_FEE,
+            )
+        ):
+            return utxos_for_coin_selection
         # if more opportunistic_merge should be done, than I have to use my coin selection
         elif txinfos.opportunistic_merge_utxos:
             # use my coin selection algo, which uses more utxos than needed
@@ -1951,9 +2143,9 @@ class Wallet(BaseSaveableClass, CacheManager):
 
     def is_my_address(self, address: str) -> bool:
         """Return True if the address belongs to this wallet."""
-        return address in self.get_addresses()
+        return address in self._get_address_set()
 
-    @instance_lru_cache()
+    @instance_lru_cache(depends_on=[CacheDependency.AddressTips])
     def get_address_dict_with_peek(
         self, peek_receive_ahead: int = 1000, peek_change_ahead: int = 1000
     ) -> dict[str, AddressInfoMin]:
@@ -1965,14 +2157,10 @@ class Wallet(BaseSaveableClass, CacheManager):
             addresses.update({address_info.address: address_info for address_info in address_infos})
             tip = address_infos[-1].index if address_infos else 0
 
+            keychain = AddressInfoMin.is_change_to_keychain(is_change=_is_change)
             for index in range(tip + 1, tip + 1 + _peek_ahead):
-                address_info = self.bdkwallet.peek_address(
-                    keychain=AddressInfoMin.is_change_to_keychain(is_change=_is_change), index=index
-                )
-                address = str(address_info.address)
-                addresses[address] = AddressInfoMin(
-                    address=address, index=address_info.index, keychain=address_info.keychain
-                )
+                address = self.bdkwallet.peek_address_str(index, is_change=_is_change)
+                addresses[address] = AddressInfoMin(address=address, index=index, keychain=keychain)
         logger.debug(f"{self.id} get_address_dict_with_peek  in {time() - start_time}s")
         return addresses
 
@@ -2075,6 +2263,8 @@ class Wallet(BaseSaveableClass, CacheManager):
 
     def create_psbt(self, txinfos: TxUiInfos) -> TxBuilderInfos:
         """Create a PSBT from the provided builder information."""
+        # coin selection needs all utxos
+        self.load_history()
         if txinfos.replace_tx:
             return self.create_bump_fee_psbt(txinfos=txinfos)
 
@@ -2236,11 +2426,18 @@ class Wallet(BaseSaveableClass, CacheManager):
     def on_addresses_updated(self, update_filter: UpdateFilter) -> None:
         """Checks if the tip reaches the addresses and updated the tips if necessary
         (This is especially relevant if a psbt creates a new change address)"""
-        self.clear_method(self._get_addresses)
-        self.clear_method(self._get_addresses_infos)
+        for is_change in [False, True]:
+            # the cached addresses only lack behind, if a tip advanced without persist
+            if len(self._get_addresses(is_change=is_change)) != self.tips[int(is_change)] + 1:
+                self.clear_method(self._get_addresses)
+                self.clear_method(self._get_addresses_infos)
+                self.clear_method(self._get_address_set)
+                break
         logger.debug(f"{self.__class__.__name__} update_with_filter")
 
-        not_indexed_addresses = set(update_filter.addresses) - set(self.get_addresses())
+        not_indexed_addresses = {
+            address for address in update_filter.addresses if not self.is_my_address(address)
+        }
         for not_indexed_address in not_indexed_addresses:
             self.advance_tip_to_address(not_indexed_address)
 
@@ -2280,7 +2477,7 @@ class Wallet(BaseSaveableClass, CacheManager):
                     conflicting_python_utxos.append(python_utxo)
         return conflicting_python_utxos
 
-    @instance_lru_cache()
+    @instance_lru_cache(depends_on=TX_CACHE_DEPENDENCIES)
     def sorted_delta_list_transactions(self, access_marker=None) -> list[TransactionDetails]:
         """
         Returns TransactionDetails sorted such that:
@@ -2289,177 +2486,19 @@ class Wallet(BaseSaveableClass, CacheManager):
         2) All unconfirmed transactions follow, grouped by dependency chains so that each parent
            immediately precedes its children (and descendants).
         """
-        # Fetch full transaction details mapping
-        dict_full: dict[str, FullTxDetail] = self.get_dict_fulltxdetail()
+        dict_full = self.get_dict_fulltxdetail()
+        delta_txs = self.bdkwallet.list_delta_transactions(access_marker="sorted_delta_list_transactions")
 
-        # 1) Split into confirmed vs. unconfirmed using helper
-        confirmed, unconfirmed, initial_transactions, local = self._split_by_confirmation(dict_full)
-
-        # 2) Sort confirmed: by height + intra-block parent→child order
-        sorted_confirmed: list[FullTxDetail] = self._sort_confirmed_transactions(confirmed)
-
-        # 3) Sort unconfirmed: group dependency chains via DFS-topo
-        sorted_unconfirmed: list[FullTxDetail] = self._sort_unconfirmed_transactions(unconfirmed)
-
-        # 4) initial_transactions: sort according to their original order
-        sorted_initial_transactions = self._sort_initial_transactions(initial_transactions)
-
-        # 5) Sort local: group dependency chains via DFS-topo
-        sorted_local: list[FullTxDetail] = self._sort_unconfirmed_transactions(local)
-
-        # 6) Merge: confirmed first, then unconfirmed
-        all_sorted: list[FullTxDetail] = (
-            sorted_confirmed + sorted_unconfirmed + sorted_initial_transactions + sorted_local
-        )
-        return [fx.tx for fx in all_sorted]
-
-    def _split_by_confirmation(
-        self, dict_full: dict[str, FullTxDetail]
-    ) -> tuple[list[FullTxDetail], list[FullTxDetail], list[FullTxDetail], list[FullTxDetail]]:
-        """
-        Splits the full-detail mapping into two lists:
-        - confirmed: with a confirmed chain position
-        - mempool: awaiting confirmation
-        - local: local transactions
-        """
-        initial_transation_ids = [tx.compute_txid() for tx in self._initial_txs]
-
-        confirmed: list[FullTxDetail] = []
-        unconfirmed: list[FullTxDetail] = []
-        initial_transactions: list[FullTxDetail] = []
-        local: list[FullTxDetail] = []
-        for tx_detail in dict_full.values():
-            if isinstance(tx_detail.tx.chain_position, bdk.ChainPosition.CONFIRMED):
-                confirmed.append(tx_detail)
-            else:
-                if is_local(tx_detail.tx.chain_position):
-                    if tx_detail.txid in initial_transation_ids:
-                        initial_transactions.append(tx_detail)
-                    else:
-                        local.append(tx_detail)
-                else:
-                    unconfirmed.append(tx_detail)
-        return confirmed, unconfirmed, initial_transactions, local
-
-    def _sort_confirmed_transactions(self, confirmed: list[FullTxDetail]) -> list[FullTxDetail]:
-        """Orders confirmed transactions by block height, and within the same block,
-        ensures parent transactions precede their children."""
-        # Bucket confirmed txs by their block height
-        conf_by_height: dict[int, list[FullTxDetail]] = defaultdict(list)
-        for fx in confirmed:
-            assert isinstance(fx.tx.chain_position, bdk.ChainPosition.CONFIRMED)
-            height: int = fx.tx.chain_position.confirmation_block_time.block_id.height  # type: ignore
-            conf_by_height[height].append(fx)
-
-        sorted_list: list[FullTxDetail] = []
-        # Iterate heights in ascending order
-        for height in sorted(conf_by_height.keys()):
-            bucket = conf_by_height[height]
-            if len(bucket) > 1:
-                # Sort within the same block by dependency
-                sorted_list.extend(self._dfs_topo_sort(bucket))
-            else:
-                # Single tx has no intra-block dependencies
-                sorted_list.append(bucket[0])
-        return sorted_list
-
-    def _sort_unconfirmed_transactions(self, unconfirmed: list[FullTxDetail]) -> list[FullTxDetail]:
-        """Topologically sorts unconfirmed transactions so that each parent precedes its
-        children and deeper descendants."""
-        # Mypy narrowing: all entries must be unconfirmed
-        for fx in unconfirmed:
-            assert not isinstance(fx.tx.chain_position, bdk.ChainPosition.CONFIRMED)
-        return self._dfs_topo_sort(unconfirmed)
-
-    def _sort_initial_transactions(self, initial_transactions: list[FullTxDetail]) -> list[FullTxDetail]:
-        """Sort initial transactions deterministically."""
-        initial_transation_id_order = {str(tx.compute_txid()): i for i, tx in enumerate(self._initial_txs)}
-
-        def sort_key(tx: FullTxDetail) -> int:
-            """Return the sorting key for initial transaction ordering."""
-            return initial_transation_id_order.get(tx.txid, 0)
-
-        return sorted(initial_transactions, key=sort_key)
-
-    def _dfs_topo_sort(self, tx_list: list[FullTxDetail]) -> list[FullTxDetail]:
-        """Return a *full* topological ordering of the given transactions.
-
-        The list ``tx_list`` must be “homogeneous’’—all confirmed in the same
-        block *or* all unconfirmed—so every dependency edge either points to
-        another element of ``tx_list`` or to a transaction outside the list,
-        never across blocks.
-
-        Topological guarantee
-        ---------------------
-        In the returned list **every parent precedes *all* of its children**.
-        (Parents are *not* guaranteed to be *immediately* before their children;
-        sibling sub-trees can interleave.)
-
-        Parameters
-        ----------
-        tx_list : List[FullTxDetail]
-            Transactions to be ordered.
-
-        Returns
-        -------
-        List[FullTxDetail]
-            A list in topological order.
-        """
-        # ─────────────────────────────── build the graph ────────────────────────────
-        tx_map: dict[str, FullTxDetail] = {fx.tx.txid: fx for fx in tx_list}
-        children: defaultdict[str, list[str]] = defaultdict(list)
-        indegree: dict[str, int] = {txid: 0 for txid in tx_map}
-
-        for fx in tx_list:
-            for inp in fx.inputs.values():
-                if not inp:
-                    continue
-                parent_id = inp.outpoint.txid_str
-                if parent_id in tx_map:  # dependency inside list
-                    children[parent_id].append(fx.tx.txid)
-                    indegree[fx.tx.txid] += 1
-
-        roots: list[str] = [txid for txid, deg in indegree.items() if deg == 0]
-
-        # ───────────────────── sort roots by lock-time (cluster order) ──────────────
-        roots.sort(
-            key=lambda tid: (
-                tx_map[tid].tx.transaction.lock_time(),  # ➊ primary key
-                tid,  # ➋ deterministic tiebreaker
-            ),
-            reverse=True,
-        )
-
-        # ──────────────────────── depth-first post-order walk ───────────────────────
-        sorted_order: list[FullTxDetail] = []
-        visited: set[str] = set()
-
-        def dfs(txid: str) -> None:
-            """Post-order DFS that appends *after* visiting descendants, yielding a
-            valid topological ordering once the list is reversed.
-
-            Steps
-            -----
-            1. Skip if *txid* already processed (cycle/duplicate guard).
-            2. Recurse on every child in ``children[txid]``.
-            3. Append the current node to ``sorted_order``.
-            """
-            if txid in visited:  # 1 ▸ guard
-                return
-            visited.add(txid)
-
-            for child_id in children.get(txid, []):  # 2 ▸ recurse
-                dfs(child_id)
-
-            sorted_order.append(tx_map[txid])  # 3 ▸ post-order emit
-
-        # visit each root (deterministic order is nice for testing)
-        for root in roots:
-            dfs(root)
-
-        # post-order → topo order
-        sorted_order.reverse()
-        return sorted_order
+        if self.tx_order_index is None:
+            self.tx_order_index = TxOrderIndex(
+                is_local=is_local, initial_txids=[str(tx.compute_txid()) for tx in self._initial_txs]
+            )
+            changed_txids: Iterable[str] = dict_full.keys()
+        else:
+            # only the height buckets and mempool clusters of these txs are sorted again
+            changed_txids = [tx.txid for tx in delta_txs.removed + delta_txs.modified + delta_txs.appended]
+        self.tx_order_index.update(dict_full, changed_txids)
+        return [fx.tx for fx in self.tx_order_index.ordered()]
 
     def is_in_mempool(self, txid: str) -> bool:
         """Return True if the transaction is seen in the mempool."""
@@ -2587,9 +2626,18 @@ class Wallet(BaseSaveableClass, CacheManager):
 
         return revealed_address_infos
 
+    def remove_address_cache(self) -> None:
+        """Delete the derived addresses and the address index cached on disk."""
+        if self.bdkwallet.derived_address_cache:
+            self.bdkwallet.derived_address_cache.remove()
+            self.bdkwallet.derived_address_cache = None
+        self.address_poisoning_index.remove_store()
+
     def close(self) -> None:
         """Shutdown the wallet and release background resources."""
         self.loop_in_thread.stop()
+        if self.bdkwallet.derived_address_cache:
+            self.bdkwallet.derived_address_cache.flush()
         if self.client:
             self.client.close()
 
@@ -28,6 +28,8 @@
 
 from __future__ import annotations
 
+import os
+
 import pytest
 
 from bitcoin_safe.logging_setup import setup_logging
@@ -51,3 +53,13 @@ def override_global_constant(monkeypatch):
     for every test."""
     monkeypatch.setattr(custom_edits, "ENABLE_COMPLETERS", False, raising=True)
     # no yield needed if you don’t need teardown
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]) -> None:
+    """Skip the benchmarks, unless BITCOIN_SAFE_BENCHMARK is set."""
+    if os.environ.get("BITCOIN_SAFE_BENCHMARK"):
+        return
+    skip_benchmark = pytest.mark.skip(reason="set BITCOIN_SAFE_BENCHMARK=1 to run the benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
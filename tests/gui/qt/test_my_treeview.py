@@ -0,0 +1,276 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from __future__ import annotations
+
+from typing import Any
+
+from PyQt6.QtCore import QPersistentModelIndex, Qt
+from PyQt6.QtGui import QStandardItem
+from pytestqt.qtbot import QtBot
+
+from bitcoin_safe.gui.qt.my_treeview import LazyTableModel, MyItemDataRole, MyStandardItemModel
+
+
+def _row(key: Any) -> list[QStandardItem]:
+    """Build a two column row carrying `key` in the key column."""
+    item = QStandardItem(str(key))
+    item.setData(key, MyItemDataRole.ROLE_KEY)
+    return [item, QStandardItem("")]
+
+
+def test_key_index_follows_row_changes(qtbot: QtBot) -> None:
+    """The key index stays consistent with inserts, removals, key edits and clear."""
+    model = MyStandardItemModel(key_column=0)
+    for row, key in enumerate(["a", "b", "c", "b"]):
+        model.insertRow(row, _row(key))
+
+    assert model.rows_of_key("b") == [1, 3]
+    assert model.row_of_key("c") == 2
+
+    model.takeRow(0)
+    assert model.row_of_key("a") is None
+    assert model.rows_of_key("b") == [0, 2]
+
+    item = model.item(0, 0)
+    assert item
+    item.setData("z", MyItemDataRole.ROLE_KEY)
+    assert model.rows_of_key("b") == [2]
+    assert model.row_of_key("z") == 0
+
+    model.insertRow(0, _row("q"))
+    assert model.row_of_key("z") == 1
+
+    model.clear()
+    assert model.row_of_key("q") is None
+
+
+def test_key_index_unhashable_keys(qtbot: QtBot) -> None:
+    """Unhashable keys fall back to a scan of the key column."""
+    model = MyStandardItemModel(key_column=0)
+    model.insertRow(0, _row(["unhashable"]))
+    assert model.row_of_key(["unhashable"]) == 0
+
+
+def test_keys_follow_inserts_in_the_middle(qtbot: QtBot) -> None:
+    """keys() mirrors the key column after rows shift."""
+    model = MyStandardItemModel(key_column=0)
+    for row, key in enumerate(["a", "b", "c"]):
+        model.insertRow(row, _row(key))
+
+    model.insertRow(1, _row("x"))
+    model.removeRow(0)
+
+    assert model.keys() == ["x", "b", "c"]
+    assert model.row_of_key("c") == 2
+    assert model.has_key("x")
+    assert not model.has_key("a")
+
+
+def test_key_index_shifts_and_sorts_without_rescan(qtbot: QtBot) -> None:
+    """Middle inserts, removals and sorts update the key index without rescanning the model."""
+    model = MyStandardItemModel(key_column=0)
+    for row, key in enumerate(["d", "b", "a", "b"]):
+        model.insertRow(row, _row(key))
+    assert model.rows_of_key("b") == [1, 3]
+
+    scanned: list[int] = []
+    key_of_row = model._key_of_row
+
+    def counting_key_of_row(row: int) -> Any:
+        """Record which rows are read from the model."""
+        scanned.append(row)
+        return key_of_row(row)
+
+    model._key_of_row = counting_key_of_row  # type: ignore[method-assign]
+
+    model.insertRows(1, 2)
+    model.setItem(1, 0, _row("x")[0])
+    model.setItem(2, 0, _row("y")[0])
+    assert model.rows_of_key("b") == [3, 5]
+    assert model.row_of_key("a") == 4
+
+    model.removeRows(0, 2)
+    assert model.keys() == ["y", "b", "a", "b"]
+    assert model.rows_of_key("b") == [1, 3]
+    assert model.row_of_key("x") is None
+
+    model.sort(0, Qt.SortOrder.AscendingOrder)
+    assert model.keys() == ["a", "b", "b", "y"]
+    assert model.rows_of_key("b") == [1, 2]
+    assert model.row_of_key("y") == 3
+
+    # only the inserted rows (and the setItem key edits) were read
+    assert set(scanned) <= {1, 2}
+
+
+def _lazy_model(keys: list[int], built: list[int]) -> LazyTableModel:
+    """A LazyTableModel over integer keys, recording which rows were built."""
+
+    def row_factory(key: int) -> list[QStandardItem]:
+        """Row factory."""
+        built.append(key)
+        return _row(key)
+
+    def quick_data(key: int, column: int, role: int) -> Any:
+        """Quick data."""
+        if role == MyItemDataRole.ROLE_SORT_ORDER and column == 1:
+            return -key
+        return LazyTableModel.MISSING
+
+    model = LazyTableModel(
+        key_column=0, column_count=2, row_factory=row_factory, quick_data=quick_data, cache_size=3
+    )
+    model.set_keys(keys)
+    return model
+
+
+def test_lazy_model_builds_rows_on_demand(qtbot: QtBot) -> None:
+    """Rows are only built when their items are needed, and only a few are kept."""
+    built: list[int] = []
+    model = _lazy_model(list(range(100)), built)
+    assert model.rowCount() == 100
+    assert built == []
+
+    assert model.data(model.index(5, 0)) == "5"
+    assert model.data(model.index(5, 0), MyItemDataRole.ROLE_KEY) == 5
+    assert built == [5]
+
+    for row in range(10):
+        model.data(model.index(row, 0))
+    assert len(built) == 11
+    assert not model.is_cached(0)
+    assert model.is_cached(9)
+
+    model.invalidate([9])
+    assert not model.is_cached(9)
+
+
+def test_lazy_model_sort_without_building_rows(qtbot: QtBot) -> None:
+    """Sorting uses quick_data and keeps the key index and persistent indexes consistent."""
+    built: list[int] = []
+    model = _lazy_model([3, 1, 2], built)
+    persistent = QPersistentModelIndex(model.index(0, 0))
+
+    model.sort(1, Qt.SortOrder.AscendingOrder)
+    assert model.keys() == [3, 2, 1]
+    assert built == []
+    assert model.row_of_key(1) == 2
+    assert persistent.row() == 0
+
+    model.sort(1, Qt.SortOrder.DescendingOrder)
+    assert model.keys() == [1, 2, 3]
+    assert persistent.row() == 2
+
+    model.append_keys([7])
+    model.removeRows(0, 1)
+    assert model.keys() == [2, 3, 7]
+    assert model.row_of_key(7) == 2
+    assert not model.has_key(1)
+
+
+def test_lazy_model_keeps_the_sort_order_on_inserts_and_moves(qtbot: QtBot) -> None:
+    """insert_keys and resort_keys place rows where the last sort puts them, keeping persistent indexes."""
+    sort_values = {"a": 10, "b": 20, "c": 30, "d": 40}
+
+    def quick_data(key: str, column: int, role: int) -> Any:
+        """Quick data."""
+        if role == MyItemDataRole.ROLE_SORT_ORDER:
+            return sort_values[key]
+        return LazyTableModel.MISSING
+
+    model = LazyTableModel(key_column=0, column_count=2, row_factory=_row, quick_data=quick_data)
+    model.set_keys(["b", "c", "a"])
+    model.insert_keys(["d"])
+    assert model.keys() == ["b", "c", "a", "d"]
+
+    model.sort(0, Qt.SortOrder.DescendingOrder)
+    assert model.keys() == ["d", "c", "b", "a"]
+    persistent = QPersistentModelIndex(model.index(model.row_of_key("a") or 0, 0))
+
+    sort_values.update(e=45, f=0)
+    model.insert_keys(["e", "f"])
+    assert model.keys() == ["e", "d", "c", "b", "a", "f"]
+
+    sort_values.update(a=50, e=25)
+    model.resort_keys(["a", "e"])
+    assert model.keys() == ["a", "d", "c", "e", "b", "f"]
+    assert persistent.row() == 0
+    assert model.row_of_key("e") == 3
+
+
+def test_lazy_model_batches_inserts_and_moves(qtbot: QtBot) -> None:
+    """insert_keys inserts all rows at once and both place them with a single layout change."""
+    sort_values = {key: 10 * key for key in range(100)}
+
+    def quick_data(key: int, column: int, role: int) -> Any:
+        """Quick data."""
+        if role == MyItemDataRole.ROLE_SORT_ORDER:
+            return sort_values[key]
+        return LazyTableModel.MISSING
+
+    model = LazyTableModel(key_column=0, column_count=2, row_factory=_row, quick_data=quick_data)
+    model.set_keys(range(0, 100, 2))
+    model.sort(0, Qt.SortOrder.AscendingOrder)
+    inserts: list[tuple[int, int]] = []
+    layout_changes: list[int] = []
+    model.rowsInserted.connect(lambda _, first, last: inserts.append((first, last)))
+    model.layoutChanged.connect(lambda *_: layout_changes.append(1))
+
+    model.insert_keys(range(1, 100, 2))
+    assert model.keys() == list(range(100))
+    assert inserts == [(50, 99)]
+    assert len(layout_changes) == 1
+
+    sort_values.update({0: 995, 50: -5, 51: 505})
+    model.resort_keys([0, 50, 51])
+    assert model.keys() == [50, *range(1, 50), 51, *range(52, 100), 0]
+    assert len(layout_changes) == 2
+
+
+def test_lazy_model_row_keys(qtbot: QtBot) -> None:
+    """With key_of, rows with the same key are told apart by their row keys."""
+    built: list[tuple[str, str]] = []
+
+    def row_factory(row_key: tuple[str, str]) -> list[QStandardItem]:
+        """Row factory."""
+        built.append(row_key)
+        return [QStandardItem(row_key[0]), QStandardItem(row_key[1])]
+
+    model = LazyTableModel(key_column=1, column_count=2, row_factory=row_factory, key_of=lambda k: k[1])
+    model.set_keys([("w1", "tx1"), ("w2", "tx1"), ("w1", "tx2")])
+
+    assert model.rows_of_key("tx1") == [0, 1]
+    assert model.rows_of_row_key(("w2", "tx1")) == [1]
+    assert model.data(model.index(1, 1), MyItemDataRole.ROLE_KEY) == "tx1"
+    assert model.data(model.index(1, 0)) == "w2"
+
+    model.invalidate([("w2", "tx1")])
+    assert not model.is_cached(("w2", "tx1"))
+    model.removeRows(0, 1)
+    assert model.rows_of_key("tx1") == [0]
+    assert model.key_at(0) == ("w2", "tx1")
@@ -0,0 +1,168 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import os
+import random
+import time
+from pathlib import Path
+
+import bdkpython as bdk
+
+from bitcoin_safe.address_cache import AddressCache, AddressIndexStore
+from bitcoin_safe.address_comparer import AddressIndex
+
+descriptor = bdk.Descriptor(
+    "wpkh([44250c36/84'/1'/0']tpubDCrUjjHLB1fxk1oRveETjw62z8jsUuqx7JkBUW44VBszGmcY3Eun3apwVcE5X2bfF5MsM3uvuQDed6Do33ZN8GiWcnj2QPqVDspFT1AyZJ9/<0;1>/*)",
+    bdk.Network.REGTEST,
+)
+other_descriptor = bdk.Descriptor(
+    "wpkh([44250c36/84'/1'/1']tpubDCrUjjHLB1fxk1oRveETjw62z8jsUuqx7JkBUW44VBszGmcY3Eun3apwVcE5X2bfF5MsM3uvuQDed6Do33ZN8GiWcnj2QPqVDspFT1AyZJ9/<0;1>/*)",
+    bdk.Network.REGTEST,
+)
+
+
+def test_address_cache_persists(tmp_path: Path):
+    """Cached addresses are appended to the file and loaded again."""
+    cache = AddressCache(tmp_path, descriptor)
+    assert len(cache) == 0
+    for index in range(5):
+        cache.add(index, is_change=False, address=f"receive{index}")
+    cache.add(0, is_change=True, address="change0")
+    # not contiguous, so it is not cached
+    cache.add(5, is_change=True, address="change5")
+    cache.flush()
+    cache.add(5, is_change=False, address="receive5")
+    cache.flush()
+
+    loaded = AddressCache(tmp_path, descriptor)
+    assert len(loaded) == 7
+    assert loaded.get(5, is_change=False) == "receive5"
+    assert loaded.get(0, is_change=True) == "change0"
+    assert loaded.get(5, is_change=True) is None
+
+    # the file is encrypted and belongs only to the descriptor
+    assert b"receive" not in Path(cache.journal.filename).read_bytes()
+    assert len(AddressCache(tmp_path, other_descriptor)) == 0
+
+
+def test_corrupted_address_cache_is_discarded(tmp_path: Path):
+    """Test corrupted address cache is discarded."""
+    cache = AddressCache(tmp_path, descriptor)
+    cache.add(0, is_change=False, address="receive0")
+    cache.flush()
+    with open(cache.journal.filename, "ab") as f:
+        f.write(b"garbage\nmore garbage\n")
+
+    loaded = AddressCache(tmp_path, descriptor)
+    assert len(loaded) == 0
+    assert not Path(cache.journal.filename).exists()
+
+
+def test_address_cache_remove_and_prune(tmp_path: Path):
+    """Removed and unused caches are deleted from disk."""
+    cache = AddressCache(tmp_path, descriptor)
+    cache.add(0, is_change=False, address="receive0")
+    cache.flush()
+    cache.remove()
+    assert len(cache) == 0
+    assert not Path(cache.journal.filename).exists()
+
+    cache.add(0, is_change=False, address="receive0")
+    cache.flush()
+    other = AddressCache(tmp_path, other_descriptor)
+    other.add(0, is_change=False, address="receive0")
+    other.flush()
+    unused_since = time.time() - (AddressCache.MAX_UNUSED_DAYS + 1) * 24 * 60 * 60
+    os.utime(cache.journal.filename, (unused_since, unused_since))
+    os.utime(other.journal.filename, (unused_since, unused_since))
+
+    # loading the cache marks it as used
+    assert len(AddressCache(tmp_path, other_descriptor)) == 1
+    assert AddressCache.prune(tmp_path) == [Path(cache.journal.filename)]
+    assert not Path(cache.journal.filename).exists()
+    assert Path(other.journal.filename).exists()
+
+
+def _random_addresses(n: int) -> list[str]:
+    """Random p2pkh like addresses."""
+    base58_chars = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+    return ["1" + "".join(random.choices(base58_chars, k=33)) for _ in range(n)]
+
+
+def test_address_index_store(tmp_path: Path):
+    """The index segments are stored encrypted, loaded again and extended."""
+    random.seed(3)
+    addresses = _random_addresses(700)
+    poisoned = addresses[100][:6] + _random_addresses(1)[0][7:29] + addresses[100][-6:]
+
+    index = AddressIndex(store=AddressIndexStore(tmp_path, descriptor))
+    for i in range(0, 500, 100):
+        index.add(addresses[i : i + 100])
+    store = AddressIndexStore(tmp_path, descriptor)
+    # only the current segments are stored, the merged ones were deleted
+    assert store.ranges() == [(segment.start, segment.end) for segment in index._segments]
+    assert not any(addresses[0].encode() in path.read_bytes() for path in tmp_path.iterdir())
+
+    loaded = AddressIndex(store=AddressIndexStore(tmp_path, descriptor))
+    assert len(loaded) == 500
+    assert loaded.addresses == addresses[:500]
+    assert loaded.poisonous([poisoned]) == index.poisonous([poisoned])
+    assert (
+        AddressIndex(store=AddressIndexStore(tmp_path, other_descriptor)).add(addresses[:1]) == addresses[:1]
+    )
+
+    # only the new addresses are indexed
+    assert loaded.add(addresses) == addresses[500:]
+    expected = AddressIndex()
+    expected.add(addresses)
+    assert loaded.neighbors(addresses) == expected.neighbors(addresses)
+    assert len(AddressIndex(store=AddressIndexStore(tmp_path, descriptor))) == 700
+
+    loaded.remove_store()
+    assert store.ranges() == []
+
+
+def test_address_index_store_discards_corrupted_segments(tmp_path: Path):
+    """A segment that cannot be decrypted discards the stored index."""
+    random.seed(4)
+    addresses = _random_addresses(300)
+    store = AddressIndexStore(tmp_path, descriptor)
+    index = AddressIndex(store=store)
+    index.add(addresses[:200])
+    index.add(addresses[200:])
+    start, end = store.ranges()[-1]
+    with open(store._path(start, end), "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b"x")
+
+    loaded = AddressIndex(store=AddressIndexStore(tmp_path, descriptor))
+    assert len(loaded) == 0
+    assert store.ranges() == []
+    assert loaded.add(addresses) == addresses
@@ -31,7 +31,7 @@ from __future__ import annotations
 import random
 import time
 
-from bitcoin_safe.address_comparer import AddressComparer
+from bitcoin_safe.address_comparer import AddressComparer, AddressIndex
 
 
 def test_identical_addresses():
@@ -193,6 +193,55 @@ def test_fuzzy_prefix_match_gap():
     assert result.matches[0][1] == "abcxef"
 
 
+def test_find_neighbors_matches_trigram_dicts():
+    """The vectorized neighbor search gives the same scores as comparing the trigram
+    dictionaries pairwise."""
+    random.seed(5)
+    bech32_chars = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+    addresses = {
+        "bc1q" + "".join(random.choices(bech32_chars[:4], k=random.randint(0, 20))) for _ in range(150)
+    }
+    addresses |= {"1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa", "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb", "bc1"}
+
+    trigram_dicts = AddressComparer.precompute_trigram_dicts(addresses)
+    expected: dict[str, list[tuple[str, float]]] = {}
+    for addr in addresses:
+        expected[addr] = []
+        for candidate in addresses - {addr}:
+            score = sum(
+                min(weight, trigram_dicts[candidate][trigram])
+                for trigram, weight in trigram_dicts[addr].items()
+                if trigram in trigram_dicts[candidate]
+            )
+            if score >= 2.0:
+                expected[addr].append((candidate, score))
+
+    neighbors = AddressComparer.find_neighbors(addresses)
+    assert {k: sorted(v) for k, v in neighbors.items()} == {k: sorted(v) for k, v in expected.items()}
+
+
+def test_address_index_incremental():
+    """Addresses added in batches are found like addresses indexed at once."""
+    random.seed(7)
+    base58_chars = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+    addresses = ["1" + "".join(random.choices(base58_chars, k=33)) for _ in range(1000)]
+    poisoned = addresses[500][:6] + "".join(random.choices(base58_chars, k=22)) + addresses[500][-6:]
+
+    index = AddressIndex()
+    for i in range(0, len(addresses), 100):
+        assert index.add(addresses[i : i + 100]) == addresses[i : i + 100]
+    assert index.add(addresses[:10]) == []
+    assert len(index) == len(addresses)
+    assert poisoned not in index
+
+    expected = AddressComparer.find_neighbors(set(addresses))
+    neighbors = index.neighbors(addresses)
+    assert {k: sorted(v) for k, v in neighbors.items()} == {k: sorted(v) for k, v in expected.items()}
+
+    # a new address is checked against the indexed addresses
+    assert [(a, b) for a, b, _ in index.poisonous([poisoned])] == [tuple(sorted([poisoned, addresses[500]]))]
+
+
 # below is a psbt with similar addresses.
 # You must set ADDRESS_SIMILARITY_THRESHOLD = 32768
 # otherwise it is not recognized, since the difficulty is too low
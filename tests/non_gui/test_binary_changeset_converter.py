@@ -0,0 +1,169 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from __future__ import annotations
+
+import base64
+import json
+import random
+import time
+
+import bdkpython as bdk
+import pytest
+
+from bitcoin_safe.persister.binary_changeset_converter import BinaryChangeSetConverter
+from bitcoin_safe.persister.changeset_converter import ChangeSetConverter
+from bitcoin_safe.persister.serialize_persistence import ChangeSetEncoding, SerializePersistence
+
+from .test_offline_custom_persist import initial_txs, serialized_persistence
+
+
+def _synthetic_changeset(n: int, seed: int = 0) -> bdk.ChangeSet:
+    """A changeset with n distinct transactions, n txouts, anchors and a chain."""
+    rng = random.Random(seed)
+    base = json.loads(serialized_persistence)
+    tx_bytes = bytes.fromhex(initial_txs[0])
+    txs = [(tx_bytes[:-4] + i.to_bytes(4, "little")).hex() for i in range(n)]
+
+    def random_hash() -> str:
+        """Random hash."""
+        return rng.randbytes(32).hex()
+
+    heights = sorted(rng.sample(range(1, 10 * n + 2), n))
+    base["local_chain"]["changes"] += [{"height": h, "hash": random_hash()} for h in heights]
+    base["tx_graph"] = {
+        "txs": txs,
+        "txouts": {
+            ChangeSetConverter._canonical_outpoint_key(random_hash(), rng.randrange(4)): {
+                "value": rng.randrange(1, 10**8),
+                "script_pubkey": "0014" + rng.randbytes(20).hex(),
+            }
+            for _ in range(n)
+        },
+        "anchors": [
+            {
+                "txid": random_hash(),
+                "confirmation_block_time": {
+                    "block_id": {"height": h, "hash": random_hash()},
+                    "confirmation_time": 1_600_000_000 + h,
+                },
+            }
+            for h in heights
+        ],
+        "last_seen": {random_hash(): rng.randrange(2**32) for _ in range(n)},
+        "first_seen": {random_hash(): rng.randrange(2**32) for _ in range(n)},
+        "last_evicted": {random_hash(): rng.randrange(2**32) for _ in range(n // 10)},
+    }
+    return ChangeSetConverter.from_dict(base)
+
+
+@pytest.mark.parametrize("restrict_chain_changes", [False, True])
+def test_binary_roundtrip(restrict_chain_changes: bool):
+    """Test binary roundtrip."""
+    change_set = _synthetic_changeset(50)
+    expected = ChangeSetConverter.to_dict(change_set, restrict_chain_changes=restrict_chain_changes)
+
+    data = BinaryChangeSetConverter.to_bytes(change_set, restrict_chain_changes=restrict_chain_changes)
+    assert BinaryChangeSetConverter.is_binary(data)
+    loaded = BinaryChangeSetConverter.from_bytes(data)
+    assert ChangeSetConverter.to_dict(loaded, restrict_chain_changes=restrict_chain_changes) == expected
+
+    # the tx_graph can be deserialized separately from the rest
+    without_tx_graph = BinaryChangeSetConverter.from_bytes(data, with_tx_graph=False)
+    only_tx_graph = BinaryChangeSetConverter.from_bytes(data, only_tx_graph=True)
+    assert not without_tx_graph.tx_graph_changeset().txs
+    assert not only_tx_graph.descriptor()
+    merged = bdk.ChangeSet.from_merge(without_tx_graph, only_tx_graph)
+    assert ChangeSetConverter.to_dict(merged, restrict_chain_changes=restrict_chain_changes) == expected
+
+    with pytest.raises(ValueError):
+        BinaryChangeSetConverter.from_bytes(data[:-1])
+
+
+@pytest.mark.parametrize("defer_tx_graph", [False, True])
+def test_serialize_persistence_binary_encoding(defer_tx_graph: bool):
+    """Test serialize persistence binary encoding."""
+    change_set = _synthetic_changeset(20)
+    persistence = SerializePersistence(change_set=change_set, change_set_encoding=ChangeSetEncoding.binary)
+    dump = json.loads(json.dumps(persistence.dump()))
+    # versions without the binary encoding must fail instead of loading an empty history
+    assert dump["change_set"] == SerializePersistence.CHANGE_SET_NOT_EMBEDDED
+    with pytest.raises(AttributeError):
+        ChangeSetConverter.from_dict(dump["change_set"])
+    assert dump["change_set_encoding"] == "binary"
+
+    dump["defer_tx_graph"] = defer_tx_graph
+    loaded = SerializePersistence.from_dump(dump)
+    loaded.load_deferred_tx_graph()
+    assert loaded.change_set_encoding == ChangeSetEncoding.binary
+    assert ChangeSetConverter.to_dict(loaded.change_set) == ChangeSetConverter.to_dict(
+        change_set, restrict_chain_changes=True
+    )
+
+
+def test_binary_encoding_is_smaller():
+    """Both encodings (as stored in the wallet file) restore the changeset, and the
+    binary one is smaller."""
+    change_set = _synthetic_changeset(500)
+    expected = ChangeSetConverter.to_dict(change_set)
+
+    sizes = {}
+    for encoding in ChangeSetEncoding:
+        if encoding == ChangeSetEncoding.json:
+            content = json.dumps(ChangeSetConverter.to_dict(change_set))
+            loaded = ChangeSetConverter.from_dict(json.loads(content))
+        else:
+            content = json.dumps(base64.b64encode(BinaryChangeSetConverter.to_bytes(change_set)).decode())
+            loaded = BinaryChangeSetConverter.from_bytes(base64.b64decode(json.loads(content)))
+        sizes[encoding] = len(content)
+        assert ChangeSetConverter.to_dict(loaded) == expected
+    assert sizes[ChangeSetEncoding.binary] < sizes[ChangeSetEncoding.json]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("num_txs", [1_000, 10_000])
+def test_changeset_encoding_benchmark(num_txs: int):
+    """Report save time, load time and size of the json and binary encoding of the
+    wallet history."""
+    change_set = _synthetic_changeset(num_txs)
+    expected = ChangeSetConverter.to_dict(change_set, restrict_chain_changes=True)
+
+    for encoding in ChangeSetEncoding:
+        start = time.perf_counter()
+        persistence = SerializePersistence(change_set=change_set, change_set_encoding=encoding)
+        content = json.dumps(persistence.dump())
+        save_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loaded = SerializePersistence.from_dump(json.loads(content))
+        load_time = time.perf_counter() - start
+
+        print(
+            f"{num_txs} txs {encoding.value}: save {save_time * 1000:.0f} ms, "
+            f"load {load_time * 1000:.0f} ms, {len(content) / 1000:.0f} kB"
+        )
+        assert ChangeSetConverter.to_dict(loaded.change_set) == expected
@@ -0,0 +1,181 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import itertools
+import time
+
+import numpy as np
+import pytest
+
+from bitcoin_safe.coin_selection import CoinSelectionAlgorithm, CoinSelectionParams, select_coins
+
+ALGORITHMS = [algorithm for algorithm in CoinSelectionAlgorithm if algorithm != CoinSelectionAlgorithm.bdk]
+
+
+def test_branch_and_bound_finds_lowest_waste():
+    """Branch and bound finds the changeless selection with the lowest waste (compared
+    to trying all subsets)."""
+    rng = np.random.default_rng(3)
+    for _ in range(100):
+        values = rng.integers(1_000, 100_000, rng.integers(1, 9))
+        params = CoinSelectionParams(
+            target=int(rng.integers(1_000, values.sum() + 1)), fee_rate=float(rng.choice([1, 5, 20]))
+        )
+        upper_bound = params.selection_target + min(
+            params.cost_of_change, params.change_fee + params.dust_limit - 1
+        )
+        effective_values = values - params.input_fee
+
+        expected_waste = None
+        for size in range(1, len(values) + 1):
+            for subset in itertools.combinations(effective_values.tolist(), size):
+                if min(subset) > 0 and params.selection_target <= sum(subset) <= upper_bound:
+                    waste, _ = params.waste(size, sum(subset))
+                    expected_waste = waste if expected_waste is None else min(waste, expected_waste)
+
+        result = select_coins(values, params, CoinSelectionAlgorithm.branch_and_bound)
+        if expected_waste is None:
+            assert result is None
+        else:
+            assert result
+            assert result.waste == expected_waste
+            assert not result.has_change
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_selection_covers_target(algorithm: CoinSelectionAlgorithm):
+    """Test selection covers target."""
+    rng = np.random.default_rng(4)
+    values = rng.integers(1_000, 1_000_000, 500)
+    params = CoinSelectionParams(target=3_000_000, fee_rate=7)
+
+    result = select_coins(values, params, algorithm, rng=rng)
+    assert result
+    assert len(set(result.indices.tolist())) == len(result.indices)
+    assert result.effective_value == int((values[result.indices] - params.input_fee).sum())
+    assert result.effective_value >= params.selection_target
+
+    # coins that cost more to spend than they are worth are never selected
+    assert select_coins(np.array([100, 200]), CoinSelectionParams(target=50, fee_rate=5), algorithm) is None
+    assert select_coins(values, CoinSelectionParams(target=int(values.sum()), fee_rate=1), algorithm) is None
+
+
+def test_min_waste_is_best():
+    """Test min waste is best."""
+    rng = np.random.default_rng(5)
+    values = rng.integers(1_000, 1_000_000, 200)
+    params = CoinSelectionParams(target=2_000_000, fee_rate=30)
+
+    result = select_coins(values, params, CoinSelectionAlgorithm.min_waste, rng=np.random.default_rng(1))
+    assert result
+    for algorithm in ALGORITHMS:
+        other = select_coins(values, params, algorithm, rng=np.random.default_rng(1))
+        assert other is None or result.waste <= other.waste
+
+
+def _synthetic_values(n: int) -> np.ndarray:
+    """Many small coins from payments, and some large ones."""
+    rng = np.random.default_rng(n)
+    return np.concatenate(
+        [
+            rng.integers(1_000, 50_000, n // 2),
+            rng.lognormal(13, 2, n - n // 2).astype(np.int64) + 1_000,
+        ]
+    )
+
+
+def test_selection_of_large_utxo_sets():
+    """On a large utxo set the results match the selection rules computed without numpy."""
+    values = _synthetic_values(10_000)
+    params = CoinSelectionParams(target=5_000_000, fee_rate=15)
+    effective_values = sorted(
+        (value - params.input_fee for value in values.tolist() if value > params.input_fee), reverse=True
+    )
+
+    # largest first takes the largest coins until a change output can be created
+    expected_total = 0
+    for expected_count, effective_value in enumerate(effective_values, start=1):
+        expected_total += effective_value
+        if expected_total >= params.target_with_change:
+            break
+    largest_first = select_coins(values, params, CoinSelectionAlgorithm.largest_first)
+    assert largest_first
+    assert len(largest_first.indices) == expected_count
+    assert largest_first.effective_value == expected_total
+    assert largest_first.waste == params.waste(expected_count, expected_total)[0]
+
+    # branch and bound only returns changeless selections within the bdk upper bound
+    branch_and_bound = select_coins(values, params, CoinSelectionAlgorithm.branch_and_bound)
+    if branch_and_bound:
+        assert not branch_and_bound.has_change
+        assert (
+            params.selection_target
+            <= branch_and_bound.effective_value
+            <= params.selection_target + min(params.cost_of_change, params.change_fee + params.dust_limit - 1)
+        )
+
+    # the same rng gives the same knapsack selection
+    knapsack = select_coins(values, params, CoinSelectionAlgorithm.knapsack, rng=np.random.default_rng(2))
+    assert knapsack
+    again = select_coins(values, params, CoinSelectionAlgorithm.knapsack, rng=np.random.default_rng(2))
+    assert again
+    assert knapsack.indices.tolist() == again.indices.tolist()
+
+    # min waste picks the best of the others
+    results = [result for result in (largest_first, branch_and_bound, knapsack) if result]
+    min_waste = select_coins(values, params, CoinSelectionAlgorithm.min_waste, rng=np.random.default_rng(2))
+    assert min_waste
+    assert (min_waste.waste, len(min_waste.indices)) == min(
+        (result.waste, len(result.indices)) for result in results
+    )
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("num_utxos", [10_000, 100_000])
+def test_coin_selection_benchmark(num_utxos: int):
+    """Report the latency and the waste of each algorithm on a large synthetic utxo
+    set."""
+    values = _synthetic_values(num_utxos)
+    for target, fee_rate in [(500_000, 2), (5_000_000, 15), (50_000_000, 80)]:
+        params = CoinSelectionParams(target=target, fee_rate=fee_rate)
+        for algorithm in ALGORITHMS:
+            start = time.perf_counter()
+            result = select_coins(values, params, algorithm, rng=np.random.default_rng(0))
+            latency = time.perf_counter() - start
+
+            summary = (
+                f"waste {result.waste}, {len(result.indices)} inputs, change {result.has_change}"
+                if result
+                else "no selection"
+            )
+            print(
+                f"{num_utxos} utxos, target {target}, {fee_rate} sat/vB, {algorithm.name}: "
+                f"{latency * 1000:.1f} ms, {summary}"
+            )
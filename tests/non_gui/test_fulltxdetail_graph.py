@@ -0,0 +1,167 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import struct
+
+import bdkpython as bdk
+
+from bitcoin_safe.pythonbdk_types import FullTxDetailGraph, TransactionDetails, TxOut
+
+UNKNOWN_TXID = "ab" * 32
+
+
+def make_tx(inputs: list[tuple[str, int]], outputs: list[tuple[int, int]]) -> TransactionDetails:
+    """A legacy serialized tx spending inputs (txid, vout) with outputs (address number, value)."""
+    data = struct.pack("<i", 2) + bytes([len(inputs)])
+    for txid, vout in inputs:
+        data += bytes.fromhex(txid)[::-1] + struct.pack("<I", vout) + b"\x00" + b"\xff" * 4
+    data += bytes([len(outputs)])
+    for address_number, value in outputs:
+        script = b"\x00\x14" + address_number.to_bytes(20, "big")
+        data += struct.pack("<q", value) + bytes([len(script)]) + script
+    data += struct.pack("<I", 0)
+    return TransactionDetails(
+        transaction=bdk.Transaction(data),
+        fee=None,
+        received=0,
+        sent=0,
+        chain_position=bdk.ChainPosition.UNCONFIRMED(timestamp=0),
+    )
+
+
+def get_address_of_txout(txid: str, vout: int, txout: TxOut) -> str:
+    """Get address of txout."""
+    return f"addr{int.from_bytes(txout.spk_bytes[2:], 'big')}"
+
+
+def snapshot(graph: FullTxDetailGraph) -> dict:
+    """Everything about the graph, that does not depend on the order txs were added in."""
+    txs = {}
+    for txid, fulltxdetail in graph.fulltxdetails.items():
+        outputs = {
+            outpoint: (utxo.address, utxo.value, utxo.is_spent_by_txid)
+            for outpoint, utxo in fulltxdetail.outputs.items()
+        }
+        inputs = {
+            outpoint: str(utxo.outpoint) if utxo else None for outpoint, utxo in fulltxdetail.inputs.items()
+        }
+        # a linked input must be the very object in the outputs of the spent tx
+        for outpoint, utxo in fulltxdetail.inputs.items():
+            if utxo:
+                assert graph.fulltxdetails[utxo.outpoint.txid_str].outputs[outpoint] is utxo
+        txs[txid] = (outputs, inputs, fulltxdetail.tx)
+    return {
+        "txs": txs,
+        "address_to_txids": {k: v for k, v in graph.address_to_txids.items() if v},
+        "spenders": graph.spenders,
+    }
+
+
+def full_rebuild(txs: list[TransactionDetails]) -> FullTxDetailGraph:
+    """Full rebuild."""
+    graph = FullTxDetailGraph()
+    graph.add(txs, get_address_of_txout)
+    return graph
+
+
+def make_chain() -> tuple[TransactionDetails, TransactionDetails, TransactionDetails, TransactionDetails]:
+    """funding -> spend -> child, and replacement conflicting with spend."""
+    funding = make_tx([(UNKNOWN_TXID, 0)], [(1, 100_000), (2, 50_000)])
+    spend = make_tx([(funding.txid, 0)], [(3, 60_000), (4, 39_000)])
+    child = make_tx([(spend.txid, 1), (funding.txid, 1)], [(5, 88_000)])
+    replacement = make_tx([(funding.txid, 0)], [(3, 60_000), (6, 38_000)])
+    return funding, spend, child, replacement
+
+
+def test_add_in_any_order_equals_full_rebuild() -> None:
+    """Txs added before the tx they spend from are linked, when it arrives."""
+    funding, spend, child, _ = make_chain()
+
+    graph = FullTxDetailGraph()
+    graph.add([child], get_address_of_txout)
+    assert graph.fulltxdetails[child.txid].inputs == {
+        f"{spend.txid}:1": None,
+        f"{funding.txid}:1": None,
+    }
+    graph.add([spend], get_address_of_txout)
+    graph.add([funding], get_address_of_txout)
+
+    assert snapshot(graph) == snapshot(full_rebuild([funding, spend, child]))
+    assert graph.fulltxdetails[funding.txid].outputs[f"{funding.txid}:1"].is_spent_by_txid == child.txid
+    assert graph.address_to_txids["addr2"] == {funding.txid, child.txid}
+
+
+def test_rbf_replacement_equals_full_rebuild() -> None:
+    """Removing a replaced tx only unlinks it and its spent-by edges."""
+    funding, spend, child, replacement = make_chain()
+    graph = full_rebuild([funding, spend, child])
+
+    graph.remove([spend.txid, child.txid])
+    graph.add([replacement], get_address_of_txout)
+
+    assert snapshot(graph) == snapshot(full_rebuild([funding, replacement]))
+    assert graph.fulltxdetails[funding.txid].outputs[f"{funding.txid}:0"].is_spent_by_txid == replacement.txid
+    assert graph.fulltxdetails[funding.txid].outputs[f"{funding.txid}:1"].is_spent_by_txid is None
+    assert "addr4" not in graph.address_to_txids
+    assert "addr5" not in graph.address_to_txids
+    assert graph.address_to_txids["addr3"] == {replacement.txid}
+
+
+def test_remove_parent_keeps_child_consistent() -> None:
+    """A remaining tx loses its link (and address) to a removed parent, and gets it back when re-added."""
+    funding, spend, child, _ = make_chain()
+    graph = full_rebuild([funding, spend, child])
+
+    graph.remove([spend.txid])
+    assert snapshot(graph) == snapshot(full_rebuild([funding, child]))
+    assert child.txid not in graph.address_to_txids.get("addr4", set())
+    # still involved through the other input
+    assert child.txid in graph.address_to_txids["addr2"]
+
+    graph.add([spend], get_address_of_txout)
+    assert snapshot(graph) == snapshot(full_rebuild([funding, spend, child]))
+
+
+def test_update_keeps_links() -> None:
+    """Modified txs get the new TransactionDetails, without relinking."""
+    funding, spend, child, _ = make_chain()
+    graph = full_rebuild([funding, spend, child])
+
+    confirmed = TransactionDetails(
+        transaction=spend.transaction,
+        fee=1_000,
+        received=0,
+        sent=0,
+        chain_position=bdk.ChainPosition.UNCONFIRMED(timestamp=1),
+    )
+    graph.update([confirmed], get_address_of_txout)
+
+    assert graph.fulltxdetails[spend.txid].tx is confirmed
+    assert snapshot(graph) == snapshot(full_rebuild([funding, confirmed, child]))
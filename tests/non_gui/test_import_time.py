@@ -0,0 +1,160 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import builtins
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from bitcoin_safe.import_profiler import ImportTimeRecorder
+
+# The main window may take this many times as long to import as the gui and bdk libraries
+# alone, measured on the same machine. This is generous: where these libraries take 200 ms,
+# it allows the 6 s of the former fixed budget.
+IMPORT_TIME_BUDGET_FACTOR = 30
+
+# modules that must only be loaded when the user actually needs them
+LAZY_MODULES = [
+    "reportlab",
+    "pgpy",
+    "bitcoin_safe.pdfrecovery",
+    "bitcoin_safe.pdf_statement",
+    "bitcoin_safe.pdf_labels",
+    "PyQt6.QtCharts",
+    "bitcoin_safe.gui.qt.wallet_balance_chart",
+]
+
+
+def test_import_time_recorder(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Nested first time imports are recorded with cumulative and self time."""
+    package = tmp_path / "import_time_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("from . import parent\n")
+    (package / "parent.py").write_text("import time\ntime.sleep(0.02)\nfrom . import child\n")
+    (package / "child.py").write_text("import time\ntime.sleep(0.05)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    original_import = builtins.__import__
+    recorder = ImportTimeRecorder()
+    recorder.install()
+    try:
+        import import_time_pkg  # noqa: F401
+        import import_time_pkg.child  # noqa: F401  already loaded, not recorded again
+    finally:
+        recorder.uninstall()
+        for name in list(sys.modules):
+            if name.startswith("import_time_pkg"):
+                del sys.modules[name]
+
+    assert builtins.__import__ is original_import
+    assert set(recorder.records) == {"import_time_pkg", "import_time_pkg.parent", "import_time_pkg.child"}
+    root = recorder.records["import_time_pkg"]
+    parent = recorder.records["import_time_pkg.parent"]
+    child = recorder.records["import_time_pkg.child"]
+    assert child.cumulative_ms >= 50
+    assert parent.cumulative_ms >= child.cumulative_ms + 20
+    assert parent.self_ms == pytest.approx(parent.cumulative_ms - child.cumulative_ms)
+    assert root.cumulative_ms >= parent.cumulative_ms
+    assert [r.name for r in recorder.top_level_records()] == ["import_time_pkg"]
+    assert recorder.total_ms() == root.cumulative_ms
+
+    stream = io.StringIO()
+    recorder.write_report(stream)
+    lines = stream.getvalue().splitlines()
+    assert lines[0].startswith("Total import time")
+    assert lines[2].endswith("import_time_pkg")
+
+
+def test_cold_start_defers_heavy_modules():
+    """Importing the main window in a fresh interpreter does not load the deferred modules."""
+    code = f"""
+import json, sys
+from bitcoin_safe.import_profiler import ImportTimeRecorder
+
+recorder = ImportTimeRecorder()
+recorder.install()
+import bitcoin_safe.gui.qt.main
+recorder.uninstall()
+
+stream = sys.stderr
+recorder.write_report(stream, limit=30)
+print(json.dumps({{
+    "loaded": [name for name in {LAZY_MODULES!r} if name in sys.modules],
+}}))
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).parents[2],
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    summary = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert summary["loaded"] == [], result.stderr
+
+
+def _import_time_ms(module: str) -> float:
+    """Import time of module in a fresh interpreter."""
+    code = f"""
+import json, sys
+from bitcoin_safe.import_profiler import ImportTimeRecorder
+
+recorder = ImportTimeRecorder()
+recorder.install()
+import {module}
+recorder.uninstall()
+print(json.dumps(recorder.total_ms()))
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).parents[2],
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.benchmark
+def test_cold_start_import_budget():
+    """Importing the main window stays within a budget relative to its unavoidable
+    libraries."""
+    baseline_ms = min(_import_time_ms("PyQt6.QtWidgets, bdkpython") for _ in range(3))
+    total_ms = min(_import_time_ms("bitcoin_safe.gui.qt.main") for _ in range(3))
+
+    print(f"baseline {baseline_ms:.0f} ms, main window {total_ms:.0f} ms, {total_ms / baseline_ms:.1f}x")
+    assert total_ms < IMPORT_TIME_BUDGET_FACTOR * baseline_ms
@@ -0,0 +1,59 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from bitcoin_safe.labels import Labels
+from bitcoin_safe.plugin_framework.plugins.chat_sync.label_summary import (
+    SUMMARY_BUCKETS,
+    LabelSetSummary,
+    bucket_of,
+)
+
+
+def test_label_set_summary_finds_changed_buckets():
+    """Only the buckets of changed labels differ, and the summary survives a dump."""
+    labels = Labels()
+    for i in range(1000):
+        labels.set_addr_label(f"a{i}", f"label {i}", timestamp=1000.0)
+    before = LabelSetSummary.from_labels(labels.data.values())
+    restored = LabelSetSummary.from_dump(before.dump())
+    assert restored and restored.digests == before.digests
+    assert LabelSetSummary.from_dump(before.dump()[:-1]) is None
+
+    labels.set_addr_label("a7", "changed")
+    labels.del_item("a8")
+    after = LabelSetSummary.from_labels(labels.data.values())
+    assert after.differing_buckets(before) == {bucket_of("a7"), bucket_of("a8")}
+    assert after.differing_buckets(None) == set(range(SUMMARY_BUCKETS))
+
+    # adding a label twice removes it again
+    label = labels.data["a1"]
+    after.add(label)
+    after.add(label)
+    assert after.differing_buckets(LabelSetSummary.from_labels(labels.data.values())) == set()
@@ -30,10 +30,21 @@ from __future__ import annotations
 
 import datetime
 import json
+import random
 from time import sleep
 
 from bitcoin_safe.config import UserConfig
-from bitcoin_safe.labels import AUTOMATIC_TIMESTAMP, Label, Labels, LabelType
+from bitcoin_safe.labels import (
+    AUTOMATIC_TIMESTAMP,
+    Label,
+    Labels,
+    LabelSnapshot,
+    LabelSnapshotReason,
+    LabelType,
+    RunningTimestampRange,
+)
+from bitcoin_safe.persister.serialize_persistence import SerializePersistence
+from bitcoin_safe.storage import Journal
 from bitcoin_safe.util import clean_lines
 from bitcoin_safe.wallet import Wallet
 
@@ -328,3 +339,281 @@ def test_label_timestamp_correctly(test_config: UserConfig):
     assert len(eorg) == len(ecopy)
     for e1, e2 in zip(eorg, ecopy, strict=False):
         assert e1 == e2
+
+
+def test_snapshots_store_only_changes():
+    """Each edit stores the previous version of the touched label, and snapshots can be restored."""
+    labels = Labels()
+    labels.set_addr_label("a", "one")
+    labels.set_addr_label("b", "two")
+    labels.set_addr_category("a", "category 0")
+    labels.add_category("category 1")  # no label changed, so no snapshot
+
+    snapshots = labels.get_snapshots()
+    assert len(snapshots) == 3
+    assert all(snapshot.state is None for snapshot in snapshots)
+    assert snapshots[2].changes and list(snapshots[2].changes.keys()) == ["a"]
+    assert [snapshot.count_address_labels for snapshot in snapshots] == [0, 1, 2]
+
+    assert {label.ref: label.label for label in labels.get_snapshot_labels(snapshots[0])} == {}
+    assert {label.ref: label.category for label in labels.get_snapshot_labels(snapshots[2])} == {
+        "a": None,
+        "b": None,
+    }
+
+    labels.set_addr_label("a", "changed")
+    labels.restore_snapshot(snapshots[1])
+    assert labels.get_label("a") == "one"
+    assert labels.get_label("b") == "two"
+    assert labels.get_snapshots()[-1].reason == LabelSnapshotReason.RESTORE
+
+
+def test_snapshots_from_full_state_checkpoints():
+    """Snapshots that contain the full state (written by earlier versions) remain restorable."""
+    labels = Labels()
+    labels.set_addr_label("a", "old")
+    labels._snapshots = [
+        LabelSnapshot(created_at=datetime.datetime.now(), state=labels.dumps_data_jsonlines())
+    ]
+
+    labels.set_addr_label("a", "new")
+    labels.set_addr_label("b", "other")
+
+    snapshots = labels.get_snapshots()
+    assert [{label.ref: label.label for label in labels.get_snapshot_labels(s)} for s in snapshots] == [
+        {"a": "old"},
+        {"a": "old"},
+        {"a": "new"},
+    ]
+
+
+def test_labels_notify_changes():
+    """on_changed is called once per change of the labels or categories, and not for no-ops."""
+    labels = Labels()
+    calls: list[None] = []
+    labels.on_changed = lambda: calls.append(None)
+
+    labels.set_addr_label("a", "one", timestamp=1.0)
+    labels.set_addr_label("a", "one", timestamp=1.0)
+    assert len(calls) == 1
+    labels.import_labels([Label(LabelType.addr, f"r{i}", timestamp=1.0, label=str(i)) for i in range(10)])
+    assert len(calls) == 2
+    labels.add_category("category 0")
+    labels.add_category("category 0")
+    assert len(calls) == 3
+    labels.del_item("missing")
+    labels.del_item("a")
+    assert len(calls) == 4
+
+
+def test_snapshots_write_checkpoints():
+    """Periodic checkpoints are written, and every snapshot restores the labels before its change."""
+    labels = Labels()
+    labels._checkpoint_min_changes = 3
+    expected = []
+    for i in range(20):
+        expected.append({ref: label.label for ref, label in labels.data.items()})
+        if i % 5 == 4:
+            labels.del_item(f"r{(i + 1) % 4}")
+        else:
+            labels.set_addr_label(f"r{i % 4}", str(i))
+
+    snapshots = labels.get_snapshots()
+    checkpoints = [snapshot for snapshot in snapshots if snapshot.state is not None]
+    assert checkpoints and len(checkpoints) < len(snapshots)
+    assert all(snapshot.changes is None for snapshot in checkpoints)
+    assert [
+        {label.ref: label.label for label in labels.get_snapshot_labels(s)} for s in snapshots
+    ] == expected[-len(snapshots) :]
+
+
+def test_snapshots_for_older_versions():
+    """Older versions only see the checkpoints, and the undo steps survive a roundtrip."""
+    labels = Labels()
+    labels._checkpoint_min_changes = 3
+    for i in range(10):
+        labels.set_addr_label(f"r{i % 4}", str(i))
+    snapshots = labels.get_snapshots()
+
+    dump = labels.dump()
+    assert dump["_snapshots"] and all(snapshot.state is not None for snapshot in dump["_snapshots"])
+    assert len(dump["snapshot_steps"]) == len(snapshots)
+
+    loaded = Labels.from_dump(labels.dump())
+    assert loaded.get_snapshots() == snapshots
+
+    # a file saved by an older version has no snapshot_steps
+    old_dump = labels.dump()
+    del old_dump["snapshot_steps"]
+    assert Labels.from_dump(old_dump).get_snapshots() == dump["_snapshots"]
+
+
+def assert_indexes_match_data(labels: Labels):
+    """The secondary indexes agree with a full scan of labels.data."""
+    for category in {label.category for label in labels.data.values()} | {None, "", "missing"}:
+        for filter_type in [None, LabelType.addr, LabelType.tx]:
+            expected = {
+                label.ref
+                for label in labels.data.values()
+                if label.category == category and (not filter_type or label.type == filter_type)
+            }
+            assert labels.get_refs_of_category(category, filter_type=filter_type) == expected
+            assert labels.count_labels_of_category(category, filter_type=filter_type) == len(expected)
+
+    assert labels.count_address_labels() == sum(1 for label in labels.data.values() if label.label)
+    for exclude_automatic in [True, False]:
+        assert labels.timestamp_range(exclude_automatic=exclude_automatic) == Labels.get_timestamp_range(
+            labels.data.values(), exclude_automatic=exclude_automatic
+        )
+
+
+def test_label_indexes_follow_mutations():
+    """Every kind of label change keeps the category, type and timestamp indexes up to date."""
+    labels = Labels()
+    labels.set_addr_label("a", "one", timestamp=100.0)
+    labels.set_addr_category("a", "KYC", timestamp=200.0)
+    labels.set_addr_category("b", "KYC", timestamp="old")
+    labels.set_tx_label("t", "tx", timestamp=300.0)
+    labels.set_tx_category("t", "Private")
+    assert_indexes_match_data(labels)
+    assert labels.get_refs_of_category("KYC", filter_type=LabelType.addr) == {"a", "b"}
+    assert labels.timestamp_range() == (200.0, labels.get_timestamp("t"))
+
+    labels.set_addr_label("b", "two")
+    labels.set_addr_category("a", None)
+    assert_indexes_match_data(labels)
+
+    labels.rename_category("KYC", "Exchange")
+    labels.delete_category("Private")
+    assert_indexes_match_data(labels)
+    assert labels.count_labels_of_category("KYC") == 0
+
+    labels.import_labels(
+        [
+            Label(LabelType.addr, "c", timestamp=50.0, category="Exchange"),
+            Label(LabelType.tx, "t", timestamp="now", label="new"),
+        ],
+        force_overwrite=True,
+    )
+    assert "Exchange" in labels.categories
+    labels.del_item("a")
+    assert_indexes_match_data(labels)
+
+    assert_indexes_match_data(Labels.from_dump(labels.dump()))
+
+
+def test_label_files_are_streamed_in_batches(tmp_path):
+    """The file import merges in batches like the in-memory import, and the export writes the same lines."""
+    labels = Labels()
+    for i in range(25):
+        labels.set_addr_label(f"a{i}", f"label {i}", timestamp=1000.0 + i)
+        labels.set_addr_category(f"a{i}", f"category {i % 3}", timestamp=1000.0 + i)
+
+    bip329_file = tmp_path / "bip329.jsonl"
+    progress: list[tuple[int, int]] = []
+    assert labels.export_bip329_file(str(bip329_file), progress=lambda *args: progress.append(args)) == 25
+    assert clean_lines(bip329_file.read_text().splitlines()) == labels.export_bip329_jsonlines().splitlines()
+    assert progress[-1] == (25, 25)
+
+    dumps_file = tmp_path / "dumps.jsonl"
+    labels.export_dumps_data_file(str(dumps_file), refs=["a1", "a3", "missing"])
+    assert clean_lines(dumps_file.read_text().splitlines()) == labels.dumps_data_jsonline_list(
+        refs={"a1", "a3"}
+    )
+
+    streamed = Labels()
+    progress = []
+    changed = streamed.import_bip329_file(
+        str(bip329_file), batch_size=4, progress=lambda *args: progress.append(args)
+    )
+    in_memory = Labels()
+    in_memory.import_bip329_jsonlines(labels.export_bip329_jsonlines())
+
+    assert set(changed) == set(labels.data)
+    assert streamed.export_bip329_jsonlines() == in_memory.export_bip329_jsonlines()
+    assert streamed.categories == in_memory.categories
+    assert len(progress) == 7
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+    assert progress[-1] == (bip329_file.stat().st_size, bip329_file.stat().st_size)
+    assert len(streamed.get_snapshots()) == 1
+
+    streamed.import_dumps_data_file(str(dumps_file), force_overwrite=True, batch_size=1)
+    assert streamed.get_timestamp("a1") > labels.get_timestamp("a1")
+
+
+def test_running_timestamp_range_matches_a_full_scan():
+    """Random adds, replacements and removals keep min and max exact."""
+    rng = random.Random(0)
+    timestamp_range = RunningTimestampRange()
+    timestamps: dict[str, float] = {}
+    for _ in range(5000):
+        ref = f"r{rng.randrange(200)}"
+        if rng.random() < 0.3:
+            timestamp_range.remove(ref)
+            timestamps.pop(ref, None)
+        else:
+            timestamp_range.remove(ref)
+            timestamps[ref] = float(rng.randrange(1000))
+            timestamp_range.add(ref, timestamps[ref])
+        assert timestamp_range.min() == min(timestamps.values(), default=None)
+        assert timestamp_range.max() == max(timestamps.values(), default=None)
+
+
+def test_import_labels_tiebreak_prefers_the_older_label_set():
+    """On equal timestamps, the side whose earliest (non-automatic) label is older wins."""
+    for my_earliest, other_earliest, expected in [(100.0, 200.0, "mine"), (300.0, 200.0, "other")]:
+        labels = Labels()
+        labels.set_addr_label("first", "mine", timestamp=my_earliest)
+        labels.set_addr_label("a", "mine", timestamp=500.0)
+        labels.set_addr_label("auto", "mine", timestamp="old")
+
+        changed = labels.import_labels(
+            [
+                Label(LabelType.addr, "a", timestamp=500.0, label="other"),
+                Label(LabelType.addr, "b", timestamp=other_earliest, label="other"),
+            ]
+        )
+        assert labels.get_label("a") == expected
+        assert set(changed) == ({"b"} if expected == "mine" else {"a", "b"})
+        assert_indexes_match_data(labels)
+
+
+def test_labels_in_journal(tmp_path):
+    """In journal mode only the changed labels are appended and the wallet file omits them."""
+    filename = tmp_path / "test.wallet"
+    persistence = SerializePersistence()
+    labels = Labels()
+    labels.set_addr_label("a", "one")
+    labels.set_addr_label("b", "two")
+
+    def save() -> tuple[dict, dict]:
+        """Save the way QTWallet.save_to does in journal mode."""
+        persistence.save_to_journal(str(filename), labels=labels)
+        with persistence.change_set_in_journal(), labels.data_in_journal():
+            return persistence.dump(), labels.dump()
+
+    save()
+    labels.set_addr_label("b", "changed")
+    labels.del_item("a")
+    labels.set_addr_category("c", "category 0")
+    persistence_dump, labels_dump = save()
+    assert labels_dump["data"] == {}
+    assert not save()[1]["data"]
+
+    records = Journal(Journal.path_for(filename)).read(persistence_dump["journal_id"])
+    assert [record["type"] for record in records] == ["snapshot", "delta"]
+    assert set(records[0]["labels"]["data"]) == {"a", "b"}
+    assert records[1]["labels"]["data"]["a"] is None
+    assert set(records[1]["labels"]["data"]) == {"a", "b", "c"}
+
+    loaded_persistence = SerializePersistence.from_dump(
+        {**persistence_dump, "journal_filename": Journal.path_for(filename)}
+    )
+    loaded = Labels.from_dump(labels_dump)
+    assert loaded.missing_journal_data
+    journal_labels = loaded_persistence.pop_journal_labels()
+    assert journal_labels is not None
+    loaded.load_journal_state(journal_labels)
+    assert not loaded.missing_journal_data
+    assert loaded.dumps_data_jsonline_list() == labels.dumps_data_jsonline_list()
+    assert loaded.get_refs_of_category("category 0") == {"c"}
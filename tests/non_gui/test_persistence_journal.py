@@ -0,0 +1,242 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import bdkpython as bdk
+import pytest
+
+from bitcoin_safe.persister import serialize_persistence as serialize_persistence_module
+from bitcoin_safe.persister.changeset_converter import ChangeSetConverter
+from bitcoin_safe.persister.serialize_persistence import ChangeSetEncoding, SerializePersistence
+from bitcoin_safe.storage import Journal, JournalError
+from bitcoin_safe.util import fast_version
+
+from .test_offline_custom_persist import change_descriptor, descriptor, initial_txs
+
+
+def _create_wallet(persistence: SerializePersistence) -> tuple[bdk.Wallet, bdk.Persister]:
+    """Create wallet."""
+    persister = bdk.Persister.custom(persistence)
+    wallet = bdk.Wallet(descriptor, change_descriptor, bdk.Network.REGTEST, persister)
+    wallet.persist(persister=persister)
+    return wallet, persister
+
+
+def _save(persistence: SerializePersistence, filename: Path, password: str | None) -> dict:
+    """Save the way QTWallet.save_to does in journal mode."""
+    persistence.save_to_journal(str(filename), password=password)
+    with persistence.change_set_in_journal():
+        dump = persistence.dump()
+    filename.write_text(json.dumps(dump))
+    return dump
+
+
+def _load(filename: Path, password: str | None) -> SerializePersistence:
+    """Load."""
+    dct = json.loads(filename.read_text())
+    dct["journal_filename"] = Journal.path_for(filename)
+    dct["password"] = password
+    return SerializePersistence.from_dump(dct)
+
+
+@pytest.mark.parametrize("password", [None, "some password"])
+def test_journal_roundtrip(tmp_path: Path, password: str | None):
+    """Test journal roundtrip."""
+    filename = tmp_path / "test.wallet"
+    persistence = SerializePersistence()
+    wallet, persister = _create_wallet(persistence)
+
+    dump = _save(persistence, filename, password)
+    assert dump["change_set"] == SerializePersistence.CHANGE_SET_NOT_EMBEDDED
+    assert dump["journal_id"]
+    # versions without journal support must fail instead of loading an empty history
+    with pytest.raises(AttributeError):
+        ChangeSetConverter.from_dict(dump["change_set"])
+
+    # each save only appends the new changesets
+    for tx in initial_txs:
+        wallet.apply_unconfirmed_txs([bdk.UnconfirmedTx(tx=bdk.Transaction(bytes.fromhex(tx)), last_seen=0)])
+        wallet.persist(persister=persister)
+        _save(persistence, filename, password)
+
+    journal = Journal(Journal.path_for(filename), password=password)
+    records = journal.read(dump["journal_id"])
+    assert [record["type"] for record in records] == ["snapshot", "delta", "delta"]
+
+    loaded = _load(filename, password)
+    assert ChangeSetConverter.to_dict(loaded.change_set) == ChangeSetConverter.to_dict(persistence.change_set)
+
+    wallet2 = bdk.Wallet.load(
+        descriptor=descriptor,
+        change_descriptor=change_descriptor,
+        persister=bdk.Persister.custom(loaded),
+    )
+    assert len(wallet2.transactions()) == len(initial_txs)
+
+    # a normal dump embeds the change_set again
+    assert persistence.dump()["change_set"] == ChangeSetConverter.to_dict(persistence.change_set)
+
+
+def test_journal_compaction(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Test journal compaction."""
+    monkeypatch.setattr(serialize_persistence_module, "JOURNAL_COMPACT_AFTER_RECORDS", 1)
+    filename = tmp_path / "test.wallet"
+    persistence = SerializePersistence()
+    wallet, persister = _create_wallet(persistence)
+    dump = _save(persistence, filename, None)
+
+    for tx in initial_txs:
+        wallet.apply_unconfirmed_txs([bdk.UnconfirmedTx(tx=bdk.Transaction(bytes.fromhex(tx)), last_seen=0)])
+        wallet.persist(persister=persister)
+        _save(persistence, filename, None)
+
+    records = Journal(Journal.path_for(filename)).read(dump["journal_id"])
+    assert [record["type"] for record in records] == ["snapshot"]
+
+    loaded = _load(filename, None)
+    assert ChangeSetConverter.to_dict(loaded.change_set) == ChangeSetConverter.to_dict(persistence.change_set)
+
+
+def test_journal_ignores_truncated_last_line(tmp_path: Path):
+    """Test journal ignores truncated last line."""
+    journal = Journal(str(tmp_path / "test.journal"))
+    journal.append("id", [{"a": 1}, {"b": 2}])
+    with open(journal.filename, "ab") as f:
+        f.write(b'{"c":')
+
+    assert journal.read("id") == [{"a": 1}, {"b": 2}]
+
+    with pytest.raises(JournalError):
+        journal.read("other id")
+
+
+@pytest.mark.parametrize("encoding", list(ChangeSetEncoding))
+@pytest.mark.parametrize("journal_mode", [False, True])
+def test_deferred_tx_graph(tmp_path: Path, journal_mode: bool, encoding: ChangeSetEncoding):
+    """Test deferred tx graph."""
+    filename = tmp_path / "test.wallet"
+    persistence = SerializePersistence(change_set_encoding=encoding)
+    wallet, persister = _create_wallet(persistence)
+    for tx in initial_txs:
+        wallet.apply_unconfirmed_txs([bdk.UnconfirmedTx(tx=bdk.Transaction(bytes.fromhex(tx)), last_seen=0)])
+        wallet.persist(persister=persister)
+    if journal_mode:
+        _save(persistence, filename, None)
+    else:
+        filename.write_text(json.dumps(persistence.dump()))
+
+    dct = json.loads(filename.read_text())
+    dct["journal_filename"] = Journal.path_for(filename)
+    dct["defer_tx_graph"] = True
+    loaded = SerializePersistence.from_dump(dct)
+    assert loaded.has_deferred_tx_graph()
+
+    # the wallet can be loaded and used before the tx_graph is merged
+    loaded_persister = bdk.Persister.custom(loaded)
+    wallet2 = bdk.Wallet.load(
+        descriptor=descriptor, change_descriptor=change_descriptor, persister=loaded_persister
+    )
+    assert not wallet2.transactions()
+    wallet2.reveal_addresses_to(keychain=bdk.KeychainKind.EXTERNAL, index=30)
+    wallet2.persist(persister=loaded_persister)
+
+    assert loaded.load_deferred_tx_graph()
+    assert not loaded.has_deferred_tx_graph()
+    wallet3 = bdk.Wallet.load(
+        descriptor=descriptor, change_descriptor=change_descriptor, persister=bdk.Persister.custom(loaded)
+    )
+    assert len(wallet3.transactions()) == len(initial_txs)
+    assert wallet3.derivation_index(bdk.KeychainKind.EXTERNAL) == 30
+    assert (
+        ChangeSetConverter.to_dict(loaded.change_set)["tx_graph"]
+        == ChangeSetConverter.to_dict(persistence.change_set)["tx_graph"]
+    )
+
+
+@pytest.mark.parametrize("encoding", list(ChangeSetEncoding))
+@pytest.mark.parametrize("journal_mode", [False, True])
+def test_save_with_deferred_tx_graph(tmp_path: Path, journal_mode: bool, encoding: ChangeSetEncoding):
+    """Saving before the deferred tx_graph is merged stores it without deserializing
+    it."""
+    filename = tmp_path / "test.wallet"
+    persistence = SerializePersistence(change_set_encoding=encoding)
+    wallet, persister = _create_wallet(persistence)
+    for tx in initial_txs:
+        wallet.apply_unconfirmed_txs([bdk.UnconfirmedTx(tx=bdk.Transaction(bytes.fromhex(tx)), last_seen=0)])
+        wallet.persist(persister=persister)
+    filename.write_text(json.dumps(persistence.dump()))
+    expected_tx_graph = ChangeSetConverter.to_dict(persistence.change_set)["tx_graph"]
+
+    dct = json.loads(filename.read_text())
+    dct["defer_tx_graph"] = True
+    loaded = SerializePersistence.from_dump(dct)
+    assert loaded.has_deferred_tx_graph()
+    loaded_persister = bdk.Persister.custom(loaded)
+    wallet2 = bdk.Wallet.load(
+        descriptor=descriptor, change_descriptor=change_descriptor, persister=loaded_persister
+    )
+    wallet2.reveal_addresses_to(keychain=bdk.KeychainKind.EXTERNAL, index=30)
+    wallet2.persist(persister=loaded_persister)
+
+    if journal_mode:
+        _save(loaded, filename, None)
+    else:
+        filename.write_text(json.dumps(loaded.dump()))
+    assert loaded.has_deferred_tx_graph()
+
+    for defer_tx_graph in [False, True]:
+        dct = json.loads(filename.read_text())
+        dct["journal_filename"] = Journal.path_for(filename)
+        dct["defer_tx_graph"] = defer_tx_graph
+        reloaded = SerializePersistence.from_dump(dct)
+        assert reloaded.has_deferred_tx_graph() == defer_tx_graph
+        reloaded.load_deferred_tx_graph()
+        assert ChangeSetConverter.to_dict(reloaded.change_set)["tx_graph"] == expected_tx_graph
+        wallet3 = bdk.Wallet.load(
+            descriptor=descriptor,
+            change_descriptor=change_descriptor,
+            persister=bdk.Persister.custom(reloaded),
+        )
+        assert len(wallet3.transactions()) == len(initial_txs)
+        assert wallet3.derivation_index(bdk.KeychainKind.EXTERNAL) == 30
+
+
+def test_newer_minor_version_is_refused():
+    """A dump of a newer minor version may store the change_set elsewhere and is refused."""
+    dump = SerializePersistence().dump()
+    major, minor, _ = fast_version(SerializePersistence.VERSION).release
+    dump["VERSION"] = f"{major}.{minor}.99"
+    SerializePersistence.from_dump(dict(dump))
+
+    dump["VERSION"] = f"{major}.{minor + 1}.0"
+    with pytest.raises(ValueError):
+        SerializePersistence.from_dump(dict(dump))
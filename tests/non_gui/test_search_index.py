@@ -0,0 +1,111 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import bdkpython as bdk
+
+from bitcoin_safe.config import UserConfig
+from bitcoin_safe.search_index import SubstringIndex, WalletSearchIndex
+from bitcoin_safe.signals import UpdateFilter, UpdateFilterReason
+from bitcoin_safe.wallet import Wallet
+
+from .utils import create_multisig_protowallet
+
+
+def test_substring_index() -> None:
+    """Every key whose text contains the query is found once."""
+    index = SubstringIndex()
+    index.set("a", "abcabc")
+    index.set("b", "xyz")
+    index.set("c", "zab")
+
+    assert index.search("ab") == ["a", "c"]
+    assert index.search("ab", limit=1) == ["a"]
+    assert index.search("cz") == []  # texts are not joined to each other
+    assert index.search("") == ["a", "b", "c"]
+
+    index.set("b", "abx")
+    index.remove("a")
+    index.set("c", "")
+    assert index.search("ab") == ["b"]
+    assert "c" not in index
+
+
+def test_substring_index_many_changes() -> None:
+    """Changed texts are found by their new text only, also after segments are merged."""
+    index = SubstringIndex()
+    index.replace((f"k{i}", f"text{i}") for i in range(100))
+    for generation in range(5):
+        for i in range(0, 100, 3):
+            index.set(f"k{i}", f"changed{generation}-{i}")
+        index.remove("k1")
+        assert index.search("changed") == [f"k{i}" for i in range(0, 100, 3)]
+        assert index.search(f"changed{generation}-") == [f"k{i}" for i in range(0, 100, 3)]
+        assert index.search("text0") == []
+        assert sorted(index.search("text")) == sorted(f"k{i}" for i in range(2, 100) if i % 3)
+    assert len(index._segments) <= 2
+
+
+def test_substring_index_ignore_case() -> None:
+    """Case insensitive matching, returning the original text."""
+    index = SubstringIndex(ignore_case=True)
+    index.set("tx", "Rent September")
+    assert index.search("rent sep") == ["tx"]
+    assert index.get("tx") == "Rent September"
+
+
+def test_wallet_search_index_follows_updates() -> None:
+    """Revealed addresses and label edits reach the index without a rebuild."""
+    protowallet = create_multisig_protowallet(
+        threshold=1,
+        signers=1,
+        key_origins=["m/41h/1h/0h/2h"],
+        wallet_id="test",
+        network=bdk.Network.REGTEST,
+    )
+    config = UserConfig()
+    config.network = bdk.Network.REGTEST
+    wallet = Wallet.from_protowallet(protowallet=protowallet, config=config)
+
+    search_index = WalletSearchIndex(wallet)
+    search_index.ensure_built()
+
+    address = str(wallet.get_force_new_address(is_change=False).address)
+    wallet.labels.set_addr_label(address, "Coffee shop")
+    search_index.update_with_filter(
+        UpdateFilter(addresses=[address], reason=UpdateFilterReason.NewAddressRevealed)
+    )
+    search_index.ensure_built()
+
+    assert search_index.addresses.search(address[-10:]) == [address]
+    assert search_index.address_labels.search("coffee") == [address]
+
+    search_index.update_with_filter(UpdateFilter(refresh_all=True))
+    search_index.ensure_built()
+    assert search_index.address_labels.search("coffee") == [address]
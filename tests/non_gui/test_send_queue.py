@@ -0,0 +1,112 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import threading
+import zlib
+from collections.abc import Callable
+
+from bitcoin_safe.plugin_framework.plugins.chat_sync.send_queue import SendQueue
+
+
+class StandInRelay:
+    """Acknowledges published events after a delay, like a relay would."""
+
+    def __init__(self, latency: float = 0.02, reject: bytes | None = None) -> None:
+        """Initialize instance."""
+        self.latency = latency
+        self.reject = reject
+        self.events: list[bytes] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def publish(self, event: bytes, on_done: Callable[[bool], None]) -> None:
+        """Publish."""
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        def acknowledge() -> None:
+            """Acknowledge."""
+            with self.lock:
+                self.in_flight -= 1
+                accepted = event != self.reject
+                if accepted:
+                    self.events.append(event)
+            on_done(accepted)
+
+        threading.Timer(self.latency, acknowledge).start()
+
+
+def test_send_queue_publishes_with_bounded_concurrency():
+    """All chunks are prepared on the pool and arrive, never more than max_in_flight at a time."""
+    relay = StandInRelay(reject=zlib.compress(b"chunk 3"))
+    queue: SendQueue[str, bytes] = SendQueue(
+        prepare=lambda chunk: zlib.compress(chunk.encode()),
+        publish=relay.publish,
+        max_workers=4,
+        max_in_flight=3,
+        max_prepared=5,
+    )
+    chunks = [f"chunk {i}" for i in range(30)]
+    for chunk in chunks:
+        queue.submit(chunk)
+    assert queue.metrics().depth > 0
+
+    assert queue.wait_idle(timeout=10)
+    metrics = queue.metrics()
+    assert (metrics.sent, metrics.failed, metrics.depth) == (29, 1, 0)
+    assert metrics.throughput > 0
+    assert relay.max_in_flight <= 3
+    assert sorted(zlib.decompress(event).decode() for event in relay.events) == sorted(
+        set(chunks) - {"chunk 3"}
+    )
+    queue.close()
+
+
+def test_send_queue_counts_failed_preparations():
+    """An item that cannot be prepared is counted as failed and does not block the queue."""
+    relay = StandInRelay(latency=0)
+
+    def prepare(chunk: str) -> bytes:
+        """Prepare."""
+        if chunk == "bad":
+            raise ValueError(chunk)
+        return chunk.encode()
+
+    queue: SendQueue[str, bytes] = SendQueue(prepare=prepare, publish=relay.publish)
+    for chunk in ["a", "bad", "b"]:
+        queue.submit(chunk)
+
+    assert queue.wait_idle(timeout=10)
+    assert (queue.metrics().sent, queue.metrics().failed) == (2, 1)
+    queue.close()
+    queue.submit("after close")
+    assert queue.metrics().waiting == 0
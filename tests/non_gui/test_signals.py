@@ -0,0 +1,129 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from pytestqt.qtbot import QtBot
+
+from bitcoin_safe.signals import (
+    UpdateFilter,
+    UpdateFilterCoalescer,
+    UpdateFilterReason,
+    WalletSignals,
+)
+
+
+def test_coalescer_merges_same_reason() -> None:
+    """Filters with the same reason are unioned, different reasons stay separate and ordered."""
+    coalescer = UpdateFilterCoalescer()
+    assert not coalescer
+
+    first = UpdateFilter(addresses=["a"], reason=UpdateFilterReason.UserInput)
+    coalescer.add(first)
+    coalescer.add(UpdateFilter(categories=["c"], reason=UpdateFilterReason.CategoryChange))
+    coalescer.add(UpdateFilter(addresses=["b"], txids=["t"], reason=UpdateFilterReason.UserInput))
+    assert coalescer
+
+    merged = coalescer.take()
+    assert [f.reason for f in merged] == [UpdateFilterReason.UserInput, UpdateFilterReason.CategoryChange]
+    assert merged[0].addresses == {"a", "b"}
+    assert merged[0].txids == {"t"}
+    assert merged[1].categories == {"c"}
+    # the emitted filter instance is not modified
+    assert first.addresses == {"a"}
+    assert not coalescer
+    assert coalescer.take() == []
+
+
+def test_coalescer_transaction_deltas_stay_deltas() -> None:
+    """Merged transaction deltas are still deltas."""
+    coalescer = UpdateFilterCoalescer()
+    for txid in ["t1", "t2"]:
+        coalescer.add(UpdateFilter(txids=[txid], reason=UpdateFilterReason.TransactionChange))
+
+    (merged,) = coalescer.take()
+    assert merged.is_transaction_delta()
+    assert merged.txids == {"t1", "t2"}
+    assert not merged.refresh_all
+    # a refresh of everything is not a delta, even with txids
+    assert not UpdateFilter(
+        txids=["t1"], refresh_all=True, reason=UpdateFilterReason.TransactionChange
+    ).is_transaction_delta()
+
+
+def test_coalescer_full_refresh_keeps_order() -> None:
+    """Filters pending before a full refresh are emitted first, later ones are absorbed by it."""
+    coalescer = UpdateFilterCoalescer()
+    coalescer.add(UpdateFilter(addresses=["a"], reason=UpdateFilterReason.UserInput))
+    coalescer.add(UpdateFilter(txids=["t"], reason=UpdateFilterReason.TransactionChange))
+    full_refresh = UpdateFilter(refresh_all=True, reason=UpdateFilterReason.ForceRefresh)
+    coalescer.add(full_refresh)
+    coalescer.add(UpdateFilter(categories=["c"], reason=UpdateFilterReason.CategoryChange))
+    coalescer.add(UpdateFilter(addresses=["b"], reason=UpdateFilterReason.UserInput))
+
+    merged = coalescer.take()
+    assert [f.reason for f in merged] == [
+        UpdateFilterReason.UserInput,
+        UpdateFilterReason.TransactionChange,
+        UpdateFilterReason.ForceRefresh,
+    ]
+    assert merged[0].addresses == {"a"}
+    assert merged[1].is_transaction_delta()
+    assert merged[2].is_full_refresh()
+    assert merged[2].categories == {"c"}
+    assert merged[2].addresses == {"b"}
+    # the emitted filter instance is not modified
+    assert not full_refresh.categories
+
+
+def test_wallet_signals_updated_coalesced(qtbot: QtBot) -> None:
+    """Many updates emitted at once reach updated_coalesced merged, in the next frame."""
+    wallet_signals = WalletSignals()
+    immediate: list[UpdateFilter] = []
+    coalesced: list[UpdateFilter] = []
+    wallet_signals.updated.connect(immediate.append)
+    wallet_signals.updated_coalesced.connect(coalesced.append)
+
+    for i in range(50):
+        wallet_signals.updated.emit(UpdateFilter(addresses=[f"a{i}"], reason=UpdateFilterReason.UserImport))
+    assert len(immediate) == 50
+    assert coalesced == []
+
+    qtbot.waitUntil(lambda: len(coalesced) > 0, timeout=1000)
+    qtbot.wait(2 * wallet_signals.coalesce_interval_ms)
+    assert len(coalesced) == 1
+    assert coalesced[0].addresses == {f"a{i}" for i in range(50)}
+
+    # connect_coalescing is idempotent and restores the connection after a disconnect
+    wallet_signals.connect_coalescing()
+    wallet_signals.updated.disconnect(wallet_signals._queue_coalesced_update)
+    wallet_signals.connect_coalescing()
+    wallet_signals.updated.emit(UpdateFilter(refresh_all=True))
+    wallet_signals.flush_coalesced_updates()
+    assert len(coalesced) == 2
+    assert coalesced[1].refresh_all
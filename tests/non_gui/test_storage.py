@@ -0,0 +1,312 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import threading
+from pathlib import Path
+
+import pytest
+from cryptography.fernet import InvalidToken
+
+from bitcoin_safe.storage import (
+    BackgroundSaver,
+    BaseSaveableClass,
+    ClassSerializer,
+    DerivedKeyCache,
+    Encrypt,
+    Storage,
+    background_saver,
+    derived_key_cache,
+)
+
+
+@pytest.mark.parametrize("password", [None, "pw"])
+def test_storage_save_replaces_file(tmp_path: Path, password: str | None):
+    """Test storage save replaces file."""
+    filename = str(tmp_path / "wallet")
+    storage = Storage()
+    storage.save("old", filename, password=password)
+    storage.save("new", filename, password=password)
+
+    assert storage.load(filename, password=password) == "new"
+    assert [p.name for p in tmp_path.iterdir()] == ["wallet"]
+
+
+def test_background_saver_coalesces(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Saves that are requested while a file is written are coalesced into one
+    write."""
+    written: list[tuple[str, str]] = []
+    release = threading.Event()
+    original_save = Storage.save
+
+    def save(self: Storage, message: str, filename: str, password: str | None = None) -> None:
+        """Save."""
+        release.wait()
+        written.append((Path(filename).name, message))
+        original_save(self, message, filename, password=password)
+
+    monkeypatch.setattr(Storage, "save", save)
+    saver = BackgroundSaver()
+    for i in range(5):
+        saver.save(f"a{i}", tmp_path / "a")
+    saver.save("b0", tmp_path / "b", password="pw")
+    saver.save("a5", tmp_path / "a")
+
+    assert saver.is_pending(tmp_path / "a")
+    assert not saver.wait(timeout=0.05)
+    release.set()
+    assert saver.wait(timeout=10)
+    assert not saver.is_pending()
+
+    # at most one early version of a was being written, while the others were coalesced
+    assert len(written) <= 3
+    assert written[-2:] == [("b", "b0"), ("a", "a5")]
+    assert Storage().load(str(tmp_path / "a")) == "a5"
+    assert Storage().load(str(tmp_path / "b"), password="pw") == "b0"
+
+
+def test_background_saver_reports_failures(tmp_path: Path):
+    """A failed write is passed to on_error and kept until the file is written."""
+    errors: list[tuple[str, Exception]] = []
+    saver = BackgroundSaver()
+    # the parent of the file does not exist
+    filename = tmp_path / "missing" / "wallet"
+    saver.save("content", filename, on_error=lambda f, e: errors.append((f, e)))
+    assert saver.wait(timeout=10)
+    assert [f for f, _ in errors] == [str(filename)]
+    assert saver.failure(filename) is errors[0][1]
+
+    filename.parent.mkdir()
+    saver.save("content", filename, on_error=lambda f, e: errors.append((f, e)))
+    assert saver.wait(timeout=10)
+    assert len(errors) == 1
+    assert saver.failure(filename) is None
+
+
+def test_load_returns_unsaved_content(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """has_password and load answer from a pending background save without waiting for it."""
+    release = threading.Event()
+    original_save = Storage.save
+
+    def save(self: Storage, message: str, filename: str, password: str | None = None) -> None:
+        """Save."""
+        release.wait()
+        original_save(self, message, filename, password=password)
+
+    monkeypatch.setattr(Storage, "save", save)
+    filename = tmp_path / "wallet"
+    for i in range(10):
+        background_saver.save(f"content {i}", filename, password="pw")
+    assert Storage.has_password(str(filename))
+    assert Storage().load(str(filename), password="pw") == "content 9"
+    assert background_saver.is_pending(filename)
+
+    release.set()
+    with pytest.raises(InvalidToken):
+        Storage().load(str(filename), password="wrong")
+    assert Storage().load(str(filename), password="pw") == "content 9"
+    # the temporary files are replaced or removed
+    assert [path.name for path in tmp_path.iterdir()] == ["wallet"]
+
+
+def test_failed_save_removes_the_temporary_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """A write that fails midway leaves the old file and no temporary file."""
+    filename = tmp_path / "wallet"
+    Storage().save("old", str(filename))
+
+    def fail(*args, **kwargs):
+        """Fail."""
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "fsync", fail)
+    with pytest.raises(OSError):
+        Storage().save("new", str(filename))
+    assert [path.name for path in tmp_path.iterdir()] == ["wallet"]
+    assert Storage().load(str(filename)) == "old"
+
+
+def test_derived_key_is_cached_during_session(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Test derived key is cached during session."""
+    derivations: list[bytes] = []
+    original_derive_key = Encrypt._derive_key
+
+    def derive_key(self: Encrypt, password: bytes, salt: bytes, iterations: int) -> bytes:
+        """Derive key."""
+        derivations.append(salt)
+        return original_derive_key(self, password, salt, iterations)
+
+    monkeypatch.setattr(Encrypt, "_derive_key", derive_key)
+    filename = str(tmp_path / "wallet")
+    storage = Storage()
+
+    # without a session nothing is cached
+    storage.save("a", filename, password="pw")
+    assert storage.load(filename, password="pw") == "a"
+    assert len(derivations) == 2
+
+    derived_key_cache.open_session(filename)
+    try:
+        assert storage.load(filename, password="pw") == "a"
+        for i in range(5):
+            storage.save(f"b{i}", filename, password="pw")
+        assert storage.load(filename, password="pw") == "b4"
+        assert len(derivations) == 3
+
+        # a different password is never served from the cache
+        with pytest.raises(InvalidToken):
+            storage.load(filename, password="wrong")
+        assert len(derivations) == 4
+        storage.save("c", filename, password="new pw")
+        assert storage.load(filename, password="new pw") == "c"
+        assert len(derivations) == 5
+    finally:
+        derived_key_cache.close_session(filename)
+
+    assert derived_key_cache.get(filename, b"new pw", 100_000) is None
+    assert storage.load(filename, password="new pw") == "c"
+    assert len(derivations) == 6
+
+
+def test_derived_key_cache_wipes_entries(tmp_path: Path):
+    """Replaced and closed entries have their key and password digest overwritten with zeros."""
+    filename = str(tmp_path / "wallet")
+    cache = DerivedKeyCache()
+    cache.open_session(filename)
+    cache.put(filename, b"pw", 1, salt=b"salt 1", key=b"key 1")
+    first = cache._keys[os.path.abspath(filename)]
+    cache.put(filename, b"pw", 1, salt=b"salt 2", key=b"key 2")
+    second = cache._keys[os.path.abspath(filename)]
+    assert cache.get(filename, b"pw", 1) == (b"salt 2", b"key 2")
+    cache.close_session(filename)
+
+    for entry in [first, second]:
+        assert not any(entry.key)
+        assert not any(entry.password_digest)
+    assert cache.get(filename, b"pw", 1) is None
+
+
+def test_has_password(tmp_path: Path):
+    """Test has password."""
+    storage = Storage()
+    storage.save('{"a": 1}', str(tmp_path / "plain"))
+    storage.save('{"a": 1}', str(tmp_path / "encrypted"), password="pw")
+
+    assert not Storage.has_password(str(tmp_path / "plain"))
+    assert Storage.has_password(str(tmp_path / "encrypted"))
+
+
+def test_stream_encryption(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Test stream encryption."""
+    monkeypatch.setattr(Storage, "CHUNK_CHARS", 7)
+    monkeypatch.setattr(Encrypt, "STREAM_SEGMENT_SIZE", 10)
+    filename = str(tmp_path / "wallet")
+    storage = Storage()
+    for message in ["", "0123456789", '{"label": "Bäckerei ₿ 🥐"}' * 5]:
+        storage.save(message, filename, password="pw")
+        with open(filename, "rb") as f:
+            assert Encrypt.is_stream_encrypted(f.read())
+        assert Storage.has_password(filename)
+        assert storage.load(filename, password="pw") == message
+
+    with open(filename, "rb") as f:
+        token = f.read()
+    header_size = Encrypt._stream_header.size
+    tampered = bytearray(token)
+    tampered[header_size + 3] ^= 1
+    truncated = token[: header_size + 5 * (10 + 16)]
+    for invalid in [bytes(tampered), truncated]:
+        with pytest.raises(InvalidToken):
+            list(Encrypt().stream_decrypt(io.BytesIO(invalid), "pw"))
+    with pytest.raises(InvalidToken):
+        storage.load(filename, password="wrong")
+
+
+def test_load_single_token_format(tmp_path: Path):
+    """Files written with the previous encryption format can still be read."""
+    filename = tmp_path / "wallet"
+    filename.write_bytes(Encrypt().password_encrypt(b'{"a": 1}', "pw"))
+
+    assert Storage.has_password(str(filename))
+    assert Storage().load(str(filename), password="pw") == '{"a": 1}'
+    with pytest.raises(InvalidToken):
+        Storage().load(str(filename), password="wrong")
+
+
+class _Saveable(BaseSaveableClass):
+    VERSION = "0.0.1"
+    known_classes = {
+        **BaseSaveableClass.known_classes,
+    }
+
+    def __init__(self, value, children: list[_Saveable] | None = None) -> None:
+        """Initialize instance."""
+        self.value = value
+        self.children = children if children else []
+
+    def dump(self) -> dict:
+        """Dump."""
+        d = super().dump()
+        d["value"] = self.value
+        d["children"] = self.children
+        return d
+
+    @classmethod
+    def from_dump(cls, dct: dict, class_kwargs: dict | None = None):
+        """From dump."""
+        super()._from_dump(dct, class_kwargs=class_kwargs)
+        return cls(**dct)
+
+
+def test_deserialize_parsed_json_like_object_hook(tmp_path: Path):
+    """Deserializing an already parsed file gives the same result as json.loads with the
+    object_hook."""
+    filename = tmp_path / "file"
+    _Saveable({"a": [1, {"b": 2}]}, children=[_Saveable(1), _Saveable(2)]).save(filename)
+    known_classes = {_Saveable.__name__: _Saveable}
+    class_kwargs = {_Saveable.__name__: {"value": "preloaded"}}
+
+    loaded = _Saveable._from_file(str(filename))
+    preloaded = _Saveable.preload_file(str(filename))
+    assert preloaded == json.loads(filename.read_text())
+    deserialized = ClassSerializer.deserialize(preloaded, known_classes, class_kwargs)
+    from_object_hook = json.loads(
+        filename.read_text(), object_hook=ClassSerializer.general_deserializer(known_classes, class_kwargs)
+    )
+
+    for instance in [
+        loaded,
+        _Saveable._from_file(str(filename), preloaded=_Saveable.preload_file(str(filename))),
+    ]:
+        assert instance.value == {"a": [1, {"b": 2}]}
+        assert [child.value for child in instance.children] == [1, 2]
+    assert deserialized.dumps() == from_object_hook.dumps()
+    assert deserialized.value == "preloaded"
@@ -0,0 +1,191 @@
+#
+# Bitcoin Safe
+# Copyright (C) 2024 Andreas Griffin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of version 3 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import random
+
+import bdkpython as bdk
+
+from bitcoin_safe.pythonbdk_types import FullTxDetail, FullTxDetailGraph, TransactionDetails
+from bitcoin_safe.tx_order import TxOrderIndex, TxSection, topo_sort
+
+from .test_fulltxdetail_graph import UNKNOWN_TXID, get_address_of_txout, make_tx
+
+LOCAL_TIMESTAMP = 0
+BLOCK_HASH = bdk.BlockHash.from_string("00" * 32)
+
+
+def is_local(chain_position: bdk.ChainPosition) -> bool:
+    """Is local."""
+    return (
+        isinstance(chain_position, bdk.ChainPosition.UNCONFIRMED)
+        and chain_position.timestamp == LOCAL_TIMESTAMP
+    )
+
+
+def with_position(tx: TransactionDetails, height: int | None, local=False) -> TransactionDetails:
+    """The same tx, confirmed at height, in the mempool or local."""
+    chain_position: bdk.ChainPosition
+    if height is not None:
+        chain_position = bdk.ChainPosition.CONFIRMED(
+            confirmation_block_time=bdk.ConfirmationBlockTime(
+                block_id=bdk.BlockId(height=height, hash=BLOCK_HASH), confirmation_time=height
+            ),
+            transitively=None,
+        )
+    else:
+        chain_position = bdk.ChainPosition.UNCONFIRMED(timestamp=LOCAL_TIMESTAMP if local else 1)
+    return TransactionDetails(
+        transaction=tx.transaction, fee=None, received=0, sent=0, chain_position=chain_position
+    )
+
+
+def make_random_txs(rng: random.Random, n: int) -> list[TransactionDetails]:
+    """Txs that spend outputs of earlier txs (each output at most once) or unknown outputs."""
+    txs: list[TransactionDetails] = []
+    unspent: list[tuple[str, int]] = []
+    for i in range(n):
+        inputs = [(UNKNOWN_TXID, i)]
+        for _ in range(rng.randint(0, 2)):
+            if unspent:
+                inputs.append(unspent.pop(rng.randrange(len(unspent))))
+        tx = make_tx(inputs, [(rng.randint(1, 10), 1000 + j) for j in range(rng.randint(1, 3))])
+        unspent += [(tx.txid, vout) for vout in range(len(tx.transaction.output()))]
+        txs.append(tx)
+    return txs
+
+
+def ordered_txids(index: TxOrderIndex) -> list[str]:
+    """Ordered txids."""
+    return [fx.txid for fx in index.ordered()]
+
+
+def full_rebuild(dict_fulltxdetail: dict[str, FullTxDetail]) -> TxOrderIndex:
+    """Full rebuild."""
+    index = TxOrderIndex(is_local=is_local)
+    index.update(dict_fulltxdetail, dict_fulltxdetail.keys())
+    return index
+
+
+def assert_valid_order(index: TxOrderIndex, dict_fulltxdetail: dict[str, FullTxDetail]) -> None:
+    """All txs are present, sections and heights ascend and parents come before children."""
+    ordered = index.ordered()
+    assert sorted(fx.txid for fx in ordered) == sorted(dict_fulltxdetail)
+
+    def key(fx: FullTxDetail) -> tuple[TxSection, int]:
+        """Section and height."""
+        chain_position = fx.tx.chain_position
+        if isinstance(chain_position, bdk.ChainPosition.CONFIRMED):
+            return index.section_of(fx), chain_position.confirmation_block_time.block_id.height
+        return index.section_of(fx), 0
+
+    position = {fx.txid: i for i, fx in enumerate(ordered)}
+    for fx in ordered:
+        for python_utxo in fx.inputs.values():
+            parent = dict_fulltxdetail.get(python_utxo.outpoint.txid_str) if python_utxo else None
+            if parent and key(parent) == key(fx):
+                assert position[parent.txid] < position[fx.txid]
+    keys = [key(fx) for fx in ordered]
+    assert keys == sorted(keys)
+
+
+def test_incremental_order_equals_full_rebuild() -> None:
+    """Random adds, removals and chain position changes give the same order as a full rebuild."""
+    rng = random.Random(1)
+    txs = make_random_txs(rng, 60)
+    present: dict[str, TransactionDetails] = {}
+
+    graph = FullTxDetailGraph()
+    index = TxOrderIndex(is_local=is_local)
+    for _ in range(40):
+        removed, modified, appended = [], [], []
+        for tx in rng.sample(txs, 8):
+            position = with_position(tx, rng.choice([None, None, 1, 2, 3]), local=rng.random() < 0.3)
+            if tx.txid not in present:
+                appended.append(position)
+            elif rng.random() < 0.4:
+                removed.append(present[tx.txid])
+            else:
+                modified.append(position)
+        for tx in removed:
+            del present[tx.txid]
+        for tx in modified + appended:
+            present[tx.txid] = tx
+
+        graph.remove(tx.txid for tx in removed)
+        graph.update(modified, get_address_of_txout)
+        graph.add(appended, get_address_of_txout)
+        index.update(graph.fulltxdetails, [tx.txid for tx in removed + modified + appended])
+
+        assert ordered_txids(index) == ordered_txids(full_rebuild(graph.fulltxdetails))
+        assert_valid_order(index, graph.fulltxdetails)
+
+
+def test_sections_and_initial_order() -> None:
+    """Confirmed by height, then mempool, initial txs in their given order and local txs."""
+    a, b, c, d, e = (make_tx([(UNKNOWN_TXID, i)], [(1, 1000)]) for i in range(5))
+    txs = [
+        with_position(a, None, local=True),
+        with_position(b, None, local=True),
+        with_position(c, None, local=True),
+        with_position(d, None),
+        with_position(e, 5),
+    ]
+    graph = FullTxDetailGraph()
+    graph.add(txs, get_address_of_txout)
+    index = TxOrderIndex(is_local=is_local, initial_txids=[c.txid, b.txid])
+    index.update(graph.fulltxdetails, graph.fulltxdetails.keys())
+
+    assert ordered_txids(index) == [e.txid, d.txid, c.txid, b.txid, a.txid]
+    assert [index.section_of(fx) for fx in index.ordered()] == [
+        TxSection.Confirmed,
+        TxSection.Unconfirmed,
+        TxSection.Initial,
+        TxSection.Initial,
+        TxSection.Local,
+    ]
+
+
+def test_long_unconfirmed_chain() -> None:
+    """A chain longer than the recursion limit is sorted without recursion."""
+    txs = [make_tx([(UNKNOWN_TXID, 0)], [(1, 10_000)])]
+    for _ in range(2000):
+        txs.append(make_tx([(txs[-1].txid, 0)], [(1, 10_000)]))
+    graph = FullTxDetailGraph()
+    graph.add(reversed([with_position(tx, None) for tx in txs]), get_address_of_txout)
+
+    assert [fx.txid for fx in topo_sort(list(graph.fulltxdetails.values()))] == [tx.txid for tx in txs]
+
+    index = full_rebuild(graph.fulltxdetails)
+    assert ordered_txids(index) == [tx.txid for tx in txs]
+    # confirming the first tx only moves it, the rest of the chain stays in order
+    confirmed = with_position(txs[0], 1)
+    graph.update([confirmed], get_address_of_txout)
+    index.update(graph.fulltxdetails, [confirmed.txid])
+    assert ordered_txids(index) == [tx.txid for tx in txs]
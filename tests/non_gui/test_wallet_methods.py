@@ -34,9 +34,12 @@ from bitcoin_usb.address_types import DescriptorInfo
 
 from bitcoin_safe.config import UserConfig
 from bitcoin_safe.keystore import KeyStore
+from bitcoin_safe.pythonbdk_types import FullTxDetailGraph
+from bitcoin_safe.tx_order import TxOrderIndex
 from bitcoin_safe.wallet import Wallet, WalletInputsInconsistentError
 from bitcoin_safe.wallet_util import WalletDifferenceType
 
+from .test_offline_custom_persist import initial_txs
 from .utils import create_multisig_protowallet
 
 
@@ -231,3 +234,94 @@ def test_get_mn_tuple():
     wallet = Wallet.from_protowallet(protowallet=protowallet, config=config)
 
     assert wallet.get_mn_tuple() == (2, 3)
+
+
+def make_history_test_wallet() -> Wallet:
+    """Make the wallet, that the initial_txs of test_offline_custom_persist belong to."""
+    network = bdk.Network.REGTEST
+    descriptor = "wpkh([44250c36/84'/1'/0']tpubDCrUjjHLB1fxk1oRveETjw62z8jsUuqx7JkBUW44VBszGmcY3Eun3apwVcE5X2bfF5MsM3uvuQDed6Do33ZN8GiWcnj2QPqVDspFT1AyZJ9/<0;1>/*)"
+    info = DescriptorInfo.from_str(descriptor)
+    keystore = KeyStore(
+        xpub=info.spk_providers[0].xpub,
+        fingerprint=info.spk_providers[0].fingerprint,
+        key_origin=info.spk_providers[0].key_origin,
+        label="test",
+        network=network,
+    )
+    return Wallet(
+        id="history test",
+        descriptor_str=descriptor,
+        keystores=[keystore],
+        network=network,
+        config=_make_config(),
+    )
+
+
+def test_new_tx_is_applied_to_the_history_caches(monkeypatch: pytest.MonkeyPatch):
+    """A second tx updates the FullTxDetail graph and the history order index, instead of
+    rebuilding them."""
+    wallet = make_history_test_wallet()
+    first_tx, second_tx = (bdk.Transaction(bytes.fromhex(tx)) for tx in initial_txs)
+    first_txid, second_txid = str(first_tx.compute_txid()), str(second_tx.compute_txid())
+
+    wallet.apply_unconfirmed_txs([first_tx])
+    first_fulltxdetail = wallet.get_dict_fulltxdetail()[first_txid]
+    assert [tx.txid for tx in wallet.sorted_delta_list_transactions()] == [first_txid]
+    graph = wallet.fulltxdetail_graph
+    tx_order_index = wallet.tx_order_index
+    assert tx_order_index
+
+    added_txids: list[str] = []
+    reordered_txids: list[str] = []
+    graph_add = FullTxDetailGraph.add
+    tx_order_update = TxOrderIndex.update
+
+    def recording_add(self, txs, get_address_of_txout) -> None:
+        """Recording add."""
+        txs = list(txs)
+        added_txids.extend(tx.txid for tx in txs)
+        graph_add(self, txs, get_address_of_txout)
+
+    def recording_update(self, dict_fulltxdetail, changed_txids) -> None:
+        """Recording update."""
+        changed_txids = list(changed_txids)
+        reordered_txids.extend(changed_txids)
+        tx_order_update(self, dict_fulltxdetail, changed_txids)
+
+    monkeypatch.setattr(FullTxDetailGraph, "add", recording_add)
+    monkeypatch.setattr(TxOrderIndex, "update", recording_update)
+
+    wallet.apply_unconfirmed_txs([second_tx])
+    dict_fulltxdetail = wallet.get_dict_fulltxdetail()
+    sorted_txids = {tx.txid for tx in wallet.sorted_delta_list_transactions()}
+
+    assert set(dict_fulltxdetail) == sorted_txids == {first_txid, second_txid}
+    assert wallet.fulltxdetail_graph is graph
+    assert dict_fulltxdetail[first_txid] is first_fulltxdetail
+    assert added_txids == [second_txid]
+    assert wallet.tx_order_index is tx_order_index
+    assert reordered_txids == [second_txid]
+
+    # a full clear still starts over
+    wallet.clear_cache()
+    assert wallet.fulltxdetail_graph is not graph
+    assert wallet.tx_order_index is None
+
+
+def test_label_change_resets_only_label_caches():
+    """A label edit updates the cached labels, but keeps the transaction caches."""
+    wallet = make_history_test_wallet()
+    tx = bdk.Transaction(bytes.fromhex(initial_txs[0]))
+    txid = str(tx.compute_txid())
+    wallet.apply_unconfirmed_txs([tx])
+    address = wallet.get_output_txos(txid)[0].address
+
+    assert wallet.get_label_for_txid(txid) == ""
+    dict_fulltxdetail = wallet.get_dict_fulltxdetail()
+
+    wallet.labels.set_addr_label(address, "rent")
+    assert wallet.get_label_for_txid(txid) == "rent"
+    assert wallet.get_dict_fulltxdetail() is dict_fulltxdetail
+
+    wallet.labels.set_tx_label(txid, "paid rent")
+    assert wallet.get_label_for_txid(txid) == "paid rent"
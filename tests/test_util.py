@@ -230,3 +230,45 @@ def test_calculate_ema_zero_weights():
 
     result = calculate_ema([1, 2, 3], n=3, weights=[0, 0, 0])
     assert result == 2.25
+
+
+def test_instance_lru_cache_dependencies():
+    """Test that only the methods depending on the changed dependencies are cleared."""
+    from bitcoin_safe.util import CacheManager, instance_lru_cache
+
+    class Host(CacheManager):
+        def __init__(self) -> None:
+            """Initialize instance."""
+            super().__init__()
+            self.calls: list[str] = []
+
+        @instance_lru_cache(depends_on=["txs"])
+        def txs(self) -> int:
+            """Txs."""
+            self.calls.append("txs")
+            return 1
+
+        @instance_lru_cache(depends_on=["height"])
+        def height(self) -> int:
+            """Height."""
+            self.calls.append("height")
+            return 2
+
+        @instance_lru_cache()
+        def anything(self) -> int:
+            """Anything."""
+            self.calls.append("anything")
+            return 3
+
+    host = Host()
+    host.txs(), host.height(), host.anything()
+    host.calls.clear()
+
+    host.clear_instance_cache(dependencies=["height"])
+    host.txs(), host.height(), host.anything()
+    assert host.calls == ["height", "anything"]
+
+    host.calls.clear()
+    host.clear_instance_cache()
+    host.txs(), host.height(), host.anything()
+    assert host.calls == ["txs", "height", "anything"]